@@ -28,11 +28,13 @@ import sys
 sys.path.append('/opt/python')  # Lambda layer path
 try:
     from shared.scd_config import SCDConfigManager, is_scd_type_2
+    from shared.dynamodb_access import parallel_scan, projection_arguments
 except ImportError:
     # Fallback for local development
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
     try:
         from shared.scd_config import SCDConfigManager, is_scd_type_2
+        from shared.dynamodb_access import parallel_scan, projection_arguments
     except ImportError:
         # Final fallback - define locally
         def is_scd_type_2(table_name):
@@ -45,6 +47,24 @@ except ImportError:
             }
             return default_scd_types.get(table_name, False)
 
+        def parallel_scan(scan, total_segments=1, max_workers=None, **request):
+            """Fallback sequential scan following LastEvaluatedKey"""
+            while True:
+                response = scan(**request)
+                yield from response.get('Items', [])
+                if not response.get('LastEvaluatedKey'):
+                    return
+                request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        def projection_arguments(attribute_names, expression_attribute_names=None):
+            """Fallback projection of top-level attributes through placeholders"""
+            names = dict(expression_attribute_names or {})
+            names.update({f"#p{index}": name for index, name in enumerate(attribute_names)})
+            return {
+                'ProjectionExpression': ', '.join(f"#p{index}" for index in range(len(attribute_names))),
+                'ExpressionAttributeNames': names
+            }
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -63,6 +83,7 @@ CLICKHOUSE_SECRET_NAME = os.environ.get('CLICKHOUSE_SECRET_NAME', 'clickhouse-co
 SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
 MONITOR_FULL_PIPELINE = os.environ.get('MONITOR_FULL_PIPELINE', 'true').lower() == 'true'
 CANONICAL_TABLES = os.environ.get('CANONICAL_TABLES', 'companies,contacts,tickets,time_entries').split(',')
+JOB_SCAN_SEGMENTS = int(os.environ.get('JOB_SCAN_SEGMENTS', '4'))
 
 # Table display names for alerts
 TABLE_DISPLAY_NAMES = {
@@ -117,20 +138,21 @@ def analyze_ingestion_quality(table_name: str) -> Dict[str, Any]:
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=24)
         
-        response = processing_jobs_table.scan(
+        # Scan every page of every segment; a single scan stops at 1MB of items
+        jobs = list(parallel_scan(
+            processing_jobs_table.scan,
+            total_segments=JOB_SCAN_SEGMENTS,
             FilterExpression='#table_name = :table_name AND #created_at BETWEEN :start_time AND :end_time',
-            ExpressionAttributeNames={
-                '#table_name': 'table_name',
-                '#created_at': 'created_at'
-            },
             ExpressionAttributeValues={
                 ':table_name': table_name,
                 ':start_time': start_time.isoformat(),
                 ':end_time': end_time.isoformat()
-            }
-        )
-        
-        jobs = response.get('Items', [])
+            },
+            **projection_arguments(
+                ['status', 'records_processed', 'error_count'],
+                {'#table_name': 'table_name', '#created_at': 'created_at'}
+            )
+        ))
         
         # Calculate ingestion metrics
         total_jobs = len(jobs)
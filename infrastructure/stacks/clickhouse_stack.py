@@ -27,6 +27,8 @@ from aws_cdk import (
     aws_cloudwatch as cloudwatch,
     aws_cloudwatch_actions as cw_actions,
     aws_sns as sns,
+    aws_events as events,
+    aws_events_targets as targets,
     CfnOutput
 )
 from constructs import Construct
@@ -238,6 +240,14 @@ class ClickHouseStack(Stack):
                     ],
                     resources=["*"]
                 ),
+                # CloudWatch metrics
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=[
+                        "cloudwatch:PutMetricData"
+                    ],
+                    resources=["*"]
+                ),
                 # Step Functions execution
                 iam.PolicyStatement(
                     effect=iam.Effect.ALLOW,
@@ -391,6 +401,9 @@ class ClickHouseStack(Stack):
                     "TENANT_SERVICES_TABLE": self.tenant_services_table,
                     "LAST_UPDATED_TABLE": self.last_updated_table,
                     "TARGET_TABLE": table,
+                    "CLICKHOUSE_DEDUP_STRATEGY": "deferred",
+                    "CLICKHOUSE_LOAD_MODE": "columnar",
+                    "CLICKHOUSE_LOAD_CONCURRENCY": "4",
                     "ENVIRONMENT": self.env_name
                 },
                 log_retention=logs.RetentionDays.ONE_MONTH,
@@ -429,6 +442,49 @@ class ClickHouseStack(Stack):
             layers=[clickhouse_layer, aws_pandas_layer]
         )
         
+        # Deferred merge scheduler: partition-scoped OPTIMIZE ... FINAL off the ingest path
+        lambdas["merge_scheduler"] = _lambda.Function(
+            self,
+            "ClickHouseMergeScheduler",
+            function_name=f"clickhouse-merge-scheduler-{self.env_name}",
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            handler="lambda_function.lambda_handler",
+            code=_lambda.Code.from_asset(
+                "../src",
+                bundling=BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_10.bundling_image,
+                    command=[
+                        "bash", "-c",
+                        "cp -r /asset-input/clickhouse/merge_scheduler/* /asset-output/ && "
+                        "cp -r /asset-input/shared /asset-output/"
+                    ]
+                )
+            ),
+            role=self.lambda_role,
+            timeout=Duration.seconds(900),
+            memory_size=256,
+            vpc=self.vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            security_groups=[self.security_groups["lambda"], self.security_groups["clickhouse_client"]],
+            environment={
+                "CLICKHOUSE_SECRET_NAME": self.clickhouse_secret.secret_name,
+                "MERGE_TABLES": ",".join(tables),
+                "MERGE_MAX_PARTITIONS": "20",
+                "MERGE_MAX_RUNNING_MERGES": "2",
+                "ENVIRONMENT": self.env_name
+            },
+            log_retention=logs.RetentionDays.ONE_MONTH,
+            layers=[clickhouse_layer]
+        )
+
+        merge_schedule = events.Rule(
+            self,
+            "ClickHouseMergeSchedule",
+            rule_name=f"clickhouse-merge-schedule-{self.env_name}",
+            schedule=events.Schedule.rate(Duration.minutes(30))
+        )
+        merge_schedule.add_target(targets.LambdaFunction(lambdas["merge_scheduler"]))
+        
         return lambdas
 
     def _create_orchestration_state_machine(self) -> sfn.StateMachine:
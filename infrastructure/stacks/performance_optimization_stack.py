@@ -987,7 +987,17 @@ class PerformanceOptimizationStack(Stack):
                 "tenant_config.$": "$.tenant_config",
                 "job_id.$": "$.job_id"
             }),
+            # Keep the chunk's input so a continuation can be scheduled from the result
+            result_selector={"Payload.$": "$.Payload"},
+            result_path="$.chunk_result",
             timeout=Duration.seconds(180)
+        ).add_retry(
+            # A resumed chunk whose previous invocation may still be running waits for its lease;
+            # listed first because States.TaskFailed would match it too
+            errors=["ChunkLeaseHeld"],
+            interval=Duration.seconds(60),
+            max_attempts=10,
+            backoff_rate=1.5
         ).add_retry(
             errors=["States.TaskFailed"],
             interval=Duration.seconds(30),
@@ -1006,24 +1016,39 @@ class PerformanceOptimizationStack(Stack):
             parameters={
                 "job_id.$": "$.job_id",
                 "chunk_config.$": "$.chunk_config",
+                "table_config.$": "$.table_config",
+                "tenant_config.$": "$.tenant_config",
                 "timeout_error.$": "$.timeout_error",
                 "status": "timeout_handled"
             }
         )
         
-        # Schedule Chunk Resumption - For now we'll use a Pass state
-        # TODO: Implement proper chunk resumption logic
+        # Schedule Chunk Resumption - the invocation was killed, so resume from the
+        # last checkpoint it recorded in ChunkProgress
         schedule_chunk_resumption = sfn.Pass(
             self, "ScheduleChunkResumption",
             parameters={
+                "chunk_config.$": "States.JsonMerge($.chunk_config, States.StringToJson('{\"resume\": true}'), false)",
                 "table_config.$": "$.table_config",
                 "tenant_config.$": "$.tenant_config",
-                "job_id.$": "$.job_id",
-                "resume_chunk_id.$": "$.chunk_config.chunk_id",
-                "status": "resumption_scheduled"
+                "job_id.$": "$.job_id"
             }
         )
         
+        # Continue Chunk - the invocation stopped before its timeout and checkpointed its cursor
+        continue_chunk = sfn.Pass(
+            self, "ContinueChunk",
+            parameters={
+                "chunk_config.$": "$.chunk_result.Payload.resume_chunk_config",
+                "table_config.$": "$.table_config",
+                "tenant_config.$": "$.tenant_config",
+                "job_id.$": "$.job_id"
+            }
+        )
+        
+        # Check Chunk Continuation - loop until the chunk completes or fails
+        check_chunk_continuation = sfn.Choice(self, "CheckChunkContinuation")
+        
         # Update Chunk Progress
         update_chunk_progress = sfn.Pass(
             self, "UpdateChunkProgress",
@@ -1055,7 +1080,16 @@ class PerformanceOptimizationStack(Stack):
             chunk_processing_failed,
             errors=["States.ALL"],
             result_path="$.error"
-        ).next(update_chunk_progress)
+        ).next(
+            check_chunk_continuation
+                .when(
+                    sfn.Condition.string_equals("$.chunk_result.Payload.status", "timeout_continuation"),
+                    continue_chunk
+                )
+                .otherwise(update_chunk_progress)
+        )
+        schedule_chunk_resumption.next(process_chunk)
+        continue_chunk.next(process_chunk)
         
         # Set up the map iterator
         process_chunks.iterator(process_chunk)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the pipeline Lambda handlers
+
+Imports each handler module in a fresh interpreter with `python -X importtime`
+and reports the cumulative import time, the slowest imported packages and the
+budget from cold_start_budgets.json. Exits with status 1 when any handler is
+over its budget, so it can gate CI.
+
+Usage:
+    python scripts/benchmark_cold_start.py
+    python scripts/benchmark_cold_start.py --handler chunk_processor --repeat 5 --top 15
+    python scripts/benchmark_cold_start.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+DEFAULT_BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cold_start_budgets.json')
+
+# Handler name -> module imported by the Lambda runtime
+HANDLERS = {
+    'chunk_processor': 'optimized.processors.chunk_processor',
+    'table_processor': 'optimized.processors.table_processor',
+    'orchestrator': 'optimized.orchestrator.lambda_function',
+    'result_aggregator': 'optimized.helpers.result_aggregator',
+    'completion_notifier': 'optimized.helpers.completion_notifier',
+    'error_handler': 'optimized.helpers.error_handler',
+    'canonical_transform': 'canonical_transform.lambda_function',
+    'data_loader': 'clickhouse.data_loader.lambda_function',
+}
+
+# Handlers read these at import time; no AWS call is made while importing
+HANDLER_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-2',
+    'BUCKET_NAME': 'benchmark-bucket',
+    'TENANT_SERVICES_TABLE': 'TenantServices-benchmark',
+    'LAST_UPDATED_TABLE': 'LastUpdated-benchmark',
+    'ENVIRONMENT': 'benchmark',
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str, int]]:
+    """
+    Parse `-X importtime` output.
+
+    Args:
+        stderr: Interpreter stderr
+
+    Returns:
+        List of (nesting depth, module name, cumulative microseconds) in report order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative_us)))
+    return entries
+
+
+def _import_group(module: str) -> str:
+    """Group imports by top-level package, keeping shared modules apart."""
+    parts = module.split('.')
+    return '.'.join(parts[:2]) if parts[0] == 'shared' else parts[0]
+
+
+def measure_handler(module: str) -> Tuple[int, List[Tuple[str, int]]]:
+    """
+    Import a handler module in a fresh interpreter.
+
+    Modules the interpreter imports at startup (site, encodings, ...) are
+    excluded so only the handler's own import cost is counted.
+
+    Args:
+        module: Handler module name
+
+    Returns:
+        Tuple of (total microseconds, [(package, cumulative microseconds)]) where a
+        package's time is that of its first import, including what it imported
+    """
+    startup = {name for _, name, _ in _run_importtime('pass')}
+    entries = [entry for entry in _run_importtime(f'import {module}') if entry[1] not in startup]
+    total = sum(cumulative for depth, _, cumulative in entries if depth == 0)
+
+    handler_group = _import_group(module)
+    packages: Dict[str, int] = {}
+    for _, name, cumulative in entries:
+        group = _import_group(name)
+        if group != handler_group:
+            packages[group] = max(packages.get(group, 0), cumulative)
+    return total, list(packages.items())
+
+
+def _run_importtime(code: str) -> List[Tuple[int, str, int]]:
+    """Run code in a fresh interpreter with -X importtime and parse its report."""
+    env = dict(os.environ)
+    for name, value in HANDLER_ENVIRONMENT.items():
+        env.setdefault(name, value)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        raise RuntimeError(f"Running {code!r} failed: {error}")
+    return parse_importtime(result.stderr)
+
+
+def benchmark(module: str, repeat: int) -> Dict[str, object]:
+    """
+    Measure a handler `repeat` times and keep the median run.
+
+    Args:
+        module: Handler module name
+        repeat: Number of fresh interpreters to start
+
+    Returns:
+        Dictionary with total_ms and the median run's imported packages
+    """
+    runs = sorted((measure_handler(module) for _ in range(repeat)), key=lambda run: run[0])
+    median_total = statistics.median_low([total for total, _ in runs])
+    _, top_level = next(run for run in runs if run[0] == median_total)
+    return {
+        'total_ms': round(median_total / 1000, 1),
+        'imports': sorted(((name, round(us / 1000, 1)) for name, us in top_level),
+                          key=lambda item: item[1], reverse=True)
+    }
+
+
+def load_budgets(path: str) -> Dict[str, float]:
+    """Load per-handler budgets in milliseconds (a missing file means no budgets)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Measure Lambda handler cold-start import time')
+    parser.add_argument('--handler', action='append', choices=sorted(HANDLERS),
+                        help='Handler to measure (repeatable, default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per handler (median is reported)')
+    parser.add_argument('--top', type=int, default=8, help='Slowest imported packages to list per handler')
+    parser.add_argument('--budgets', default=DEFAULT_BUDGETS_FILE, help='JSON file of handler -> budget in ms')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    budgets = load_budgets(args.budgets)
+    results = {}
+    failed = []
+    for name in args.handler or sorted(HANDLERS):
+        try:
+            result = benchmark(HANDLERS[name], max(1, args.repeat))
+        except RuntimeError as e:
+            result = {'error': str(e)}
+            failed.append(name)
+        else:
+            budget = budgets.get(name)
+            result['budget_ms'] = budget
+            result['over_budget'] = budget is not None and result['total_ms'] > budget
+            if result['over_budget']:
+                failed.append(name)
+        results[name] = result
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            if 'error' in result:
+                print(f"{name:<22} ERROR  {result['error']}")
+                continue
+            budget = f"{result['budget_ms']:.0f}ms" if result['budget_ms'] is not None else 'none'
+            status = 'OVER BUDGET' if result['over_budget'] else 'ok'
+            print(f"{name:<22} {result['total_ms']:>8.1f}ms  budget {budget:>7}  {status}")
+            for module, ms in result['imports'][:args.top]:
+                print(f"    {ms:>8.1f}ms  {module}")
+
+    if failed:
+        print(f"\nCold-start import budget exceeded or import failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
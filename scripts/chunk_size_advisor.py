@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Chunk-size advisor for the extraction pipeline
+
+Reads a table's rolling throughput from LastUpdated, as the table processor
+does, and shows the chunk size it would choose with the reasoning behind it.
+With --outcomes it also lists the recent ChunkProgress outcomes behind that
+throughput (each weighted by age); this scans the ChunkProgress table.
+
+Usage:
+    python scripts/chunk_size_advisor.py --tenant acme --table tickets
+    python scripts/chunk_size_advisor.py --tenant acme --table tickets --estimated-records 250000 --environment prod
+    python scripts/chunk_size_advisor.py --tenant acme --table tickets --outcomes
+    python scripts/chunk_size_advisor.py --tenant acme --table tickets --timeout 300 --fraction 0.6 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from shared.chunk_sizing import (  # noqa: E402
+    DEFAULT_MIN_CHUNK_SIZE,
+    advise_chunk_size,
+    get_half_life_hours,
+    load_chunk_outcomes,
+    load_throughput
+)
+
+
+def main(argv: Optional[List[str]] = None, dynamodb_client=None) -> int:
+    parser = argparse.ArgumentParser(description='Show the throughput-learned chunk size of a table')
+    parser.add_argument('--tenant', required=True, help='Tenant ID')
+    parser.add_argument('--table', required=True, help='Table name as recorded in ChunkProgress')
+    parser.add_argument('--environment', default=os.environ.get('ENVIRONMENT', 'dev'), help='Deployment environment')
+    parser.add_argument('--last-updated-table', help='LastUpdated table name (default LastUpdated-<environment>)')
+    parser.add_argument('--chunk-progress-table', help='ChunkProgress table name (default ChunkProgress-<environment>)')
+    parser.add_argument('--outcomes', action='store_true', help='List the recent ChunkProgress outcomes (scans the table)')
+    parser.add_argument('--estimated-records', type=int, help='Records the next sync is expected to extract')
+    parser.add_argument('--timeout', type=float, help='Chunk processor timeout in seconds')
+    parser.add_argument('--fraction', type=float, help='Share of the timeout a chunk should fill')
+    parser.add_argument('--half-life-hours', type=float, help='Age at which an outcome counts half')
+    parser.add_argument('--default-size', type=int, default=DEFAULT_MIN_CHUNK_SIZE * 5,
+                        help='Size used without enough history')
+    parser.add_argument('--json', action='store_true', help='Print the advice as JSON')
+    args = parser.parse_args(argv)
+
+    if dynamodb_client is None:
+        import boto3
+        dynamodb_client = boto3.client('dynamodb')
+
+    last_updated_table = args.last_updated_table or f"LastUpdated-{args.environment}"
+    progress_table = args.chunk_progress_table or f"ChunkProgress-{args.environment}"
+    half_life = args.half_life_hours or get_half_life_hours()
+    now = datetime.now(timezone.utc)
+    throughput = load_throughput(dynamodb_client, last_updated_table, args.tenant, args.table, half_life, now)
+    outcomes = []
+    if args.outcomes:
+        outcomes = sorted(load_chunk_outcomes(dynamodb_client, progress_table, args.tenant, args.table, half_life, now),
+                          key=lambda outcome: outcome.updated_at)
+    advice = advise_chunk_size(throughput, args.default_size, args.estimated_records, args.timeout, args.fraction)
+
+    if args.json:
+        print(json.dumps({
+            'tenant_id': args.tenant,
+            'table_name': args.table,
+            'outcomes': len(outcomes),
+            'throughput': throughput._asdict() if throughput else None,
+            'chunk_size': advice.chunk_size,
+            'strategy': advice.strategy,
+            'reasons': advice.reasons
+        }, indent=2))
+        return 0
+
+    samples = throughput.samples if throughput else 0
+    print(f"{args.tenant}/{args.table}: {samples} measured chunks in {last_updated_table} (half-life {half_life:g}h)")
+    if args.outcomes:
+        print(f"  {len(outcomes)} recent outcomes in {progress_table}:")
+    for outcome in outcomes:
+        age_hours = (now - outcome.updated_at).total_seconds() / 3600
+        weight = 0.5 ** (max(age_hours, 0) / half_life)
+        flag = '  timeout' if outcome.timed_out else ''
+        print(f"    {outcome.updated_at:%Y-%m-%d %H:%M}  {outcome.records:>8} records  {outcome.seconds:>7.1f}s  "
+              f"{outcome.records / outcome.seconds:>8.1f}/s  weight {weight:.2f}{flag}")
+    print(f"\nChunk size: {advice.chunk_size} records ({advice.strategy})")
+    for reason in advice.reasons:
+        print(f"  - {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,8 @@ except ImportError as e:
 # Initialize clients using shared factory
 from shared import AWSClientFactory, CanonicalMapper
 from shared.canonical_schema import CanonicalSchemaManager
+from shared.memory_usage import get_lambda_memory_limit_mb, get_memory_usage_mb, get_process
+from shared.record_hash import RecordHasher, get_hash_mode
 aws_factory = AWSClientFactory()
 clients = aws_factory.get_client_bundle(['dynamodb', 's3'])
 dynamodb = clients['dynamodb']
@@ -203,14 +205,20 @@ def check_memory_usage(logger: PipelineLogger, max_memory_mb: int = 200, context
         True if memory cleanup was triggered, False otherwise
     """
     try:
-        import psutil
-        process = psutil.Process()
+        process = get_process()
+        if process is None:
+            # psutil not available, use basic memory check
+            import resource
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            memory_mb = usage.ru_maxrss / 1024  # On Linux, ru_maxrss is in KB
+            logger.info(f"Memory usage (resource){' - ' + context if context else ''}: {memory_mb:.1f}MB")
+            return False
         memory_info = process.memory_info()
         memory_mb = memory_info.rss / 1024 / 1024
         virtual_mb = memory_info.vms / 1024 / 1024
         
         # Get Lambda specific memory limit (from environment)
-        lambda_memory_limit = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '1024'))
+        lambda_memory_limit = get_lambda_memory_limit_mb()
         memory_percentage = (memory_mb / lambda_memory_limit) * 100
         
         logger.info(f"Memory usage{' - ' + context if context else ''}: {memory_mb:.1f}MB / {lambda_memory_limit}MB ({memory_percentage:.1f}%), Virtual: {virtual_mb:.1f}MB")
@@ -229,13 +237,6 @@ def check_memory_usage(logger: PipelineLogger, max_memory_mb: int = 200, context
             logger.info(f"Memory after cleanup: {new_memory_mb:.1f}MB (freed {memory_mb - new_memory_mb:.1f}MB)")
             return True
         return False
-    except ImportError:
-        # psutil not available, use basic memory check
-        import resource
-        usage = resource.getrusage(resource.RUSAGE_SELF)
-        memory_mb = usage.ru_maxrss / 1024  # On Linux, ru_maxrss is in KB
-        logger.info(f"Memory usage (resource){' - ' + context if context else ''}: {memory_mb:.1f}MB")
-        return False
     except Exception as e:
         logger.warning(f"Failed to check memory usage: {e}")
         return False
@@ -244,28 +245,25 @@ def check_memory_usage(logger: PipelineLogger, max_memory_mb: int = 200, context
 def aggressive_memory_cleanup(logger: PipelineLogger):
     """Perform aggressive memory cleanup between file processing."""
     try:
-        import psutil
-        process = psutil.Process()
-        memory_before = process.memory_info().rss / 1024 / 1024
+        memory_before = get_memory_usage_mb()
         
         # Triple garbage collection for maximum cleanup
         gc.collect(0)  # Young generation
         gc.collect(1)  # Middle generation
         gc.collect(2)  # Full collection
         
-        # Additional cleanup for pandas/pyarrow
-        try:
-            import pandas as pd
-            import pyarrow as pa
+        # Additional cleanup for pandas/pyarrow, only if this invocation already loaded them
+        pd = sys.modules.get('pandas')
+        if pd is not None:
             # Clear any cached pandas operations
             pd.options.mode.chained_assignment = None
-            # Force pyarrow memory cleanup if available
-            if hasattr(pa, 'total_allocated_bytes'):
-                logger.info(f"PyArrow allocated bytes: {pa.total_allocated_bytes()}")
-        except ImportError:
-            pass
+        pa = sys.modules.get('pyarrow')
+        if pa is not None and hasattr(pa, 'total_allocated_bytes'):
+            logger.info(f"PyArrow allocated bytes: {pa.total_allocated_bytes()}")
         
-        memory_after = process.memory_info().rss / 1024 / 1024
+        if memory_before is None:
+            return
+        memory_after = get_memory_usage_mb()
         memory_freed = memory_before - memory_after
         
         logger.info(f"🧹 AGGRESSIVE CLEANUP: {memory_before:.1f}MB → {memory_after:.1f}MB (freed {memory_freed:.1f}MB)")
@@ -374,12 +372,11 @@ def process_tenant_canonical_data(
                     # Filter valid records
                     valid_records = [r for r in single_file_records if r is not None]
                     
-                    # Add basic metadata (NO SCD processing)
+                    # Add basic metadata (NO SCD processing); record_hash was computed during transform
+                    ingestion_timestamp = datetime.now(timezone.utc).isoformat()
                     processed_records = []
                     for record in valid_records:
-                        # Add only essential metadata fields
-                        record['record_hash'] = calculate_record_hash(record)
-                        record['ingestion_timestamp'] = datetime.now(timezone.utc).isoformat()
+                        record['ingestion_timestamp'] = ingestion_timestamp
                         processed_records.append(record)
                     
                     if processed_records:
@@ -499,8 +496,33 @@ def load_and_transform_raw_data(config: Config, s3_key: str, canonical_table: st
     import io
     
     try:
+        # Load canonical mapping
+        mapping = load_canonical_mapping(canonical_table, canonical_mapper)
+        
+        # Extract tenant_id from s3_key path
+        tenant_id = s3_key.split('/')[0] if '/' in s3_key else None
+        
+        # Hash once, over the final records (including tenant_id)
+        hasher = RecordHasher(get_hash_mode(mapping))
+        
+        # Tables configured with transform_mode "columnar" skip the per-row path entirely
+        # (imported here: the columnar path pulls in numpy and pyarrow)
+        from shared.columnar_transform import ColumnarTransformPlan, TRANSFORM_MODE_COLUMNAR, get_transform_mode
+        columnar_plan = None
+        if get_transform_mode(mapping) == TRANSFORM_MODE_COLUMNAR:
+            columnar_plan = ColumnarTransformPlan.from_mapping(
+                canonical_mapper or CanonicalMapper(s3_client=s3),
+                mapping,
+                canonical_table,
+                required_fields=get_required_business_fields(canonical_table)
+            )
+            if columnar_plan is None:
+                logger.error(f"Failed to compile columnar transform plan for {canonical_table}")
+                return []
+        
         # Read raw data from S3 with enhanced retry logic
         df = None
+        transformed_records = None
         max_retries = 3
         base_delay = 2
         
@@ -513,8 +535,12 @@ def load_and_transform_raw_data(config: Config, s3_key: str, canonical_table: st
                 body_data = response['Body'].read()
                 body_stream = io.BytesIO(body_data)
                 
-                # Read parquet from memory stream
-                df = pd.read_parquet(body_stream)
+                if columnar_plan:
+                    # Read only the mapped columns and transform them as a whole
+                    transformed_records = columnar_plan.transform_parquet(body_stream, tenant_id, hasher=hasher)
+                else:
+                    # Read parquet from memory stream
+                    df = pd.read_parquet(body_stream)
                 
                 if attempt > 0:
                     logger.info(f"Successfully read parquet file on retry attempt {attempt + 1}")
@@ -535,24 +561,36 @@ def load_and_transform_raw_data(config: Config, s3_key: str, canonical_table: st
                 delay = base_delay * (2 ** attempt)
                 time.sleep(delay)
         
+        if columnar_plan:
+            logger.info(f"Transformed {len(transformed_records)} records from {s3_key} (columnar)")
+            return transformed_records
+        
         if df is None:
             raise Exception("Failed to read parquet file after all retry attempts")
         
         if df.empty:
             return []
         
-        # Load canonical mapping
-        mapping = load_canonical_mapping(canonical_table, canonical_mapper)
-        
-        # Transform data according to mapping
+        # Transform data according to mapping, one compiled mapping per batch of rows
+        if canonical_mapper is None:
+            canonical_mapper = CanonicalMapper(s3_client=s3)
         transformed_records = []
-        # Extract tenant_id from s3_key path
-        tenant_id = s3_key.split('/')[0] if '/' in s3_key else None
         
-        for _, row in df.iterrows():
-            transformed_record = transform_record(row.to_dict(), mapping, canonical_table, tenant_id, logger, canonical_mapper)
-            if transformed_record:
-                transformed_records.append(transformed_record)
+        batch_size = 1000
+        for start in range(0, len(df), batch_size):
+            raw_batch = [row.to_dict() for _, row in df.iloc[start:start + batch_size].iterrows()]
+            mapped_batch = canonical_mapper.transform_batch(raw_batch, mapping, canonical_table, compute_hash=False)
+            valid_batch = []
+            for raw_record, mapped_record in zip(raw_batch, mapped_batch):
+                transformed_record = validate_transformed_record(
+                    mapped_record, raw_record, mapping, canonical_table, tenant_id, logger
+                )
+                if transformed_record:
+                    valid_batch.append(transformed_record)
+            
+            for record, record_hash in zip(valid_batch, hasher.hash_records(valid_batch)):
+                record['record_hash'] = record_hash
+            transformed_records.extend(valid_batch)
         
         logger.info(f"Transformed {len(transformed_records)} records from {s3_key}")
         return transformed_records
@@ -578,7 +616,11 @@ def transform_record(raw_record: Dict[str, Any], mapping: Dict[str, Any], canoni
         # Fallback for backward compatibility - create temporary mapper
         mapper = CanonicalMapper(s3_client=s3)
     transformed_record = mapper.transform_record(raw_record, mapping, canonical_table)
-    
+    return validate_transformed_record(transformed_record, raw_record, mapping, canonical_table, tenant_id, logger)
+
+
+def validate_transformed_record(transformed_record: Optional[Dict[str, Any]], raw_record: Dict[str, Any], mapping: Dict[str, Any], canonical_table: str, tenant_id: str = None, logger: PipelineLogger = None) -> Optional[Dict[str, Any]]:
+    """Stamp tenant_id on a mapped record and apply the emergency business-field validation."""
     # Add tenant_id to the transformed record if provided
     if transformed_record and tenant_id:
         transformed_record['tenant_id'] = tenant_id
@@ -618,21 +660,7 @@ def get_required_business_fields(canonical_table: str) -> List[str]:
 
 def calculate_record_hash(record: Dict[str, Any]) -> str:
     """Calculate hash for data quality and change detection."""
-    import hashlib
-    import json
-    
-    # Exclude SCD fields from hash calculation
-    scd_fields = {
-        'effective_start_date', 'effective_end_date', 'is_current',
-        'record_hash', 'ingestion_timestamp', 'temp_record_hash'
-    }
-    
-    # Create a copy without SCD fields
-    hash_data = {k: v for k, v in record.items() if k not in scd_fields}
-    
-    # Sort keys for consistent hashing
-    sorted_data = json.dumps(hash_data, sort_keys=True, default=str)
-    return hashlib.md5(sorted_data.encode()).hexdigest()
+    return RecordHasher().hash_record(record)
 
 
 # SCD logic has been removed from canonical transform
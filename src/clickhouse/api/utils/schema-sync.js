@@ -15,6 +15,17 @@ const fs = require('fs');
 // Cache for loaded mapping files to avoid repeated file reads
 const mappingCache = new Map();
 
+// Loaders leave deduplication to the merge scheduler; the <table>_final views
+// read the ReplacingMergeTree tables with FINAL so unmerged duplicates never reach the API
+const FINAL_VIEW_SUFFIX = '_final';
+
+/**
+ * Get the deduplicated view to query for a table
+ */
+function finalViewName(tableName) {
+  return `${tableName}${FINAL_VIEW_SUFFIX}`;
+}
+
 /**
  * Load canonical mapping for a table
  */
@@ -282,7 +293,7 @@ function buildCanonicalQuery(tableName, options = {}) {
     whereClause = `${whereClause} AND ${additionalWhere}`;
   }
   
-  let query = `SELECT ${select} FROM ${tableName}`;
+  let query = `SELECT ${select} FROM ${finalViewName(tableName)}`;
   if (alias) {
     query += ` ${alias}`;
   }
@@ -392,7 +403,7 @@ function buildTableStatsQuery(tableName, tenantId) {
         max(effective_date) as latest_date,
         uniq(id) as unique_entities,
         max(last_updated) as last_update
-      FROM ${tableName}
+      FROM ${finalViewName(tableName)}
       WHERE tenant_id = '${tenantId}'
     `;
   } else {
@@ -406,7 +417,7 @@ function buildTableStatsQuery(tableName, tenantId) {
         max(last_updated) as latest_date,
         uniq(id) as unique_entities,
         max(last_updated) as last_update
-      FROM ${tableName}
+      FROM ${finalViewName(tableName)}
       WHERE tenant_id = '${tenantId}'
     `;
   }
@@ -441,6 +452,7 @@ module.exports = {
   validateTenantIsolation,
   transformResults,
   buildTableStatsQuery,
+  finalViewName,
   schemaSyncMiddleware,
   loadCanonicalMapping,
   extractCanonicalFields
@@ -11,24 +11,54 @@ import sys
 import logging
 import boto3
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import clickhouse_connect
 from clickhouse_connect.driver.client import Client
 
+from shared.load_pipeline import (
+    MB,
+    InsertBatch,
+    InsertCoalescer,
+    LoadedFile,
+    PrefetchingFileReader,
+    get_insert_target_bytes,
+    get_insert_target_rows,
+    get_load_concurrency,
+    get_memory_budget_bytes
+)
+from shared.memory_usage import get_lambda_memory_limit_mb, get_memory_usage_mb
+from shared.merge_scheduler import (
+    DEDUP_STRATEGY_IMMEDIATE,
+    create_final_view,
+    final_view_name,
+    get_dedup_strategy,
+    optimize_table
+)
+from shared.s3_ingest import S3Ingestor, S3Source
+from shared.schema_cache import get_client_database, get_schema_cache, invalidate_table_schema
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+LOAD_MODE_COLUMNAR = 'columnar'
+LOAD_MODE_ROWS = 'rows'
+LOAD_MODE_SERVER = 'server'
+LOAD_MODES = (LOAD_MODE_COLUMNAR, LOAD_MODE_ROWS, LOAD_MODE_SERVER)
+
+# (database, table) pairs whose FINAL view this container has already created
+_final_views = set()
+
 def check_memory_usage(context: str = "") -> bool:
     """Check current memory usage for ClickHouse loader."""
     try:
-        import psutil
-        process = psutil.Process()
-        memory_info = process.memory_info()
-        memory_mb = memory_info.rss / 1024 / 1024
+        memory_mb = get_memory_usage_mb()
+        if memory_mb is None:
+            logger.info(f"Memory monitoring unavailable{' - ' + context if context else ''}")
+            return False
         
         # Get Lambda specific memory limit
-        lambda_memory_limit = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '1024'))
+        lambda_memory_limit = get_lambda_memory_limit_mb()
         memory_percentage = (memory_mb / lambda_memory_limit) * 100
         
         logger.info(f"💾 Memory usage{' - ' + context if context else ''}: {memory_mb:.1f}MB / {lambda_memory_limit}MB ({memory_percentage:.1f}%)")
@@ -39,9 +69,6 @@ def check_memory_usage(context: str = "") -> bool:
         
         return memory_percentage > 80
         
-    except ImportError:
-        logger.info(f"Memory monitoring unavailable{' - ' + context if context else ''}")
-        return False
     except Exception as e:
         logger.warning(f"Failed to check memory usage: {e}")
         return False
@@ -49,18 +76,18 @@ def check_memory_usage(context: str = "") -> bool:
 def aggressive_memory_cleanup(context: str = ""):
     """Perform aggressive memory cleanup between file processing."""
     try:
-        import psutil
         import gc
         
-        process = psutil.Process()
-        memory_before = process.memory_info().rss / 1024 / 1024
+        memory_before = get_memory_usage_mb()
         
         # Triple garbage collection for maximum cleanup
         gc.collect(0)  # Young generation
         gc.collect(1)  # Middle generation
         gc.collect(2)  # Full collection
         
-        memory_after = process.memory_info().rss / 1024 / 1024
+        if memory_before is None:
+            return
+        memory_after = get_memory_usage_mb()
         memory_freed = memory_before - memory_after
         
         logger.info(f"🧹 CLEANUP{' - ' + context if context else ''}: {memory_before:.1f}MB → {memory_after:.1f}MB (freed {memory_freed:.1f}MB)")
@@ -127,51 +154,23 @@ def lambda_handler(event, context):
             logger.info(f"🔗 1:1 STREAMING MODE: Processing {len(canonical_files)} canonical files for tenant: {tenant_id}, table: {target_table}")
             logger.info(f"   • Files: {[f.split('/')[-1] for f in canonical_files[:3]]}{'...' if len(canonical_files) > 3 else ''}")
             
-            # MEMORY OPTIMIZATION: Process files one-by-one with immediate ClickHouse insertion
-            total_records_inserted = 0
-            files_processed = 0
+            # PIPELINED LOADING: the next files are read from S3 while the current batch is inserted;
+            # small files are coalesced into larger inserts within a memory budget
+            load_mode = get_load_mode()
             
             # Check initial memory
             check_memory_usage(f"Initial state - processing {len(canonical_files)} files")
             
-            for idx, file_path in enumerate(canonical_files):
-                try:
-                    logger.info(f"   📄 Processing file {idx+1}/{len(canonical_files)}: {file_path}")
-                    
-                    # Check memory before each file
-                    is_memory_critical = check_memory_usage(f"Before file {idx+1}")
-                    if is_memory_critical:
-                        logger.warning(f"⚠️ Memory critical before processing file {idx+1}, performing cleanup")
-                        aggressive_memory_cleanup(f"Pre-processing file {idx+1}")
-                    
-                    # Load ONLY this single file's data
-                    file_data = load_data_from_s3(s3_client, s3_bucket_name, file_path)
-                    
-                    if file_data:
-                        # Insert this file's data immediately to ClickHouse
-                        records_inserted = load_data_to_clickhouse(
-                            clickhouse_client,
-                            target_table,
-                            file_data,
-                            tenant_id
-                        )
-                        
-                        total_records_inserted += records_inserted
-                        files_processed += 1
-                        
-                        logger.info(f"   ✅ Processed {len(file_data)} records → inserted {records_inserted} to ClickHouse from {file_path.split('/')[-1]}")
-                    
-                    # CRITICAL: Clear memory immediately after processing each file
-                    del file_data
-                    aggressive_memory_cleanup(f"After file {idx+1}")
-                    
-                    # Check memory after cleanup
-                    check_memory_usage(f"After file {idx+1} cleanup")
-                    
-                except Exception as file_error:
-                    logger.error(f"   ❌ Failed to process {file_path}: {file_error}")
-                    # Continue with other files
-                    continue
+            load_files = load_canonical_files_server_side if load_mode == LOAD_MODE_SERVER else load_canonical_files
+            total_records_inserted, files_processed = load_files(
+                clickhouse_client,
+                s3_client,
+                s3_bucket_name,
+                target_table,
+                canonical_files,
+                tenant_id,
+                load_mode
+            )
             
             # Final memory check after all files processed
             final_memory_check = check_memory_usage("Final state after all files processed")
@@ -190,6 +189,7 @@ def lambda_handler(event, context):
                     's3_key': f"STREAMED: {len(canonical_files)} files",
                     'records_processed': total_records_inserted,
                     'processing_mode': 'streaming_multi_file_1to1',
+                    'load_mode': load_mode,
                     'files_processed': files_processed,
                     'memory_status': 'optimized'
                 })
@@ -339,6 +339,234 @@ def get_clickhouse_client(secrets_client, secret_name: str) -> Client:
         logger.error(f"Failed to connect to ClickHouse: {e}")
         raise
 
+def load_canonical_files(
+    client: Client,
+    s3_client,
+    bucket_name: str,
+    table_name: str,
+    canonical_files: List[str],
+    tenant_id: str,
+    load_mode: str
+) -> Tuple[int, int]:
+    """
+    Load canonical files into ClickHouse, reading ahead while earlier files are inserted.
+    
+    Returns:
+        Tuple of (records inserted, files inserted). Files that fail to read or
+        insert are logged and skipped.
+    """
+    total_records_inserted = 0
+    files_processed = 0
+    
+    coalescer = InsertCoalescer(get_insert_target_rows(), get_insert_target_bytes())
+    reader = PrefetchingFileReader(
+        lambda file_path: read_canonical_file(s3_client, bucket_name, file_path, load_mode),
+        max_in_flight=get_load_concurrency(),
+        memory_budget_bytes=get_memory_budget_bytes(),
+        held_bytes=lambda: coalescer.pending_bytes
+    )
+    logger.info(f"   • Reading up to {reader.max_in_flight} files ahead, "
+                f"inserting batches of {coalescer.target_rows} rows / {coalescer.target_bytes // MB}MB")
+    
+    for idx, loaded in enumerate(reader.iter_files(canonical_files)):
+        logger.info(f"   📄 Read file {idx+1}/{len(canonical_files)}: {loaded.key}")
+        if loaded.error is not None:
+            logger.error(f"   ❌ Failed to process {loaded.key}: {loaded.error}")
+            # Continue with other files
+            continue
+        if not loaded.rows:
+            continue
+        
+        batches = coalescer.add(get_insert_kind(loaded.key, load_mode), loaded)
+        del loaded
+        if not batches:
+            continue
+        for batch in batches:
+            records_inserted, files_inserted = insert_file_batch(client, table_name, batch, tenant_id)
+            total_records_inserted += records_inserted
+            files_processed += files_inserted
+        
+        # CRITICAL: Release inserted batches before reading further
+        del batches, batch
+        if check_memory_usage(f"After file {idx+1}"):
+            aggressive_memory_cleanup(f"After file {idx+1}")
+    
+    batch = coalescer.flush()
+    if batch is not None:
+        records_inserted, files_inserted = insert_file_batch(client, table_name, batch, tenant_id)
+        total_records_inserted += records_inserted
+        files_processed += files_inserted
+    
+    return total_records_inserted, files_processed
+
+def load_canonical_files_server_side(
+    client: Client,
+    s3_client,
+    bucket_name: str,
+    table_name: str,
+    canonical_files: List[str],
+    tenant_id: str,
+    load_mode: str = LOAD_MODE_SERVER
+) -> Tuple[int, int]:
+    """
+    Load canonical Parquet files with INSERT ... SELECT FROM s3(), so no data passes through the Lambda.
+    
+    Files that are not Parquet go through the row path. Files that fail to
+    describe or insert are logged and skipped.
+    
+    Returns:
+        Tuple of (records inserted, files inserted)
+    """
+    parquet_files = [file_path for file_path in canonical_files if file_path.lower().endswith('.parquet')]
+    other_files = [file_path for file_path in canonical_files if not file_path.lower().endswith('.parquet')]
+    total_records_inserted, files_processed = 0, 0
+    if other_files:
+        total_records_inserted, files_processed = load_canonical_files(
+            client, s3_client, bucket_name, table_name, other_files, tenant_id, LOAD_MODE_ROWS
+        )
+    if not parquet_files:
+        return total_records_inserted, files_processed
+    
+    # Check if table exists and create if needed
+    if not table_exists(client, table_name):
+        logger.info(f"Table {table_name} does not exist. Creating it automatically...")
+        if not create_table_from_mapping(client, table_name):
+            raise Exception(f"Failed to create table {table_name}")
+    table_schema = get_table_schema(client, table_name)
+    if not table_schema:
+        raise Exception(f"Could not read schema of table {table_name}")
+    
+    ingestor = S3Ingestor(client, S3Source.from_environment(bucket_name))
+    described_files = []
+    for file_path in parquet_files:
+        try:
+            described_files.append((file_path, ingestor.describe(file_path)))
+        except Exception as e:
+            logger.error(f"   ❌ Failed to read Parquet schema of {file_path} from ClickHouse: {e}")
+            # Continue with other files
+            continue
+    
+    for s3_keys, source_schema in ingestor.plan(described_files):
+        records_inserted = _insert_via_s3(ingestor, table_name, s3_keys, source_schema, table_schema, tenant_id)
+        if records_inserted is not None:
+            total_records_inserted += records_inserted
+            files_processed += len(s3_keys)
+            continue
+        if len(s3_keys) > 1:
+            # Retry file by file so one bad file does not sink the others
+            logger.warning(f"Server-side insert of {len(s3_keys)} files failed, inserting files one by one")
+            for s3_key in s3_keys:
+                records_inserted = _insert_via_s3(ingestor, table_name, [s3_key], source_schema, table_schema, tenant_id)
+                if records_inserted is not None:
+                    total_records_inserted += records_inserted
+                    files_processed += 1
+    
+    apply_dedup_strategy(client, table_name)
+    return total_records_inserted, files_processed
+
+def _insert_via_s3(
+    ingestor: S3Ingestor,
+    table_name: str,
+    s3_keys: List[str],
+    source_schema: Dict[str, str],
+    table_schema: Dict[str, str],
+    tenant_id: str
+) -> Optional[int]:
+    """Run one INSERT ... SELECT FROM s3(); returns the rows written, or None if it failed."""
+    try:
+        records_inserted = ingestor.insert(table_name, s3_keys, source_schema, table_schema, tenant_id)
+        source = s3_keys[0].split('/')[-1] if len(s3_keys) == 1 else f"{len(s3_keys)} files"
+        logger.info(f"   ✅ ClickHouse inserted {records_inserted} records from {source} via s3()")
+        return records_inserted
+    except Exception as e:
+        logger.error(f"   ❌ Server-side insert from {s3_keys[0]}{' and others' if len(s3_keys) > 1 else ''} failed: {e}")
+        # The table may have been altered since its schema was cached; re-read it for the next insert
+        invalidate_table_schema(table_name, get_client_database(ingestor.client))
+        return None
+
+def get_insert_kind(s3_key: str, load_mode: str) -> str:
+    """Get the insert path of a file: columnar for Parquet in columnar mode, rows otherwise."""
+    if load_mode == LOAD_MODE_COLUMNAR and s3_key.lower().endswith('.parquet'):
+        return LOAD_MODE_COLUMNAR
+    return LOAD_MODE_ROWS
+
+def read_canonical_file(s3_client, bucket_name: str, s3_key: str, load_mode: str) -> LoadedFile:
+    """Read one canonical file for its insert path (runs on a prefetch worker thread)."""
+    if get_insert_kind(s3_key, load_mode) == LOAD_MODE_COLUMNAR:
+        table = load_arrow_table_from_s3(s3_client, bucket_name, s3_key)
+        return LoadedFile(s3_key, table, table.num_rows, table.nbytes)
+    
+    records = load_data_from_s3(s3_client, bucket_name, s3_key)
+    return LoadedFile(s3_key, records, len(records), estimate_records_bytes(records))
+
+def estimate_records_bytes(records: List[Dict[str, Any]]) -> int:
+    """Estimate the memory held by a list of records from a sample of them."""
+    if not records:
+        return 0
+    sample = records[:100]
+    sample_bytes = sum(
+        sys.getsizeof(record) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in record.items())
+        for record in sample
+    )
+    return sample_bytes * len(records) // len(sample)
+
+def insert_file_batch(client: Client, table_name: str, batch: InsertBatch, tenant_id: str) -> Tuple[int, int]:
+    """
+    Insert a batch of coalesced files, falling back to one insert per file if the batch fails.
+    
+    Returns:
+        Tuple of (records inserted, files inserted)
+    """
+    try:
+        records_inserted = _insert_files(client, table_name, batch.kind, batch.files, tenant_id)
+        source = batch.keys[0].split('/')[-1] if len(batch.files) == 1 else f"{len(batch.files)} coalesced files"
+        logger.info(f"   ✅ Inserted {records_inserted} records to ClickHouse from {source}")
+        return records_inserted, len(batch.files)
+        
+    except Exception as batch_error:
+        if len(batch.files) == 1:
+            logger.error(f"   ❌ Failed to process {batch.keys[0]}: {batch_error}")
+            return 0, 0
+        logger.warning(f"Coalesced insert of {len(batch.files)} files failed ({batch_error}), inserting files one by one")
+    
+    total_records_inserted = 0
+    files_inserted = 0
+    for loaded in batch.files:
+        try:
+            total_records_inserted += _insert_files(client, table_name, batch.kind, [loaded], tenant_id)
+            files_inserted += 1
+        except Exception as file_error:
+            logger.error(f"   ❌ Failed to process {loaded.key}: {file_error}")
+            # Continue with other files
+            continue
+    return total_records_inserted, files_inserted
+
+def _insert_files(client: Client, table_name: str, kind: str, files: List[LoadedFile], tenant_id: str) -> int:
+    """Insert the payloads of several files with as few inserts as their schemas allow."""
+    if kind == LOAD_MODE_COLUMNAR:
+        import pyarrow as pa
+        
+        tables = [loaded.payload for loaded in files]
+        try:
+            # Null-typed and narrower columns are widened so files written from different pages still combine
+            combined = pa.concat_tables(tables, promote_options='permissive') if len(tables) > 1 else tables[0]
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logger.info(f"Files have incompatible Parquet schemas ({e}), inserting them separately")
+            return sum(load_arrow_table_to_clickhouse(client, table_name, table, tenant_id) for table in tables)
+        return load_arrow_table_to_clickhouse(client, table_name, combined, tenant_id)
+    
+    # Records are only merged with records of the same columns; the insert takes its column list from the first record
+    records_inserted = 0
+    run: List[Dict[str, Any]] = []
+    for loaded in files:
+        if run and set(run[0].keys()) != set(loaded.payload[0].keys()):
+            records_inserted += load_data_to_clickhouse(client, table_name, run, tenant_id)
+            run = []
+        run.extend(loaded.payload)
+    if run:
+        records_inserted += load_data_to_clickhouse(client, table_name, run, tenant_id)
+    return records_inserted
+
 def load_data_from_s3(s3_client, bucket_name: str, s3_key: str) -> List[Dict[str, Any]]:
     """Load data from S3 with support for multiple canonical files (1:1 transformation output)."""
     try:
@@ -502,7 +730,6 @@ def load_data_to_clickhouse(
                 record['tenant_id'] = tenant_id
         
         # Filter data to only include columns that exist in ClickHouse table
-        filtered_data = []
         source_columns = set(data[0].keys()) if data else set()
         logger.info(f"Source data has {len(source_columns)} columns")
         
@@ -517,106 +744,276 @@ def load_data_to_clickhouse(
         if columns_extra_in_source:
             logger.info(f"Extra columns in source (will be ignored): {sorted(columns_extra_in_source)}")
         
-        # Filter each record to only include valid columns
-        for record in data:
-            filtered_record = {col: record.get(col) for col in columns_to_include}
-            filtered_data.append(filtered_record)
-        
         # Apply data type normalization for ClickHouse compatibility
         logger.info("Applying data type normalization for ClickHouse compatibility")
         
         # Get table schema once for efficiency
         table_schema = get_table_schema(client, table_name)
         
-        for record in filtered_data:
-            for col_name in columns_to_include:
-                value = record.get(col_name)
-                if value is None:
-                    record[col_name] = None  # Keep nulls as None
-                else:
-                    # Apply type-specific conversion based on ClickHouse schema
-                    clickhouse_type = table_schema.get(col_name, '')
-                    record[col_name] = convert_value_for_clickhouse(value, clickhouse_type, col_name)
+        # Convert column by column with converters compiled once per ClickHouse type
+        from shared.clickhouse_coercion import compile_column_converter
+        column_names = sorted(columns_to_include)
+        columns = [
+            compile_column_converter(table_schema.get(col_name, ''), col_name).convert(
+                [record.get(col_name) for record in data]
+            )
+            for col_name in column_names
+        ]
         
         # Insert filtered data using clickhouse_connect
-        logger.info(f"Inserting {len(filtered_data)} records into {table_name}")
+        logger.info(f"Inserting {len(data)} records into {table_name}")
+        logger.info(f"Using {len(column_names)} columns: {column_names[:5]}...")
+        client.insert(table_name, columns, column_names=column_names, column_oriented=True)
         
-        # Use native SQL INSERT approach (most compatible with ClickHouse)
-        if filtered_data:
-            # Get column names in consistent order
-            column_names = sorted(columns_to_include)
-            
-            # Prepare data in row format for SQL insertion
-            rows_to_insert = []
-            for record in filtered_data:
-                row_values = []
-                for col_name in column_names:
-                    value = record.get(col_name)
-                    # Handle None values and ensure proper formatting
-                    if value is None:
-                        row_values.append(None)
-                    else:
-                        row_values.append(value)
-                rows_to_insert.append(row_values)
-            
-            # Debug logging
-            logger.info(f"Prepared {len(rows_to_insert)} rows for SQL insertion")
-            logger.info(f"Using {len(column_names)} columns: {column_names[:5]}...")
-            
-            # Use standard insert method with row data format
-            client.insert(table_name, rows_to_insert, column_names=column_names)
-        else:
-            logger.warning("No data to insert")
+        logger.info(f"✅ Successfully inserted {len(data)} records into {table_name}")
+        
+        apply_dedup_strategy(client, table_name)
         
-        logger.info(f"✅ Successfully inserted {len(filtered_data)} records into {table_name}")
+        return len(data)
         
-        # Force immediate deduplication with OPTIMIZE
+    except Exception as e:
+        logger.error(f"Failed to insert data into ClickHouse: {e}")
+        # The table may have been altered since its schema was cached; re-read it for the next file
+        invalidate_table_schema(table_name, get_client_database(client))
+        raise
+
+def ensure_final_view(client: Client, table_name: str) -> None:
+    """Create the table's FINAL view once per container; tables created before views were introduced lack one."""
+    key = (get_client_database(client), table_name)
+    if key in _final_views:
+        return
+    try:
+        create_final_view(client, table_name)
+        _final_views.add(key)
+    except Exception as e:
+        logger.warning(f"Failed to create FINAL view for {table_name}: {e}")
+
+def apply_dedup_strategy(client: Client, table_name: str) -> None:
+    """Deduplicate after a load according to CLICKHOUSE_DEDUP_STRATEGY."""
+    # Readers query the FINAL view whatever the strategy, so every loaded table needs one
+    ensure_final_view(client, table_name)
+    # Deduplication is deferred to the merge scheduler unless configured otherwise;
+    # a table-wide OPTIMIZE after every insert costs time proportional to the table size
+    dedup_strategy = get_dedup_strategy()
+    if dedup_strategy == DEDUP_STRATEGY_IMMEDIATE:
         logger.info(f"Running OPTIMIZE on {table_name} to ensure immediate deduplication...")
         try:
-            client.query(f"OPTIMIZE TABLE {table_name} FINAL")
+            optimize_table(client, table_name)
             logger.info(f"✅ Successfully optimized {table_name} for deduplication")
         except Exception as e:
             logger.warning(f"OPTIMIZE operation failed for {table_name}: {e}")
             # Don't fail the entire operation if OPTIMIZE fails
+    else:
+        logger.info(f"Deduplication of {table_name} deferred (strategy: {dedup_strategy}); "
+                    f"read {final_view_name(table_name)} for deduplicated rows")
+
+def get_load_mode() -> str:
+    """
+    Get the load mode: 'columnar' (Arrow insert, default), 'rows' (per-record conversion)
+    or 'server' (ClickHouse reads Parquet files from S3 itself).
+    """
+    mode = os.environ.get('CLICKHOUSE_LOAD_MODE', LOAD_MODE_COLUMNAR).lower()
+    if mode not in LOAD_MODES:
+        logger.warning(f"Unknown load mode '{mode}', using {LOAD_MODE_COLUMNAR}")
+        return LOAD_MODE_COLUMNAR
+    return mode
+
+def load_arrow_table_from_s3(s3_client, bucket_name: str, s3_key: str):
+    """Read a Parquet file from S3 as an Arrow table."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    logger.info(f"Loading Parquet file as Arrow table: s3://{bucket_name}/{s3_key}")
+    response = s3_client.get_object(Bucket=bucket_name, Key=s3_key)
+    return pq.read_table(pa.BufferReader(response['Body'].read()))
+
+def get_arrow_type(clickhouse_type: str):
+    """
+    Map a ClickHouse column type to the Arrow type it is inserted as.
+    
+    Args:
+        clickhouse_type: ClickHouse type (e.g., 'Nullable(Int32)')
+        
+    Returns:
+        Arrow DataType, or None when the column is sent as converted Python values
+    """
+    import pyarrow as pa
+    
+    inner_type = clickhouse_type
+    for wrapper in ('LowCardinality(', 'Nullable('):
+        if inner_type.startswith(wrapper):
+            inner_type = inner_type[len(wrapper):-1]
+    
+    integer_types = {
+        'Int8': pa.int8, 'Int16': pa.int16, 'Int32': pa.int32, 'Int64': pa.int64,
+        'UInt8': pa.uint8, 'UInt16': pa.uint16, 'UInt32': pa.uint32, 'UInt64': pa.uint64
+    }
+    if inner_type in integer_types:
+        return integer_types[inner_type]()
+    if inner_type == 'Float32':
+        return pa.float32()
+    if inner_type == 'Float64':
+        return pa.float64()
+    if inner_type == 'Bool':
+        return pa.bool_()
+    if inner_type == 'String' or inner_type.startswith('FixedString'):
+        return pa.string()
+    if inner_type in ('Date', 'Date32'):
+        return pa.date32()
+    if inner_type.startswith('DateTime64'):
+        return pa.timestamp('us')
+    if inner_type.startswith('DateTime'):
+        return pa.timestamp('s')
+    return None
+
+def _is_value_preserving_cast(source_type, target_type) -> bool:
+    """Whether an Arrow cast gives the same values as convert_value_for_clickhouse."""
+    import pyarrow as pa
+    
+    numeric = (pa.types.is_integer, pa.types.is_floating, pa.types.is_boolean)
+    if any(check(target_type) for check in numeric):
+        return any(check(source_type) for check in numeric)
+    if pa.types.is_string(target_type):
+        # Python str() of floats and bools differs from Arrow's formatting
+        return pa.types.is_string(source_type) or pa.types.is_large_string(source_type) or pa.types.is_integer(source_type)
+    if pa.types.is_date(target_type):
+        return pa.types.is_date(source_type) or pa.types.is_timestamp(source_type)
+    if pa.types.is_timestamp(target_type):
+        return pa.types.is_timestamp(source_type)
+    return False
+
+def _convert_arrow_column(column, clickhouse_type: str, field_name: str):
+    """
+    Cast an Arrow column to its ClickHouse type.
+    
+    Compatible columns are cast in one vectorized call. Columns that need
+    parsing (e.g. date strings) or whose cast fails go through the column
+    converter compiled for the ClickHouse type.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from shared.clickhouse_coercion import compile_column_converter
+    
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    target_type = get_arrow_type(clickhouse_type)
+    
+    # NaN marks a missing value in pandas-written files; ClickHouse gets NULL like the row path sends None
+    if pa.types.is_floating(column.type):
+        column = pc.if_else(pc.is_nan(column), pa.scalar(None, column.type), column)
+    
+    if target_type is not None and _is_value_preserving_cast(column.type, target_type):
+        if pa.types.is_timestamp(target_type) and pa.types.is_timestamp(column.type):
+            target_type = pa.timestamp(target_type.unit, column.type.tz)
+        try:
+            return column.cast(target_type, safe=True)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            logger.debug(f"Vectorized cast of {field_name} to {clickhouse_type} failed, converting values")
+    
+    values = column.to_pylist()
+    if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+        # Match process_single_file_content, which hands datetimes over as ISO strings
+        values = [None if value is None else value.isoformat() for value in values]
+    values = compile_column_converter(clickhouse_type, field_name).convert(values)
+    if target_type is not None and pa.types.is_timestamp(target_type):
+        # Parsed datetimes may carry a UTC offset; let Arrow keep it
+        target_type = None
+    try:
+        return pa.array(values, type=target_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return pa.array(values)
+
+def align_arrow_table(table, table_schema: Dict[str, str], tenant_id: str):
+    """
+    Project and cast an Arrow table to a ClickHouse table's columns.
+    
+    Args:
+        table: Arrow table read from a canonical Parquet file
+        table_schema: ClickHouse column name -> type
+        tenant_id: Tenant written to records without a tenant_id
+        
+    Returns:
+        Arrow table with the source columns that exist in ClickHouse, in sorted order
+    """
+    import pyarrow as pa
+    
+    if 'tenant_id' not in table.column_names:
+        table = table.append_column('tenant_id', pa.array([tenant_id] * table.num_rows, type=pa.string()))
+    
+    source_columns = set(table.column_names)
+    columns_to_include = sorted(source_columns.intersection(table_schema))
+    columns_missing_in_source = set(table_schema) - source_columns
+    columns_extra_in_source = source_columns - set(table_schema)
+    
+    logger.info(f"Columns to include in insert: {len(columns_to_include)}")
+    if columns_missing_in_source:
+        logger.warning(f"Columns missing in source data: {sorted(columns_missing_in_source)}")
+    if columns_extra_in_source:
+        logger.info(f"Extra columns in source (will be ignored): {sorted(columns_extra_in_source)}")
+    
+    return pa.table({
+        column_name: _convert_arrow_column(table.column(column_name), table_schema[column_name], column_name)
+        for column_name in columns_to_include
+    })
+
+def load_arrow_table_to_clickhouse(
+    client: Client,
+    table_name: str,
+    table,
+    tenant_id: str
+) -> int:
+    """Load an Arrow table into ClickHouse with a single columnar insert."""
+    try:
+        if table.num_rows == 0:
+            return 0
+        
+        # Check if table exists and create if needed
+        if not table_exists(client, table_name):
+            logger.info(f"Table {table_name} does not exist. Creating it automatically...")
+            if not create_table_from_mapping(client, table_name):
+                raise Exception(f"Failed to create table {table_name}")
+        
+        table_schema = get_table_schema(client, table_name)
+        if not table_schema:
+            raise Exception(f"Could not read schema of table {table_name}")
+        logger.info(f"ClickHouse table {table_name} has {len(table_schema)} columns")
+        
+        aligned = align_arrow_table(table, table_schema, tenant_id)
+        
+        logger.info(f"Inserting {aligned.num_rows} records into {table_name} (columnar)")
+        client.insert_arrow(table_name, aligned)
+        logger.info(f"✅ Successfully inserted {aligned.num_rows} records into {table_name}")
         
-        return len(filtered_data)
+        apply_dedup_strategy(client, table_name)
+        
+        return aligned.num_rows
         
     except Exception as e:
-        logger.error(f"Failed to insert data into ClickHouse: {e}")
+        logger.error(f"Failed to insert Arrow data into ClickHouse: {e}")
+        # The table may have been altered since its schema was cached; re-read it for the next file
+        invalidate_table_schema(table_name, get_client_database(client))
         raise
 
 def get_table_columns(client: Client, table_name: str) -> set:
-    """Get the set of column names for a ClickHouse table."""
+    """Get the set of column names for a ClickHouse table (from the container's schema cache)."""
     try:
-        query = f"DESCRIBE TABLE {table_name}"
-        result = client.query(query)
-        columns = {row[0] for row in result.result_rows}
-        return columns
+        return set(get_schema_cache().get_table_schema(client, table_name) or {})
     except Exception as e:
         logger.error(f"Failed to get table columns for {table_name}: {e}")
         raise
 
 def get_table_schema(client: Client, table_name: str) -> Dict[str, str]:
-    """Get the schema of a ClickHouse table as a dictionary of field_name -> field_type."""
+    """Get the schema of a ClickHouse table as a dictionary of field_name -> field_type (cached)."""
     try:
-        query = f"DESCRIBE TABLE {table_name}"
-        result = client.query(query)
-        schema = {}
-        for row in result.result_rows:
-            field_name = row[0]
-            field_type = row[1]
-            schema[field_name] = field_type
-        return schema
+        return dict(get_schema_cache().get_table_schema(client, table_name) or {})
     except Exception as e:
         logger.error(f"Failed to get table schema for {table_name}: {e}")
         return {}
 
 def table_exists(client: Client, table_name: str) -> bool:
-    """Check if table exists in ClickHouse."""
+    """Check if table exists in ClickHouse (from the container's schema cache)."""
     try:
-        query = f"EXISTS TABLE {table_name}"
-        result = client.query(query)
-        return bool(result.result_rows[0][0])
+        return get_schema_cache().get_table_schema(client, table_name) is not None
     except Exception as e:
         logger.warning(f"Failed to check if table {table_name} exists: {e}")
         return False
@@ -644,6 +1041,7 @@ def create_table_from_mapping(client: Client, table_name: str) -> bool:
         
         if success:
             logger.info(f"✅ Successfully created table {table_name}")
+            ensure_final_view(client, table_name)
         else:
             logger.error(f"❌ Failed to create table {table_name}")
         
@@ -652,190 +1050,3 @@ def create_table_from_mapping(client: Client, table_name: str) -> bool:
     except Exception as e:
         logger.error(f"Failed to create table {table_name}: {e}")
         return False
-
-def convert_value_for_clickhouse(value: Any, clickhouse_type: str, field_name: str) -> Any:
-    """Convert a value to the appropriate type for ClickHouse insertion."""
-    if value is None:
-        return None
-    
-    # Handle nullable types
-    is_nullable = clickhouse_type.startswith('Nullable(')
-    if is_nullable:
-        # Extract the inner type from Nullable(Type)
-        inner_type = clickhouse_type[9:-1]  # Remove 'Nullable(' and ')'
-    else:
-        inner_type = clickhouse_type
-    
-    try:
-        # Date type conversion - COMPREHENSIVE FIX for ClickHouse Date serialization
-        if 'Date' in inner_type and inner_type != 'DateTime':
-            from datetime import datetime, date
-            import math
-            
-            # Handle None/empty/invalid values first - CRITICAL for ClickHouse compatibility
-            if value is None:
-                return None
-            
-            # Handle NaN float values (common in pandas DataFrames)
-            if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-                return None
-            
-            # Handle string representations of null/empty values
-            if isinstance(value, str):
-                value_lower = value.strip().lower()
-                if not value_lower or value_lower in ['nan', 'none', 'null', 'na', '', '0000-00-00']:
-                    return None
-            
-            # Handle numeric values (timestamp/epoch conversions)
-            if isinstance(value, (int, float)):
-                # Handle common "null" numeric representations
-                if value == 0 or value < 0:
-                    return None
-                
-                # Handle Unix timestamps (seconds since epoch)
-                try:
-                    if 1000000000 <= value <= 2147483647:  # Valid Unix timestamp range (2001-2038)
-                        parsed_date = datetime.fromtimestamp(value)
-                        return parsed_date.date()
-                    elif 1000000000000 <= value <= 2147483647000:  # Unix timestamp in milliseconds
-                        parsed_date = datetime.fromtimestamp(value / 1000)
-                        return parsed_date.date()
-                    else:
-                        # Other numeric values are invalid for dates
-                        logger.warning(f"Invalid numeric date value {value} for field {field_name}, setting to None")
-                        return None
-                except (ValueError, OSError, OverflowError):
-                    logger.warning(f"Could not convert numeric timestamp {value} for field {field_name}, setting to None")
-                    return None
-            
-            # Handle string dates
-            if isinstance(value, str):
-                value_trimmed = value.strip()
-                if not value_trimmed:
-                    return None
-                
-                # Try common date formats with enhanced error handling
-                date_formats = [
-                    '%Y-%m-%d',                    # 2023-01-15
-                    '%m/%d/%Y',                    # 01/15/2023
-                    '%d/%m/%Y',                    # 15/01/2023
-                    '%Y-%m-%dT%H:%M:%S%z',        # 2023-01-15T12:00:00+00:00
-                    '%Y-%m-%dT%H:%M:%S',          # 2023-01-15T12:00:00
-                    '%Y-%m-%dT%H:%M:%S.%fZ',      # 2023-01-15T12:00:00.000Z
-                    '%Y-%m-%dT%H:%M:%SZ',         # 2023-01-15T12:00:00Z
-                    '%Y/%m/%d',                    # 2023/01/15
-                    '%d-%m-%Y',                    # 15-01-2023
-                ]
-                
-                for fmt in date_formats:
-                    try:
-                        parsed_date = datetime.strptime(value_trimmed, fmt)
-                        result_date = parsed_date.date()
-                        
-                        # Validate reasonable date range (avoid ancient or far future dates)
-                        if 1900 <= result_date.year <= 2100:
-                            return result_date
-                        else:
-                            logger.warning(f"Date {result_date} outside reasonable range for field {field_name}, setting to None")
-                            return None
-                            
-                    except ValueError:
-                        continue
-                
-                # Pandas fallback with enhanced error handling
-                try:
-                    import pandas as pd
-                    parsed_date = pd.to_datetime(value_trimmed, errors='coerce', utc=True)
-                    if pd.notna(parsed_date):
-                        result_date = parsed_date.date()
-                        # Additional validation for pandas results
-                        if 1900 <= result_date.year <= 2100:
-                            return result_date
-                        else:
-                            logger.warning(f"Pandas parsed date {result_date} outside reasonable range for field {field_name}, setting to None")
-                            return None
-                    else:
-                        logger.debug(f"Pandas could not parse date value '{value}' for field {field_name}, setting to None")
-                        return None
-                except Exception as e:
-                    logger.debug(f"Pandas date parsing failed for '{value}' on field {field_name}: {e}, setting to None")
-                    return None
-            
-            # Handle datetime objects
-            elif hasattr(value, 'date') and callable(getattr(value, 'date')):
-                try:
-                    result_date = value.date()
-                    if 1900 <= result_date.year <= 2100:
-                        return result_date
-                    else:
-                        logger.warning(f"Datetime object date {result_date} outside reasonable range for field {field_name}, setting to None")
-                        return None
-                except Exception as e:
-                    logger.warning(f"Could not extract date from datetime object for field {field_name}: {e}, setting to None")
-                    return None
-            
-            # Handle date objects directly
-            elif isinstance(value, date):
-                if 1900 <= value.year <= 2100:
-                    return value
-                else:
-                    logger.warning(f"Date object {value} outside reasonable range for field {field_name}, setting to None")
-                    return None
-            
-            # For any other type, convert to None (safer than attempting conversion)
-            else:
-                logger.warning(f"Unexpected date value type {type(value)} for field {field_name}: '{value}', setting to None")
-                return None
-        
-        # DateTime type conversion
-        elif 'DateTime' in inner_type:
-            if isinstance(value, str):
-                from datetime import datetime
-                try:
-                    # Try ISO format first
-                    return datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except:
-                    try:
-                        import pandas as pd
-                        return pd.to_datetime(value).to_pydatetime()
-                    except:
-                        logger.warning(f"Could not parse datetime value '{value}' for field {field_name}, keeping as string")
-                        return str(value)
-            return value
-        
-        # Numeric type conversions
-        elif 'Int' in inner_type or 'UInt' in inner_type:
-            if isinstance(value, str) and value.strip() == '':
-                return None
-            return int(float(value))  # Handle cases where int is stored as float string
-        
-        elif 'Float' in inner_type:
-            if isinstance(value, str) and value.strip() == '':
-                return None
-            return float(value)
-        
-        # Boolean type conversion
-        elif 'Bool' in inner_type:
-            if isinstance(value, str):
-                value_lower = value.lower()
-                if value_lower in ['true', '1', 'yes', 'on']:
-                    return True
-                elif value_lower in ['false', '0', 'no', 'off']:
-                    return False
-                else:
-                    return bool(value)
-            return bool(value)
-        
-        # String types - convert to string but preserve None
-        elif 'String' in inner_type:
-            return str(value)
-        
-        else:
-            # For unknown types, convert to string as fallback
-            logger.debug(f"Unknown ClickHouse type '{clickhouse_type}' for field {field_name}, converting to string")
-            return str(value)
-            
-    except Exception as e:
-        logger.warning(f"Error converting value '{value}' for field {field_name} to type {clickhouse_type}: {e}")
-        # Fallback to string conversion
-        return str(value)
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+ClickHouse Merge Scheduler Lambda Function
+
+Runs on a schedule and deduplicates ReplacingMergeTree tables by merging only
+the partitions that received inserts since their last merge, keeping the
+OPTIMIZE cost off the data loaders' ingest path. Each run also creates any
+missing <table>_final views, which readers query for deduplicated rows.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+from shared import ClickHouseClient
+from shared.merge_scheduler import (
+    DEFAULT_MAX_PARTITIONS_PER_RUN,
+    DEFAULT_MAX_RUNNING_MERGES,
+    DEFAULT_MAX_SECONDS_PER_RUN,
+    MergeScheduler,
+    ensure_final_views
+)
+from shared.metrics_emitter import publish_metrics
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_TABLES = ['companies', 'contacts', 'tickets', 'time_entries']
+
+
+def get_target_tables(event: Dict[str, Any]) -> List[str]:
+    """Get the tables to merge from the event or the MERGE_TABLES environment variable."""
+    tables = event.get('tables')
+    if not tables:
+        configured = os.environ.get('MERGE_TABLES', '')
+        tables = [table.strip() for table in configured.split(',') if table.strip()] or DEFAULT_TABLES
+    return tables
+
+
+def send_merge_metrics(summary: Dict[str, Any]) -> None:
+    """Send per-table merge counts to CloudWatch."""
+    try:
+        environment = os.environ.get('ENVIRONMENT', 'dev')
+        metrics = []
+        for table_name, table_summary in summary['tables'].items():
+            dimensions = [
+                {'Name': 'TableName', 'Value': table_name},
+                {'Name': 'Environment', 'Value': environment}
+            ]
+            for metric_name, value in (
+                ('PartitionsOptimized', len(table_summary['optimized'])),
+                ('PartitionsPendingMerge', table_summary['pending']),
+                ('PartitionMergeFailures', len(table_summary['failed']))
+            ):
+                metrics.append({'MetricName': metric_name, 'Dimensions': dimensions, 'Value': value, 'Unit': 'Count'})
+        metrics.append({
+            'MetricName': 'MergeSchedulerDuration',
+            'Dimensions': [{'Name': 'Environment', 'Value': environment}],
+            'Value': summary['duration_seconds'],
+            'Unit': 'Seconds'
+        })
+
+        publish_metrics('AVESA/DataPipeline', metrics)
+    except Exception as e:
+        logger.warning(f"Failed to send merge metrics: {e}")
+
+
+def lambda_handler(event, context):
+    """
+    Main Lambda handler for deferred partition merges.
+
+    Expected event structure (all keys optional):
+    {
+        "tables": ["companies", "tickets"],
+        "max_partitions": 20,
+        "max_seconds": 600
+    }
+    """
+    event = event or {}
+    logger.info(f"ClickHouse Merge Scheduler starting")
+    logger.info(f"Event: {json.dumps(event, default=str)}")
+
+    try:
+        tables = get_target_tables(event)
+
+        # Leave a margin so the last OPTIMIZE can finish within the Lambda timeout
+        max_seconds = float(event.get('max_seconds', os.environ.get('MERGE_MAX_SECONDS', DEFAULT_MAX_SECONDS_PER_RUN)))
+        if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+            max_seconds = min(max_seconds, context.get_remaining_time_in_millis() / 1000 * 0.5)
+
+        clickhouse = ClickHouseClient.from_environment()
+        scheduler = MergeScheduler(
+            clickhouse.client,
+            max_partitions_per_run=int(event.get('max_partitions',
+                                                 os.environ.get('MERGE_MAX_PARTITIONS', DEFAULT_MAX_PARTITIONS_PER_RUN))),
+            max_seconds_per_run=max_seconds,
+            max_running_merges=int(os.environ.get('MERGE_MAX_RUNNING_MERGES', DEFAULT_MAX_RUNNING_MERGES))
+        )
+
+        try:
+            views = ensure_final_views(clickhouse.client, tables)
+        except Exception as e:
+            logger.warning(f"Failed to create FINAL views: {e}")
+            views = []
+        summary = scheduler.run(tables)
+        summary['final_views'] = views
+        send_merge_metrics(summary)
+        clickhouse.close()
+
+        logger.info(f"✅ Merged {summary['partitions_optimized']} partitions in {summary['duration_seconds']}s "
+                    f"({summary['partitions_pending']} pending, {summary['partitions_failed']} failed)")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps(summary, default=str)
+        }
+
+    except Exception as e:
+        logger.error(f"Merge scheduler failed: {str(e)}", exc_info=True)
+        return {
+            'statusCode': 500,
+            'body': json.dumps({
+                'error': str(e),
+                'message': 'Failed to run merge scheduler'
+            })
+        }
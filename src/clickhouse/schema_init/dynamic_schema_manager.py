@@ -19,6 +19,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'shared')
 
 from canonical_schema import CanonicalSchemaManager, CanonicalFieldTypeMapper
 
+try:
+    from shared.schema_cache import get_client_database, invalidate_table_schema
+except ImportError:
+    from schema_cache import get_client_database, invalidate_table_schema
+
 class DynamicClickHouseSchemaManager:
     """Manage ClickHouse schemas dynamically from canonical mappings"""
     
@@ -122,8 +127,9 @@ class DynamicClickHouseSchemaManager:
                 field_definitions.append(f"    {field_name} {field_type}")
             
             # Generate CREATE TABLE statement
+            columns_sql = ',\n'.join(field_definitions)
             create_sql = f"""CREATE TABLE IF NOT EXISTS {table_name} (
-{',\n'.join(field_definitions)}
+{columns_sql}
 )
 ENGINE = ReplacingMergeTree(last_updated)
 ORDER BY (tenant_id, id, last_updated)
@@ -171,9 +177,10 @@ SETTINGS index_granularity = 8192"""
                     field_type = self.determine_clickhouse_type(field_name, mapping)
                     field_definitions.append(f"    {field_name} {field_type}")
                 
+                columns_sql = ',\n'.join(field_definitions)
                 create_sql = f"""
 CREATE TABLE IF NOT EXISTS {table_name} (
-{',\n'.join(field_definitions)}
+{columns_sql}
 )
 ENGINE = ReplacingMergeTree(last_updated)
 ORDER BY (tenant_id, id, last_updated)
@@ -182,6 +189,7 @@ SETTINGS index_granularity = 8192
             
             # Execute CREATE TABLE
             self.client.query(create_sql)
+            invalidate_table_schema(table_name, get_client_database(self.client))
             print(f"✅ Successfully created table {table_name}")
             return True
             
@@ -203,6 +211,7 @@ SETTINGS index_granularity = 8192
             print(f"Dropping table {table_name}...")
             drop_sql = f"DROP TABLE IF EXISTS {table_name}"
             self.client.query(drop_sql)
+            invalidate_table_schema(table_name, get_client_database(self.client))
             print(f"✅ Successfully dropped table {table_name}")
             return True
             
@@ -260,16 +269,20 @@ SETTINGS index_granularity = 8192
             
             # Add missing columns
             mapping = self.load_canonical_mapping(table_name)
-            for field_name in sorted(missing_fields):
-                field_type = self.determine_clickhouse_type(field_name, mapping)
-                alter_sql = f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {field_name} {field_type}"
-                
-                try:
-                    self.client.query(alter_sql)
-                    print(f"    ✅ Added column: {field_name}")
-                except Exception as e:
-                    print(f"    ❌ Failed to add column {field_name}: {e}")
-                    return False
+            try:
+                for field_name in sorted(missing_fields):
+                    field_type = self.determine_clickhouse_type(field_name, mapping)
+                    alter_sql = f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {field_name} {field_type}"
+                    
+                    try:
+                        self.client.query(alter_sql)
+                        print(f"    ✅ Added column: {field_name}")
+                    except Exception as e:
+                        print(f"    ❌ Failed to add column {field_name}: {e}")
+                        return False
+            finally:
+                # Loaders in this container must not keep inserting against the old column list
+                invalidate_table_schema(table_name, get_client_database(self.client))
             
             print(f"✅ Successfully updated table {table_name}")
             return True
@@ -14,6 +14,7 @@ from typing import Dict, Any
 from shared.config_simple import Config
 from shared.logger import PipelineLogger
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client
+from shared.metrics_emitter import publish_metrics
 from shared.utils import get_timestamp
 
 
@@ -136,10 +137,7 @@ class CompletionNotifier:
                         'Unit': 'Count/Second'
                     })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline/Notifications',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline/Notifications', metrics, cloudwatch_client=self.cloudwatch)
             
         except Exception as e:
             self.logger.warning(f"Failed to send notification metrics: {str(e)}")
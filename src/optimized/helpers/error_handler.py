@@ -14,6 +14,7 @@ from typing import Dict, Any
 from shared.config_simple import Config
 from shared.logger import PipelineLogger
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client
+from shared.metrics_emitter import publish_metrics
 from shared.utils import get_timestamp
 
 
@@ -147,17 +148,13 @@ class ErrorHandler:
                 metrics.append({
                     'MetricName': 'JobFailed',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'Environment', 'Value': self.config.environment}
                     ],
                     'Value': 1,
                     'Unit': 'Count'
                 })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline/Errors',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline/Errors', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send error metrics: {str(e)}")
@@ -13,10 +13,18 @@ from typing import Dict, List, Any, Optional
 # Import shared modules from root shared directory
 from shared.config_simple import Config
 from shared.logger import PipelineLogger
-from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client
+from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client, get_s3_client
+from shared.metrics_emitter import publish_metrics
+from shared.chunk_manifest import iter_job_chunks, manifest_keys, read_manifest
+from shared.dynamodb_access import projection_arguments
 from shared.canonical_mapper import CanonicalMapper
 from shared.utils import get_timestamp
 
+# ChunkProgress attributes needed to collect a job's files
+CHUNK_MANIFEST_ATTRIBUTES = (
+    'chunk_id', 'tenant_id', 'table_name', 'status', 'service_name', 's3_manifest', 's3_manifest_key'
+)
+
 
 class ResultAggregator:
     """Aggregates results from pipeline execution."""
@@ -26,6 +34,7 @@ class ResultAggregator:
         self.logger = PipelineLogger("result-aggregator")
         self.dynamodb = get_dynamodb_client()
         self.cloudwatch = get_cloudwatch_client()
+        self.s3_client = get_s3_client()
         
         # Initialize Lambda client for canonical transformation triggering
         self.lambda_client = boto3.client('lambda', region_name='us-east-2')
@@ -260,17 +269,13 @@ class ResultAggregator:
                 metrics.append({
                     'MetricName': 'JobCompleted',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'Environment', 'Value': self.config.environment}
                     ],
                     'Value': 1,
                     'Unit': 'Count'
                 })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline/Completion',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline/Completion', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send completion metrics: {str(e)}")
@@ -328,27 +333,23 @@ class ResultAggregator:
         except Exception as e:
             self.logger.error(f"Failed to trigger canonical transforms: {str(e)}", job_id=job_id)
 
-    def _collect_s3_files_by_table(self, job_id: str) -> Dict[tuple, List[str]]:
+    def _collect_s3_files_by_table(self, job_id: str) -> Dict[str, List[str]]:
         """
-        Collect S3 files from chunk progress data, grouped by table.
+        Collect S3 files from chunk manifests, grouped by table.
         
         Args:
             job_id: Processing job identifier
             
         Returns:
-            Dictionary mapping (tenant_id, service_name, table_name) to list of S3 files
+            Dictionary mapping "tenant_id:service_name:table_name" to list of S3 files
         """
         try:
             table_files = {}
+            chunks_without_manifest = []
             
-            # Query chunk progress table for all chunks of this job
-            response = self.dynamodb.query(
-                TableName=self.chunk_progress_table,
-                KeyConditionExpression='job_id = :job_id',
-                ExpressionAttributeValues={':job_id': {'S': job_id}}
-            )
-            
-            for item in response.get('Items', []):
+            # Query chunk progress table for all chunks of this job, across all result pages
+            for item in iter_job_chunks(self.dynamodb, self.chunk_progress_table, job_id,
+                                        **projection_arguments(CHUNK_MANIFEST_ATTRIBUTES)):
                 # Extract chunk metadata
                 chunk_id = item.get('chunk_id', {}).get('S', '')
                 tenant_id = item.get('tenant_id', {}).get('S', '')
@@ -359,19 +360,29 @@ class ResultAggregator:
                 if status != 'completed':
                     continue
                 
-                # Get S3 files from chunk results (stored in DynamoDB or extract from chunk_id)
+                # Get S3 files from the manifest the chunk processor stored with the chunk
                 s3_files = self._extract_s3_files_from_chunk(item, job_id)
+                if s3_files is None:
+                    chunks_without_manifest.append(chunk_id)
+                    continue
                 
                 if s3_files:
                     # Derive service_name from chunk data or use default mapping
                     service_name = self._derive_service_name_from_chunk(item, table_name)
                     
-                    table_key = (tenant_id, service_name, table_name)
+                    table_key = f"{tenant_id}:{service_name}:{table_name}"
                     if table_key not in table_files:
                         table_files[table_key] = []
                     
                     table_files[table_key].extend(s3_files)
             
+            if chunks_without_manifest:
+                self.logger.warning(
+                    f"Skipped {len(chunks_without_manifest)} completed chunks without a file manifest",
+                    job_id=job_id,
+                    chunk_ids=chunks_without_manifest
+                )
+            
             self.logger.info(
                 f"Collected S3 files for {len(table_files)} tables",
                 job_id=job_id,
@@ -384,49 +395,30 @@ class ResultAggregator:
             self.logger.error(f"Failed to collect S3 files by table: {str(e)}", job_id=job_id)
             return {}
 
-    def _extract_s3_files_from_chunk(self, chunk_item: Dict[str, Any], job_id: str) -> List[str]:
+    def _extract_s3_files_from_chunk(self, chunk_item: Dict[str, Any], job_id: str) -> Optional[List[str]]:
         """
-        Extract S3 file paths from chunk data.
+        Extract the S3 file paths a chunk wrote from its manifest.
         
         Args:
             chunk_item: DynamoDB chunk item
             job_id: Processing job identifier
             
         Returns:
-            List of S3 file keys
+            List of S3 file keys, or None if the chunk has no readable manifest
         """
         try:
-            # S3 files might be stored in chunk progress or derived from chunk_id
-            chunk_id = chunk_item.get('chunk_id', {}).get('S', '')
-            tenant_id = chunk_item.get('tenant_id', {}).get('S', '')
-            table_name = chunk_item.get('table_name', {}).get('S', '')
-            
-            if not chunk_id or not tenant_id or not table_name:
-                return []
-            
-            # Derive service name from table mapping
-            service_name = self._derive_service_name_from_chunk(chunk_item, table_name)
-            
-            # For now, we'll derive S3 files from the chunk_id pattern
-            # In practice, this should be stored in the chunk progress record
-            s3_files = []
-            
-            # Construct expected S3 file pattern based on chunk processor logic
-            # Pattern: raw/{tenant_id}/{service_name}/{table_name}/YYYY/MM/DD/{chunk_id}_batch{N}.parquet
-            from datetime import datetime
-            today = datetime.now()
-            date_path = f"{today.year:04d}/{today.month:02d}/{today.day:02d}"
-            
-            # For simplicity, assume 1-3 batch files per chunk (this should be tracked better)
-            for batch_num in range(1, 4):  # Most chunks will have 1-3 batches
-                s3_key = f"raw/{tenant_id}/{service_name}/{table_name}/{date_path}/{chunk_id}_batch{batch_num:03d}.parquet"
-                s3_files.append(s3_key)
-            
-            return s3_files
+            manifest = read_manifest(chunk_item, self.s3_client, self.config.bucket_name)
+            if manifest is None:
+                return None
+            return manifest_keys(manifest)
             
         except Exception as e:
-            self.logger.warning(f"Failed to extract S3 files from chunk: {str(e)}")
-            return []
+            self.logger.warning(
+                f"Failed to read file manifest of chunk: {str(e)}",
+                job_id=job_id,
+                chunk_id=chunk_item.get('chunk_id', {}).get('S', '')
+            )
+            return None
 
     def _derive_service_name_from_chunk(self, chunk_item: Dict[str, Any], table_name: str) -> str:
         """
@@ -439,8 +431,10 @@ class ResultAggregator:
         Returns:
             Service name
         """
-        # This is a simplified derivation - in practice should be stored in chunk metadata
-        # or derived from a mapping table
+        # Chunks record the service they fetched from; older chunks fall back to the table mapping
+        service_name = chunk_item.get('service_name', {}).get('S')
+        if service_name:
+            return service_name
         
         # Common table to service mappings
         table_service_mapping = {
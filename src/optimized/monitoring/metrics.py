@@ -3,6 +3,9 @@ CloudWatch Metrics Module
 
 Provides centralized metrics collection and reporting for the optimized
 AVESA data pipeline with custom metrics and performance tracking.
+
+Metrics are published with the backend selected by METRICS_BACKEND: EMF log
+lines aggregated per invocation (default) or PutMetricData calls.
 """
 
 import time
@@ -21,6 +24,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 try:
     from logger import PipelineLogger
     from aws_clients import get_cloudwatch_client
+    from metrics_emitter import METRICS_BACKEND_API, create_metrics_emitter, get_metrics_backend
 except ImportError as e:
     print(f"Import error: {e}")
 
@@ -30,10 +34,11 @@ class MetricsCollector:
     
     def __init__(self, namespace: str = "AVESA/DataPipeline"):
         self.namespace = namespace
-        self.cloudwatch = get_cloudwatch_client()
+        self.backend = get_metrics_backend()
+        # The EMF backend writes to stdout and needs no CloudWatch client
+        self.cloudwatch = get_cloudwatch_client() if self.backend == METRICS_BACKEND_API else None
         self.logger = PipelineLogger("metrics-collector")
-        self._metric_buffer = []
-        self._buffer_size = 20  # CloudWatch limit is 20 metrics per request
+        self.emitter = create_metrics_emitter(namespace, self.cloudwatch, self.backend)
     
     def record_pipeline_initialization(
         self, 
@@ -378,34 +383,19 @@ class MetricsCollector:
         self._add_metrics_to_buffer(metrics)
     
     def _add_metrics_to_buffer(self, metrics: List[Dict[str, Any]]):
-        """Add metrics to buffer and flush if needed."""
-        self._metric_buffer.extend(metrics)
-        
-        if len(self._metric_buffer) >= self._buffer_size:
-            self.flush_metrics()
+        """Add metrics to the emitter (aggregated until flush for EMF, sent in 20s for the API)."""
+        try:
+            self.emitter.put_metric_data(metrics)
+        except Exception as e:
+            self.logger.error(f"Failed to send metrics to CloudWatch: {str(e)}")
     
     def flush_metrics(self):
-        """Flush all buffered metrics to CloudWatch."""
-        if not self._metric_buffer:
-            return
-        
+        """Flush all buffered metrics."""
         try:
-            # Send metrics in batches
-            while self._metric_buffer:
-                batch = self._metric_buffer[:self._buffer_size]
-                self._metric_buffer = self._metric_buffer[self._buffer_size:]
-                
-                self.cloudwatch.put_metric_data(
-                    Namespace=self.namespace,
-                    MetricData=batch
-                )
-                
-                self.logger.debug(f"Sent {len(batch)} metrics to CloudWatch")
-            
+            self.emitter.flush()
+            self.logger.debug(f"Flushed metrics with the {self.backend} backend")
         except Exception as e:
             self.logger.error(f"Failed to send metrics to CloudWatch: {str(e)}")
-            # Clear buffer to prevent memory issues
-            self._metric_buffer.clear()
     
     def __del__(self):
         """Ensure metrics are flushed when object is destroyed."""
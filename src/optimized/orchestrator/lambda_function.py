@@ -4,6 +4,7 @@ Pipeline Orchestrator Lambda Function
 """
 
 import json
+import math
 import os
 import uuid
 from datetime import datetime, timezone
@@ -20,7 +21,18 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from shared.config_simple import Config, TenantConfig
 from shared.logger import PipelineLogger
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client
+from shared.metrics_emitter import publish_metrics
+from shared.dynamodb_access import paginate, parallel_scan, projection_arguments
+from shared.id_sharding import SHARDABLE_SERVICES, get_max_id_shards, shard_chunk_id
+from shared.record_estimator import estimate_duration_seconds, load_estimate
 from shared.utils import get_timestamp
+from shared.watermark import format_watermark, load_watermark
+
+# Segments of the parallel tenant discovery scan
+TENANT_SCAN_SEGMENTS = int(os.environ.get('TENANT_SCAN_SEGMENTS', '4'))
+
+# Tenant service attributes used by _format_tenant_config
+TENANT_SERVICE_ATTRIBUTES = ('tenant_id', 'service', 'enabled', 'config')
 
 
 class PipelineOrchestrator:
@@ -335,27 +347,32 @@ class PipelineOrchestrator:
         try:
             if tenant_id:
                 # Process specific tenant
-                response = self.dynamodb.query(
+                items = list(paginate(
+                    self.dynamodb.query,
                     TableName=self.config.tenant_services_table,
                     KeyConditionExpression='tenant_id = :tenant_id',
-                    ExpressionAttributeValues={':tenant_id': {'S': tenant_id}}
-                )
+                    ExpressionAttributeValues={':tenant_id': {'S': tenant_id}},
+                    **projection_arguments(TENANT_SERVICE_ATTRIBUTES)
+                ))
                 
-                if not response.get('Items'):
+                if not items:
                     raise ValueError(f"Tenant {tenant_id} not found")
                 
-                return [self._format_tenant_config(response['Items'])]
+                return [self._format_tenant_config(items)]
             else:
-                # Process all enabled tenants
-                response = self.dynamodb.scan(
+                # Process all enabled tenants, reading every page of every scan segment
+                enabled_items = parallel_scan(
+                    self.dynamodb.scan,
+                    total_segments=TENANT_SCAN_SEGMENTS,
                     TableName=self.config.tenant_services_table,
                     FilterExpression='attribute_exists(enabled) AND enabled = :enabled',
-                    ExpressionAttributeValues={':enabled': {'BOOL': True}}
+                    ExpressionAttributeValues={':enabled': {'BOOL': True}},
+                    **projection_arguments(TENANT_SERVICE_ATTRIBUTES)
                 )
                 
                 # Group by tenant_id
                 tenants_by_id = {}
-                for item in response.get('Items', []):
+                for item in enabled_items:
                     tid = item['tenant_id']['S']
                     if tid not in tenants_by_id:
                         tenants_by_id[tid] = []
@@ -481,7 +498,7 @@ class PipelineOrchestrator:
                         # Try to find canonical table for this specific table
                         canonical_table = get_canonical_table_for_endpoint(service_name, table_name)
                         base_time = canonical_estimates.get(canonical_table, 180)  # Default 3 minutes
-                        total_time += base_time
+                        total_time += self._estimate_table_seconds(tenant.get('tenant_id'), table_name, base_time)
                 
                 return total_time if total_time > 0 else 180 * len(tenants)
             else:
@@ -503,7 +520,11 @@ class PipelineOrchestrator:
                                     from shared.utils import get_service_tables_for_canonical
                                     service_tables = get_service_tables_for_canonical(canonical_table)
                                     if service_name in service_tables:
-                                        tenant_time += canonical_estimates.get(canonical_table, 180)
+                                        tenant_time += self._estimate_table_seconds(
+                                            tenant.get('tenant_id'),
+                                            canonical_table,
+                                            canonical_estimates.get(canonical_table, 180)
+                                        )
                                 except:
                                     pass
                     
@@ -525,6 +546,20 @@ class PipelineOrchestrator:
             else:
                 return base_time * len(tenants) * 4  # Assume 4 tables per tenant
     
+    def _estimate_table_seconds(self, tenant_id: Optional[str], table_name: str, default_seconds: int) -> int:
+        """
+        Forecast a table's processing time from its latest record estimate.
+        
+        Estimates are stored per tenant and table by the chunk processor when it
+        plans a sync; tables never estimated keep the default.
+        """
+        try:
+            estimate = load_estimate(self.dynamodb, self.config.last_updated_table, tenant_id, table_name, any_window=True)
+        except Exception as e:
+            self.logger.warning(f"Failed to read record estimate for {tenant_id}/{table_name}: {str(e)}")
+            estimate = None
+        return estimate_duration_seconds(estimate) if estimate else default_seconds
+    
     def _get_state_machine_arn(self) -> str:
         """Get Step Functions state machine ARN at runtime."""
         try:
@@ -619,6 +654,9 @@ class PipelineOrchestrator:
                 canonical_tables = [table_name]
                 self.logger.info(f"🎯 SINGLE-TABLE MODE: Processing specific table: {table_name}")
             
+            # Full syncs fetch every record; other syncs fetch only records changed since each table's watermark
+            full_sync = bool(event.get('backfill_mode')) or event.get('source') == 'manual_backfill'
+            
             # Process each table for each tenant
             chunk_counter = 0
             for i, tenant in enumerate(tenants):
@@ -652,24 +690,35 @@ class PipelineOrchestrator:
                                        table_name=current_table,
                                        event_limit=event.get('record_limit'))
                         
+                        # Captured before any record is fetched; becomes the next watermark once the table's sync commits
+                        sync_started_at = format_watermark(datetime.now(timezone.utc))
+                        incremental_field = self._get_incremental_field(service_config['service_name'], service_config['endpoint'])
+                        incremental_since = None
+                        if incremental_field and not full_sync:
+                            incremental_since = self._get_watermark(tenant_id, current_table)
+                        
                         chunk_payload = {
                             "chunk_config": {
                                 "chunk_id": unique_chunk_id,  # Use the pre-calculated unique chunk_id
                                 "tenant_id": tenant_id,
                                 "table_name": current_table,
                                 "start_offset": 0,
-                                "end_offset": 999999,  # Large range for full sync
+                                "end_offset": None,  # Read to the end of the data
                                 "estimated_records": record_limit,  # Use actual limit from trigger
                                 "record_limit": record_limit,  # Add explicit record limit
                                 "page_size": 1000,  # Use higher page size for pagination fix
-                                "offset": 0
+                                "offset": 0,
+                                "incremental_since": incremental_since,
+                                # Advanced by the chunk processor only after the whole table has been fetched
+                                "next_watermark": sync_started_at
                             },
                             "table_config": {
                                 "table_name": current_table,
                                 "service_name": service_config['service_name'],
                                 "endpoint": service_config['endpoint'],
                                 "credentials": service_config['credentials'],
-                                "page_size": service_config.get('page_size', 1000)
+                                "page_size": service_config.get('page_size', 1000),
+                                "incremental_field": incremental_field
                             },
                             "tenant_config": {
                                 "tenant_id": tenant_id,
@@ -678,130 +727,18 @@ class PipelineOrchestrator:
                             "job_id": job_id
                         }
                         
-                        chunk_counter += 1
-                        
-                        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Invoking chunk processor for tenant {tenant_id}",
-                                       function_name=chunk_processor_function,
-                                       invocation_type='RequestResponse')
-                        
-                        # Invoke chunk processor asynchronously
-                        import time
-                        invoke_start_time = time.time()
-                        
-                        self.logger.info(f"🚀 ORCHESTRATOR DEBUG: About to invoke chunk processor",
-                                       function_name=chunk_processor_function,
-                                       payload_size=len(json.dumps(chunk_payload)),
-                                       tenant_id=tenant_id,
-                                       unique_chunk_id=unique_chunk_id,
-                                       iteration_number=i+1,
-                                       total_tenants=len(tenants))
-                        
-                        # CRITICAL DEBUG: This is where the actual Lambda invocation happens
-                        self.logger.info(f"🚨 INVOCATION POINT: Invoking chunk processor NOW for {unique_chunk_id}")
-                        
-                        # Use asynchronous invocation with completion callback mechanism
-                        response = lambda_client.invoke(
-                            FunctionName=chunk_processor_function,
-                            InvocationType='Event',  # Asynchronous to prevent timeouts
-                            Payload=json.dumps(chunk_payload)
-                        )
-                        
-                        # CRITICAL DEBUG: Log immediately after invocation
-                        self.logger.info(f"✅ INVOCATION COMPLETE: Chunk processor invoked asynchronously for {unique_chunk_id}")
-                        
-                        invoke_duration = time.time() - invoke_start_time
-                        
-                        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Async Lambda invoke completed",
-                                       status_code=response.get('StatusCode'),
-                                       function_error=response.get('FunctionError'),
-                                       executed_version=response.get('ExecutedVersion'),
-                                       invoke_duration_seconds=invoke_duration)
-                        
-                        # Check for Lambda execution errors
-                        if response.get('FunctionError'):
-                            self.logger.error(f"🚨 ORCHESTRATOR DEBUG: Lambda function error detected",
-                                            function_error=response.get('FunctionError'),
-                                            status_code=response.get('StatusCode'))
-                            raise Exception(f"Chunk processor invocation failed: {response.get('FunctionError')}")
-                        
-                        # For asynchronous invocations, we don't get payload response immediately
-                        # Instead, we'll track the job in DynamoDB and the chunk processor will trigger result aggregator when done
-                        self.logger.info(f"📊 ORCHESTRATOR DEBUG: Chunk processor invoked asynchronously, tracking job {unique_chunk_id}")
-                        
-                        # Create chunk tracking record in DynamoDB for callback mechanism
-                        chunk_record = {
-                            'job_id': {'S': job_id},
-                            'chunk_id': {'S': unique_chunk_id},
-                            'tenant_id': {'S': tenant_id},
-                            'table_name': {'S': current_table},
-                            'status': {'S': 'processing'},
-                            'processing_mode': {'S': 'async_chunk'},
-                            'created_at': {'S': get_timestamp()},
-                            'updated_at': {'S': get_timestamp()}
-                        }
-                        
-                        try:
-                            self.dynamodb.put_item(
-                                TableName=self.chunk_progress_table,
-                                Item=chunk_record
+                        # Large full syncs are split into id ranges pulled by parallel chunk processors
+                        for shard_payload in self._shard_chunk_payload(lambda_client, chunk_processor_function, chunk_payload):
+                            chunk_counter += 1
+                            self._dispatch_chunk(
+                                lambda_client,
+                                chunk_processor_function,
+                                shard_payload,
+                                job_id,
+                                tenant_id,
+                                current_table
                             )
-                            self.logger.info(f"📊 ORCHESTRATOR DEBUG: Created chunk tracking record for {unique_chunk_id}")
-                        except Exception as db_error:
-                            self.logger.error(f"Failed to create chunk tracking record: {str(db_error)}")
-                            # Continue processing even if tracking fails
-                        
-                        # For async processing, we'll assume successful invocation
-                        # The chunk processor will trigger result aggregator directly when complete
                         processed_tenants += 1
-                        response_payload = {
-                            'status': 'processing_async',
-                            'records_processed': 0,  # Will be updated by chunk processor
-                            'chunk_id': unique_chunk_id
-                        }
-                        
-                        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Complete response payload: {response_payload}")
-                        
-                        # For async processing, validate invocation success (not final processing results)
-                        if response.get('StatusCode') == 202:
-                            self.logger.info(f"✅ ORCHESTRATOR DEBUG: Async invocation successful for tenant {tenant_id} table {current_table}")
-                            
-                            # Create job tracking record for async invocation
-                            job_record = {
-                                'job_id': {'S': job_id},
-                                'tenant_id': {'S': tenant_id},
-                                'status': {'S': 'processing'},  # Will be updated by chunk processor
-                                'table_name': {'S': current_table},
-                                'records_processed': {'N': '0'},  # Will be updated by chunk processor
-                                'processing_mode': {'S': 'async_backfill'},
-                                'chunk_id': {'S': unique_chunk_id},
-                                'created_at': {'S': get_timestamp()},
-                                'updated_at': {'S': get_timestamp()}
-                            }
-                        else:
-                            # Handle invocation failure (not processing failure)
-                            error_msg = f"Chunk processor invocation failed - Status: {response.get('StatusCode')}, Error: {response.get('FunctionError', 'Unknown')}"
-                            self.logger.error(f"❌ INVOCATION FAILED: {error_msg} for tenant {tenant_id} table {current_table}")
-                            
-                            job_record = {
-                                'job_id': {'S': job_id},
-                                'tenant_id': {'S': tenant_id},
-                                'status': {'S': 'invocation_failed'},
-                                'table_name': {'S': current_table},
-                                'records_processed': {'N': '0'},
-                                'processing_mode': {'S': 'async_backfill'},
-                                'error_message': {'S': error_msg},
-                                'created_at': {'S': get_timestamp()},
-                                'updated_at': {'S': get_timestamp()},
-                                'failed_at': {'S': get_timestamp()}
-                            }
-                        
-                        # Store job record in DynamoDB
-                        self.dynamodb.put_item(
-                            TableName=self.processing_jobs_table,
-                            Item=job_record
-                        )
-                        
-                        self.logger.info(f"Created job record for tenant {tenant_id} table {current_table}")
                         
                     except Exception as e:
                         self.logger.error(f"Failed to process tenant {tenant_id} table {current_table}: {str(e)}")
@@ -847,24 +784,238 @@ class PipelineOrchestrator:
             self.logger.error(f"Pipeline workflow execution failed: {str(e)}")
             raise
 
+    def _shard_chunk_payload(
+        self,
+        lambda_client,
+        chunk_processor_function: str,
+        chunk_payload: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Split a table's chunk into id-range chunks extracted in parallel.
+        
+        The chunk processor probes the table's id bounds and plans the ranges
+        (a synchronous planning invocation). Record-limited runs, incremental
+        syncs, services without id filters and failed plans keep the single
+        unsharded chunk. Shards share a shard_group, and the table's watermark
+        advances only once every shard of the group has completed.
+        """
+        chunk_config = chunk_payload['chunk_config']
+        table_config = chunk_payload['table_config']
+        service_name = table_config.get('service_name', '').lower()
+        if (chunk_config.get('record_limit') or chunk_config.get('incremental_since')
+                or service_name not in SHARDABLE_SERVICES or get_max_id_shards() <= 1):
+            return [chunk_payload]
+        
+        try:
+            response = lambda_client.invoke(
+                FunctionName=chunk_processor_function,
+                InvocationType='RequestResponse',
+                Payload=json.dumps({
+                    'action': 'plan_id_shards',
+                    'table_config': table_config,
+                    'tenant_id': chunk_payload['tenant_config']['tenant_id']
+                })
+            )
+            plan = json.loads(response['Payload'].read())
+            if response.get('FunctionError') or plan.get('status') != 'planned':
+                raise ValueError(plan.get('errorMessage') or plan.get('error') or 'no shard plan returned')
+        except Exception as e:
+            self.logger.warning(f"Failed to plan id shards for {table_config.get('table_name')}, using one chunk: {str(e)}")
+            return [chunk_payload]
+        
+        id_ranges = plan.get('id_ranges') or []
+        estimated_records = plan.get('estimated_records')
+        if len(id_ranges) <= 1:
+            if estimated_records is None:
+                return [chunk_payload]
+            return [dict(chunk_payload, chunk_config=dict(chunk_config, estimated_records=estimated_records))]
+        
+        self.logger.info(f"Sharding {table_config.get('table_name')} into {len(id_ranges)} id ranges",
+                       id_field=plan['id_field'],
+                       bounds=plan.get('bounds'))
+        return [
+            dict(chunk_payload, chunk_config=dict(
+                chunk_config,
+                chunk_id=shard_chunk_id(chunk_config['chunk_id'], index),
+                shard_group=chunk_config['chunk_id'],
+                id_field=plan['id_field'],
+                id_range=id_range,
+                shard_index=index,
+                shard_count=len(id_ranges),
+                estimated_records=math.ceil(estimated_records / len(id_ranges)) if estimated_records else None
+            ))
+            for index, id_range in enumerate(id_ranges)
+        ]
+    
+    def _get_incremental_field(self, service_name: str, endpoint: str) -> Optional[str]:
+        """Get the incremental field of an endpoint from the service's endpoint mapping."""
+        try:
+            from shared.utils import load_endpoint_configuration
+            endpoints = load_endpoint_configuration(service_name).get('endpoints', {})
+            return (endpoints.get(endpoint) or {}).get('incremental_field')
+        except Exception as e:
+            self.logger.warning(f"Failed to load endpoint configuration for {service_name}: {str(e)}")
+            return None
+    
+    def _get_watermark(self, tenant_id: str, table_name: str) -> Optional[str]:
+        """Get a table's incremental sync watermark; None runs a full sync."""
+        try:
+            return load_watermark(self.dynamodb, self.config.last_updated_table, tenant_id, table_name)
+        except Exception as e:
+            self.logger.warning(f"Failed to read watermark for {tenant_id}/{table_name}, running a full sync: {str(e)}")
+            return None
+    
+    def _dispatch_chunk(
+        self,
+        lambda_client,
+        chunk_processor_function: str,
+        chunk_payload: Dict[str, Any],
+        job_id: str,
+        tenant_id: str,
+        current_table: str
+    ):
+        """Invoke the chunk processor asynchronously for one chunk and record its tracking rows."""
+        unique_chunk_id = chunk_payload['chunk_config']['chunk_id']
+        
+        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Invoking chunk processor for tenant {tenant_id}",
+                       function_name=chunk_processor_function,
+                       invocation_type='RequestResponse')
+        
+        # Invoke chunk processor asynchronously
+        import time
+        invoke_start_time = time.time()
+        
+        self.logger.info(f"🚀 ORCHESTRATOR DEBUG: About to invoke chunk processor",
+                       function_name=chunk_processor_function,
+                       payload_size=len(json.dumps(chunk_payload)),
+                       tenant_id=tenant_id,
+                       unique_chunk_id=unique_chunk_id)
+        
+        # CRITICAL DEBUG: This is where the actual Lambda invocation happens
+        self.logger.info(f"🚨 INVOCATION POINT: Invoking chunk processor NOW for {unique_chunk_id}")
+        
+        # Use asynchronous invocation with completion callback mechanism
+        response = lambda_client.invoke(
+            FunctionName=chunk_processor_function,
+            InvocationType='Event',  # Asynchronous to prevent timeouts
+            Payload=json.dumps(chunk_payload)
+        )
+        
+        # CRITICAL DEBUG: Log immediately after invocation
+        self.logger.info(f"✅ INVOCATION COMPLETE: Chunk processor invoked asynchronously for {unique_chunk_id}")
+        
+        invoke_duration = time.time() - invoke_start_time
+        
+        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Async Lambda invoke completed",
+                       status_code=response.get('StatusCode'),
+                       function_error=response.get('FunctionError'),
+                       executed_version=response.get('ExecutedVersion'),
+                       invoke_duration_seconds=invoke_duration)
+        
+        # Check for Lambda execution errors
+        if response.get('FunctionError'):
+            self.logger.error(f"🚨 ORCHESTRATOR DEBUG: Lambda function error detected",
+                            function_error=response.get('FunctionError'),
+                            status_code=response.get('StatusCode'))
+            raise Exception(f"Chunk processor invocation failed: {response.get('FunctionError')}")
+        
+        # For asynchronous invocations, we don't get payload response immediately
+        # Instead, we'll track the job in DynamoDB and the chunk processor will trigger result aggregator when done
+        self.logger.info(f"📊 ORCHESTRATOR DEBUG: Chunk processor invoked asynchronously, tracking job {unique_chunk_id}")
+        
+        # Create chunk tracking record in DynamoDB for callback mechanism
+        chunk_record = {
+            'job_id': {'S': job_id},
+            'chunk_id': {'S': unique_chunk_id},
+            'tenant_id': {'S': tenant_id},
+            'table_name': {'S': current_table},
+            'status': {'S': 'processing'},
+            'processing_mode': {'S': 'async_chunk'},
+            'created_at': {'S': get_timestamp()},
+            'updated_at': {'S': get_timestamp()}
+        }
+        
+        try:
+            self.dynamodb.put_item(
+                TableName=self.chunk_progress_table,
+                Item=chunk_record
+            )
+            self.logger.info(f"📊 ORCHESTRATOR DEBUG: Created chunk tracking record for {unique_chunk_id}")
+        except Exception as db_error:
+            self.logger.error(f"Failed to create chunk tracking record: {str(db_error)}")
+            # Continue processing even if tracking fails
+        
+        # For async processing, we'll assume successful invocation
+        # The chunk processor will trigger result aggregator directly when complete
+        response_payload = {
+            'status': 'processing_async',
+            'records_processed': 0,  # Will be updated by chunk processor
+            'chunk_id': unique_chunk_id
+        }
+        
+        self.logger.info(f"🔧 ORCHESTRATOR DEBUG: Complete response payload: {response_payload}")
+        
+        # For async processing, validate invocation success (not final processing results)
+        if response.get('StatusCode') == 202:
+            self.logger.info(f"✅ ORCHESTRATOR DEBUG: Async invocation successful for tenant {tenant_id} table {current_table}")
+        
+            # Create job tracking record for async invocation
+            job_record = {
+                'job_id': {'S': job_id},
+                'tenant_id': {'S': tenant_id},
+                'status': {'S': 'processing'},  # Will be updated by chunk processor
+                'table_name': {'S': current_table},
+                'records_processed': {'N': '0'},  # Will be updated by chunk processor
+                'processing_mode': {'S': 'async_backfill'},
+                'chunk_id': {'S': unique_chunk_id},
+                'created_at': {'S': get_timestamp()},
+                'updated_at': {'S': get_timestamp()}
+            }
+        else:
+            # Handle invocation failure (not processing failure)
+            error_msg = f"Chunk processor invocation failed - Status: {response.get('StatusCode')}, Error: {response.get('FunctionError', 'Unknown')}"
+            self.logger.error(f"❌ INVOCATION FAILED: {error_msg} for tenant {tenant_id} table {current_table}")
+        
+            job_record = {
+                'job_id': {'S': job_id},
+                'tenant_id': {'S': tenant_id},
+                'status': {'S': 'invocation_failed'},
+                'table_name': {'S': current_table},
+                'records_processed': {'N': '0'},
+                'processing_mode': {'S': 'async_backfill'},
+                'error_message': {'S': error_msg},
+                'created_at': {'S': get_timestamp()},
+                'updated_at': {'S': get_timestamp()},
+                'failed_at': {'S': get_timestamp()}
+            }
+        
+        # Store job record in DynamoDB
+        self.dynamodb.put_item(
+            TableName=self.processing_jobs_table,
+            Item=job_record
+        )
+        
+        self.logger.info(f"Created job record for tenant {tenant_id} table {current_table}")
+    
     def _get_service_config_for_table(self, tenant: Dict[str, Any], table_name: str) -> Optional[Dict[str, Any]]:
         """Get service configuration including credentials for a specific table."""
         try:
             tenant_id = tenant['tenant_id']
             
             # Get all services for this tenant from DynamoDB
-            response = self.dynamodb.query(
+            items = list(paginate(
+                self.dynamodb.query,
                 TableName=self.config.tenant_services_table,
                 KeyConditionExpression='tenant_id = :tenant_id',
                 ExpressionAttributeValues={':tenant_id': {'S': tenant_id}}
-            )
+            ))
             
-            if not response.get('Items'):
+            if not items:
                 self.logger.warning(f"No services found for tenant {tenant_id}")
                 return None
             
             # Look through the services to find one that can handle this table
-            for item in response['Items']:
+            for item in items:
                 service_name = item.get('service', {}).get('S', '')
                 secret_name = item.get('secret_name', {}).get('S', '')
                 enabled = item.get('enabled', {}).get('BOOL', False)
@@ -987,7 +1138,6 @@ class PipelineOrchestrator:
                 {
                     'MetricName': 'PipelineInitialized',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'ProcessingMode', 'Value': processing_mode}
                     ],
                     'Value': 1,
@@ -995,18 +1145,13 @@ class PipelineOrchestrator:
                 },
                 {
                     'MetricName': 'TenantCount',
-                    'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id}
-                    ],
+                    'Dimensions': [],
                     'Value': tenant_count,
                     'Unit': 'Count'
                 }
             ]
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send initialization metrics: {str(e)}")
@@ -8,13 +8,13 @@ Updated: 2025-07-01 20:36 - Fixed batch_records initialization issue
 """
 
 import json
+import math
 import time
 import gc
-import urllib.request
 import urllib.parse
 import urllib.error
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 
 import boto3
 from botocore.exceptions import ClientError
@@ -22,8 +22,61 @@ from botocore.exceptions import ClientError
 # Import shared modules from root shared directory
 from shared.config_simple import Config
 from shared.logger import PipelineLogger
+from shared.memory_usage import get_memory_usage_mb
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client, get_s3_client
+from shared.metrics_emitter import publish_metrics
 from shared.utils import get_timestamp, get_s3_key
+from shared.page_fetcher import PipelinedPageFetcher
+from shared.http_pool import HTTPSession, get_http_session
+from shared.json_stream import PARSE_MODE_STREAMING, get_response_parsing_mode, iter_json_records
+from shared.rate_limiter import RateLimitPause, RequestScheduler, get_request_scheduler
+from shared.chunk_manifest import build_manifest, manifest_attributes, manifest_keys
+from shared.id_sharding import (
+    id_range_filter,
+    id_range_from_dict,
+    id_range_to_dict,
+    merge_filters,
+    plan_id_shards,
+    probe_id_bounds,
+    shards_completed
+)
+from shared.record_estimator import (
+    RecordEstimate,
+    cache_estimate,
+    estimate_records,
+    estimate_to_dict,
+    get_cached_estimate,
+    get_estimate_ttl_seconds,
+    load_estimate,
+    store_estimate
+)
+from shared.cursor_pagination import (
+    PAGINATION_OFFSET,
+    CursorPaginationError,
+    PageCursor,
+    get_cursor_field,
+    get_pagination_strategy
+)
+from shared.chunk_checkpoint import (
+    CHECKPOINT_ATTRIBUTE,
+    LEASE_ATTRIBUTE,
+    LEASE_GRACE_SECONDS,
+    LEASED_STATUSES,
+    RESUMABLE_STATUSES,
+    ChunkCheckpoint,
+    ChunkCursor,
+    ChunkLeaseHeld,
+    DurableCursorTracker,
+    cursor_to_attribute,
+    get_checkpoint_bytes,
+    get_checkpoint_rows,
+    get_max_chunk_continuations,
+    lease_attributes,
+    load_checkpoint
+)
+from shared.chunk_sizing import outcome_from_result, record_chunk_outcome
+from shared.progress_recorder import ProgressRecorder
+from shared.watermark import advance_watermark, build_incremental_params, get_incremental_field
 
 # Define ServiceCredentials class for API authentication
 import base64
@@ -40,6 +93,31 @@ class ServiceCredentials:
         return cls(**data)
     
     def get_auth_header(self):
+        """Get the authentication header, built once per credentials object."""
+        if '_auth_header' not in self.__dict__:
+            self._auth_header = self._build_auth_header()
+        return self._auth_header
+    
+    def get_request_headers(self):
+        """Get the static request headers (content type, auth, client id), built once."""
+        if '_request_headers' not in self.__dict__:
+            headers = {
+                'Content-Type': 'application/json'
+            }
+            
+            # Add authentication header
+            auth_header = self.get_auth_header()
+            if auth_header:
+                headers['Authorization'] = auth_header
+            
+            # Add service-specific headers
+            if getattr(self, 'client_id', None):
+                headers['ClientId'] = self.client_id
+            
+            self._request_headers = headers
+        return self._request_headers
+    
+    def _build_auth_header(self):
         """Generate authentication header based on service type."""
         # ConnectWise-style authentication
         if hasattr(self, 'company_id') and hasattr(self, 'public_key') and hasattr(self, 'private_key'):
@@ -101,9 +179,11 @@ class ChunkProcessor:
             True if memory cleanup was triggered, False otherwise
         """
         try:
-            import psutil
-            process = psutil.Process()
-            memory_mb = process.memory_info().rss / 1024 / 1024
+            memory_mb = get_memory_usage_mb()
+            if memory_mb is None:
+                # psutil not available, skip memory monitoring
+                self.logger.warning("psutil not available - memory monitoring disabled")
+                return False
             memory_percent = (memory_mb / 1024) * 100  # Percentage of Lambda's 1024MB limit
             
             self.logger.info(f"Memory usage: {memory_mb:.1f}MB ({memory_percent:.1f}% of Lambda limit)")
@@ -117,16 +197,12 @@ class ChunkProcessor:
                 gc.collect()  # Triple collection for maximum cleanup
                 
                 # Check memory after cleanup
-                memory_after = process.memory_info().rss / 1024 / 1024
+                memory_after = get_memory_usage_mb()
                 memory_freed = memory_mb - memory_after
                 self.logger.info(f"Memory cleanup freed {memory_freed:.1f}MB, new usage: {memory_after:.1f}MB")
                 
                 return True
             return False
-        except ImportError:
-            # psutil not available, skip memory monitoring
-            self.logger.warning("psutil not available - memory monitoring disabled")
-            return False
         except Exception as e:
             self.logger.warning(f"Failed to check memory usage: {e}")
             return False
@@ -155,6 +231,17 @@ class ChunkProcessor:
         Returns:
             Chunk processing results
         """
+        # Planning actions run without a chunk deadline; extraction sets one in _process_chunk
+        self.timeout_handler = None
+        self.chunk_lease = None
+        # Connection pools and rate limits are per tenant; table configs from the orchestrator carry no tenant_id
+        self.tenant_id = event.get('tenant_id') or event.get('tenant_config', {}).get('tenant_id')
+        if event.get('action') == 'plan_id_shards':
+            return self._plan_id_shards(event['table_config'], event.get('estimated_records'), event.get('tenant_id'))
+        if event.get('action') == 'estimate_records':
+            estimate = self._estimate_records(event['table_config'], event.get('tenant_id'), event.get('incremental_since'))
+            return dict(estimate_to_dict(estimate), status='estimated') if estimate else {'status': 'unavailable'}
+        
         try:
             self.logger.info(f"Chunk processor started - AWS Request ID: {context.aws_request_id}")
             
@@ -175,42 +262,98 @@ class ChunkProcessor:
             # Initialize timeout handler
             timeout_handler = TimeoutHandler(context, buffer_seconds=15)
             
-            # Initialize chunk progress tracking
-            self._initialize_chunk_progress(chunk_config, job_id)
+            # No continuation may take the chunk over before this invocation's deadline has passed
+            # (the grace also covers the timeout handler's buffer before the deadline)
+            self.chunk_lease = lease_attributes(
+                context.aws_request_id,
+                time.time() + timeout_handler.get_remaining_time() + LEASE_GRACE_SECONDS
+            )
+            
+            # Progress writes are coalesced per invocation and written behind the processing
+            self.progress_recorder = None
+            
+            table_metadata = {
+                'tenant_id': tenant_id,
+                'service_name': table_config['service_name'],
+                'table_name': table_config['table_name']
+            }
+            
+            # A continuation invocation picks the chunk up at its durable checkpoint
+            checkpoint = None
+            if chunk_config.get('resume'):
+                checkpoint = self._resume_chunk_progress(chunk_config, job_id)
+                if checkpoint is not None and checkpoint.status == 'completed':
+                    self.logger.info(f"Chunk {chunk_id} already completed, nothing to resume", job_id=job_id)
+                    self._close_progress_recorder()
+                    return {
+                        'chunk_id': chunk_id,
+                        'status': 'completed',
+                        'records_processed': checkpoint.cursor.records_processed,
+                        'processing_time': 0,
+                        'continuation_state': None,
+                        's3_files_written': manifest_keys(checkpoint.manifest),
+                        's3_files_count': len(checkpoint.manifest),
+                        'table_metadata': table_metadata
+                    }
+            else:
+                # Initialize chunk progress tracking
+                self._initialize_chunk_progress(chunk_config, job_id)
             
             # Process the chunk
             processing_result = self._process_chunk(
                 chunk_config, 
                 table_config, 
                 tenant_config, 
-                timeout_handler
+                timeout_handler,
+                job_id=job_id,
+                checkpoint=checkpoint
             )
             
+            # A chunk that stopped for the timeout continues in another invocation; one that hit an error does not
+            if processing_result['completed']:
+                status = 'completed'
+            elif 'error' in processing_result:
+                status = 'failed'
+            else:
+                status = 'timeout_continuation'
+            
             # Update progress
             self._update_chunk_progress(
                 chunk_id, 
                 job_id, 
-                'completed' if processing_result['completed'] else 'timeout_continuation',
+                status,
                 processing_result
             )
+            processing_result['progress_stats'] = self._close_progress_recorder()
+            self._record_chunk_throughput(
+                tenant_id, table_name, status, processing_result,
+                checkpoint.continuations + 1 if checkpoint else 0
+            )
+            
+            # Files are committed to S3 by now, so the table's watermark can move forward once
+            # the whole table is fetched: by this chunk alone, or by every shard of its group
+            if processing_result.get('reached_end_of_data') and chunk_config.get('next_watermark'):
+                if self._table_sync_completed(chunk_config, job_id):
+                    self._advance_watermark(tenant_id, table_name, chunk_config['next_watermark'])
             
             # Send metrics
             self._send_chunk_metrics(job_id, tenant_id, table_name, chunk_id, processing_result)
             
             result = {
                 'chunk_id': chunk_id,
-                'status': 'completed' if processing_result['completed'] else 'timeout_continuation',
+                'status': status,
                 'records_processed': processing_result['records_processed'],
                 'processing_time': processing_result['processing_time'],
                 'continuation_state': processing_result.get('continuation_state'),
                 's3_files_written': processing_result.get('s3_files_written', []),
                 's3_files_count': processing_result.get('s3_files_count', 0),
-                'table_metadata': {
-                    'tenant_id': tenant_id,
-                    'service_name': table_config['service_name'],
-                    'table_name': table_config['table_name']
-                }
+                'table_metadata': table_metadata
             }
+            if status == 'timeout_continuation':
+                # Input for the next invocation; the cursor itself is read back from ChunkProgress
+                result['resume_chunk_config'] = dict(chunk_config, resume=True)
+            if 'error' in processing_result:
+                result['error'] = processing_result['error']
             
             # COMPLETION CALLBACK: Trigger result aggregator when chunk processing completes successfully
             if (processing_result['completed'] and
@@ -276,6 +419,12 @@ class ChunkProcessor:
             
             return result
             
+        except ChunkLeaseHeld as e:
+            # The chunk belongs to a running invocation; its progress row is left alone and
+            # the state machine retries the continuation once the lease can have expired
+            self.logger.warning(str(e), job_id=job_id)
+            self._close_progress_recorder()
+            raise
         except Exception as e:
             self.logger.error(f"🚨 CHUNK DEBUG: Chunk processing failed with exception",
                             error=str(e),
@@ -286,6 +435,7 @@ class ChunkProcessor:
             # Update chunk progress to failed
             if 'chunk_id' in locals() and 'job_id' in locals():
                 self._update_chunk_progress(chunk_id, job_id, 'failed', {'error': str(e)})
+            self._close_progress_recorder()
             
             # Return error response instead of raising to see if this helps
             return {
@@ -297,6 +447,32 @@ class ChunkProcessor:
                 'errorMessage': str(e)  # Lambda standard error field
             }
     
+    def _table_sync_completed(self, chunk_config: Dict[str, Any], job_id: str) -> bool:
+        """Check whether the table's sync is complete once this chunk has completed."""
+        if not chunk_config.get('shard_group'):
+            return True
+        try:
+            return shards_completed(
+                self.dynamodb,
+                self.chunk_progress_table,
+                job_id,
+                chunk_config['shard_group'],
+                chunk_config['shard_count']
+            )
+        except Exception as e:
+            # The watermark stays put, so the next sync re-reads the changed records
+            self.logger.warning(f"Failed to check shards of {chunk_config['shard_group']}: {str(e)}")
+            return False
+    
+    def _advance_watermark(self, tenant_id: str, table_name: str, watermark: str):
+        """Advance the table's incremental sync watermark after a complete, committed sync."""
+        try:
+            if advance_watermark(self.dynamodb, self.last_updated_table, tenant_id, table_name, watermark):
+                self.logger.info(f"Advanced incremental watermark for {tenant_id}/{table_name}", watermark=watermark)
+        except Exception as e:
+            # The next sync re-reads from the old watermark, so a failure here only costs extra records
+            self.logger.warning(f"Failed to advance incremental watermark: {str(e)}")
+    
     def _initialize_chunk_progress(self, chunk_config: Dict[str, Any], job_id: str):
         """Initialize chunk progress tracking."""
         try:
@@ -329,25 +505,127 @@ class ChunkProcessor:
             else:
                 progress_item['estimated_records'] = {'N': '0'}
             
-            self.dynamodb.put_item(
-                TableName=self.chunk_progress_table,
-                Item=progress_item
-            )
+            progress_item.update(getattr(self, 'chunk_lease', None) or {})
+            
+            # Written in the background while the first pages are fetched
+            recorder = self._get_progress_recorder()
+            recorder.record(progress_item)
+            recorder.flush(wait=False)
             
         except Exception as e:
             self.logger.warning(f"Failed to initialize chunk progress: {str(e)}")
     
+    def _resume_chunk_progress(self, chunk_config: Dict[str, Any], job_id: str) -> Optional[ChunkCheckpoint]:
+        """
+        Claim a chunk for a continuation invocation and read its checkpoint.
+        
+        Returns:
+            The chunk's checkpoint (status 'completed' if there is nothing left to do),
+            or None if the chunk has no progress item and starts from the beginning
+        """
+        chunk_id = chunk_config['chunk_id']
+        checkpoint = load_checkpoint(
+            self.dynamodb, self.chunk_progress_table, job_id, chunk_id, self.s3_client, self.config.bucket_name
+        )
+        if checkpoint is None:
+            self.logger.warning(f"No progress recorded for chunk {chunk_id}, starting from the beginning")
+            self._initialize_chunk_progress(chunk_config, job_id)
+            return None
+        if checkpoint.status == 'completed':
+            return checkpoint
+        
+        continuations = checkpoint.continuations + 1
+        attributes = {'continuations': {'N': str(continuations)}, 'updated_at': {'S': get_timestamp()}}
+        attributes.update(getattr(self, 'chunk_lease', None) or {})
+        applied = self._get_progress_recorder().transition(
+            {'job_id': {'S': job_id}, 'chunk_id': {'S': chunk_id}},
+            'processing',
+            attributes,
+            from_statuses=RESUMABLE_STATUSES,
+            leased_statuses=LEASED_STATUSES,
+            lease_attribute=LEASE_ATTRIBUTE
+        )
+        if not applied:
+            if checkpoint.status in LEASED_STATUSES:
+                raise ChunkLeaseHeld(f"Chunk {chunk_id} is still leased by a running invocation")
+            raise ValueError(f"Chunk {chunk_id} cannot be resumed from status '{checkpoint.status}'")
+        if continuations > get_max_chunk_continuations():
+            raise ValueError(f"Chunk {chunk_id} exceeded {get_max_chunk_continuations()} continuation invocations")
+        
+        self.logger.info(f"Resuming chunk {chunk_id} from checkpoint",
+                       job_id=job_id,
+                       continuation=continuations,
+                       page=checkpoint.cursor.page,
+                       offset=checkpoint.cursor.offset,
+                       records_processed=checkpoint.cursor.records_processed,
+                       files_written=len(checkpoint.manifest))
+        return checkpoint
+    
+    def _checkpoint_chunk(self, job_id: str, chunk_id: str, cursor: ChunkCursor, manifest: List[Dict[str, Any]]):
+        """Record the cursor and files behind the chunk's committed records, while it is still processing."""
+        try:
+            attributes = {
+                'updated_at': {'S': get_timestamp()},
+                'records_processed': {'N': str(cursor.records_processed)},
+                CHECKPOINT_ATTRIBUTE: cursor_to_attribute(cursor)
+            }
+            attributes.update(manifest_attributes(manifest, self.s3_client, self.config.bucket_name, job_id, chunk_id))
+            if not self._get_progress_recorder().transition(
+                {'job_id': {'S': job_id}, 'chunk_id': {'S': chunk_id}},
+                'processing',
+                attributes
+            ):
+                self.logger.warning(f"Chunk {chunk_id} is no longer processing; checkpoint not recorded", job_id=job_id)
+        except Exception as e:
+            # The next checkpoint or the final status update records the progress instead
+            self.logger.warning(f"Failed to checkpoint chunk {chunk_id}: {str(e)}")
+    
+    def _get_progress_recorder(self) -> ProgressRecorder:
+        """Get this invocation's ChunkProgress recorder."""
+        if getattr(self, 'progress_recorder', None) is None:
+            self.progress_recorder = ProgressRecorder(self.dynamodb, self.chunk_progress_table)
+        return self.progress_recorder
+    
+    def _close_progress_recorder(self) -> Optional[Dict[str, Any]]:
+        """Write any buffered progress rows and report the recorder's overhead."""
+        recorder = getattr(self, 'progress_recorder', None)
+        if recorder is None:
+            return None
+        self.progress_recorder = None
+        try:
+            recorder.close()
+        except Exception as e:
+            self.logger.warning(f"Failed to flush chunk progress: {str(e)}")
+        stats = recorder.get_stats()
+        self.logger.info("Chunk progress write overhead", **stats)
+        return stats
+    
     def _process_chunk(
         self,
         chunk_config: Dict[str, Any],
         table_config: Dict[str, Any],
         tenant_config: Dict[str, Any],
-        timeout_handler: TimeoutHandler
+        timeout_handler: TimeoutHandler,
+        job_id: Optional[str] = None,
+        checkpoint: Optional[ChunkCheckpoint] = None
     ) -> Dict[str, Any]:
-        """Process a single chunk of data with memory-efficient streaming to S3."""
+        """
+        Process a single chunk of data with memory-efficient streaming to S3.
+        
+        With a job_id, the cursor behind every file whose upload completes is
+        checkpointed to ChunkProgress; with a checkpoint, fetching resumes at its
+        cursor and new files are appended to its manifest. Otherwise fetching
+        starts at the chunk's start_offset and stops at its end_offset.
+        """
         start_time = time.time()
-        records_processed = 0
+        # Rate-limit waits that would outlast the invocation stop the chunk for a continuation instead
+        self.timeout_handler = timeout_handler
+        self.tenant_id = tenant_config.get('tenant_id') or chunk_config.get('tenant_id')
+        start_cursor = checkpoint.cursor if checkpoint else self._chunk_start_cursor(chunk_config, table_config)
+        previous_manifest = checkpoint.manifest if checkpoint else []
+        records_processed = start_cursor.records_processed
         s3_files_written = []
+        chunk_writer = None
         
         try:
             # Get credentials
@@ -358,14 +636,38 @@ class ChunkProcessor:
             service_credentials = ServiceCredentials.from_dict(credentials)
             service_name = table_config.get('service_name', 'unknown')
             
+            # Connection reuse is reported per chunk against the warm container's pool
+            http_session = self._get_http_session(table_config, service_credentials)
+            http_stats_baseline = http_session.get_stats()
+            request_scheduler = self._get_request_scheduler(table_config)
+            rate_limit_baseline = request_scheduler.get_stats()
+            
             # Get configured page size from endpoint configuration
             configured_page_size = table_config.get('page_size', 1000)
             
-            # Memory optimization: Write to S3 every N batches to avoid memory accumulation
-            write_batch_size = 25  # Reduced from 40 to 25 API batches for better memory management
-            batch_buffer = []
-            batch_count = 0
-            file_batch_number = 0  # Cumulative file counter (never resets)
+            # Cursors of written pages, resolved to the last page inside completed uploads
+            cursor_tracker = DurableCursorTracker(start_cursor) if job_id else None
+            final_close = False
+            
+            def checkpoint_closed_file(file_info: Dict[str, Any]):
+                # The final status update records the last file's checkpoint itself
+                if cursor_tracker is None or final_close:
+                    return
+                self._checkpoint_chunk(
+                    job_id,
+                    chunk_config['chunk_id'],
+                    cursor_tracker.durable(chunk_writer.rows_committed),
+                    previous_manifest + build_manifest(chunk_writer.files)
+                )
+            
+            # Pages are appended to Parquet row groups as they arrive and uploaded as multipart parts
+            chunk_writer = self._create_chunk_writer(
+                chunk_config,
+                table_config,
+                tenant_config,
+                first_file_number=len(previous_manifest) + 1,
+                on_file_closed=checkpoint_closed_file
+            )
             
             # CRITICAL DEBUG: Log all record limit sources and disable enforcement for backfill
             explicit_record_limit = chunk_config.get('record_limit')
@@ -376,14 +678,52 @@ class ChunkProcessor:
             if explicit_record_limit:
                 record_limit = explicit_record_limit
                 self.logger.info(f"🎯 USING EXPLICIT RECORD LIMIT: {record_limit}")
+            elif chunk_config.get('end_offset') is not None:
+                # A planned offset range stops where the next chunk starts
+                record_limit = chunk_config['end_offset'] - (chunk_config.get('start_offset') or 0)
+                self.logger.info(f"🎯 OFFSET RANGE LIMIT: {record_limit}",
+                               start_offset=chunk_config.get('start_offset'),
+                               end_offset=chunk_config['end_offset'])
             else:
                 # For backfill, ignore estimated_records and fetch all data
                 record_limit = None
                 self.logger.info(f"🎯 BACKFILL MODE: No record limit enforced (ignoring estimated_records: {estimated_records})")
             
             # For backfill operations, we want to fetch ALL available data up to the limit
-            current_page = 1
-            current_offset = 0
+            current_page = start_cursor.page
+            current_offset = start_cursor.offset
+            last_id = start_cursor.last_id
+            fetch_error_message = None
+            reached_end_of_data = False
+            
+            # Cursor pagination continues after the last record; otherwise pages are numbered
+            page_cursor = self._create_page_cursor(table_config, last_id)
+            if page_cursor is not None and chunk_config.get('start_offset'):
+                raise ValueError(f"Chunk {chunk_config['chunk_id']} starts at offset {chunk_config['start_offset']}, "
+                                 f"but cursor pagination can only read a table from its start")
+            
+            # A sharded chunk only requests the records of its id range
+            id_range_params = id_range_filter(
+                service_name,
+                chunk_config.get('id_field') or get_cursor_field(table_config),
+                id_range_from_dict(chunk_config.get('id_range'))
+            )
+            
+            # Pipelined fetch: keep several page requests in flight when pages are numbered
+            page_fetcher = None if page_cursor else self._create_page_fetcher(
+                chunk_config,
+                table_config,
+                service_credentials,
+                configured_page_size,
+                record_limit,
+                timeout_handler,
+                records_done=records_processed,
+                id_range_params=id_range_params
+            )
+            page_iterator = (
+                page_fetcher.iter_pages(start_page=current_offset // configured_page_size + 1)
+                if page_fetcher else None
+            )
             
             # Continue fetching until we get no more records or timeout
             while timeout_handler.should_continue():
@@ -407,21 +747,50 @@ class ChunkProcessor:
                 
                 # Fetch batch of data using adjusted batch size
                 try:
-                    batch_records = self._fetch_data_batch(
-                        table_config,
-                        service_credentials,
-                        current_offset,
-                        effective_batch_size
-                    )
+                    if page_iterator is not None:
+                        # Full pages are always requested; trim the last one to the record limit
+                        _, batch_records = next(page_iterator, (None, []))
+                        batch_records = batch_records[:effective_batch_size]
+                    elif page_cursor is not None:
+                        batch_records = self._fetch_data_batch(
+                            table_config,
+                            service_credentials,
+                            current_offset,
+                            effective_batch_size,
+                            incremental_since=chunk_config.get('incremental_since'),
+                            page_cursor=page_cursor,
+                            id_range_params=id_range_params
+                        )
+                    else:
+                        # Page numbers are derived from offset / page size, so a short last
+                        # request would ask for the wrong page; fetch it whole and trim it
+                        batch_records = self._fetch_data_batch(
+                            table_config,
+                            service_credentials,
+                            current_offset,
+                            configured_page_size,
+                            incremental_since=chunk_config.get('incremental_since'),
+                            id_range_params=id_range_params
+                        )[:effective_batch_size]
+                except RateLimitPause as pause:
+                    # Everything fetched so far is checkpointed; the next invocation waits out the quota
+                    self.logger.warning(f"Stopping for a continuation: {str(pause)}",
+                                      wait_seconds=pause.wait_seconds,
+                                      offset=current_offset)
+                    break
                 except Exception as fetch_error:
                     self.logger.error(f"Failed to fetch data batch: {str(fetch_error)}",
                                     error_type=type(fetch_error).__name__,
                                     offset=current_offset,
                                     batch_size=effective_batch_size)
-                    # batch_records remains empty list, so the loop will break naturally
+                    # Stop without marking the chunk complete so the table is not silently truncated
+                    fetch_error_message = str(fetch_error)
+                    break
                 
-                # If no records returned, we've reached the end
+                # Only an empty page from a successful response marks the end of the data; the
+                # pipelined fetcher also stops for the timeout or the page limit
                 if not batch_records:
+                    reached_end_of_data = page_fetcher.reached_end if page_fetcher else True
                     self.logger.info(
                         f"🛑 STOPPING: No more records returned from API",
                         current_page=current_page,
@@ -437,34 +806,23 @@ class ChunkProcessor:
                     # Check memory BEFORE adding to buffer
                     memory_cleanup_triggered = self._check_memory_usage(max_memory_mb=400)  # Reduced from 700MB to 400MB
                     
-                    if memory_cleanup_triggered:
-                        self.logger.info("Memory cleanup triggered before buffer extend - checking if emergency write needed")
-                        # If we're near memory limit, write current buffer immediately
-                        if batch_buffer and len(batch_buffer) > 1000:  # Emergency threshold
-                            self.logger.warning(f"EMERGENCY WRITE: Writing {len(batch_buffer)} records due to memory pressure")
-                            file_batch_number += 1
-                            s3_key = self._write_batch_to_s3(
-                                batch_buffer,
-                                chunk_config,
-                                table_config,
-                                tenant_config,
-                                file_batch_number
-                            )
-                            if s3_key:
-                                s3_files_written.append(s3_key)
-                            
-                            # Clear buffer and reset
-                            del batch_buffer[:]  # More aggressive than clear()
-                            batch_count = 0
-                            gc.collect()
+                    if memory_cleanup_triggered and chunk_writer.buffered_rows:
+                        # If we're near memory limit, write the buffered rows as a row group immediately
+                        self.logger.warning(f"EMERGENCY FLUSH: Writing {chunk_writer.buffered_rows} buffered records due to memory pressure")
+                        chunk_writer.flush()
+                        gc.collect()
                 
-                # Add records to current batch buffer
-                batch_buffer.extend(batch_records)
                 records_processed += len(batch_records)
-                batch_count += 1
                 
                 # Store batch_records length before cleanup for pagination
                 batch_records_len = len(batch_records)
+                if page_cursor is not None:
+                    last_id = page_cursor.after
+                else:
+                    last_record = batch_records[-1] if isinstance(batch_records[-1], dict) else {}
+                    record_id = last_record.get('id', last_record.get('sys_id', last_record.get('Id')))
+                    if record_id is not None:
+                        last_id = str(record_id)
                 
                 # Update offset for next iteration only if we have records
                 if batch_records_len > 0:
@@ -476,13 +834,23 @@ class ChunkProcessor:
                         # Other services may use offset-based pagination
                         current_offset += batch_records_len
                 
+                # Mark the page before writing it: appending it may complete a file
+                if cursor_tracker is not None:
+                    cursor_tracker.mark(
+                        chunk_writer.rows_written + chunk_writer.buffered_rows + batch_records_len,
+                        ChunkCursor(current_page, current_offset, records_processed, last_id)
+                    )
+                
+                # Convert the page to Arrow and append it to the current row group
+                chunk_writer.write_records(batch_records)
+                
                 # Log progress with record limit status
                 progress_info = {
                     "batch_size": batch_records_len,
                     "current_page": current_page,
                     "current_offset": current_offset,
                     "total_processed": records_processed,
-                    "buffer_size": len(batch_buffer),
+                    "buffer_size": chunk_writer.buffered_rows,
                     "service": service_name
                 }
                 
@@ -492,44 +860,8 @@ class ChunkProcessor:
                     
                 self.logger.info(f"Processed batch: {batch_records_len} records", **progress_info)
                 
-                # Aggressive cleanup of batch_records after all operations
-                if 'batch_records' in locals() and batch_records:
-                    del batch_records
-                gc.collect()
-                
-                # CRITICAL FIX: Write to S3 when buffer reaches write_batch_size batches
-                should_write = batch_count >= write_batch_size
-                
-                self.logger.info(f"🔍 BATCH WRITE CHECK: batch_count={batch_count}, write_batch_size={write_batch_size}, should_write={should_write}, buffer_size={len(batch_buffer)}")
-                
-                if should_write and batch_buffer:
-                    self.logger.info(f"📝 WRITING BATCH TO S3: file_batch_number will be={file_batch_number + 1}, buffer_size={len(batch_buffer)}")
-                    file_batch_number += 1  # Increment file counter
-                    s3_key = self._write_batch_to_s3(
-                        batch_buffer,
-                        chunk_config,
-                        table_config,
-                        tenant_config,
-                        file_batch_number
-                    )
-                    if s3_key:
-                        s3_files_written.append(s3_key)
-                    
-                    self.logger.info(
-                        f"Wrote batch buffer to S3: {len(batch_buffer)} records",
-                        buffer_size=len(batch_buffer),
-                        total_processed=records_processed,
-                        s3_files_count=len(s3_files_written)
-                    )
-                    
-                    # Aggressive cleanup to free memory
-                    del batch_buffer[:]  # More aggressive than clear()
-                    batch_count = 0
-                    gc.collect()  # Force garbage collection after clearing
-                    gc.collect()  # Double collect for aggressive cleanup
-                    
-                    # Check memory after cleanup
-                    self._check_memory_usage(max_memory_mb=400)
+                # The page now lives in Arrow buffers; drop the record dictionaries
+                del batch_records
                 
                 # Only stop if we get zero records - partial pages may still have more data
                 # Note: batch_records_len is already captured above before cleanup
@@ -551,33 +883,20 @@ class ChunkProcessor:
                         total_processed=records_processed
                     )
             
-            # MEMORY OPTIMIZATION: Write any remaining records in buffer
-            if batch_buffer:
-                file_batch_number += 1  # Fix: Increment for final batch
-                s3_key = self._write_batch_to_s3(
-                    batch_buffer,
-                    chunk_config,
-                    table_config,
-                    tenant_config,
-                    file_batch_number
-                )
-                if s3_key:
-                    s3_files_written.append(s3_key)
-                
-                self.logger.info(
-                    f"Wrote final batch buffer to S3: {len(batch_buffer)} remaining records",
-                    buffer_size=len(batch_buffer),
-                    total_processed=records_processed,
-                    s3_files_count=len(s3_files_written)
-                )
-            else:
-                self.logger.info("No remaining records - all data written in intermediate batches")
+            # Cancel any prefetched pages that will not be consumed
+            if page_fetcher:
+                page_fetcher.close()
             
-            # Aggressive final cleanup
-            del batch_buffer
-            gc.collect()
-            gc.collect()  # Double collection for better cleanup
-            self.logger.info("Final memory cleanup completed")
+            # Write the last row group and complete the open file's upload
+            final_close = True
+            s3_files_written = manifest_keys(previous_manifest) + chunk_writer.close()
+            s3_manifest = previous_manifest + build_manifest(chunk_writer.files)
+            self.logger.info(
+                f"Wrote {len(chunk_writer.files)} Parquet files to S3",
+                files=chunk_writer.files,
+                total_processed=records_processed
+            )
+            chunk_writer = None
             
             # Final memory check
             self._check_memory_usage(max_memory_mb=400)
@@ -585,17 +904,32 @@ class ChunkProcessor:
             processing_time = time.time() - start_time
             
             # For backfill operations, we consider it completed when we've fetched all available data
-            completed = True
+            completed = fetch_error_message is None and (
+                reached_end_of_data or bool(record_limit and records_processed >= record_limit)
+            )
             
             result = {
                 'completed': completed,
+                'reached_end_of_data': reached_end_of_data,
                 'records_processed': records_processed,
+                'invocation_records_processed': records_processed - start_cursor.records_processed,
                 'processing_time': processing_time,
                 'final_page': current_page,
                 'final_offset': current_offset,
                 's3_files_written': s3_files_written,
-                's3_files_count': len(s3_files_written)
+                's3_files_count': len(s3_files_written),
+                's3_manifest': s3_manifest,
+                'service_name': service_name,
+                'http_pool_stats': http_session.get_stats(since=http_stats_baseline),
+                'rate_limit_stats': request_scheduler.get_stats(since=rate_limit_baseline)
             }
+            if fetch_error_message:
+                result['error'] = fetch_error_message
+            elif not completed:
+                # Everything fetched is in S3, so the next invocation continues right after it
+                result['continuation_state'] = ChunkCursor(
+                    current_page, current_offset, records_processed, last_id
+                )._asdict()
             
             self.logger.info(
                 f"Memory-efficient chunk processing completed",
@@ -611,6 +945,8 @@ class ChunkProcessor:
         except Exception as e:
             processing_time = time.time() - start_time
             self.logger.error(f"Chunk processing error: {str(e)}")
+            if chunk_writer is not None:
+                chunk_writer.abort()
             
             return {
                 'completed': False,
@@ -619,6 +955,317 @@ class ChunkProcessor:
                 'error': str(e)
             }
     
+    def _create_chunk_writer(
+        self,
+        chunk_config: Dict[str, Any],
+        table_config: Dict[str, Any],
+        tenant_config: Dict[str, Any],
+        first_file_number: int = 1,
+        on_file_closed=None
+    ):
+        """Create the streaming Parquet writer for a chunk's raw output files."""
+        from shared.parquet_stream import DEFAULT_ROW_GROUP_ROWS, S3MultipartSink, StreamingParquetWriter
+        
+        tenant_id = tenant_config['tenant_id']
+        # Use configured table_name from table_config, not derived from endpoint
+        table_name = table_config['table_name']
+        service_name = table_config['service_name']
+        chunk_id = chunk_config['chunk_id']
+        
+        def open_sink(file_number: int):
+            s3_key = get_s3_key(tenant_id, 'raw', service_name, table_name, get_timestamp())
+            # Add chunk and file identifiers to ensure unique files
+            s3_key = s3_key.replace('.parquet', f'_{chunk_id}_batch{file_number:03d}.parquet')
+            return s3_key, S3MultipartSink(self.s3_client, self.config.bucket_name, s3_key)
+        
+        # A resumed chunk numbers its files after those of earlier invocations. Files are kept
+        # small because a checkpoint is only taken once a file's upload has completed
+        checkpoint_rows = get_checkpoint_rows()
+        return StreamingParquetWriter(
+            lambda file_number: open_sink(first_file_number + file_number - 1),
+            row_group_rows=min(DEFAULT_ROW_GROUP_ROWS, checkpoint_rows),
+            max_file_bytes=get_checkpoint_bytes(),
+            on_file_closed=on_file_closed,
+            max_file_rows=checkpoint_rows
+        )
+    
+    def _chunk_start_cursor(self, chunk_config: Dict[str, Any], table_config: Dict[str, Any]) -> ChunkCursor:
+        """Cursor at the first record of the chunk's planned offset range."""
+        start_offset = chunk_config.get('start_offset') or 0
+        page_size = table_config.get('page_size', 1000)
+        return ChunkCursor(page=start_offset // page_size + 1, offset=start_offset)
+    
+    def _get_http_session(self, table_config: Dict[str, Any], credentials: ServiceCredentials) -> HTTPSession:
+        """Get the pooled session shared by this tenant's requests to the service's base URL."""
+        api_base_url = getattr(credentials, 'api_base_url', None) or getattr(credentials, 'instance_url', None) or getattr(credentials, 'base_url', None)
+        service_name = table_config.get('service_name', 'unknown').lower()
+        if not api_base_url:
+            raise ValueError(f"No API base URL found in credentials for service {service_name}")
+        
+        return get_http_session(
+            api_base_url,
+            tenant_id=self._request_tenant_id(table_config),
+            max_connections_per_host=self._get_max_concurrent_requests(service_name)
+        )
+    
+    def _get_request_scheduler(self, table_config: Dict[str, Any]) -> RequestScheduler:
+        """Get the rate-limit scheduler shared by this tenant's requests to the service."""
+        service_name = table_config.get('service_name', 'unknown').lower()
+        try:
+            from shared.utils import load_endpoint_configuration
+            endpoint_config = dict(load_endpoint_configuration(service_name))
+        except Exception as e:
+            self.logger.warning(f"Failed to load rate limiting config for {service_name}: {e}")
+            endpoint_config = {}
+        # Let the scheduler admit as many requests as the page fetcher keeps in flight
+        endpoint_config['rate_limiting'] = dict(
+            endpoint_config.get('rate_limiting', {}),
+            max_concurrent_requests=self._get_max_concurrent_requests(service_name)
+        )
+        return get_request_scheduler(service_name, self._request_tenant_id(table_config), endpoint_config)
+    
+    def _request_tenant_id(self, table_config: Dict[str, Any]) -> Optional[str]:
+        """Tenant whose session and scheduler this invocation's requests use."""
+        return getattr(self, 'tenant_id', None) or table_config.get('tenant_id')
+    
+    def _get_max_concurrent_requests(self, service_name: str) -> int:
+        """Get the per-service concurrent request cap from the endpoint configuration."""
+        try:
+            from shared.utils import get_service_concurrency_limit
+            return get_service_concurrency_limit(service_name)
+        except Exception as e:
+            self.logger.warning(f"Failed to load concurrency limit for {service_name}: {e}")
+            return 1
+    
+    def _create_page_cursor(self, table_config: Dict[str, Any], after: Optional[str] = None) -> Optional[PageCursor]:
+        """
+        Create a cursor when the table's endpoint is configured for cursor pagination.
+        
+        The strategy and cursor field come from the table config or the endpoint's
+        entry in mappings/integrations/<service>_endpoints.json; after is the
+        cursor value a resumed chunk continues from.
+        """
+        service_name = table_config.get('service_name', 'unknown').lower()
+        endpoint_settings = self._get_endpoint_settings(table_config)
+        strategy = get_pagination_strategy(table_config, endpoint_settings)
+        if strategy == PAGINATION_OFFSET:
+            return None
+        
+        cursor_field = get_cursor_field(table_config, endpoint_settings)
+        self.logger.info("Using cursor pagination",
+                       strategy=strategy,
+                       cursor_field=cursor_field,
+                       resume_after=after)
+        return PageCursor(service_name, strategy, cursor_field, after=after)
+    
+    def _get_endpoint_settings(self, table_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the table endpoint's entry in mappings/integrations/<service>_endpoints.json."""
+        service_name = table_config.get('service_name', 'unknown').lower()
+        try:
+            from shared.utils import load_endpoint_configuration
+            return load_endpoint_configuration(service_name).get('endpoints', {}).get(table_config.get('endpoint'), {})
+        except Exception as e:
+            self.logger.warning(f"Failed to load endpoint config for {service_name}: {e}")
+            return {}
+    
+    def _plan_id_shards(
+        self,
+        table_config: Dict[str, Any],
+        estimated_records: Optional[int] = None,
+        tenant_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Plan the id ranges a large table is extracted in, for the orchestrator.
+        
+        The table's lowest and highest id are read with two one-record requests
+        and the ids between them are split into ranges of about ID_SHARD_RECORDS
+        records. The record count is estimated when not given; the id span
+        stands in for it when the table cannot be counted.
+        
+        Returns:
+            Dictionary with the id field, the probed bounds, the record estimate and the id ranges
+        """
+        service_name = table_config.get('service_name', 'unknown')
+        id_field = get_cursor_field(table_config, self._get_endpoint_settings(table_config))
+        if estimated_records is None:
+            estimate = self._estimate_records(table_config, tenant_id)
+            estimated_records = estimate.records if estimate else None
+        try:
+            credentials = ServiceCredentials.from_dict(table_config.get('credentials', {}))
+            bounds = probe_id_bounds(
+                service_name,
+                id_field,
+                lambda params: self._fetch_records(table_config, credentials, params)
+            )
+            id_ranges = plan_id_shards(bounds, estimated_records)
+        except Exception as e:
+            # An unsharded extraction is always correct, just slower
+            self.logger.warning(f"Failed to plan id shards for {table_config.get('table_name')}: {str(e)}")
+            bounds, id_ranges = None, plan_id_shards(None)
+        
+        self.logger.info("Planned id shards",
+                       id_field=id_field,
+                       bounds=bounds,
+                       shard_count=len(id_ranges))
+        return {
+            'status': 'planned',
+            'id_field': id_field,
+            'bounds': list(bounds) if bounds else None,
+            'estimated_records': estimated_records,
+            'id_ranges': [id_range_to_dict(id_range) for id_range in id_ranges]
+        }
+    
+    def _estimate_records(
+        self,
+        table_config: Dict[str, Any],
+        tenant_id: Optional[str],
+        incremental_since: Optional[str] = None
+    ) -> Optional[RecordEstimate]:
+        """
+        Estimate a table's records and bytes for chunk planning.
+        
+        Estimates are reused for RECORD_ESTIMATE_TTL_SECONDS from this container's
+        cache or the LastUpdated table before the API's count request is made.
+        
+        Returns:
+            RecordEstimate, or None when the table cannot be counted
+        """
+        table_name = table_config.get('table_name')
+        cached = tenant_id and table_name and get_cached_estimate(tenant_id, table_name, incremental_since)
+        if cached:
+            return cached
+        
+        if tenant_id and table_name:
+            try:
+                stored = load_estimate(self.dynamodb, self.last_updated_table, tenant_id, table_name,
+                                       incremental_since, max_age_seconds=get_estimate_ttl_seconds())
+                if stored:
+                    cache_estimate(tenant_id, table_name, stored)
+                    return stored
+            except Exception as e:
+                self.logger.warning(f"Failed to read cached estimate for {table_name}: {str(e)}")
+        
+        endpoint_settings = self._get_endpoint_settings(table_config)
+        try:
+            credentials = ServiceCredentials.from_dict(table_config.get('credentials', {}))
+            
+            def fetch(path, params):
+                response = self._fetch_response(table_config, credentials, params, path=path, request_class='count')
+                return response.body, response.headers
+            
+            estimate = estimate_records(table_config, fetch, incremental_since, endpoint_settings)
+        except Exception as e:
+            self.logger.warning(f"Failed to estimate records for {table_name}: {str(e)}")
+            return None
+        
+        self.logger.info("Estimated table size",
+                       estimated_records=estimate.records,
+                       estimated_bytes=estimate.bytes,
+                       incremental_since=incremental_since)
+        if tenant_id and table_name:
+            cache_estimate(tenant_id, table_name, estimate)
+            try:
+                store_estimate(self.dynamodb, self.last_updated_table, tenant_id, table_name, estimate)
+            except Exception as e:
+                self.logger.warning(f"Failed to store estimate for {table_name}: {str(e)}")
+        return estimate
+    
+    def _scheduler_deadline(self) -> Optional[Callable[[], float]]:
+        """Remaining-time callback of the chunk being extracted, for rate-limit waits."""
+        timeout_handler = getattr(self, 'timeout_handler', None)
+        return timeout_handler.get_remaining_time if timeout_handler is not None else None
+    
+    def _fetch_response(
+        self,
+        table_config: Dict[str, Any],
+        credentials: ServiceCredentials,
+        params: Dict[str, Any],
+        path: Optional[str] = None,
+        request_class: str = 'probe'
+    ):
+        """Make one request to the table's endpoint (or another path under the API base URL)."""
+        api_base_url = getattr(credentials, 'api_base_url', None) or getattr(credentials, 'instance_url', None) or getattr(credentials, 'base_url', None)
+        if not api_base_url:
+            raise ValueError(f"No API base URL found in credentials for service {table_config.get('service_name')}")
+        
+        path = path or table_config['endpoint']
+        url = f"{api_base_url.rstrip('/')}/{path.lstrip('/')}?{urllib.parse.urlencode(params)}"
+        session = self._get_http_session(table_config, credentials)
+        return self._get_request_scheduler(table_config).execute(
+            lambda: session.get(url, headers=credentials.get_request_headers()),
+            response_headers=lambda result: result.headers,
+            request_class=request_class,
+            time_remaining=self._scheduler_deadline()
+        )
+    
+    def _fetch_records(
+        self,
+        table_config: Dict[str, Any],
+        credentials: ServiceCredentials,
+        params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Make one request to the table's endpoint with the given parameters and return its records."""
+        response = self._fetch_response(table_config, credentials, params)
+        data = json.loads(response.body.decode('utf-8'))
+        if isinstance(data, dict):
+            return data.get('data', [])
+        return data if isinstance(data, list) else []
+    
+    def _create_page_fetcher(
+        self,
+        chunk_config: Dict[str, Any],
+        table_config: Dict[str, Any],
+        credentials: ServiceCredentials,
+        page_size: int,
+        record_limit: Optional[int],
+        timeout_handler: TimeoutHandler,
+        records_done: int = 0,
+        id_range_params: Optional[Dict[str, str]] = None
+    ) -> Optional[PipelinedPageFetcher]:
+        """
+        Create a pipelined page fetcher when the chunk can be fetched concurrently.
+        
+        Only page-numbered APIs qualify (offset APIs depend on the previous page's
+        size), the page count must be known or estimable, and the service must
+        allow more than one concurrent request. Page counts are for the part of
+        the chunk after records_done (records fetched by earlier invocations).
+        """
+        service_name = table_config.get('service_name', 'unknown').lower()
+        if service_name in ('salesforce', 'servicenow'):
+            return None
+        
+        max_pages = math.ceil(max(record_limit - records_done, 0) / page_size) if record_limit else None
+        estimated_records = chunk_config.get('estimated_records')
+        remaining_estimate = max(estimated_records - records_done, 0) if estimated_records else 0
+        estimated_pages = math.ceil(remaining_estimate / page_size) if remaining_estimate else None
+        if max_pages is None and estimated_pages is None:
+            return None
+        
+        max_in_flight = self._get_max_concurrent_requests(service_name)
+        if max_in_flight <= 1 or (max_pages or estimated_pages) <= 1:
+            return None
+        
+        self.logger.info("🚀 PIPELINED FETCH: Prefetching pages concurrently",
+                       max_in_flight=max_in_flight,
+                       estimated_pages=estimated_pages,
+                       max_pages=max_pages,
+                       page_size=page_size)
+        
+        return PipelinedPageFetcher(
+            lambda page_number: self._fetch_data_batch(
+                table_config,
+                credentials,
+                (page_number - 1) * page_size,
+                page_size,
+                incremental_since=chunk_config.get('incremental_since'),
+                id_range_params=id_range_params
+            ),
+            max_in_flight=max_in_flight,
+            estimated_pages=estimated_pages,
+            max_pages=max_pages,
+            should_continue=timeout_handler.should_continue
+        )
+    
     def _fetch_data_batch(
         self,
         table_config: Dict[str, Any],
@@ -626,13 +1273,25 @@ class ChunkProcessor:
         offset: int,
         batch_size: int,
         current_page: int = None,
-        total_processed: int = None
+        total_processed: int = None,
+        incremental_since: Optional[str] = None,
+        page_cursor: Optional[PageCursor] = None,
+        id_range_params: Optional[Dict[str, str]] = None
     ) -> List[Dict[str, Any]]:
-        """Fetch a batch of data from the API with proper pagination handling."""
+        """
+        Fetch a batch of data from the API with proper pagination handling.
+        
+        With a page_cursor the request continues after the cursor instead of at
+        offset, and the cursor is advanced past the returned records.
+        id_range_params restricts the request to a sharded chunk's id range.
+        """
         import time
         
         start_time = time.time()
         
+        if page_cursor is not None and page_cursor.exhausted:
+            return []
+        
         try:
             endpoint = table_config['endpoint']
             service_name = table_config.get('service_name', 'unknown')
@@ -649,58 +1308,54 @@ class ChunkProcessor:
             # Use the provided batch_size (which may be adjusted for record limits)
             effective_page_size = batch_size
             
-            # Build headers
-            headers = {
-                'Content-Type': 'application/json'
-            }
+            # Static headers are cached on the credentials object
+            headers = credentials.get_request_headers()
             
-            # Add authentication header
-            auth_header = credentials.get_auth_header()
-            if auth_header:
-                headers['Authorization'] = auth_header
+            # Restrict incremental syncs to records changed since the table's watermark,
+            # and sharded chunks to their id range
+            filter_params = merge_filters(
+                build_incremental_params(service_name, get_incremental_field(table_config), incremental_since),
+                id_range_params
+            )
             
-            # Add service-specific headers
-            if hasattr(credentials, 'client_id') and credentials.client_id:
-                headers['ClientId'] = credentials.client_id
-            
-            # Handle service-specific pagination
-            if service_name.lower() == 'connectwise':
-                # ConnectWise uses page-based pagination (1-indexed)
-                page_number = (offset // effective_page_size) + 1
-                params = {
-                    'page': page_number,
-                    'pageSize': effective_page_size,
-                    'orderBy': table_config.get('order_by', 'id asc')
-                }
-                
-                # Add incremental sync conditions if configured
-                incremental_field = table_config.get('incremental_field')
-                if incremental_field:
-                    # This would be implemented based on last_updated timestamp
-                    # For now, we'll fetch all records during backfill
-                    pass
-                    
-            elif service_name.lower() == 'salesforce':
-                # Salesforce uses offset-based pagination
-                params = {
-                    'limit': effective_page_size,
-                    'offset': offset
-                }
-            elif service_name.lower() == 'servicenow':
-                # ServiceNow uses offset-based pagination
-                params = {
-                    'sysparm_limit': effective_page_size,
-                    'sysparm_offset': offset,
-                    'sysparm_order_by': 'sys_id'
-                }
+            if page_cursor is not None:
+                # Cursor pagination: continue after the last record instead of counting past it
+                params, cursor_headers = page_cursor.request_params(effective_page_size, filter_params)
+                headers = dict(headers, **cursor_headers)
             else:
-                # Default to page-based pagination
-                page_number = (offset // effective_page_size) + 1
-                params = {
-                    'page': page_number,
-                    'pageSize': effective_page_size,
-                    'orderBy': 'id asc'
-                }
+                # Handle service-specific pagination
+                if service_name.lower() == 'connectwise':
+                    # ConnectWise uses page-based pagination (1-indexed)
+                    page_number = (offset // effective_page_size) + 1
+                    params = {
+                        'page': page_number,
+                        'pageSize': effective_page_size,
+                        'orderBy': table_config.get('order_by', 'id asc')
+                    }
+                    
+                elif service_name.lower() == 'salesforce':
+                    # Salesforce uses offset-based pagination
+                    params = {
+                        'limit': effective_page_size,
+                        'offset': offset
+                    }
+                elif service_name.lower() == 'servicenow':
+                    # ServiceNow uses offset-based pagination
+                    params = {
+                        'sysparm_limit': effective_page_size,
+                        'sysparm_offset': offset,
+                        'sysparm_order_by': 'sys_id'
+                    }
+                else:
+                    # Default to page-based pagination
+                    page_number = (offset // effective_page_size) + 1
+                    params = {
+                        'page': page_number,
+                        'pageSize': effective_page_size,
+                        'orderBy': 'id asc'
+                    }
+                
+                params.update(filter_params)
             
             # Build URL with parameters
             if params:
@@ -720,35 +1375,61 @@ class ChunkProcessor:
                            effective_page_size=effective_page_size,
                            offset=offset)
             
-            # Create request with headers
-            request = urllib.request.Request(full_url, headers=headers)
-            
-            # Make the request
-            with urllib.request.urlopen(request, timeout=30) as response:
-                # Get response headers for pagination metadata
-                response_headers = dict(response.headers)
-                response_data = response.read().decode('utf-8')
-                
-                # CRITICAL API DEBUG: Log raw response details
+            # Make the request over a pooled keep-alive connection (gzip/deflate negotiated),
+            # paced by the tenant's rate-limit scheduler with retries for 429/5xx
+            session = self._get_http_session(table_config, credentials)
+            scheduler = self._get_request_scheduler(table_config)
+            
+            if get_response_parsing_mode(table_config) == PARSE_MODE_STREAMING:
+                # Decode records straight off the socket; the body bytes and text are never held whole
+                records, response_headers, response_size = scheduler.execute(
+                    lambda: self._stream_page_records(session, full_url, headers),
+                    response_headers=lambda result: result[1],
+                    time_remaining=self._scheduler_deadline()
+                )
+                api_call_time = time.time() - start_time
                 self.logger.info(f"🌐 API RESPONSE DEBUG",
-                                status_code=response.getcode(),
-                                response_size_bytes=len(response_data),
-                                response_headers_count=len(response_headers),
-                                content_type=response_headers.get('content-type', 'unknown'),
-                                response_preview=response_data[:500] if response_data else 'empty')
-                
-                # MEMORY OPTIMIZATION: Check memory before JSON parsing
-                if len(response_data) > 10 * 1024 * 1024:  # If response > 10MB
-                    self.logger.warning(f"Large API response detected: {len(response_data) / 1024 / 1024:.1f}MB")
-                    self._check_memory_usage(max_memory_mb=400)
-                
-                # Parse JSON and measure time
-                json_parse_start = time.time()
-                data = json.loads(response_data)
-                json_parse_time = time.time() - json_parse_start
-                
-                # Immediately free response_data memory after parsing
-                del response_data
+                               streamed=True,
+                               response_size_bytes=response_size,
+                               response_headers_count=len(response_headers),
+                               content_type=response_headers.get('Content-Type', 'unknown'),
+                               records_count=len(records),
+                               first_record_keys=list(records[0].keys()) if records and isinstance(records[0], dict) else None,
+                               total_api_call_time=api_call_time)
+                if page_cursor is not None:
+                    page_cursor.advance(records, response_headers)
+                return records
+            
+            response = scheduler.execute(
+                lambda: session.get(full_url, headers=headers),
+                response_headers=lambda result: result.headers,
+                time_remaining=self._scheduler_deadline()
+            )
+            
+            # Get response headers for pagination metadata
+            response_headers = dict(response.headers)
+            response_data = response.body.decode('utf-8')
+            
+            # CRITICAL API DEBUG: Log raw response details
+            self.logger.info(f"🌐 API RESPONSE DEBUG",
+                            status_code=response.getcode(),
+                            response_size_bytes=len(response_data),
+                            response_headers_count=len(response_headers),
+                            content_type=response_headers.get('content-type', 'unknown'),
+                            response_preview=response_data[:500] if response_data else 'empty')
+            
+            # MEMORY OPTIMIZATION: Check memory before JSON parsing
+            if len(response_data) > 10 * 1024 * 1024:  # If response > 10MB
+                self.logger.warning(f"Large API response detected: {len(response_data) / 1024 / 1024:.1f}MB")
+                self._check_memory_usage(max_memory_mb=400)
+            
+            # Parse JSON and measure time
+            json_parse_start = time.time()
+            data = json.loads(response_data)
+            json_parse_time = time.time() - json_parse_start
+            
+            # Immediately free response_data memory after parsing
+            del response_data
             
             # Handle different response formats
             if isinstance(data, list):
@@ -782,6 +1463,9 @@ class ChunkProcessor:
                 del data
                 gc.collect()
             
+            if page_cursor is not None:
+                page_cursor.advance(records, response_headers)
+            
             return records
                 
         except urllib.error.HTTPError as e:
@@ -791,154 +1475,38 @@ class ChunkProcessor:
                 self.logger.error(f"{error_msg}: {error_body}")
             except:
                 self.logger.error(f"{error_msg}: {str(e)}")
-            return []
+            # A failed request must never look like end of data, or the watermark would skip unfetched records
+            raise
         except urllib.error.URLError as e:
             self.logger.error(f"URL error fetching data batch: {str(e)}")
-            return []
+            raise
+        except (CursorPaginationError, RateLimitPause):
+            # Without a cursor the rest of the table cannot be reached; do not report end of data.
+            # A rate-limit pause is handled by the caller as a continuation
+            raise
         except Exception as e:
             self.logger.error(f"Failed to fetch data batch: {str(e)}")
-            return []
+            raise
     
-    def _write_batch_to_s3(
-        self,
-        records: List[Dict[str, Any]],
-        chunk_config: Dict[str, Any],
-        table_config: Dict[str, Any],
-        tenant_config: Dict[str, Any],
-        batch_number: int
-    ) -> Optional[str]:
-        """Write a batch of records to S3 with memory-efficient processing."""
-        try:
-            import pandas as pd
-            import pyarrow as pa
-            import pyarrow.parquet as pq
-            from io import BytesIO
-            
-            tenant_id = tenant_config['tenant_id']
-            # Use configured table_name from table_config, not derived from endpoint
-            table_name = table_config['table_name']
-            service_name = table_config['service_name']
-            
-            # Generate S3 key using configured table name
-            timestamp = get_timestamp()
-            s3_key = get_s3_key(tenant_id, 'raw', service_name, table_name, timestamp)
-            
-            # Add chunk and batch identifiers to ensure unique files
-            chunk_id = chunk_config['chunk_id']
-            s3_key = s3_key.replace('.parquet', f'_{chunk_id}_batch{batch_number:03d}.parquet')
-            
-            # Convert records to DataFrame and then to Parquet
-            df = pd.DataFrame(records)
-            
-            # Convert DataFrame to Parquet in memory
-            parquet_buffer = BytesIO()
-            df.to_parquet(parquet_buffer, engine='pyarrow', index=False)
-            parquet_data = parquet_buffer.getvalue()
-            
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.config.bucket_name,
-                Key=s3_key,
-                Body=parquet_data,
-                ContentType='application/octet-stream'
-            )
-            
-            self.logger.info(
-                f"Wrote batch {batch_number} with {len(records)} records to S3 as Parquet",
-                s3_key=s3_key,
-                record_count=len(records),
-                batch_number=batch_number,
-                table_name=table_name,
-                service_name=service_name
-            )
-            
-            # Aggressive memory cleanup
-            del df
-            del parquet_buffer
-            del parquet_data
-            del records
-            gc.collect()
-            gc.collect()  # Double gc.collect() for better cleanup
-            
-            # Note: Canonical transformation now triggered by result aggregator after all chunks complete
-            # This eliminates race conditions and duplicate processing
-            self.logger.info(
-                f"S3 write completed for {table_name} batch {batch_number}",
-                table_name=table_name,
-                service_name=service_name,
-                batch_number=batch_number,
-                s3_key=s3_key
-            )
-            
-            return s3_key
-            
-        except Exception as e:
-            self.logger.error(f"Failed to write batch {batch_number} to S3: {str(e)}")
-            return None
-
-    def _write_to_s3(
+    def _stream_page_records(
         self,
-        records: List[Dict[str, Any]],
-        chunk_config: Dict[str, Any],
-        table_config: Dict[str, Any],
-        tenant_config: Dict[str, Any]
-    ):
-        """Write processed records to S3 (legacy method - kept for compatibility)."""
-        try:
-            import pandas as pd
-            import pyarrow as pa
-            import pyarrow.parquet as pq
-            from io import BytesIO
-            
-            tenant_id = tenant_config['tenant_id']
-            # Use configured table_name from table_config, not derived from endpoint
-            table_name = table_config['table_name']
-            service_name = table_config['service_name']
-            
-            # Generate S3 key using configured table name
-            timestamp = get_timestamp()
-            s3_key = get_s3_key(tenant_id, 'raw', service_name, table_name, timestamp)
-            
-            # Add chunk identifier to the key (keep the naming convention but use parquet)
-            chunk_id = chunk_config['chunk_id']
-            s3_key = s3_key.replace('.parquet', f'_{chunk_id}.parquet')
-            
-            # Convert records to DataFrame and then to Parquet
-            df = pd.DataFrame(records)
-            
-            # Convert DataFrame to Parquet in memory
-            parquet_buffer = BytesIO()
-            df.to_parquet(parquet_buffer, engine='pyarrow', index=False)
-            parquet_data = parquet_buffer.getvalue()
-            
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.config.bucket_name,
-                Key=s3_key,
-                Body=parquet_data,
-                ContentType='application/octet-stream'
-            )
-            
-            self.logger.info(
-                f"Wrote {len(records)} records to S3 as Parquet",
-                s3_key=s3_key,
-                record_count=len(records),
-                table_name=table_name,
-                service_name=service_name
-            )
-            
-            # Note: Canonical transformation now triggered by result aggregator after all chunks complete
-            # This eliminates race conditions and duplicate processing
-            self.logger.info(
-                f"S3 write completed for {table_name}",
-                table_name=table_name,
-                service_name=service_name,
-                s3_key=s3_key
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Failed to write to S3: {str(e)}")
-            raise
+        session: HTTPSession,
+        full_url: str,
+        headers: Dict[str, str]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str], int]:
+        """
+        Fetch one page and parse its records incrementally from the response stream.
+        
+        The page is returned whole rather than written while it is read: the
+        scheduler retries a request whose body fails part-way, and rows already
+        handed to the writer could not be taken back.
+        
+        Returns:
+            The page records, the response headers and the number of body bytes received
+        """
+        with session.stream('GET', full_url, headers=headers) as response:
+            records = list(iter_json_records(response.body))
+            return records, dict(response.headers), response.body.bytes_read
     
     # Note: _get_canonical_table_name method removed - functionality moved to result aggregator
     
@@ -951,41 +1519,69 @@ class ChunkProcessor:
         status: str, 
         processing_result: Dict[str, Any]
     ):
-        """Update chunk progress in DynamoDB."""
+        """Move the chunk to its final status with a conditional update of its progress row."""
         try:
-            update_expression = 'SET #status = :status, updated_at = :updated_at'
-            expression_values = {
-                ':status': {'S': status},
-                ':updated_at': {'S': get_timestamp()}
-            }
-            expression_names = {'#status': 'status'}
+            attributes = {'updated_at': {'S': get_timestamp()}}
             
             if 'records_processed' in processing_result:
-                update_expression += ', records_processed = :records_processed'
-                expression_values[':records_processed'] = {'N': str(processing_result['records_processed'])}
+                attributes['records_processed'] = {'N': str(processing_result['records_processed'])}
             
             if 'processing_time' in processing_result:
-                update_expression += ', processing_time = :processing_time'
-                expression_values[':processing_time'] = {'N': str(processing_result['processing_time'])}
+                attributes['processing_time'] = {'N': str(processing_result['processing_time'])}
+            
+            # Records of this invocation alone, so chunk sizing can learn the table's throughput
+            if 'invocation_records_processed' in processing_result:
+                attributes['invocation_records'] = {'N': str(processing_result['invocation_records_processed'])}
             
             if 'error' in processing_result:
-                update_expression += ', error_message = :error_message'
-                expression_values[':error_message'] = {'S': processing_result['error']}
-            
-            self.dynamodb.update_item(
-                TableName=self.chunk_progress_table,
-                Key={
-                    'job_id': {'S': job_id},
-                    'chunk_id': {'S': chunk_id}
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_names,
-                ExpressionAttributeValues=expression_values
+                attributes['error_message'] = {'S': processing_result['error']}
+            
+            if processing_result.get('service_name'):
+                attributes['service_name'] = {'S': processing_result['service_name']}
+            
+            if processing_result.get('continuation_state'):
+                attributes[CHECKPOINT_ATTRIBUTE] = cursor_to_attribute(
+                    ChunkCursor(**processing_result['continuation_state'])
+                )
+            
+            # The manifest is written with the status, so a completed chunk always lists its files
+            if 's3_manifest' in processing_result:
+                bytes_written = sum(entry['size_bytes'] for entry in processing_result['s3_manifest'])
+                attributes['bytes_written'] = {'N': str(bytes_written)}
+                attributes.update(manifest_attributes(
+                    processing_result['s3_manifest'], self.s3_client, self.config.bucket_name, job_id, chunk_id
+                ))
+            
+            # Only a chunk that is still processing can move on, so a late or duplicate
+            # invocation never overwrites a completed chunk
+            applied = self._get_progress_recorder().transition(
+                {'job_id': {'S': job_id}, 'chunk_id': {'S': chunk_id}},
+                status,
+                attributes
             )
+            if not applied:
+                self.logger.warning(f"Chunk {chunk_id} is no longer processing; kept its recorded status",
+                                    job_id=job_id, status=status)
             
         except Exception as e:
             self.logger.warning(f"Failed to update chunk progress: {str(e)}")
     
+    def _record_chunk_throughput(
+        self,
+        tenant_id: str,
+        table_name: str,
+        status: str,
+        processing_result: Dict[str, Any],
+        continuations: int
+    ):
+        """Fold this invocation into the table's rolling throughput, which chunk sizing plans from."""
+        try:
+            outcome = outcome_from_result(tenant_id, table_name, status, processing_result, continuations)
+            if outcome:
+                record_chunk_outcome(self.dynamodb, self.last_updated_table, outcome)
+        except Exception as e:
+            self.logger.warning(f"Failed to record chunk throughput: {str(e)}")
+    
     def _send_chunk_metrics(
         self, 
         job_id: str, 
@@ -1000,7 +1596,6 @@ class ChunkProcessor:
                 {
                     'MetricName': 'ChunkProcessed',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id},
                         {'Name': 'TableName', 'Value': table_name}
                     ],
@@ -1013,11 +1608,11 @@ class ChunkProcessor:
                 metrics.append({
                     'MetricName': 'ChunkRecordsProcessed',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id},
                         {'Name': 'TableName', 'Value': table_name}
                     ],
-                    'Value': processing_result['records_processed'],
+                    # Resumed chunks report only this invocation's records, so the sum stays the chunk total
+                    'Value': processing_result.get('invocation_records_processed', processing_result['records_processed']),
                     'Unit': 'Count'
                 })
             
@@ -1025,7 +1620,6 @@ class ChunkProcessor:
                 metrics.append({
                     'MetricName': 'ChunkProcessingTime',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id},
                         {'Name': 'TableName', 'Value': table_name}
                     ],
@@ -1033,10 +1627,62 @@ class ChunkProcessor:
                     'Unit': 'Seconds'
                 })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline',
-                MetricData=metrics
-            )
+            http_pool_stats = processing_result.get('http_pool_stats')
+            if http_pool_stats and http_pool_stats.get('requests'):
+                metrics.append({
+                    'MetricName': 'HttpConnectionReuseRate',
+                    'Dimensions': [
+                        {'Name': 'TenantId', 'Value': tenant_id},
+                        {'Name': 'TableName', 'Value': table_name}
+                    ],
+                    'Value': http_pool_stats['reuse_rate'] * 100,
+                    'Unit': 'Percent'
+                })
+                metrics.append({
+                    'MetricName': 'HttpConnectionsCreated',
+                    'Dimensions': [
+                        {'Name': 'TenantId', 'Value': tenant_id},
+                        {'Name': 'TableName', 'Value': table_name}
+                    ],
+                    'Value': http_pool_stats['connections_created'],
+                    'Unit': 'Count'
+                })
+            
+            rate_limit_stats = processing_result.get('rate_limit_stats')
+            if rate_limit_stats:
+                for metric_name, stat in (('ApiThrottledRequests', 'throttled'), ('ApiRequestRetries', 'retries')):
+                    metrics.append({
+                        'MetricName': metric_name,
+                        'Dimensions': [
+                            {'Name': 'TenantId', 'Value': tenant_id},
+                            {'Name': 'TableName', 'Value': table_name}
+                        ],
+                        'Value': rate_limit_stats.get(stat, 0),
+                        'Unit': 'Count'
+                    })
+            
+            progress_stats = processing_result.get('progress_stats')
+            if progress_stats:
+                metrics.append({
+                    'MetricName': 'ProgressWriteRequests',
+                    'Dimensions': [
+                        {'Name': 'TenantId', 'Value': tenant_id},
+                        {'Name': 'TableName', 'Value': table_name}
+                    ],
+                    'Value': progress_stats['requests'],
+                    'Unit': 'Count'
+                })
+                metrics.append({
+                    'MetricName': 'ProgressWriteBlockingTime',
+                    'Dimensions': [
+                        {'Name': 'TenantId', 'Value': tenant_id},
+                        {'Name': 'TableName', 'Value': table_name}
+                    ],
+                    'Value': progress_stats['blocking_seconds'] * 1000,
+                    'Unit': 'Milliseconds'
+                })
+            
+            publish_metrics('AVESA/DataPipeline', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send chunk metrics: {str(e)}")
@@ -17,7 +17,12 @@ from botocore.exceptions import ClientError
 from shared.config_simple import Config
 from shared.logger import PipelineLogger
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client
+from shared.chunk_sizing import advise_chunk_size, load_throughput
+from shared.cursor_pagination import PAGINATION_OFFSET, get_pagination_strategy
+from shared.metrics_emitter import publish_metrics
 from shared.utils import get_timestamp
+from shared.record_estimator import RecordEstimate, estimate_from_dict
+from shared.watermark import format_watermark, get_incremental_field
 
 
 class TableProcessor:
@@ -113,15 +118,19 @@ class TableProcessor:
             table_name = table_config['table_name']
             tenant_id = tenant_config['tenant_id']
             
+            # Captured before any record is fetched; becomes the next watermark once this sync commits
+            sync_started_at = format_watermark(datetime.now(timezone.utc))
+            
             # Get last updated timestamp for incremental processing
             last_updated = self._get_last_updated_timestamp(tenant_id, table_name)
             
             # Determine if this is a full sync or incremental
             backfill_mode = table_config.get('backfill_mode', False)
-            is_full_sync = backfill_mode or not last_updated
+            is_full_sync = backfill_mode or not last_updated or not get_incremental_field(table_config)
             
-            # Estimate total records (this would typically call the API to get count)
-            estimated_total_records = self._estimate_total_records(table_config, is_full_sync)
+            # Count the records this sync will extract (only changed records for incremental syncs)
+            estimate = self._estimate_total_records(table_config, tenant_id, None if is_full_sync else last_updated)
+            estimated_total_records = estimate.records if estimate else None
             
             table_state = {
                 'table_name': table_name,
@@ -129,7 +138,9 @@ class TableProcessor:
                 'job_id': job_id,
                 'last_updated': last_updated,
                 'is_full_sync': is_full_sync,
+                'sync_started_at': sync_started_at,
                 'estimated_total_records': estimated_total_records,
+                'estimated_total_bytes': estimate.bytes if estimate else None,
                 'processing_started_at': get_timestamp(),
                 'status': 'initialized'
             }
@@ -147,6 +158,51 @@ class TableProcessor:
             self.logger.error(f"Failed to initialize table processing: {str(e)}")
             raise
     
+    def _estimate_total_records(
+        self,
+        table_config: Dict[str, Any],
+        tenant_id: str,
+        incremental_since: Optional[str]
+    ) -> Optional[RecordEstimate]:
+        """
+        Estimate the records and bytes a sync will extract.
+        
+        The chunk processor owns the source API clients, so it makes the count
+        request (its 'estimate_records' action) and caches the result per
+        tenant and table.
+        
+        Returns:
+            RecordEstimate, or None when the table cannot be counted
+        """
+        try:
+            response = boto3.client('lambda').invoke(
+                FunctionName=f"avesa-chunk-processor-{self.config.environment}",
+                InvocationType='RequestResponse',
+                Payload=json.dumps({
+                    'action': 'estimate_records',
+                    'table_config': table_config,
+                    'tenant_id': tenant_id,
+                    'incremental_since': incremental_since
+                })
+            )
+            result = json.loads(response['Payload'].read())
+            if response.get('FunctionError'):
+                raise ValueError(result.get('errorMessage', 'estimate failed'))
+            return estimate_from_dict(result) if result.get('status') == 'estimated' else None
+        except Exception as e:
+            self.logger.warning(f"Failed to estimate total records: {str(e)}")
+            return None
+    
+    def _get_endpoint_settings(self, table_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the table endpoint's entry in mappings/integrations/<service>_endpoints.json."""
+        service_name = table_config.get('service_name', 'unknown').lower()
+        try:
+            from shared.utils import load_endpoint_configuration
+            return load_endpoint_configuration(service_name).get('endpoints', {}).get(table_config.get('endpoint'), {})
+        except Exception as e:
+            self.logger.warning(f"Failed to load endpoint config for {service_name}: {e}")
+            return {}
+    
     def _get_last_updated_timestamp(self, tenant_id: str, table_name: str) -> Optional[str]:
         """Get last updated timestamp for incremental processing."""
         try:
@@ -177,6 +233,7 @@ class TableProcessor:
         try:
             table_name = table_config['table_name']
             estimated_records = table_state['estimated_total_records']
+            estimated_bytes = table_state.get('estimated_total_bytes')
             
             # Store current table config for dynamic functions to access
             self._current_table_config = table_config
@@ -188,19 +245,37 @@ class TableProcessor:
                     'estimated_total_records': 0
                 }
             
-            # Calculate optimal chunk size using intelligent chunking strategy
-            chunk_size = self._calculate_optimal_chunk_size(table_name, estimated_records)
+            if estimated_records is None:
+                # Size unknown: one chunk reads to the end of the data, continuing across invocations
+                chunk_size = None
+                total_chunks = 1
+            else:
+                # Size chunks from the tenant's measured throughput for this table
+                chunk_size = self._calculate_optimal_chunk_size(table_name, estimated_records, table_state['tenant_id'])
+                
+                # Incremental syncs fetch only changed records, in a single chunk that owns the watermark.
+                # Cursor-paginated tables cannot seek to an offset, so they are read from the start too
+                pagination = get_pagination_strategy(table_config, self._get_endpoint_settings(table_config))
+                if not table_state.get('is_full_sync', True) or pagination != PAGINATION_OFFSET:
+                    chunk_size = max(chunk_size, estimated_records)
+                
+                # Chunks start on a page boundary, so page-numbered APIs can begin at the chunk's first page
+                page_size = table_config.get('page_size') or 1000
+                chunk_size = math.ceil(chunk_size / page_size) * page_size
+                
+                total_chunks = math.ceil(estimated_records / chunk_size)
+            
+            bytes_per_record = estimated_bytes / estimated_records if estimated_bytes and estimated_records else None
             
             # Create chunk definitions
             chunks = []
-            total_chunks = math.ceil(estimated_records / chunk_size)
-            
             for i in range(total_chunks):
-                start_offset = i * chunk_size
-                end_offset = min((i + 1) * chunk_size, estimated_records)
-                estimated_chunk_records = end_offset - start_offset
+                start_offset = i * chunk_size if chunk_size else 0
+                # The last chunk reads to the end of the data, which may have grown past the estimate
+                end_offset = (i + 1) * chunk_size if i < total_chunks - 1 else None
+                estimated_chunk_records = min(chunk_size, estimated_records - start_offset) if chunk_size else None
                 
-                chunk_id = f"{table_name}_{table_state['tenant_id']}_{start_offset}_{end_offset}"
+                chunk_id = f"{table_name}_{table_state['tenant_id']}_{start_offset}_{end_offset if end_offset else 'end'}"
                 
                 chunk_config = {
                     'chunk_id': chunk_id,
@@ -208,6 +283,7 @@ class TableProcessor:
                     'start_offset': start_offset,
                     'end_offset': end_offset,
                     'estimated_records': estimated_chunk_records,
+                    'estimated_bytes': int(estimated_chunk_records * bytes_per_record) if bytes_per_record else None,
                     'table_name': table_name,
                     'tenant_id': table_state['tenant_id'],
                     'job_id': table_state['job_id'],
@@ -215,12 +291,19 @@ class TableProcessor:
                     'created_at': get_timestamp()
                 }
                 
+                if not table_state.get('is_full_sync', True):
+                    chunk_config['incremental_since'] = table_state['last_updated']
+                # A chunk may only advance the watermark when it covers the whole table
+                if total_chunks == 1 and table_state.get('sync_started_at'):
+                    chunk_config['next_watermark'] = table_state['sync_started_at']
+                
                 chunks.append(chunk_config)
             
             chunk_plan = {
                 'chunks': chunks,
                 'total_chunks': total_chunks,
                 'estimated_total_records': estimated_records,
+                'estimated_total_bytes': estimated_bytes,
                 'chunk_size': chunk_size,
                 'chunking_strategy': 'intelligent',
                 'created_at': get_timestamp()
@@ -239,8 +322,40 @@ class TableProcessor:
             self.logger.error(f"Failed to calculate chunks: {str(e)}")
             raise
     
-    def _calculate_optimal_chunk_size(self, table_name: str, estimated_records: int) -> int:
-        """Calculate optimal chunk size based on table characteristics."""
+    def _calculate_optimal_chunk_size(
+        self,
+        table_name: str,
+        estimated_records: int,
+        tenant_id: Optional[str] = None
+    ) -> int:
+        """
+        Calculate the records per chunk from the table's measured throughput.
+        
+        Chunks are sized to fill CHUNK_TARGET_TIMEOUT_FRACTION of the chunk
+        processor timeout at the throughput learned from recent chunk outcomes
+        (the table's rolling throughput item in LastUpdated). Tables without
+        enough history use the default size.
+        """
+        default_size = self._calculate_default_chunk_size(table_name, estimated_records)
+        throughput = None
+        if tenant_id:
+            try:
+                throughput = load_throughput(self.dynamodb, self.last_updated_table, tenant_id, table_name)
+            except Exception as e:
+                self.logger.warning(f"Failed to learn chunk throughput for {table_name}: {str(e)}")
+        
+        advice = advise_chunk_size(throughput, default_size, estimated_records)
+        self.logger.info(
+            "Chose chunk size",
+            table_name=table_name,
+            chunk_size=advice.chunk_size,
+            strategy=advice.strategy,
+            reasons=advice.reasons
+        )
+        return advice.chunk_size
+    
+    def _calculate_default_chunk_size(self, table_name: str, estimated_records: int) -> int:
+        """Calculate the chunk size of a table without throughput history, from its characteristics."""
         # Base chunk size configuration
         base_chunk_size = 5000
         max_chunk_size = 15000
@@ -389,7 +504,6 @@ class TableProcessor:
                 {
                     'MetricName': f'TableProcessing{event_type.title()}',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id},
                         {'Name': 'TableName', 'Value': table_name}
                     ],
@@ -402,7 +516,6 @@ class TableProcessor:
                 metrics.append({
                     'MetricName': 'TableChunkCount',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id},
                         {'Name': 'TableName', 'Value': table_name}
                     ],
@@ -410,10 +523,7 @@ class TableProcessor:
                     'Unit': 'Count'
                 })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send table metrics: {str(e)}")
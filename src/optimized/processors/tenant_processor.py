@@ -17,6 +17,7 @@ from botocore.exceptions import ClientError
 from shared.config_simple import Config, TenantConfig
 from shared.logger import PipelineLogger
 from shared.aws_clients import get_dynamodb_client, get_cloudwatch_client, get_secrets_client
+from shared.metrics_emitter import publish_metrics
 from shared.utils import get_timestamp
 
 
@@ -188,16 +189,15 @@ class TenantProcessor:
     def _get_service_config(self, service_name: str) -> Optional[Dict[str, Any]]:
         """Get service configuration from mappings dynamically."""
         try:
-            # Import dynamic utilities with correct path
+            # Import dynamic utilities
             build_service_table_configurations = None
-            
+
             try:
-                sys.path.insert(0, os.path.join('/var/task', 'src', 'shared'))
                 from shared.utils import build_service_table_configurations
-                except ImportError:
+            except ImportError:
                 self.logger.error(f"Could not import build_service_table_configurations")
-            return None
-            
+                return None
+
             if not build_service_table_configurations:
                 self.logger.error(f"build_service_table_configurations function not available")
                 return None
@@ -305,7 +305,6 @@ class TenantProcessor:
                 {
                     'MetricName': f'TenantProcessing{event_type.title()}',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id}
                     ],
                     'Value': 1,
@@ -317,17 +316,13 @@ class TenantProcessor:
                 metrics.append({
                     'MetricName': 'TenantTableCount',
                     'Dimensions': [
-                        {'Name': 'JobId', 'Value': job_id},
                         {'Name': 'TenantId', 'Value': tenant_id}
                     ],
                     'Value': table_count,
                     'Unit': 'Count'
                 })
             
-            self.cloudwatch.put_metric_data(
-                Namespace='AVESA/DataPipeline',
-                MetricData=metrics
-            )
+            publish_metrics('AVESA/DataPipeline', metrics, cloudwatch_client=self.cloudwatch, properties={'JobId': job_id})
             
         except Exception as e:
             self.logger.warning(f"Failed to send tenant metrics: {str(e)}")
@@ -7,66 +7,94 @@ This module provides centralized access to all shared components including:
 - Data validation and quality checks
 - Environment configuration and utilities
 - Logging and utility functions
+
+Exports are imported on first access (PEP 562), so importing one submodule
+such as shared.utils does not pay for boto3, clickhouse_connect and the rest
+of the package at Lambda cold start.
 """
 
-# Legacy AWS clients (maintained for backward compatibility)
-from .aws_clients import get_dynamodb_client, get_s3_client, get_secrets_client
-
-# New centralized AWS client factory
-from .aws_client_factory import (
-    AWSClientFactory,
-    get_dynamodb_client as get_dynamodb_client_v2,
-    get_s3_client as get_s3_client_v2,
-    get_secrets_client as get_secrets_client_v2,
-    get_cloudwatch_client,
-    get_lambda_client,
-    get_stepfunctions_client
-)
-
-# ClickHouse client management
-from .clickhouse_client import (
-    ClickHouseClient,
-    ClickHouseConnectionError,
-    ClickHouseQueryError,
-    get_clickhouse_connection
-)
-
-# Data validation and quality checks
-from .validators import (
-    CredentialValidator,
-    DataQualityValidator,
-    TenantConfigValidator,
-    ValidationError,
-    validate_connectwise_credentials,
-    validate_tenant_config
-)
-
-# Canonical mapping and transformation
-from .canonical_mapper import CanonicalMapper
-
-# SCD configuration management
-from .scd_config import (
-    SCDConfigManager,
-    SCDType,
-    SCDTypeEnum,
-    get_scd_type,
-    is_scd_type_1,
-    is_scd_type_2,
-    filter_tables_by_scd_type,
-    validate_scd_configuration
-)
-
-# Configuration and environment management
-from .config_simple import Config, TenantConfig, ServiceConfig, ConnectWiseCredentials
-from .environment import Environment, EnvironmentConfig, get_current_environment, get_table_name
-
-# Logging and utilities
-from .logger import get_logger
-from .utils import flatten_json, get_timestamp
-
-# Path and environment utilities
-from .path_utils import PathManager
-from .env_validator import EnvironmentValidator
+import importlib
+
+
+# Exported name -> (submodule, attribute in the submodule)
+_EXPORTS = {
+    # Legacy AWS clients (maintained for backward compatibility)
+    "get_dynamodb_client": ("aws_clients", "get_dynamodb_client"),
+    "get_s3_client": ("aws_clients", "get_s3_client"),
+    "get_secrets_client": ("aws_clients", "get_secrets_client"),
+
+    # New centralized AWS client factory
+    "AWSClientFactory": ("aws_client_factory", "AWSClientFactory"),
+    "get_dynamodb_client_v2": ("aws_client_factory", "get_dynamodb_client"),
+    "get_s3_client_v2": ("aws_client_factory", "get_s3_client"),
+    "get_secrets_client_v2": ("aws_client_factory", "get_secrets_client"),
+    "get_cloudwatch_client": ("aws_client_factory", "get_cloudwatch_client"),
+    "get_lambda_client": ("aws_client_factory", "get_lambda_client"),
+    "get_stepfunctions_client": ("aws_client_factory", "get_stepfunctions_client"),
+
+    # ClickHouse client management
+    "ClickHouseClient": ("clickhouse_client", "ClickHouseClient"),
+    "ClickHouseConnectionError": ("clickhouse_client", "ClickHouseConnectionError"),
+    "ClickHouseQueryError": ("clickhouse_client", "ClickHouseQueryError"),
+    "get_clickhouse_connection": ("clickhouse_client", "get_clickhouse_connection"),
+
+    # Data validation and quality checks
+    "CredentialValidator": ("validators", "CredentialValidator"),
+    "DataQualityValidator": ("validators", "DataQualityValidator"),
+    "TenantConfigValidator": ("validators", "TenantConfigValidator"),
+    "ValidationError": ("validators", "ValidationError"),
+    "validate_connectwise_credentials": ("validators", "validate_connectwise_credentials"),
+    "validate_tenant_config": ("validators", "validate_tenant_config"),
+
+    # Canonical mapping and transformation
+    "CanonicalMapper": ("canonical_mapper", "CanonicalMapper"),
+    "RecordHasher": ("record_hash", "RecordHasher"),
+    "get_hash_mode": ("record_hash", "get_hash_mode"),
+
+    # SCD configuration management
+    "SCDConfigManager": ("scd_config", "SCDConfigManager"),
+    "SCDType": ("scd_config", "SCDType"),
+    "SCDTypeEnum": ("scd_config", "SCDTypeEnum"),
+    "get_scd_type": ("scd_config", "get_scd_type"),
+    "is_scd_type_1": ("scd_config", "is_scd_type_1"),
+    "is_scd_type_2": ("scd_config", "is_scd_type_2"),
+    "filter_tables_by_scd_type": ("scd_config", "filter_tables_by_scd_type"),
+    "validate_scd_configuration": ("scd_config", "validate_scd_configuration"),
+
+    # Configuration and environment management
+    "Config": ("config_simple", "Config"),
+    "TenantConfig": ("config_simple", "TenantConfig"),
+    "ServiceConfig": ("config_simple", "ServiceConfig"),
+    "ConnectWiseCredentials": ("config_simple", "ConnectWiseCredentials"),
+    "Environment": ("environment", "Environment"),
+    "EnvironmentConfig": ("environment", "EnvironmentConfig"),
+    "get_current_environment": ("environment", "get_current_environment"),
+    "get_table_name": ("environment", "get_table_name"),
+
+    # Logging and utilities
+    "get_logger": ("logger", "get_logger"),
+    "flatten_json": ("utils", "flatten_json"),
+    "get_timestamp": ("utils", "get_timestamp"),
+
+    # Path and environment utilities
+    "PathManager": ("path_utils", "PathManager"),
+    "EnvironmentValidator": ("env_validator", "EnvironmentValidator"),
+}
+
+
+def __getattr__(name):
+    """Import an exported name's submodule on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _EXPORTS[name]
+    value = getattr(importlib.import_module(f".{module_name}", __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 __all__ = [
     # Legacy AWS clients (backward compatibility)
@@ -99,6 +127,8 @@ __all__ = [
     
     # Canonical mapping
     "CanonicalMapper",
+    "RecordHasher",
+    "get_hash_mode",
     
     # SCD configuration
     "SCDConfigManager",
@@ -1,11 +1,36 @@
 """
 AWS client utilities for the ConnectWise data pipeline.
+
+Clients are cached per (service, region) for the life of the process, so a
+warm Lambda container reuses its clients and their connection pools instead
+of rebuilding them on every invocation. boto3 clients are thread-safe.
 """
 
+import threading
 import boto3
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from botocore.config import Config as BotoConfig
 
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _cached_client(service_name: str, region_name: Optional[str], config: BotoConfig):
+    """Return the process-wide client for a service and region, creating it once."""
+    key = (service_name, region_name)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.client(service_name, config=config)
+            _clients[key] = client
+        return client
+
+
+def clear_client_cache() -> None:
+    """Forget every cached client (e.g. after credential rotation or in tests)."""
+    with _clients_lock:
+        _clients.clear()
+
 
 def get_dynamodb_client(region_name: Optional[str] = None):
     """Get DynamoDB client with optimized configuration."""
@@ -17,7 +42,7 @@ def get_dynamodb_client(region_name: Optional[str] = None):
         },
         max_pool_connections=50
     )
-    return boto3.client('dynamodb', config=config)
+    return _cached_client('dynamodb', region_name, config)
 
 
 def get_s3_client(region_name: Optional[str] = None):
@@ -36,7 +61,7 @@ def get_s3_client(region_name: Optional[str] = None):
             'addressing_style': 'auto'
         }
     )
-    return boto3.client('s3', config=config)
+    return _cached_client('s3', region_name, config)
 
 
 def get_secrets_client(region_name: Optional[str] = None):
@@ -48,7 +73,7 @@ def get_secrets_client(region_name: Optional[str] = None):
             'mode': 'adaptive'
         }
     )
-    return boto3.client('secretsmanager', config=config)
+    return _cached_client('secretsmanager', region_name, config)
 
 
 def get_cloudwatch_client(region_name: Optional[str] = None):
@@ -60,7 +85,7 @@ def get_cloudwatch_client(region_name: Optional[str] = None):
             'mode': 'adaptive'
         }
     )
-    return boto3.client('cloudwatch', config=config)
+    return _cached_client('cloudwatch', region_name, config)
 
 
 def get_lambda_client(region_name: Optional[str] = None):
@@ -72,7 +97,7 @@ def get_lambda_client(region_name: Optional[str] = None):
             'mode': 'adaptive'
         }
     )
-    return boto3.client('lambda', config=config)
+    return _cached_client('lambda', region_name, config)
 
 
 def get_stepfunctions_client(region_name: Optional[str] = None):
@@ -84,4 +109,4 @@ def get_stepfunctions_client(region_name: Optional[str] = None):
             'mode': 'adaptive'
         }
     )
-    return boto3.client('stepfunctions', config=config)
\ No newline at end of file
+    return _cached_client('stepfunctions', region_name, config)
\ No newline at end of file
@@ -13,20 +13,117 @@ import json
 import os
 import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timezone
 from collections import OrderedDict
 
 try:
     from .aws_client_factory import AWSClientFactory
+    from .record_hash import RecordHasher
     from .utils import get_timestamp
 except ImportError:
     # Fallback for direct imports
     from aws_client_factory import AWSClientFactory
+    from record_hash import RecordHasher
     from utils import get_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Canonical fields that are always emitted as strings for consistency
+ID_FIELDS = ('id', 'company_id', 'contact_id', 'ticket_id', 'entry_id')
+
+
+class KeyResolver:
+    """
+    Memoized case-insensitive key resolution.
+    
+    Records produced from the same source schema spell a key the same way, so
+    the spellings found for a key are remembered and tried first: a hit costs
+    a dictionary lookup per known spelling instead of lowercasing and scanning
+    every key of every record. Only keys without a known spelling are scanned.
+    """
+
+    def __init__(self, max_cache_size: int = 4096):
+        """
+        Initialize the resolver.
+        
+        Args:
+            max_cache_size: Maximum number of keys whose spellings are cached
+        """
+        self.max_cache_size = max_cache_size
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+
+    def resolve(self, data: Dict[str, Any], key: str) -> Optional[str]:
+        """
+        Find the key in data matching key case-insensitively.
+        
+        Args:
+            data: Dictionary being searched (key is known not to be an exact match)
+            key: Key to resolve
+            
+        Returns:
+            Matching key in data, or None if there is no match
+        """
+        spellings = self._cache.get(key, ())
+        for spelling in spellings:
+            if spelling in data:
+                return spelling
+        
+        key_lower = key.lower()
+        for data_key in data:
+            if data_key.lower() == key_lower:
+                if len(self._cache) >= self.max_cache_size:
+                    self._cache.clear()
+                self._cache[key] = spellings + (data_key,)
+                return data_key
+        return None
+
+
+class FieldAccessor:
+    """Precompiled accessor for a double-underscore field path (e.g. 'status__name')."""
+
+    __slots__ = ('canonical_field', 'field_path', 'keys', 'is_id', 'resolver')
+
+    def __init__(self, canonical_field: str, field_path: str, resolver: KeyResolver):
+        self.canonical_field = canonical_field
+        self.field_path = field_path
+        self.keys = tuple(field_path.split('__'))
+        self.is_id = canonical_field in ID_FIELDS
+        self.resolver = resolver
+
+    def get(self, data: Dict[str, Any]) -> Any:
+        """
+        Get the value at this accessor's path.
+        
+        Args:
+            data: Source data dictionary
+            
+        Returns:
+            Value at the path or None if not found
+        """
+        try:
+            value = data
+            for key in self.keys:
+                if not isinstance(value, dict):
+                    return None
+                if key in value:
+                    value = value[key]
+                else:
+                    # Try case-insensitive match for common field variations
+                    resolved = self.resolver.resolve(value, key)
+                    if resolved is None:
+                        return None
+                    value = value[resolved]
+            return value
+        except Exception:
+            return None
+
+
+class CompiledMapping(NamedTuple):
+    """A table mapping compiled into field accessors."""
+    source_mapping: Optional[Dict[str, str]]
+    accessors: Tuple[FieldAccessor, ...]
+
 
 class CanonicalMapper:
     """
@@ -44,19 +141,34 @@ class CanonicalMapper:
         
         Args:
             s3_client: Optional S3 client for loading mappings from S3
+                (created on first S3 mapping load when None)
             max_cache_size: Maximum number of mappings to cache (prevents memory leaks)
         """
-        if s3_client is None:
-            # Create S3 client using shared factory
-            aws_factory = AWSClientFactory()
-            clients = aws_factory.get_client_bundle(['s3'])
-            self.s3_client = clients['s3']
-        else:
-            self.s3_client = s3_client
+        self._s3_client = s3_client
         
         # MEMORY OPTIMIZATION: Bounded cache with LRU eviction
         self.max_cache_size = max_cache_size
         self._mapping_cache = OrderedDict()
+        
+        # Compiled accessors, keyed by (canonical_table, id(mapping)); entries keep
+        # a reference to their mapping so the id cannot be reused while cached
+        self._compiled_cache = OrderedDict()
+        self._path_accessors = {}
+        self._key_resolver = KeyResolver()
+        self._record_hasher = RecordHasher()
+
+    @property
+    def s3_client(self):
+        """S3 client, created with the shared factory only when a mapping is loaded from S3."""
+        if self._s3_client is None:
+            aws_factory = AWSClientFactory()
+            clients = aws_factory.get_client_bundle(['s3'])
+            self._s3_client = clients['s3']
+        return self._s3_client
+
+    @s3_client.setter
+    def s3_client(self, client):
+        self._s3_client = client
 
 # REMOVED: get_default_mapping function - redundant since we have actual mapping files
 # This eliminates hardcoded fallback data that could drift from real JSON files
@@ -75,7 +187,9 @@ class CanonicalMapper:
         # Check cache first
         cache_key = f"{table_type}_{bucket or 'default'}"
         if cache_key in self._mapping_cache:
-            return self._mapping_cache[cache_key]
+            mapping = self._mapping_cache[cache_key]
+            self.compile_mapping(mapping, table_type)
+            return mapping
         
         mapping = None
         
@@ -118,6 +232,9 @@ class CanonicalMapper:
         
         # MEMORY OPTIMIZATION: Cache the result with size management
         self._manage_cache(cache_key, mapping)
+        
+        # Precompile field accessors so per-record transforms skip path parsing
+        self.compile_mapping(mapping, table_type)
         return mapping
     
     def _manage_cache(self, key: str, value: Dict[str, Any]) -> None:
@@ -149,32 +266,11 @@ class CanonicalMapper:
         Returns:
             Value at the specified path or None if not found
         """
-        try:
-            keys = field_path.split('__')
-            value = data
-            
-            for key in keys:
-                if isinstance(value, dict):
-                    # Try exact match first
-                    if key in value:
-                        value = value[key]
-                    else:
-                        # Try case-insensitive match for common field variations
-                        key_lower = key.lower()
-                        found = False
-                        for data_key in value.keys():
-                            if data_key.lower() == key_lower:
-                                value = value[data_key]
-                                found = True
-                                break
-                        if not found:
-                            return None
-                else:
-                    return None
-            
-            return value
-        except Exception:
-            return None
+        accessor = self._path_accessors.get(field_path)
+        if accessor is None:
+            accessor = FieldAccessor(field_path, field_path, self._key_resolver)
+            self._path_accessors[field_path] = accessor
+        return accessor.get(data)
 
     def _calculate_record_hash(self, record: Dict[str, Any]) -> str:
         """
@@ -186,18 +282,7 @@ class CanonicalMapper:
         Returns:
             MD5 hash string
         """
-        # Exclude SCD fields from hash calculation
-        scd_fields = {
-            'effective_start_date', 'effective_end_date', 'is_current',
-            'record_hash', 'ingestion_timestamp'
-        }
-        
-        # Create a copy without SCD fields
-        hash_data = {k: v for k, v in record.items() if k not in scd_fields}
-        
-        # Sort keys for consistent hashing
-        sorted_data = json.dumps(hash_data, sort_keys=True, default=str)
-        return hashlib.md5(sorted_data.encode()).hexdigest()
+        return self._record_hasher.hash_record(record)
 
     def _get_source_table_for_canonical(self, canonical_table: str) -> str:
         """Map canonical table to source table name."""
@@ -224,6 +309,114 @@ class CanonicalMapper:
         
         return source_mappings.get(canonical_table)
 
+    def resolve_table_mapping(self, mapping: Dict[str, Any],
+                              canonical_table: str) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]]]:
+        """
+        Resolve the source mapping and field mapping used for a canonical table.
+        
+        Args:
+            mapping: Mapping configuration
+            canonical_table: Target canonical table name
+            
+        Returns:
+            Tuple of (source mapping, canonical field -> source path mapping).
+            The field mapping is None if no usable mapping was found.
+        """
+        # Determine the service based on source system (default to connectwise)
+        source_mapping = self.get_source_mapping(canonical_table)
+        service = source_mapping['service'] if source_mapping else 'connectwise'
+        
+        # Get service-specific mapping
+        service_mapping = mapping.get(service)
+        if not service_mapping:
+            logger.error(f"No mapping found for service '{service}' in {canonical_table}")
+            return source_mapping, None
+        
+        # Get the table-specific mapping within the service
+        source_table = source_mapping['table'] if source_mapping else canonical_table
+        table_mapping_key = f"{service}/{source_table}" if service == 'connectwise' else source_table
+        table_mapping = service_mapping.get(table_mapping_key) or service_mapping.get(source_table)
+        
+        if not table_mapping:
+            # Fallback - try to find any mapping in the service
+            if len(service_mapping) == 1:
+                table_mapping = list(service_mapping.values())[0]
+            else:
+                logger.error(f"No table mapping found for '{table_mapping_key}' in service '{service}'")
+                return source_mapping, None
+        
+        return source_mapping, table_mapping
+
+    def compile_mapping(self, mapping: Dict[str, Any], canonical_table: str) -> Optional[CompiledMapping]:
+        """
+        Compile a mapping into field accessors, reusing a previously compiled plan.
+        
+        Args:
+            mapping: Mapping configuration
+            canonical_table: Target canonical table name
+            
+        Returns:
+            Compiled mapping, or None if the mapping has no usable table mapping
+        """
+        cache_key = (canonical_table, id(mapping))
+        cached = self._compiled_cache.get(cache_key)
+        if cached is not None and cached[0] is mapping:
+            return cached[1]
+        
+        source_mapping, table_mapping = self.resolve_table_mapping(mapping, canonical_table)
+        if not table_mapping:
+            return None
+        
+        compiled = CompiledMapping(
+            source_mapping=source_mapping,
+            accessors=tuple(
+                FieldAccessor(canonical_field, source_field, self._key_resolver)
+                for canonical_field, source_field in table_mapping.items()
+            )
+        )
+        
+        while len(self._compiled_cache) >= self.max_cache_size:
+            self._compiled_cache.popitem(last=False)
+        self._compiled_cache[cache_key] = (mapping, compiled)
+        return compiled
+
+    def _apply_compiled_mapping(self, raw_record: Dict[str, Any], compiled: CompiledMapping,
+                                canonical_table: str, tenant_id: Optional[str],
+                                ingestion_timestamp: str) -> Dict[str, Any]:
+        """Build a canonical record from a raw record using compiled accessors."""
+        canonical_record = {}
+        
+        # Apply field mappings - transform ALL fields from the mapping
+        for accessor in compiled.accessors:
+            value = accessor.get(raw_record)
+            if value is not None and accessor.is_id:
+                # Convert ID fields to strings for consistency
+                value = str(value)
+            # Missing fields are set to None to maintain schema consistency
+            canonical_record[accessor.canonical_field] = value
+        
+        # CRITICAL FIX: Add tenant_id to prevent NULL values
+        if tenant_id:
+            canonical_record['tenant_id'] = tenant_id
+        
+        # Add metadata fields
+        source_mapping = compiled.source_mapping
+        if source_mapping:
+            canonical_record['source_system'] = source_mapping['service']
+            canonical_record['source_table'] = source_mapping['table']
+        
+        canonical_record['canonical_table'] = canonical_table
+        
+        # CRITICAL FIX: Do NOT add SCD Type 2 fields here
+        # SCD fields should be added by the SCD processing logic based on table configuration
+        # This was causing schema mismatches for Type 1 tables
+        canonical_record['ingestion_timestamp'] = ingestion_timestamp
+        
+        # Record hash for change detection is filled in by the caller
+        canonical_record['record_hash'] = None
+        
+        return canonical_record
+
     def transform_record(self, raw_record: Dict[str, Any], mapping: Dict[str, Any],
                         canonical_table: str, tenant_id: str = None) -> Optional[Dict[str, Any]]:
         """
@@ -243,60 +436,13 @@ class CanonicalMapper:
                 logger.error(f"Invalid or missing mapping for {canonical_table}")
                 return None
             
-            canonical_record = {}
-            
-            # Determine the service based on source system (default to connectwise)
-            source_mapping = self.get_source_mapping(canonical_table)
-            service = source_mapping['service'] if source_mapping else 'connectwise'
-            
-            # Get service-specific mapping
-            service_mapping = mapping.get(service)
-            if not service_mapping:
-                logger.error(f"No mapping found for service '{service}' in {canonical_table}")
+            compiled = self.compile_mapping(mapping, canonical_table)
+            if not compiled:
                 return None
             
-            # Get the table-specific mapping within the service
-            source_table = source_mapping['table'] if source_mapping else canonical_table
-            table_mapping_key = f"{service}/{source_table}" if service == 'connectwise' else source_table
-            table_mapping = service_mapping.get(table_mapping_key) or service_mapping.get(source_table)
-            
-            if not table_mapping:
-                # Fallback - try to find any mapping in the service
-                if len(service_mapping) == 1:
-                    table_mapping = list(service_mapping.values())[0]
-                else:
-                    logger.error(f"No table mapping found for '{table_mapping_key}' in service '{service}'")
-                    return None
-            
-            # Apply field mappings - transform ALL fields from the mapping
-            for canonical_field, source_field in table_mapping.items():
-                value = self._get_nested_value(raw_record, source_field)
-                if value is not None:
-                    # Convert ID fields to strings for consistency
-                    if canonical_field in ['id', 'company_id', 'contact_id', 'ticket_id', 'entry_id']:
-                        canonical_record[canonical_field] = str(value)
-                    else:
-                        canonical_record[canonical_field] = value
-                else:
-                    # Set None for missing fields to maintain schema consistency
-                    canonical_record[canonical_field] = None
-            
-            # CRITICAL FIX: Add tenant_id to prevent NULL values
-            if tenant_id:
-                canonical_record['tenant_id'] = tenant_id
-            
-            # Add metadata fields
-            if source_mapping:
-                canonical_record['source_system'] = source_mapping['service']
-                canonical_record['source_table'] = source_mapping['table']
-            
-            canonical_record['canonical_table'] = canonical_table
-            
-            # CRITICAL FIX: Do NOT add SCD Type 2 fields here
-            # SCD fields should be added by the SCD processing logic based on table configuration
-            # This was causing schema mismatches for Type 1 tables
-            current_timestamp = get_timestamp()
-            canonical_record['ingestion_timestamp'] = current_timestamp
+            canonical_record = self._apply_compiled_mapping(
+                raw_record, compiled, canonical_table, tenant_id, get_timestamp()
+            )
             
             # Calculate record hash for change detection
             canonical_record['record_hash'] = self._calculate_record_hash(canonical_record)
@@ -309,6 +455,54 @@ class CanonicalMapper:
             logger.error(f"Failed to transform record for {canonical_table}: {e}")
             return None
 
+    def transform_batch(self, raw_records: Iterable[Dict[str, Any]], mapping: Dict[str, Any],
+                        canonical_table: str, tenant_id: str = None,
+                        compute_hash: bool = True) -> List[Optional[Dict[str, Any]]]:
+        """
+        Transform a batch of records to canonical format with one compiled plan.
+        
+        The mapping is compiled once for the batch and all records share a single
+        ingestion timestamp.
+        
+        Args:
+            raw_records: Raw records from source system
+            mapping: Mapping configuration
+            canonical_table: Target canonical table name
+            tenant_id: Tenant ID for multi-tenant support
+            compute_hash: Whether to fill record_hash; callers that add fields
+                after mapping pass False and hash the final records once
+            
+        Returns:
+            Transformed records aligned with the input; None where a record failed
+        """
+        raw_records = list(raw_records)
+        if not mapping:
+            logger.error(f"Invalid or missing mapping for {canonical_table}")
+            return [None] * len(raw_records)
+        
+        compiled = self.compile_mapping(mapping, canonical_table)
+        if not compiled:
+            return [None] * len(raw_records)
+        
+        ingestion_timestamp = get_timestamp()
+        results = []
+        for raw_record in raw_records:
+            try:
+                results.append(self._apply_compiled_mapping(
+                    raw_record, compiled, canonical_table, tenant_id, ingestion_timestamp
+                ))
+            except Exception as e:
+                logger.error(f"Failed to transform record for {canonical_table}: {e}")
+                results.append(None)
+        
+        if compute_hash:
+            transformed = [record for record in results if record is not None]
+            for record, record_hash in zip(transformed, self._record_hasher.hash_records(transformed)):
+                record['record_hash'] = record_hash
+        
+        logger.debug(f"Transformed batch of {len(results)} records for {canonical_table}")
+        return results
+
     # Legacy methods for backward compatibility
     def map_company_data(self, source_data: Dict[str, Any], service: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,224 @@
+"""
+Durable pagination checkpoints for chunks that span several invocations.
+
+A chunk's extraction cursor (page, offset, last record id and the number of
+records behind it) is stored in its ChunkProgress item together with the
+manifest of the files written so far. A checkpoint is only taken for records
+that are in S3: the cursor recorded after a file's upload completes is the
+one that follows the last page inside that file, so records still buffered
+or in an unfinished upload are fetched again rather than lost.
+
+A continuation invocation (chunk_config['resume']) reads the checkpoint,
+resumes fetching at its cursor and appends new files to its manifest, so one
+table can stream across any number of Lambda invocations without rework.
+
+Files are closed every CHUNK_CHECKPOINT_ROWS rows (or CHUNK_CHECKPOINT_BYTES
+bytes), which bounds the work a killed invocation loses. The invocation that
+owns a chunk holds a lease on it until its own deadline has passed; a chunk
+left 'processing' is only taken over once that lease has run out, so a
+continuation never extracts a chunk while its previous invocation still runs.
+"""
+
+import logging
+import math
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .chunk_manifest import read_manifest
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_ATTRIBUTE = 'checkpoint'
+LEASE_ATTRIBUTE = 'lease_expires_at'
+LEASE_OWNER_ATTRIBUTE = 'lease_owner'
+
+# Statuses a chunk may always be resumed from: the previous invocation stopped gracefully
+RESUMABLE_STATUSES = ('timeout_continuation',)
+
+# Statuses a chunk may be resumed from once its lease has expired: an invocation killed mid-chunk
+LEASED_STATUSES = ('processing',)
+
+# Added to an invocation's remaining time, for clock skew between Lambda hosts
+LEASE_GRACE_SECONDS = 60
+
+DEFAULT_MAX_CHUNK_CONTINUATIONS = 100
+DEFAULT_CHECKPOINT_ROWS = 25000
+DEFAULT_CHECKPOINT_BYTES = 32 * 1024 * 1024
+
+
+class ChunkLeaseHeld(Exception):
+    """Another invocation still holds the lease on a chunk."""
+
+
+class ChunkCursor(NamedTuple):
+    """Where extraction of a chunk continues."""
+    page: int = 1
+    offset: int = 0
+    records_processed: int = 0
+    last_id: Optional[str] = None
+
+
+class ChunkCheckpoint(NamedTuple):
+    """A chunk's recorded progress."""
+    status: str
+    cursor: ChunkCursor
+    manifest: List[Dict[str, Any]]
+    continuations: int
+
+
+def get_max_chunk_continuations() -> int:
+    """Get the limit on continuation invocations per chunk from MAX_CHUNK_CONTINUATIONS."""
+    return max(1, int(os.environ.get('MAX_CHUNK_CONTINUATIONS', str(DEFAULT_MAX_CHUNK_CONTINUATIONS))))
+
+
+def get_checkpoint_rows() -> int:
+    """Get the rows per output file, and so between checkpoints, from CHUNK_CHECKPOINT_ROWS."""
+    return max(1, int(os.environ.get('CHUNK_CHECKPOINT_ROWS', str(DEFAULT_CHECKPOINT_ROWS))))
+
+
+def get_checkpoint_bytes() -> int:
+    """Get the output file size after which a checkpoint is taken from CHUNK_CHECKPOINT_BYTES."""
+    return max(1, int(os.environ.get('CHUNK_CHECKPOINT_BYTES', str(DEFAULT_CHECKPOINT_BYTES))))
+
+
+def lease_attributes(owner: str, expires_at: float) -> Dict[str, Any]:
+    """
+    Build the ChunkProgress attributes of a chunk lease.
+
+    Args:
+        owner: Invocation holding the lease (the Lambda request id)
+        expires_at: Epoch seconds after which the owner can no longer be running
+
+    Returns:
+        Attributes in DynamoDB attribute format
+    """
+    return {
+        LEASE_OWNER_ATTRIBUTE: {'S': owner},
+        LEASE_ATTRIBUTE: {'N': str(int(math.ceil(expires_at)))}
+    }
+
+
+def cursor_to_attribute(cursor: ChunkCursor) -> Dict[str, Any]:
+    """
+    Convert a cursor to a DynamoDB map attribute.
+
+    Args:
+        cursor: Cursor to store
+
+    Returns:
+        DynamoDB attribute value
+    """
+    fields = {
+        'page': {'N': str(cursor.page)},
+        'offset': {'N': str(cursor.offset)},
+        'records_processed': {'N': str(cursor.records_processed)}
+    }
+    if cursor.last_id is not None:
+        fields['last_id'] = {'S': str(cursor.last_id)}
+    return {'M': fields}
+
+
+def cursor_from_attribute(attribute: Optional[Dict[str, Any]]) -> ChunkCursor:
+    """
+    Read a cursor stored by cursor_to_attribute().
+
+    Args:
+        attribute: DynamoDB map attribute, or None
+
+    Returns:
+        The stored cursor, or the start of the chunk when nothing is stored
+    """
+    fields = (attribute or {}).get('M')
+    if not fields:
+        return ChunkCursor()
+    return ChunkCursor(
+        page=int(fields.get('page', {}).get('N', '1')),
+        offset=int(fields.get('offset', {}).get('N', '0')),
+        records_processed=int(fields.get('records_processed', {}).get('N', '0')),
+        last_id=fields.get('last_id', {}).get('S')
+    )
+
+
+def load_checkpoint(
+    dynamodb_client,
+    table_name: str,
+    job_id: str,
+    chunk_id: str,
+    s3_client,
+    bucket_name: str
+) -> Optional[ChunkCheckpoint]:
+    """
+    Read a chunk's checkpoint with a consistent read.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: ChunkProgress table name
+        job_id: Processing job identifier
+        chunk_id: Chunk identifier
+        s3_client: boto3 S3 client (for manifests stored in S3)
+        bucket_name: Bucket of manifest objects
+
+    Returns:
+        ChunkCheckpoint, or None if the chunk has no progress item
+    """
+    response = dynamodb_client.get_item(
+        TableName=table_name,
+        Key={'job_id': {'S': job_id}, 'chunk_id': {'S': chunk_id}},
+        ConsistentRead=True
+    )
+    item = response.get('Item')
+    if not item:
+        return None
+    return ChunkCheckpoint(
+        status=item.get('status', {}).get('S', ''),
+        cursor=cursor_from_attribute(item.get(CHECKPOINT_ATTRIBUTE)),
+        manifest=read_manifest(item, s3_client, bucket_name) or [],
+        continuations=int(item.get('continuations', {}).get('N', '0'))
+    )
+
+
+class DurableCursorTracker:
+    """
+    Maps rows handed to the Parquet writer back to the cursor after their page.
+
+    mark() is called as each page is handed to the writer, with the writer's
+    row count including that page; durable() is called with the row count of completed files and
+    returns the cursor that follows the last page they contain. Files are
+    closed on row group boundaries and row groups hold whole pages, so every
+    committed row count matches a mark.
+    """
+
+    def __init__(self, start: ChunkCursor):
+        """
+        Initialize the tracker.
+
+        Args:
+            start: Cursor the invocation started from (durable by definition)
+        """
+        self._durable = start
+        self._marks: Deque[Tuple[int, ChunkCursor]] = deque()
+
+    def mark(self, rows: int, cursor: ChunkCursor):
+        """
+        Record the cursor following a page.
+
+        Args:
+            rows: Rows handed to the writer once this page is written
+            cursor: Cursor of the next page
+        """
+        self._marks.append((rows, cursor))
+
+    def durable(self, committed_rows: int) -> ChunkCursor:
+        """
+        Get the cursor covered by committed rows.
+
+        Args:
+            committed_rows: Rows in files whose upload has completed
+
+        Returns:
+            The latest cursor whose page is entirely committed
+        """
+        while self._marks and self._marks[0][0] <= committed_rows:
+            self._durable = self._marks.popleft()[1]
+        return self._durable
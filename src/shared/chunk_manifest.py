@@ -0,0 +1,161 @@
+"""
+Per-chunk manifests of the raw files a chunk wrote to S3.
+
+The chunk processor records every file it wrote (key, row count, size and
+Parquet schema hash) in the chunk's ChunkProgress item, in the same update
+that marks the chunk completed. Downstream stages read the manifest instead
+of guessing file names, so they process exactly the files that exist.
+
+Manifests with more than MAX_INLINE_MANIFEST_FILES files are written to S3 as
+a JSON object and the item stores its key; DynamoDB items are limited to
+400KB. The object is written before the item is updated, so an item never
+points at a missing manifest.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from .dynamodb_access import paginate
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MAX_INLINE_MANIFEST_FILES = 200
+MANIFEST_PREFIX = 'manifests'
+
+
+def build_manifest(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build manifest entries from StreamingParquetWriter.files.
+
+    Args:
+        files: Dictionaries with name, record_count, size_bytes and schema_hash
+
+    Returns:
+        List of {key, record_count, size_bytes, schema_hash}, in write order
+    """
+    return [
+        {
+            'key': file_info['name'],
+            'record_count': int(file_info.get('record_count', 0)),
+            'size_bytes': int(file_info.get('size_bytes', 0)),
+            'schema_hash': file_info.get('schema_hash', '')
+        }
+        for file_info in files
+    ]
+
+
+def manifest_keys(manifest: List[Dict[str, Any]]) -> List[str]:
+    """Get the S3 keys listed in a manifest."""
+    return [entry['key'] for entry in manifest]
+
+
+def manifest_object_key(job_id: str, chunk_id: str) -> str:
+    """Get the S3 key of a chunk's manifest object."""
+    return f"{MANIFEST_PREFIX}/{job_id}/{chunk_id}.json"
+
+
+def _entry_to_attribute(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {'M': {
+        'key': {'S': entry['key']},
+        'record_count': {'N': str(entry['record_count'])},
+        'size_bytes': {'N': str(entry['size_bytes'])},
+        'schema_hash': {'S': entry['schema_hash']}
+    }}
+
+
+def _entry_from_attribute(attribute: Dict[str, Any]) -> Dict[str, Any]:
+    fields = attribute.get('M', {})
+    return {
+        'key': fields.get('key', {}).get('S', ''),
+        'record_count': int(fields.get('record_count', {}).get('N', '0')),
+        'size_bytes': int(fields.get('size_bytes', {}).get('N', '0')),
+        'schema_hash': fields.get('schema_hash', {}).get('S', '')
+    }
+
+
+def manifest_attributes(
+    manifest: List[Dict[str, Any]],
+    s3_client,
+    bucket_name: str,
+    job_id: str,
+    chunk_id: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the ChunkProgress attributes that store a manifest.
+
+    Small manifests are stored inline as s3_manifest; larger ones are written
+    to S3 first and referenced by s3_manifest_key.
+
+    Args:
+        manifest: Entries from build_manifest()
+        s3_client: boto3 S3 client (used only for large manifests)
+        bucket_name: Bucket for manifest objects
+        job_id: Processing job identifier
+        chunk_id: Chunk identifier
+
+    Returns:
+        Attribute name -> DynamoDB attribute value, to SET on the item
+    """
+    attributes = {
+        's3_files_count': {'N': str(len(manifest))},
+        's3_records_written': {'N': str(sum(entry['record_count'] for entry in manifest))}
+    }
+    if len(manifest) <= MAX_INLINE_MANIFEST_FILES:
+        attributes['s3_manifest'] = {'L': [_entry_to_attribute(entry) for entry in manifest]}
+        return attributes
+
+    object_key = manifest_object_key(job_id, chunk_id)
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=object_key,
+        Body=json.dumps({'version': MANIFEST_VERSION, 'job_id': job_id, 'chunk_id': chunk_id, 'files': manifest}),
+        ContentType='application/json'
+    )
+    attributes['s3_manifest_key'] = {'S': object_key}
+    return attributes
+
+
+def read_manifest(item: Dict[str, Any], s3_client, bucket_name: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read the manifest stored with a ChunkProgress item.
+
+    Args:
+        item: ChunkProgress item in DynamoDB attribute format
+        s3_client: boto3 S3 client (used only for manifests stored in S3)
+        bucket_name: Bucket of manifest objects
+
+    Returns:
+        Manifest entries, or None if the chunk has no manifest (written before manifests existed)
+    """
+    if 's3_manifest' in item:
+        return [_entry_from_attribute(attribute) for attribute in item['s3_manifest'].get('L', [])]
+    if 's3_manifest_key' in item:
+        response = s3_client.get_object(Bucket=bucket_name, Key=item['s3_manifest_key']['S'])
+        return json.loads(response['Body'].read())['files']
+    return None
+
+
+def iter_job_chunks(dynamodb_client, table_name: str, job_id: str, **query_kwargs) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every ChunkProgress item of a job, following query pagination.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: ChunkProgress table name
+        job_id: Processing job identifier
+        **query_kwargs: Extra query arguments (e.g. ProjectionExpression)
+
+    Yields:
+        ChunkProgress items in DynamoDB attribute format
+    """
+    return paginate(
+        dynamodb_client.query,
+        **dict(
+            query_kwargs,
+            TableName=table_name,
+            KeyConditionExpression='job_id = :job_id',
+            ExpressionAttributeValues=dict(query_kwargs.get('ExpressionAttributeValues', {}), **{':job_id': {'S': job_id}})
+        )
+    )
@@ -0,0 +1,486 @@
+"""
+Throughput-learned chunk sizing.
+
+This module provides:
+- Chunk outcomes (records, seconds, bytes and whether the chunk ran into the
+  Lambda timeout) of finished invocations and of ChunkProgress rows
+- Per-(tenant, table) throughput learned from those outcomes, with older
+  outcomes weighted down exponentially (CHUNK_THROUGHPUT_HALF_LIFE_HOURS)
+- A rolling throughput item per table in the LastUpdated DynamoDB table
+  ('<table>#throughput', next to the '#estimate' items) that each finished
+  invocation folds its outcome into, so planning reads one item
+- Chunk size advice targeting a fraction of the chunk processor's timeout
+  (CHUNK_TARGET_TIMEOUT_FRACTION of CHUNK_PROCESSOR_TIMEOUT_SECONDS), with the
+  reasoning behind it
+
+Tables without enough history keep the caller's default size. Advice is a
+planning input only: a chunk that takes longer than planned continues in a
+new invocation from its checkpoint.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .dynamodb_access import paginate, projection_arguments
+from .watermark import format_watermark
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_PROCESSOR_TIMEOUT_SECONDS = 180
+DEFAULT_TARGET_TIMEOUT_FRACTION = 0.5
+DEFAULT_HALF_LIFE_HOURS = 72.0
+DEFAULT_MIN_CHUNK_SIZE = 1000
+DEFAULT_MAX_CHUNK_SIZE = 100000
+
+# Outcomes needed before learned throughput replaces the default size
+MIN_THROUGHPUT_SAMPLES = 3
+
+# Outcomes older than this many half-lives weigh under 1/16 and are not read
+LOOKBACK_HALF_LIVES = 4
+
+# Sort key suffix of the rolling throughput items stored alongside watermarks in LastUpdated
+THROUGHPUT_KEY_SUFFIX = '#throughput'
+
+# Conditional writes tried before an outcome is dropped from the rolling throughput
+THROUGHPUT_UPDATE_ATTEMPTS = 3
+
+# Statuses whose outcome reflects a full invocation of extraction work
+_MEASURED_STATUSES = ('completed', 'timeout_continuation')
+
+OUTCOME_ATTRIBUTES = (
+    'tenant_id', 'table_name', 'status', 'records_processed', 'invocation_records',
+    'processing_time', 'bytes_written', 'continuations', 'updated_at'
+)
+
+
+class ChunkOutcome(NamedTuple):
+    """Result of a chunk's last invocation, as recorded in ChunkProgress."""
+    tenant_id: str
+    table_name: str
+    records: int
+    seconds: float
+    bytes: int
+    timed_out: bool
+    updated_at: datetime
+
+
+class Throughput(NamedTuple):
+    """Decay-weighted extraction throughput of a tenant's table."""
+    records_per_second: float
+    bytes_per_record: Optional[float]
+    timeout_rate: float
+    samples: int
+
+
+class ChunkSizeAdvice(NamedTuple):
+    """Recommended chunk size and the reasoning behind it."""
+    chunk_size: int
+    strategy: str
+    reasons: List[str]
+    throughput: Optional[Throughput] = None
+
+
+def get_chunk_processor_timeout_seconds() -> float:
+    """Get the chunk processor's Lambda timeout from CHUNK_PROCESSOR_TIMEOUT_SECONDS."""
+    return float(os.environ.get('CHUNK_PROCESSOR_TIMEOUT_SECONDS', str(DEFAULT_CHUNK_PROCESSOR_TIMEOUT_SECONDS)))
+
+
+def get_target_timeout_fraction() -> float:
+    """Get the share of the timeout a chunk is sized to fill from CHUNK_TARGET_TIMEOUT_FRACTION."""
+    fraction = float(os.environ.get('CHUNK_TARGET_TIMEOUT_FRACTION', str(DEFAULT_TARGET_TIMEOUT_FRACTION)))
+    return min(1.0, max(0.05, fraction))
+
+
+def get_half_life_hours() -> float:
+    """Get the age at which an outcome counts half from CHUNK_THROUGHPUT_HALF_LIFE_HOURS."""
+    return max(1.0, float(os.environ.get('CHUNK_THROUGHPUT_HALF_LIFE_HOURS', str(DEFAULT_HALF_LIFE_HOURS))))
+
+
+def get_chunk_size_bounds() -> Tuple[int, int]:
+    """Get (min, max) chunk sizes from CHUNK_SIZE_MIN and CHUNK_SIZE_MAX."""
+    minimum = max(1, int(os.environ.get('CHUNK_SIZE_MIN', str(DEFAULT_MIN_CHUNK_SIZE))))
+    maximum = max(minimum, int(os.environ.get('CHUNK_SIZE_MAX', str(DEFAULT_MAX_CHUNK_SIZE))))
+    return minimum, maximum
+
+
+def _number(item: Dict[str, Any], name: str) -> Optional[float]:
+    """Read a numeric DynamoDB attribute."""
+    value = item.get(name, {}).get('N')
+    return float(value) if value is not None else None
+
+
+def outcome_from_item(item: Dict[str, Any]) -> Optional[ChunkOutcome]:
+    """
+    Read a chunk outcome from a ChunkProgress item.
+
+    Args:
+        item: DynamoDB item (low-level attribute format)
+
+    Returns:
+        ChunkOutcome, or None when the row holds no measured invocation
+    """
+    status = item.get('status', {}).get('S')
+    seconds = _number(item, 'processing_time')
+    if status not in _MEASURED_STATUSES or not seconds or seconds <= 0:
+        return None
+
+    # Rows written before invocation_records existed only measure single-invocation chunks
+    records = _number(item, 'invocation_records')
+    continuations = int(_number(item, 'continuations') or 0)
+    if records is None:
+        if continuations:
+            return None
+        records = _number(item, 'records_processed')
+    if not records:
+        return None
+
+    try:
+        updated_at = datetime.fromisoformat(item['updated_at']['S'].replace('Z', '+00:00'))
+    except (KeyError, ValueError):
+        return None
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+
+    total_records = _number(item, 'records_processed') or records
+    bytes_written = _number(item, 'bytes_written')
+    return ChunkOutcome(
+        tenant_id=item.get('tenant_id', {}).get('S', ''),
+        table_name=item.get('table_name', {}).get('S', ''),
+        records=int(records),
+        seconds=seconds,
+        # Bytes are recorded for the whole chunk; attribute this invocation its share
+        bytes=int(bytes_written * records / total_records) if bytes_written and total_records else 0,
+        timed_out=status == 'timeout_continuation' or continuations > 0,
+        updated_at=updated_at
+    )
+
+
+def outcome_from_result(
+    tenant_id: str,
+    table_name: str,
+    status: str,
+    processing_result: Dict[str, Any],
+    continuations: int = 0,
+    updated_at: Optional[datetime] = None
+) -> Optional[ChunkOutcome]:
+    """
+    Read the outcome of the invocation that just processed a chunk.
+
+    Args:
+        tenant_id: Tenant identifier
+        table_name: Table name
+        status: Status the chunk moved to
+        processing_result: Result of the chunk processor's invocation
+        continuations: Continuations recorded for the chunk (0 on its first invocation)
+        updated_at: Time the invocation finished (default now)
+
+    Returns:
+        ChunkOutcome, or None when the invocation measured nothing
+    """
+    seconds = processing_result.get('processing_time')
+    total_records = processing_result.get('records_processed')
+    records = processing_result.get('invocation_records_processed', total_records)
+    if status not in _MEASURED_STATUSES or not seconds or seconds <= 0 or not records:
+        return None
+
+    bytes_written = sum(entry['size_bytes'] for entry in processing_result.get('s3_manifest', []))
+    return ChunkOutcome(
+        tenant_id=tenant_id,
+        table_name=table_name,
+        records=int(records),
+        seconds=float(seconds),
+        bytes=int(bytes_written * records / total_records) if bytes_written and total_records else 0,
+        timed_out=status == 'timeout_continuation' or continuations > 0,
+        updated_at=updated_at or datetime.now(timezone.utc)
+    )
+
+
+def load_chunk_outcomes(
+    dynamodb_client,
+    chunk_progress_table: str,
+    tenant_id: str,
+    table_name: str,
+    half_life_hours: Optional[float] = None,
+    now: Optional[datetime] = None
+) -> List[ChunkOutcome]:
+    """
+    Read a table's recent chunk outcomes from ChunkProgress.
+
+    ChunkProgress is keyed by job and chunk, so this is a filtered scan over
+    the whole table; it is meant for offline inspection (the chunk size
+    advisor), while planning reads the rolling throughput item. Only rows
+    updated within LOOKBACK_HALF_LIVES half-lives are returned.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        chunk_progress_table: ChunkProgress table name
+        tenant_id: Tenant identifier
+        table_name: Table name
+        half_life_hours: Decay half-life (default CHUNK_THROUGHPUT_HALF_LIFE_HOURS)
+        now: Current time (for tests)
+
+    Returns:
+        Outcomes with a measured invocation
+    """
+    half_life_hours = half_life_hours or get_half_life_hours()
+    since = (now or datetime.now(timezone.utc)) - timedelta(hours=half_life_hours * LOOKBACK_HALF_LIVES)
+    request = {
+        'TableName': chunk_progress_table,
+        'FilterExpression': '#tenant = :tenant AND #table = :table AND #updated >= :since',
+        'ExpressionAttributeValues': {
+            ':tenant': {'S': tenant_id},
+            ':table': {'S': table_name},
+            ':since': {'S': format_watermark(since)}
+        }
+    }
+    request.update(projection_arguments(
+        OUTCOME_ATTRIBUTES,
+        {'#tenant': 'tenant_id', '#table': 'table_name', '#updated': 'updated_at'}
+    ))
+    outcomes = [outcome_from_item(item) for item in paginate(dynamodb_client.scan, **request)]
+    return [outcome for outcome in outcomes if outcome is not None]
+
+
+def learn_throughput(
+    outcomes: Iterable[ChunkOutcome],
+    half_life_hours: Optional[float] = None,
+    now: Optional[datetime] = None
+) -> Optional[Throughput]:
+    """
+    Learn a table's throughput from its chunk outcomes.
+
+    Each outcome is weighted 0.5 ** (age / half-life). Throughput is the
+    ratio of weighted records to weighted seconds, so long chunks count for
+    more than short ones.
+
+    Args:
+        outcomes: Chunk outcomes of one tenant's table
+        half_life_hours: Decay half-life (default CHUNK_THROUGHPUT_HALF_LIFE_HOURS)
+        now: Current time (for tests)
+
+    Returns:
+        Throughput, or None with fewer than MIN_THROUGHPUT_SAMPLES outcomes
+    """
+    outcomes = list(outcomes)
+    if len(outcomes) < MIN_THROUGHPUT_SAMPLES:
+        return None
+
+    half_life_hours = half_life_hours or get_half_life_hours()
+    now = now or datetime.now(timezone.utc)
+    weights = [
+        0.5 ** (max((now - outcome.updated_at).total_seconds(), 0) / 3600 / half_life_hours)
+        for outcome in outcomes
+    ]
+    total_weight = sum(weights)
+    weighted_records = sum(w * o.records for w, o in zip(weights, outcomes))
+    weighted_seconds = sum(w * o.seconds for w, o in zip(weights, outcomes))
+    weighted_bytes = sum(w * o.bytes for w, o in zip(weights, outcomes) if o.bytes)
+    weighted_byte_records = sum(w * o.records for w, o in zip(weights, outcomes) if o.bytes)
+
+    return Throughput(
+        records_per_second=weighted_records / weighted_seconds,
+        bytes_per_record=weighted_bytes / weighted_byte_records if weighted_byte_records else None,
+        timeout_rate=sum(w for w, o in zip(weights, outcomes) if o.timed_out) / total_weight,
+        samples=len(outcomes)
+    )
+
+
+def _throughput_key(tenant_id: str, table_name: str) -> Dict[str, Dict[str, str]]:
+    """LastUpdated key of a table's rolling throughput item."""
+    return {'tenant_id': {'S': tenant_id}, 'table_name': {'S': f"{table_name}{THROUGHPUT_KEY_SUFFIX}"}}
+
+
+def _decay(since: datetime, until: datetime, half_life_hours: float) -> float:
+    """Weight of something measured at since, as seen at until."""
+    return 0.5 ** (max((until - since).total_seconds(), 0) / 3600 / half_life_hours)
+
+
+def _parse_time(item: Dict[str, Any]) -> Optional[datetime]:
+    """Read the updated_at attribute of a throughput item."""
+    try:
+        value = datetime.fromisoformat(item['updated_at']['S'].replace('Z', '+00:00'))
+    except (KeyError, ValueError):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def record_chunk_outcome(
+    dynamodb_client,
+    last_updated_table: str,
+    outcome: ChunkOutcome,
+    half_life_hours: Optional[float] = None
+) -> bool:
+    """
+    Fold a chunk outcome into its table's rolling throughput item.
+
+    The item holds decay-weighted sums (as of its updated_at) of everything
+    learn_throughput needs, so adding an outcome decays the sums and adds the
+    outcome's weight. Concurrent chunks of a table are serialized with a
+    conditional write on the sample count.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        last_updated_table: LastUpdated DynamoDB table name
+        outcome: Outcome of a finished invocation
+        half_life_hours: Decay half-life (default CHUNK_THROUGHPUT_HALF_LIFE_HOURS)
+
+    Returns:
+        True if the outcome was recorded, False if every attempt lost a race
+    """
+    half_life_hours = half_life_hours or get_half_life_hours()
+    key = _throughput_key(outcome.tenant_id, outcome.table_name)
+
+    for attempt in range(THROUGHPUT_UPDATE_ATTEMPTS):
+        item = dynamodb_client.get_item(TableName=last_updated_table, Key=key, ConsistentRead=True).get('Item')
+        stored_at = _parse_time(item) if item else None
+        samples = int(_number(item, 'samples') or 0) if stored_at else 0
+
+        updated_at = max(outcome.updated_at, stored_at) if stored_at else outcome.updated_at
+        decay = _decay(stored_at, updated_at, half_life_hours) if stored_at else 0.0
+        weight = _decay(outcome.updated_at, updated_at, half_life_hours)
+
+        def fold(name: str, value: float) -> Dict[str, str]:
+            stored = (_number(item, name) or 0.0) if stored_at else 0.0
+            return {'N': repr(stored * decay + weight * value)}
+
+        new_item = dict(
+            key,
+            weight=fold('weight', 1.0),
+            records=fold('records', outcome.records),
+            seconds=fold('seconds', outcome.seconds),
+            bytes=fold('bytes', outcome.bytes),
+            byte_records=fold('byte_records', outcome.records if outcome.bytes else 0),
+            timeout_weight=fold('timeout_weight', 1.0 if outcome.timed_out else 0.0),
+            samples={'N': str(samples + 1)},
+            updated_at={'S': format_watermark(updated_at)}
+        )
+        condition = {'ExpressionAttributeNames': {'#samples': 'samples'}}
+        if item and 'samples' in item:
+            condition['ConditionExpression'] = '#samples = :samples'
+            condition['ExpressionAttributeValues'] = {':samples': item['samples']}
+        else:
+            condition['ConditionExpression'] = 'attribute_not_exists(#samples)'
+
+        try:
+            dynamodb_client.put_item(TableName=last_updated_table, Item=new_item, **condition)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+            # Another chunk of the table recorded first; fold into its result
+            time.sleep(0.05 * (attempt + 1))
+
+    logger.warning(f"Dropped a chunk outcome of {outcome.tenant_id}/{outcome.table_name}: "
+                   f"{THROUGHPUT_UPDATE_ATTEMPTS} concurrent updates won")
+    return False
+
+
+def load_throughput(
+    dynamodb_client,
+    last_updated_table: str,
+    tenant_id: str,
+    table_name: str,
+    half_life_hours: Optional[float] = None,
+    now: Optional[datetime] = None
+) -> Optional[Throughput]:
+    """
+    Read a table's throughput from its rolling throughput item.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        last_updated_table: LastUpdated DynamoDB table name
+        tenant_id: Tenant identifier
+        table_name: Table name
+        half_life_hours: Decay half-life (default CHUNK_THROUGHPUT_HALF_LIFE_HOURS)
+        now: Current time (for tests)
+
+    Returns:
+        Throughput, or None with fewer than MIN_THROUGHPUT_SAMPLES outcomes or
+        none within LOOKBACK_HALF_LIVES half-lives
+    """
+    response = dynamodb_client.get_item(TableName=last_updated_table, Key=_throughput_key(tenant_id, table_name))
+    item = response.get('Item')
+    updated_at = _parse_time(item) if item else None
+    if updated_at is None or int(_number(item, 'samples') or 0) < MIN_THROUGHPUT_SAMPLES:
+        return None
+
+    half_life_hours = half_life_hours or get_half_life_hours()
+    now = now or datetime.now(timezone.utc)
+    if (now - updated_at).total_seconds() > half_life_hours * LOOKBACK_HALF_LIVES * 3600:
+        return None
+
+    # Every sum decays alike from updated_at, so the ratios hold as of now
+    weight = _number(item, 'weight') or 0.0
+    seconds = _number(item, 'seconds') or 0.0
+    byte_records = _number(item, 'byte_records') or 0.0
+    if weight <= 0 or seconds <= 0:
+        return None
+    return Throughput(
+        records_per_second=(_number(item, 'records') or 0.0) / seconds,
+        bytes_per_record=(_number(item, 'bytes') or 0.0) / byte_records if byte_records else None,
+        timeout_rate=(_number(item, 'timeout_weight') or 0.0) / weight,
+        samples=int(_number(item, 'samples'))
+    )
+
+
+def advise_chunk_size(
+    throughput: Optional[Throughput],
+    default_size: int,
+    estimated_records: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+    target_fraction: Optional[float] = None
+) -> ChunkSizeAdvice:
+    """
+    Choose the records per chunk for a table.
+
+    Args:
+        throughput: Learned throughput, or None without enough history
+        default_size: Size to use without learned throughput
+        estimated_records: Records the sync is expected to extract
+        timeout_seconds: Chunk processor timeout (default CHUNK_PROCESSOR_TIMEOUT_SECONDS)
+        target_fraction: Share of the timeout to fill (default CHUNK_TARGET_TIMEOUT_FRACTION)
+
+    Returns:
+        ChunkSizeAdvice with the chosen size and the reasons for it
+    """
+    if throughput is None:
+        return ChunkSizeAdvice(
+            chunk_size=default_size,
+            strategy='default',
+            reasons=[f"fewer than {MIN_THROUGHPUT_SAMPLES} measured chunks; using the default size {default_size}"]
+        )
+
+    timeout_seconds = timeout_seconds or get_chunk_processor_timeout_seconds()
+    target_fraction = target_fraction or get_target_timeout_fraction()
+    minimum, maximum = get_chunk_size_bounds()
+
+    target_seconds = timeout_seconds * target_fraction
+    size = round(throughput.records_per_second * target_seconds)
+    reasons = [
+        f"{throughput.samples} measured chunks average {throughput.records_per_second:.1f} records/s",
+        f"target {target_seconds:.0f}s = {target_fraction:.0%} of the {timeout_seconds:.0f}s timeout "
+        f"-> {size} records"
+    ]
+
+    if throughput.timeout_rate > 0:
+        # Chunks that hit the timeout show throughput varies; leave more headroom
+        factor = max(0.5, 1 - throughput.timeout_rate)
+        size = round(size * factor)
+        reasons.append(f"{throughput.timeout_rate:.0%} of recent chunks hit the timeout; "
+                       f"scaling by {factor:.2f} -> {size} records")
+
+    bounded = max(minimum, min(maximum, size))
+    if bounded != size:
+        reasons.append(f"clamped to [{minimum}, {maximum}] -> {bounded} records")
+    if estimated_records is not None and 0 < estimated_records < bounded:
+        bounded = estimated_records
+        reasons.append(f"the sync has only ~{estimated_records} records -> one chunk")
+    if throughput.bytes_per_record:
+        reasons.append(f"~{throughput.bytes_per_record:.0f} bytes/record -> ~{bounded * throughput.bytes_per_record / 1e6:.1f} MB per chunk")
+
+    return ChunkSizeAdvice(chunk_size=bounded, strategy='throughput', reasons=reasons, throughput=throughput)
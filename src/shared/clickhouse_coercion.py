@@ -0,0 +1,479 @@
+"""
+ClickHouse type coercion for loaded records.
+
+This module provides:
+- convert_value_for_clickhouse: the row-wise conversion of one value to the
+  Python value inserted into a ClickHouse column
+- compile_column_converter: compiles a ClickHouse column type once into a
+  ColumnConverter that converts whole columns with the same results
+
+Column converters classify a column once and convert the common shapes in
+bulk: fixed-format date and datetime strings, numeric strings, and numeric
+and boolean columns. Values outside those shapes are converted row-wise,
+once per distinct value, so results always match the row-wise function.
+
+pandas and numpy are imported at module level, so import this module only
+from code that runs with the pandas layer.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def convert_value_for_clickhouse(value: Any, clickhouse_type: str, field_name: str) -> Any:
+    """Convert a value to the appropriate type for ClickHouse insertion."""
+    if value is None:
+        return None
+    
+    # Handle nullable types
+    is_nullable = clickhouse_type.startswith('Nullable(')
+    if is_nullable:
+        # Extract the inner type from Nullable(Type)
+        inner_type = clickhouse_type[9:-1]  # Remove 'Nullable(' and ')'
+    else:
+        inner_type = clickhouse_type
+    
+    try:
+        # Date type conversion - COMPREHENSIVE FIX for ClickHouse Date serialization
+        if 'Date' in inner_type and inner_type != 'DateTime':
+            from datetime import datetime, date
+            import math
+            
+            # Handle None/empty/invalid values first - CRITICAL for ClickHouse compatibility
+            if value is None:
+                return None
+            
+            # Handle NaN float values (common in pandas DataFrames)
+            if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+                return None
+            
+            # Handle string representations of null/empty values
+            if isinstance(value, str):
+                value_lower = value.strip().lower()
+                if not value_lower or value_lower in ['nan', 'none', 'null', 'na', '', '0000-00-00']:
+                    return None
+            
+            # Handle numeric values (timestamp/epoch conversions)
+            if isinstance(value, (int, float)):
+                # Handle common "null" numeric representations
+                if value == 0 or value < 0:
+                    return None
+                
+                # Handle Unix timestamps (seconds since epoch)
+                try:
+                    if 1000000000 <= value <= 2147483647:  # Valid Unix timestamp range (2001-2038)
+                        parsed_date = datetime.fromtimestamp(value)
+                        return parsed_date.date()
+                    elif 1000000000000 <= value <= 2147483647000:  # Unix timestamp in milliseconds
+                        parsed_date = datetime.fromtimestamp(value / 1000)
+                        return parsed_date.date()
+                    else:
+                        # Other numeric values are invalid for dates
+                        logger.warning(f"Invalid numeric date value {value} for field {field_name}, setting to None")
+                        return None
+                except (ValueError, OSError, OverflowError):
+                    logger.warning(f"Could not convert numeric timestamp {value} for field {field_name}, setting to None")
+                    return None
+            
+            # Handle string dates
+            if isinstance(value, str):
+                value_trimmed = value.strip()
+                if not value_trimmed:
+                    return None
+                
+                # Try common date formats with enhanced error handling
+                date_formats = [
+                    '%Y-%m-%d',                    # 2023-01-15
+                    '%m/%d/%Y',                    # 01/15/2023
+                    '%d/%m/%Y',                    # 15/01/2023
+                    '%Y-%m-%dT%H:%M:%S%z',        # 2023-01-15T12:00:00+00:00
+                    '%Y-%m-%dT%H:%M:%S',          # 2023-01-15T12:00:00
+                    '%Y-%m-%dT%H:%M:%S.%fZ',      # 2023-01-15T12:00:00.000Z
+                    '%Y-%m-%dT%H:%M:%SZ',         # 2023-01-15T12:00:00Z
+                    '%Y/%m/%d',                    # 2023/01/15
+                    '%d-%m-%Y',                    # 15-01-2023
+                ]
+                
+                for fmt in date_formats:
+                    try:
+                        parsed_date = datetime.strptime(value_trimmed, fmt)
+                        result_date = parsed_date.date()
+                        
+                        # Validate reasonable date range (avoid ancient or far future dates)
+                        if 1900 <= result_date.year <= 2100:
+                            return result_date
+                        else:
+                            logger.warning(f"Date {result_date} outside reasonable range for field {field_name}, setting to None")
+                            return None
+                            
+                    except ValueError:
+                        continue
+                
+                # Pandas fallback with enhanced error handling
+                try:
+                    import pandas as pd
+                    parsed_date = pd.to_datetime(value_trimmed, errors='coerce', utc=True)
+                    if pd.notna(parsed_date):
+                        result_date = parsed_date.date()
+                        # Additional validation for pandas results
+                        if 1900 <= result_date.year <= 2100:
+                            return result_date
+                        else:
+                            logger.warning(f"Pandas parsed date {result_date} outside reasonable range for field {field_name}, setting to None")
+                            return None
+                    else:
+                        logger.debug(f"Pandas could not parse date value '{value}' for field {field_name}, setting to None")
+                        return None
+                except Exception as e:
+                    logger.debug(f"Pandas date parsing failed for '{value}' on field {field_name}: {e}, setting to None")
+                    return None
+            
+            # Handle datetime objects
+            elif hasattr(value, 'date') and callable(getattr(value, 'date')):
+                try:
+                    result_date = value.date()
+                    if 1900 <= result_date.year <= 2100:
+                        return result_date
+                    else:
+                        logger.warning(f"Datetime object date {result_date} outside reasonable range for field {field_name}, setting to None")
+                        return None
+                except Exception as e:
+                    logger.warning(f"Could not extract date from datetime object for field {field_name}: {e}, setting to None")
+                    return None
+            
+            # Handle date objects directly
+            elif isinstance(value, date):
+                if 1900 <= value.year <= 2100:
+                    return value
+                else:
+                    logger.warning(f"Date object {value} outside reasonable range for field {field_name}, setting to None")
+                    return None
+            
+            # For any other type, convert to None (safer than attempting conversion)
+            else:
+                logger.warning(f"Unexpected date value type {type(value)} for field {field_name}: '{value}', setting to None")
+                return None
+        
+        # DateTime type conversion
+        elif 'DateTime' in inner_type:
+            if isinstance(value, str):
+                from datetime import datetime
+                try:
+                    # Try ISO format first
+                    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except:
+                    try:
+                        import pandas as pd
+                        return pd.to_datetime(value).to_pydatetime()
+                    except:
+                        logger.warning(f"Could not parse datetime value '{value}' for field {field_name}, keeping as string")
+                        return str(value)
+            return value
+        
+        # Numeric type conversions
+        elif 'Int' in inner_type or 'UInt' in inner_type:
+            if isinstance(value, str) and value.strip() == '':
+                return None
+            return int(float(value))  # Handle cases where int is stored as float string
+        
+        elif 'Float' in inner_type:
+            if isinstance(value, str) and value.strip() == '':
+                return None
+            return float(value)
+        
+        # Boolean type conversion
+        elif 'Bool' in inner_type:
+            if isinstance(value, str):
+                value_lower = value.lower()
+                if value_lower in ['true', '1', 'yes', 'on']:
+                    return True
+                elif value_lower in ['false', '0', 'no', 'off']:
+                    return False
+                else:
+                    return bool(value)
+            return bool(value)
+        
+        # String types - convert to string but preserve None
+        elif 'String' in inner_type:
+            return str(value)
+        
+        else:
+            # For unknown types, convert to string as fallback
+            logger.debug(f"Unknown ClickHouse type '{clickhouse_type}' for field {field_name}, converting to string")
+            return str(value)
+            
+    except Exception as e:
+        logger.warning(f"Error converting value '{value}' for field {field_name} to type {clickhouse_type}: {e}")
+        # Fallback to string conversion
+        return str(value)
+
+
+# Column kinds, chosen exactly as convert_value_for_clickhouse chooses its branch
+KIND_DATE = 'date'
+KIND_DATETIME = 'datetime'
+KIND_INT = 'int'
+KIND_FLOAT = 'float'
+KIND_BOOL = 'bool'
+KIND_STRING = 'string'
+
+# Full-match patterns, written for both Python re and Arrow's RE2
+_DATE_STRING = r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+_TIME = r'(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]'
+_OFFSET = r'(?:Z|[+-](?:[01][0-9]|2[0-3]):?[0-5][0-9])'
+# ISO datetimes whose first matching strptime format yields the wall-clock date
+_DATED_DATETIME_STRING = rf'[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}T{_TIME}(?:{_OFFSET}?|\.[0-9]{{1,6}}Z)'
+_NAIVE_DATETIME_STRING = rf'[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}T{_TIME}'
+_UTC_DATETIME_STRING = rf'[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}T{_TIME}(?:Z|\+00:00)'
+_DECIMAL_STRING = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+
+_DATE_NULL_STRINGS = ['nan', 'none', 'null', 'na', '', '0000-00-00']
+_TRUE_STRINGS = ['true', '1', 'yes', 'on']
+_FALSE_STRINGS = ['false', '0', 'no', 'off']
+
+# Largest magnitude whose float converts to int64 exactly
+_INT64_LIMIT = float(2 ** 63)
+
+
+@lru_cache(maxsize=None)
+def get_column_kind(clickhouse_type: str) -> str:
+    """
+    Get the conversion kind of a ClickHouse column type.
+
+    Args:
+        clickhouse_type: ClickHouse type (e.g., 'Nullable(Date)')
+
+    Returns:
+        One of KIND_DATE, KIND_DATETIME, KIND_INT, KIND_FLOAT, KIND_BOOL or KIND_STRING
+    """
+    inner_type = clickhouse_type[9:-1] if clickhouse_type.startswith('Nullable(') else clickhouse_type
+    if 'Date' in inner_type and inner_type != 'DateTime':
+        return KIND_DATE
+    if 'DateTime' in inner_type:
+        return KIND_DATETIME
+    if 'Int' in inner_type or 'UInt' in inner_type:
+        return KIND_INT
+    if 'Float' in inner_type:
+        return KIND_FLOAT
+    if 'Bool' in inner_type:
+        return KIND_BOOL
+    return KIND_STRING
+
+
+class ColumnConverter:
+    """Converts whole columns to one ClickHouse type."""
+
+    def __init__(self, clickhouse_type: str, field_name: str = ''):
+        """
+        Initialize the converter.
+
+        Args:
+            clickhouse_type: ClickHouse column type
+            field_name: Column name used in log messages
+        """
+        self.clickhouse_type = clickhouse_type
+        self.field_name = field_name
+        self.kind = get_column_kind(clickhouse_type)
+        self._bulk: Dict[str, Callable[[pd.Series, np.ndarray], Optional[np.ndarray]]] = {
+            KIND_DATE: self._bulk_date,
+            KIND_DATETIME: self._bulk_datetime,
+            KIND_INT: self._bulk_int,
+            KIND_FLOAT: self._bulk_float,
+            KIND_BOOL: self._bulk_bool,
+            KIND_STRING: self._bulk_string
+        }
+
+    def convert_value(self, value: Any) -> Any:
+        """Convert one value (the row-wise semantics every bulk path matches)."""
+        if value is None:
+            return None
+        return convert_value_for_clickhouse(value, self.clickhouse_type, self.field_name)
+
+    def convert(self, values: Sequence[Any]) -> List[Any]:
+        """
+        Convert a column.
+
+        Args:
+            values: Column values; None, NaN and NaT are nulls
+
+        Returns:
+            Converted Python values, with None for nulls
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            # Loaders hand datetimes over as ISO strings
+            series = series.map(lambda value: value.isoformat(), na_action='ignore')
+        series = series.astype(object).reset_index(drop=True)
+        nulls = series.isna().to_numpy()
+        result = np.empty(len(series), dtype=object)
+        if nulls.all():
+            return result.tolist()
+
+        present = series[~nulls]
+        try:
+            bulk = self._bulk[self.kind](present)
+        except Exception as e:
+            logger.debug(f"Bulk conversion of {self.field_name} failed, converting values: {e}")
+            bulk = None
+        if bulk is None:
+            bulk = self._convert_each(present, np.ones(len(present), dtype=bool))
+        result[~nulls] = bulk
+        return result.tolist()
+
+    def _convert_each(self, values: pd.Series, mask: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert the masked values row-wise, once per distinct value."""
+        if out is None:
+            out = np.empty(len(values), dtype=object)
+        cache: Dict[Any, Any] = {}
+        for position in np.flatnonzero(mask):
+            value = values.iat[position]
+            try:
+                key = (type(value), value)
+                if key not in cache:
+                    cache[key] = self.convert_value(value)
+                out[position] = cache[key]
+            except TypeError:
+                # Unhashable values (lists, dicts)
+                out[position] = self.convert_value(value)
+        return out
+
+    @staticmethod
+    def _inferred_type(values: pd.Series) -> str:
+        return pd.api.types.infer_dtype(values, skipna=False)
+
+    def _bulk_date(self, values: pd.Series) -> Optional[np.ndarray]:
+        if self._inferred_type(values) != 'string':
+            return None
+        strings = _as_strings(values)
+        out = np.empty(len(values), dtype=object)
+        null_like = strings.str.lower().isin(_DATE_NULL_STRINGS).to_numpy(dtype=bool)
+
+        # Fixed formats first: the date part decides the result
+        dated = ~null_like & (_matches(strings, _DATE_STRING) | _matches(strings, _DATED_DATETIME_STRING))
+        parsed = pd.to_datetime(strings[dated].str.slice(0, 10), format='%Y-%m-%d', errors='coerce')
+        valid = parsed.notna().to_numpy(dtype=bool)
+        years = parsed.dt.year.to_numpy(dtype=np.float64)
+        in_range = valid & (years >= 1900) & (years <= 2100)
+        dated_positions = np.flatnonzero(dated)
+        out[dated_positions[in_range]] = parsed[in_range].dt.date.to_numpy(dtype=object)
+        out[dated_positions[valid & ~in_range]] = None
+
+        # Everything else (other formats, padding, invalid dates) goes through the mixed-format row-wise parser
+        remaining = ~null_like
+        remaining[dated_positions[valid]] = False
+        return self._convert_each(values, remaining, out)
+
+    def _bulk_datetime(self, values: pd.Series) -> Optional[np.ndarray]:
+        if self._inferred_type(values) != 'string':
+            return None
+        strings = _as_strings(values)
+        out = np.empty(len(values), dtype=object)
+        remaining = np.ones(len(values), dtype=bool)
+        for pattern, tz in ((_NAIVE_DATETIME_STRING, None), (_UTC_DATETIME_STRING, 'UTC')):
+            matched = _matches(strings, pattern)
+            if not matched.any():
+                continue
+            parsed = pd.to_datetime(strings[matched].str.slice(0, 19), format='%Y-%m-%dT%H:%M:%S', errors='coerce')
+            valid = parsed.notna().to_numpy(dtype=bool)
+            timestamps = pd.DatetimeIndex(parsed[valid])
+            if tz is not None:
+                timestamps = timestamps.tz_localize(tz)
+            positions = np.flatnonzero(matched)[valid]
+            out[positions] = timestamps.to_pydatetime()
+            remaining[positions] = False
+        return self._convert_each(values, remaining, out)
+
+    def _numeric_values(self, values: pd.Series):
+        """
+        Floats for the values float() converts the common way.
+
+        Returns:
+            (floats, empty, converted) arrays, or None when the column needs row-wise conversion
+        """
+        inferred = self._inferred_type(values)
+        if inferred in ('integer', 'floating', 'mixed-integer-float', 'boolean'):
+            if inferred == 'integer' and not values.map(lambda value: -_INT64_LIMIT < value < _INT64_LIMIT).all():
+                return None
+            converted = np.ones(len(values), dtype=bool)
+            return values.to_numpy(dtype=np.float64), ~converted, converted
+        if inferred != 'string':
+            return None
+        strings = _as_strings(values)
+        empty = (strings.str.len() == 0).to_numpy(dtype=bool)
+        converted = _matches(strings, _DECIMAL_STRING)
+        floats = np.full(len(values), np.nan)
+        floats[converted] = values[converted].to_numpy(dtype=object).astype(np.float64)
+        return floats, empty, converted
+
+    def _bulk_int(self, values: pd.Series) -> Optional[np.ndarray]:
+        numeric = self._numeric_values(values)
+        if numeric is None:
+            return None
+        floats, empty, converted = numeric
+        out = np.empty(len(values), dtype=object)
+        # inf and values beyond int64 keep their row-wise handling
+        exact = converted & np.isfinite(floats) & (np.abs(floats) < _INT64_LIMIT)
+        out[exact] = np.trunc(floats[exact]).astype(np.int64).astype(object)
+        out[empty] = None
+        return self._convert_each(values, ~exact & ~empty, out)
+
+    def _bulk_float(self, values: pd.Series) -> Optional[np.ndarray]:
+        numeric = self._numeric_values(values)
+        if numeric is None:
+            return None
+        floats, empty, converted = numeric
+        out = floats.astype(object)
+        out[empty] = None
+        return self._convert_each(values, ~converted & ~empty, out)
+
+    def _bulk_bool(self, values: pd.Series) -> Optional[np.ndarray]:
+        inferred = self._inferred_type(values)
+        if inferred == 'boolean':
+            return values.to_numpy(dtype=object)
+        if inferred in ('integer', 'floating', 'mixed-integer-float'):
+            return (values.to_numpy(dtype=np.float64) != 0).astype(object)
+        if inferred != 'string':
+            return None
+        strings = _as_strings(values)
+        lowered = strings.str.lower()
+        out = (strings.str.len() > 0).to_numpy(dtype=bool).astype(object)
+        out[lowered.isin(_TRUE_STRINGS).to_numpy(dtype=bool)] = True
+        out[lowered.isin(_FALSE_STRINGS).to_numpy(dtype=bool)] = False
+        return out
+
+    def _bulk_string(self, values: pd.Series) -> Optional[np.ndarray]:
+        if self._inferred_type(values) == 'string':
+            return values.to_numpy(dtype=object)
+        return np.array(list(map(str, values)), dtype=object)
+
+
+def _as_strings(values: pd.Series) -> pd.Series:
+    """View an all-string column as a pandas string Series, Arrow-backed when pyarrow is installed."""
+    try:
+        return values.astype('string[pyarrow]')
+    except (ImportError, TypeError, ValueError):
+        return values.astype('string')
+
+
+def _matches(strings: pd.Series, pattern: str) -> np.ndarray:
+    """Boolean mask of the strings fully matching a pattern."""
+    return strings.str.fullmatch(pattern).to_numpy(dtype=bool)
+
+
+@lru_cache(maxsize=1024)
+def compile_column_converter(clickhouse_type: str, field_name: str = '') -> ColumnConverter:
+    """
+    Get the column converter for a ClickHouse type.
+
+    Args:
+        clickhouse_type: ClickHouse column type (e.g., 'Nullable(Date)')
+        field_name: Column name used in log messages
+
+    Returns:
+        Cached ColumnConverter
+    """
+    return ColumnConverter(clickhouse_type, field_name)
@@ -0,0 +1,214 @@
+"""
+Cursor pagination for deep source API extractions.
+
+This module provides:
+- Per-endpoint selection of a pagination strategy ('pagination' in
+  mappings/integrations/*_endpoints.json): 'offset' page numbers/offsets,
+  ConnectWise 'forward_only' pageId pagination driven by the Link header, or
+  'keyset' conditions on an ordered id field (id > last_id)
+- PageCursor, which builds each request's parameters and advances past the
+  page it returned
+
+Offset pages get slower with depth on the vendor side and shift when records
+change during an extraction. A cursor continues after the last record seen,
+so every page costs the same and no record is skipped or read twice. Cursor
+pages depend on the previous response, so they are fetched sequentially.
+"""
+
+import logging
+import re
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_OFFSET = 'offset'
+PAGINATION_FORWARD_ONLY = 'forward_only'
+PAGINATION_KEYSET = 'keyset'
+
+# Cursor strategies each service's API supports (offset pagination is always available)
+CURSOR_STRATEGIES = {
+    'connectwise': (PAGINATION_FORWARD_ONLY, PAGINATION_KEYSET),
+    'servicenow': (PAGINATION_KEYSET,),
+}
+
+DEFAULT_CURSOR_FIELDS = {
+    'connectwise': 'id',
+    'servicenow': 'sys_id',
+}
+
+_NEXT_LINK = re.compile(r'<([^>]*)>\s*;\s*rel="?next"?', re.IGNORECASE)
+
+
+class CursorPaginationError(Exception):
+    """Raised when a page gives no position to continue after."""
+    pass
+
+
+def _setting(table_config: Dict[str, Any], endpoint_settings: Optional[Dict[str, Any]], name: str) -> Any:
+    """Read a setting from the table config, its api_config, or the endpoint's mapping entry."""
+    return (
+        table_config.get(name)
+        or (table_config.get('api_config') or {}).get(name)
+        or (endpoint_settings or {}).get(name)
+    )
+
+
+def get_pagination_strategy(table_config: Dict[str, Any], endpoint_settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the pagination strategy of a table.
+
+    Args:
+        table_config: Table configuration (top level or api_config)
+        endpoint_settings: The endpoint's entry in the service's endpoint mapping
+
+    Returns:
+        One of PAGINATION_OFFSET, PAGINATION_FORWARD_ONLY or PAGINATION_KEYSET
+    """
+    strategy = _setting(table_config, endpoint_settings, 'pagination') or PAGINATION_OFFSET
+    service_name = table_config.get('service_name', 'unknown').lower()
+    if strategy != PAGINATION_OFFSET and strategy not in CURSOR_STRATEGIES.get(service_name, ()):
+        logger.warning(f"Pagination strategy '{strategy}' is not supported for {service_name}; using offset pagination")
+        return PAGINATION_OFFSET
+    return strategy
+
+
+def get_cursor_field(table_config: Dict[str, Any], endpoint_settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the ordered, unique field a cursor continues after.
+
+    Args:
+        table_config: Table configuration (top level or api_config)
+        endpoint_settings: The endpoint's entry in the service's endpoint mapping
+
+    Returns:
+        Field name (e.g., 'id' for ConnectWise, 'sys_id' for ServiceNow)
+    """
+    service_name = table_config.get('service_name', 'unknown').lower()
+    return _setting(table_config, endpoint_settings, 'cursor_field') or DEFAULT_CURSOR_FIELDS.get(service_name, 'id')
+
+
+def parse_next_link(link_header: Optional[str]) -> Optional[str]:
+    """
+    Get the rel="next" URL of a Link header.
+
+    Args:
+        link_header: Link response header value
+
+    Returns:
+        The next page's URL, or None on the last page
+    """
+    match = _NEXT_LINK.search(link_header or '')
+    return match.group(1) if match else None
+
+
+def _get_header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """Case-insensitive response header lookup."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def format_condition_value(value: str) -> str:
+    """Format an id for a ConnectWise condition (numbers bare, strings quoted)."""
+    return value if value.lstrip('-').isdigit() else '"' + value.replace('"', '\\"') + '"'
+
+
+class PageCursor:
+    """
+    Position of a cursor-paginated extraction.
+
+    request_params() builds the next request; advance() moves the cursor past
+    the records that request returned. `after` is the cursor value the next
+    page starts after (None before the first page), which is what a chunk
+    checkpoint stores as its last_id to resume from.
+    """
+
+    def __init__(self, service_name: str, strategy: str, cursor_field: str, after: Optional[str] = None):
+        """
+        Initialize the cursor.
+
+        Args:
+            service_name: Service name (e.g., 'connectwise')
+            strategy: PAGINATION_FORWARD_ONLY or PAGINATION_KEYSET
+            cursor_field: Field the cursor continues after
+            after: Cursor value to resume after, or None to start at the beginning
+        """
+        self.service_name = service_name.lower()
+        self.strategy = strategy
+        self.cursor_field = cursor_field
+        self.after = after
+        self.exhausted = False
+
+    def request_params(self, page_size: int, filters: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Build the query parameters and extra headers of the next page request.
+
+        Args:
+            page_size: Records per page
+            filters: Filter parameters to combine with the cursor (e.g., the incremental filter)
+
+        Returns:
+            Tuple of (query parameters, request headers)
+        """
+        filters = filters or {}
+
+        if self.service_name == 'connectwise':
+            conditions = [filters['conditions']] if filters.get('conditions') else []
+            if self.strategy == PAGINATION_FORWARD_ONLY:
+                # Forward-only pages are always in id order; pageId continues after the given id
+                params = {'pageSize': page_size}
+                if self.after is not None:
+                    params['pageId'] = self.after
+                headers = {'pagination-type': 'forward-only'}
+            else:
+                params = {'page': 1, 'pageSize': page_size, 'orderBy': f"{self.cursor_field} asc"}
+                if self.after is not None:
+                    conditions.append(f"{self.cursor_field} > {format_condition_value(self.after)}")
+                headers = {}
+            if conditions:
+                params['conditions'] = ' and '.join(conditions)
+            return params, headers
+
+        if self.service_name == 'servicenow':
+            query = [filters['sysparm_query']] if filters.get('sysparm_query') else []
+            if self.after is not None:
+                query.append(f"{self.cursor_field}>{self.after}")
+            query.append(f"ORDERBY{self.cursor_field}")
+            return {'sysparm_limit': page_size, 'sysparm_query': '^'.join(query)}, {}
+
+        raise ValueError(f"Cursor pagination is not supported for {self.service_name}")
+
+    def advance(self, records: List[Dict[str, Any]], response_headers: Optional[Dict[str, str]] = None):
+        """
+        Move the cursor past a page.
+
+        Args:
+            records: Records the last request returned
+            response_headers: Headers of the last response
+
+        Raises:
+            CursorPaginationError: If the cursor field is missing from the last record
+        """
+        if not records:
+            self.exhausted = True
+            return
+
+        if self.strategy == PAGINATION_FORWARD_ONLY:
+            link_header = _get_header(response_headers, 'link')
+            if link_header is not None:
+                next_url = parse_next_link(link_header)
+                if next_url is None:
+                    # No next link: this was the last page
+                    self.exhausted = True
+                page_id = urllib.parse.parse_qs(urllib.parse.urlparse(next_url or '').query).get('pageId')
+                if page_id:
+                    self.after = page_id[0]
+                    return
+
+        last_record = records[-1] if isinstance(records[-1], dict) else {}
+        value = last_record.get(self.cursor_field)
+        if value is None:
+            raise CursorPaginationError(f"Last record has no '{self.cursor_field}' field to continue cursor pagination from")
+        self.after = str(value)
@@ -0,0 +1,230 @@
+"""
+DynamoDB access helpers for the pipeline's control tables.
+
+A single Query or Scan call returns at most 1MB of items; the rest has to be
+fetched by passing LastEvaluatedKey back as ExclusiveStartKey. This module
+provides:
+- paginate(): every item of a query or scan, across all result pages
+- parallel_scan(): a scan split into Segment/TotalSegments, one thread per segment
+- projection_arguments(): ProjectionExpression with placeholders, so reserved
+  words such as status can be projected
+- batch_get_items() / batch_write_items(): BatchGetItem and BatchWriteItem in
+  request-sized chunks, retrying unprocessed keys and items with backoff
+
+The helpers take the bound operation (client.query, table.scan, ...), so they
+work with both the low-level client and boto3 resource tables.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+DEFAULT_MAX_BATCH_ATTEMPTS = 8
+BATCH_RETRY_DELAY_SECONDS = 0.05
+MAX_BATCH_RETRY_DELAY_SECONDS = 5.0
+
+
+class UnprocessedItemsError(Exception):
+    """Raised when DynamoDB keeps returning unprocessed keys or items after all retries."""
+
+    def __init__(self, message: str, unprocessed: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.unprocessed = unprocessed
+
+
+def paginate(operation: Callable[..., Dict[str, Any]], **request) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item of a query or scan, following LastEvaluatedKey.
+
+    Args:
+        operation: Bound query or scan method (client.query, table.scan, ...)
+        **request: Operation arguments (TableName, KeyConditionExpression, ...)
+
+    Yields:
+        Items in the order DynamoDB returns them
+    """
+    while True:
+        response = operation(**request)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        request['ExclusiveStartKey'] = last_key
+
+
+def parallel_scan(
+    scan: Callable[..., Dict[str, Any]],
+    total_segments: int = 1,
+    max_workers: Optional[int] = None,
+    **request
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item of a scan, reading its segments concurrently.
+
+    Each segment is paginated to the end by its own thread. Items are yielded
+    segment by segment, in segment order, as soon as a segment completes.
+
+    Args:
+        scan: Bound scan method (client.scan or table.scan)
+        total_segments: Number of Segment/TotalSegments slices (1 scans sequentially)
+        max_workers: Maximum concurrent segments (defaults to total_segments)
+        **request: Scan arguments (TableName, FilterExpression, ...)
+
+    Yields:
+        Items of all segments
+    """
+    total_segments = max(1, int(total_segments or 1))
+    if total_segments == 1:
+        yield from paginate(scan, **request)
+        return
+
+    def scan_segment(segment: int) -> List[Dict[str, Any]]:
+        return list(paginate(scan, Segment=segment, TotalSegments=total_segments, **request))
+
+    with ThreadPoolExecutor(max_workers=min(total_segments, max_workers or total_segments),
+                            thread_name_prefix='dynamodb-scan') as executor:
+        futures = [executor.submit(scan_segment, segment) for segment in range(total_segments)]
+        for future in futures:
+            yield from future.result()
+
+
+def projection_arguments(
+    attribute_names: Sequence[str],
+    expression_attribute_names: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Build ProjectionExpression arguments for top-level attributes.
+
+    Every attribute is projected through a #placeholder, so reserved words
+    (status, name, ...) need no special handling by the caller.
+
+    Args:
+        attribute_names: Attributes to return
+        expression_attribute_names: Placeholders already used by the request, kept in the result
+
+    Returns:
+        ProjectionExpression and ExpressionAttributeNames arguments
+    """
+    names = dict(expression_attribute_names or {})
+    placeholders = []
+    for index, attribute_name in enumerate(attribute_names):
+        placeholder = f"#p{index}"
+        names[placeholder] = attribute_name
+        placeholders.append(placeholder)
+    return {'ProjectionExpression': ', '.join(placeholders), 'ExpressionAttributeNames': names}
+
+
+def _chunks(values: Sequence[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(values), size):
+        yield list(values[start:start + size])
+
+
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retrying unprocessed work."""
+    return min(MAX_BATCH_RETRY_DELAY_SECONDS, BATCH_RETRY_DELAY_SECONDS * (2 ** attempt)) * random.random()
+
+
+def batch_get_items(
+    dynamodb_client,
+    table_name: str,
+    keys: Iterable[Dict[str, Any]],
+    attribute_names: Optional[Sequence[str]] = None,
+    max_attempts: int = DEFAULT_MAX_BATCH_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep
+) -> List[Dict[str, Any]]:
+    """
+    Get items by primary key with BatchGetItem.
+
+    Keys are sent 100 at a time; UnprocessedKeys are retried with backoff.
+    Missing items are simply absent from the result, which is unordered.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: Table to read
+        keys: Primary keys in DynamoDB attribute format
+        attribute_names: Attributes to return (all when None)
+        max_attempts: Requests per chunk before giving up on unprocessed keys
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        Items found
+
+    Raises:
+        UnprocessedItemsError: If keys remain unprocessed after max_attempts requests
+    """
+    table_request: Dict[str, Any] = {}
+    if attribute_names:
+        table_request.update(projection_arguments(attribute_names))
+
+    items: List[Dict[str, Any]] = []
+    for chunk in _chunks(list(keys), MAX_BATCH_GET_KEYS):
+        pending = chunk
+        for attempt in range(max_attempts):
+            if attempt:
+                sleep(_retry_delay(attempt - 1))
+            response = dynamodb_client.batch_get_item(
+                RequestItems={table_name: dict(table_request, Keys=pending)}
+            )
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            pending = response.get('UnprocessedKeys', {}).get(table_name, {}).get('Keys', [])
+            if not pending:
+                break
+        if pending:
+            raise UnprocessedItemsError(
+                f"{len(pending)} keys of {table_name} unprocessed after {max_attempts} attempts", pending
+            )
+    return items
+
+
+def batch_write_items(
+    dynamodb_client,
+    table_name: str,
+    put_items: Iterable[Dict[str, Any]] = (),
+    delete_keys: Iterable[Dict[str, Any]] = (),
+    max_attempts: int = DEFAULT_MAX_BATCH_ATTEMPTS,
+    sleep: Callable[[float], None] = time.sleep
+) -> int:
+    """
+    Put and delete items with BatchWriteItem.
+
+    Requests are sent 25 at a time; UnprocessedItems are retried with backoff.
+    A single batch must not touch the same key twice, so callers should pass
+    each key at most once.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: Table to write
+        put_items: Items to put, in DynamoDB attribute format
+        delete_keys: Primary keys to delete, in DynamoDB attribute format
+        max_attempts: Requests per chunk before giving up on unprocessed items
+        sleep: Sleep function (injectable for tests)
+
+    Returns:
+        Number of write requests applied
+
+    Raises:
+        UnprocessedItemsError: If requests remain unprocessed after max_attempts requests
+    """
+    requests = [{'PutRequest': {'Item': item}} for item in put_items]
+    requests += [{'DeleteRequest': {'Key': key}} for key in delete_keys]
+
+    for chunk in _chunks(requests, MAX_BATCH_WRITE_ITEMS):
+        pending = chunk
+        for attempt in range(max_attempts):
+            if attempt:
+                sleep(_retry_delay(attempt - 1))
+            response = dynamodb_client.batch_write_item(RequestItems={table_name: pending})
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if not pending:
+                break
+        if pending:
+            raise UnprocessedItemsError(
+                f"{len(pending)} writes to {table_name} unprocessed after {max_attempts} attempts", pending
+            )
+    return len(requests)
@@ -0,0 +1,553 @@
+"""
+Pooled keep-alive HTTP sessions for source API calls.
+
+This module provides:
+- Per-host pools of persistent http.client connections with a connection cap
+- gzip/deflate response negotiation and transparent decoding
+- A process-wide session registry keyed by tenant and base URL, so warm Lambda
+  containers reuse connections across pages, tables and invocations
+- Streaming responses whose decoded body is read incrementally from the socket
+- Redirect following for GET/HEAD and HTTP(S) proxies from the environment
+  (HTTP_PROXY, HTTPS_PROXY, NO_PROXY), as urllib.request.urlopen does
+- Connection reuse statistics for monitoring
+
+Errors are raised as urllib.error.HTTPError / URLError so callers written
+against urllib.request.urlopen keep their existing error handling. Every 3xx
+response that is not followed is raised as an HTTPError, never returned as a
+successful response.
+"""
+
+import gzip
+import http.client
+import io
+import logging
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from base64 import b64encode
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Deque, Dict, Iterator, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 4
+DEFAULT_TIMEOUT_SECONDS = 30
+STREAM_READ_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Credentials that must not follow a redirect to another origin
+_ORIGIN_BOUND_HEADERS = ('authorization', 'cookie')
+
+# Errors raised when a pooled keep-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError
+)
+
+
+class HTTPResponse(NamedTuple):
+    """A fully read HTTP response."""
+    status: int
+    headers: http.client.HTTPMessage
+    body: bytes
+
+    def getcode(self) -> int:
+        return self.status
+
+
+def decode_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    Decode a gzip or deflate encoded response body.
+
+    Args:
+        body: Raw response body
+        content_encoding: Value of the Content-Encoding header
+
+    Returns:
+        Decoded body
+    """
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+def proxy_for(scheme: str, host: str) -> Optional[str]:
+    """
+    Get the proxy URL configured in the environment for a host.
+
+    Args:
+        scheme: 'http' or 'https'
+        host: Host name
+
+    Returns:
+        Proxy URL, or None when the host is reached directly (no proxy or NO_PROXY match)
+    """
+    proxies = urllib.request.getproxies_environment()
+    proxy = proxies.get(scheme)
+    if not proxy or urllib.request.proxy_bypass_environment(host, proxies):
+        return None
+    return proxy if '://' in proxy else f"http://{proxy}"
+
+
+def redirect_target(url: str, method: str, status: int, headers: http.client.HTTPMessage,
+                    redirects: int) -> Optional[str]:
+    """
+    Get the URL a 3xx response should be followed to.
+
+    Only GET and HEAD are redirected, at most MAX_REDIRECTS times.
+
+    Returns:
+        Absolute redirect URL, or None when the response must be raised as an error
+    """
+    location = headers.get('Location')
+    if status not in REDIRECT_STATUSES or not location or method not in ('GET', 'HEAD'):
+        return None
+    if redirects >= MAX_REDIRECTS:
+        return None
+    return urllib.parse.urljoin(url, location)
+
+
+def redirect_headers(url: str, target: str, headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Request headers for a redirect; credentials are dropped when it leaves the origin."""
+    source, destination = urllib.parse.urlsplit(url), urllib.parse.urlsplit(target)
+    if not headers or (source.scheme, source.netloc) == (destination.scheme, destination.netloc):
+        return headers
+    return {name: value for name, value in headers.items() if name.lower() not in _ORIGIN_BOUND_HEADERS}
+
+
+class DecodingReader(io.RawIOBase):
+    """
+    Incrementally decodes a gzip/deflate encoded stream.
+
+    Only STREAM_READ_SIZE compressed bytes are buffered at a time, so the
+    full body never has to be held in memory.
+    """
+
+    def __init__(self, raw: BinaryIO, content_encoding: Optional[str]):
+        """
+        Initialize the reader.
+
+        Args:
+            raw: Undecoded response stream
+            content_encoding: Value of the Content-Encoding header
+        """
+        self._raw = raw
+        self._encoding = (content_encoding or '').strip().lower()
+        self._decompressor = None
+        self._pending = b''
+        self._eof = False
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _create_decompressor(self, first_chunk: bytes):
+        if self._encoding in ('gzip', 'x-gzip'):
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # Deflate is usually zlib-wrapped, but some servers send raw deflate
+        has_zlib_header = (len(first_chunk) >= 2 and first_chunk[0] & 0x0F == 8
+                           and (first_chunk[0] << 8 | first_chunk[1]) % 31 == 0)
+        return zlib.decompressobj(zlib.MAX_WBITS if has_zlib_header else -zlib.MAX_WBITS)
+
+    def _next_chunk(self) -> bytes:
+        while not self._eof:
+            chunk = self._raw.read(STREAM_READ_SIZE)
+            if not chunk:
+                self._eof = True
+                return self._decompressor.flush() if self._decompressor else b''
+            self.bytes_read += len(chunk)
+            if self._encoding not in ('gzip', 'x-gzip', 'deflate'):
+                return chunk
+            if self._decompressor is None:
+                self._decompressor = self._create_decompressor(chunk)
+            decoded = self._decompressor.decompress(chunk)
+            if decoded:
+                return decoded
+        return b''
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            self._pending = self._next_chunk()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class StreamingResponse(NamedTuple):
+    """An HTTP response whose decoded body is read from the open connection."""
+    status: int
+    headers: http.client.HTTPMessage
+    body: DecodingReader
+
+    def getcode(self) -> int:
+        return self.status
+
+
+class HostConnectionPool:
+    """Thread-safe pool of keep-alive connections to a single host."""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, proxy: Optional[str] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            scheme: 'http' or 'https'
+            host: Host name
+            port: Port (defaults to the scheme's port)
+            max_connections: Maximum open connections to this host
+            timeout: Socket timeout in seconds
+            proxy: Proxy URL to reach the host through (HTTPS is tunnelled with CONNECT)
+        """
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.proxy = urllib.parse.urlsplit(proxy) if proxy else None
+        self._proxy_headers: Dict[str, str] = {}
+        if self.proxy and self.proxy.username:
+            userinfo = f"{urllib.parse.unquote(self.proxy.username)}:{urllib.parse.unquote(self.proxy.password or '')}"
+            self._proxy_headers['Proxy-Authorization'] = f"Basic {b64encode(userinfo.encode()).decode('ascii')}"
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        self._idle: Deque[http.client.HTTPConnection] = deque()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.stats['connections_created'] += 1
+        if self.proxy is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            return connection_class(self.host, self.port, timeout=self.timeout)
+
+        proxy_port = self.proxy.port or (443 if self.proxy.scheme == 'https' else 80)
+        if self.scheme == 'https':
+            # TLS to the host runs inside a CONNECT tunnel through the proxy
+            connection = http.client.HTTPSConnection(self.proxy.hostname, proxy_port, timeout=self.timeout)
+            connection.set_tunnel(self.host, self.port, headers=self._proxy_headers)
+            return connection
+        proxy_class = http.client.HTTPSConnection if self.proxy.scheme == 'https' else http.client.HTTPConnection
+        return proxy_class(self.proxy.hostname, proxy_port, timeout=self.timeout)
+
+    def _request_target(self, path: str, headers: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+        """Plain HTTP through a proxy sends the absolute URL and the proxy credentials."""
+        if self.proxy is None or self.scheme == 'https':
+            return path, headers
+        netloc = self.host if self.port is None else f"{self.host}:{self.port}"
+        return f"http://{netloc}{path}", dict(headers, **self._proxy_headers)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection if available; returns (connection, reused)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, connection: http.client.HTTPConnection, keep_alive: bool) -> None:
+        if keep_alive:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+
+    def request(self, method: str, path: str, headers: Dict[str, str],
+                body: Optional[bytes] = None) -> HTTPResponse:
+        """
+        Send a request over a pooled connection and read the full response.
+
+        Args:
+            method: HTTP method
+            path: Request path including query string
+            headers: Request headers
+            body: Optional request body
+
+        Returns:
+            Response with a decoded body
+        """
+        with self.stream(method, path, headers, body) as response:
+            payload = response.read()
+
+        return HTTPResponse(
+            status=response.status,
+            headers=response.headers,
+            body=decode_body(payload, response.headers.get('Content-Encoding'))
+        )
+
+    @contextmanager
+    def stream(self, method: str, path: str, headers: Dict[str, str],
+               body: Optional[bytes] = None) -> Iterator[http.client.HTTPResponse]:
+        """
+        Send a request and yield the unread response.
+
+        The connection stays checked out until the block exits; it returns to
+        the pool only if the body was read to the end.
+
+        Args:
+            method: HTTP method
+            path: Request path including query string
+            headers: Request headers
+            body: Optional request body
+
+        Yields:
+            The raw http.client response
+        """
+        path, headers = self._request_target(path, headers)
+        with self._slots:
+            connection, reused = self._acquire()
+            try:
+                try:
+                    response = self._send(connection, method, path, headers, body)
+                except _STALE_CONNECTION_ERRORS:
+                    if not reused:
+                        raise
+                    # The server closed the idle connection; retry once on a fresh one
+                    connection.close()
+                    connection, reused = self._new_connection(), False
+                    response = self._send(connection, method, path, headers, body)
+
+                with self._lock:
+                    self.stats['requests'] += 1
+                    if reused:
+                        self.stats['connections_reused'] += 1
+
+                yield response
+            except BaseException:
+                connection.close()
+                raise
+
+            self._release(connection, keep_alive=response.isclosed() and not response.will_close)
+
+    @staticmethod
+    def _send(connection: http.client.HTTPConnection, method: str, path: str,
+              headers: Dict[str, str], body: Optional[bytes]) -> http.client.HTTPResponse:
+        connection.request(method, path, body=body, headers=headers)
+        return connection.getresponse()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class HTTPSession:
+    """
+    Keep-alive HTTP session for one tenant's access to one API base URL.
+
+    Requests negotiate gzip/deflate, reuse pooled connections per host and
+    raise urllib.error exceptions on failure.
+    """
+
+    def __init__(self, max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        """
+        Initialize the session.
+
+        Args:
+            max_connections_per_host: Connection cap for each host
+            timeout: Socket timeout in seconds
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._pools: Dict[Tuple[str, str, Optional[int]], HostConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def _pool_for(self, scheme: str, host: str, port: Optional[int]) -> HostConnectionPool:
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = HostConnectionPool(scheme, host, port, self.max_connections_per_host, self.timeout,
+                                          proxy=proxy_for(scheme, host))
+                self._pools[key] = pool
+            return pool
+
+    def _prepare(self, url: str, headers: Optional[Dict[str, str]]) -> Tuple[HostConnectionPool, str, Dict[str, str]]:
+        """Resolve the host pool, request path and headers for a URL."""
+        parsed = urllib.parse.urlsplit(url)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+
+        request_headers = {'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'}
+        request_headers.update(headers or {})
+
+        return self._pool_for(parsed.scheme, parsed.hostname, parsed.port), path, request_headers
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                body: Optional[bytes] = None) -> HTTPResponse:
+        """
+        Send a request and return the fully read, decoded response.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            headers: Request headers
+            body: Optional request body
+
+        Returns:
+            Response for 2xx statuses, after following GET/HEAD redirects
+
+        Raises:
+            urllib.error.HTTPError: For 4xx/5xx responses and 3xx responses that are not followed
+            urllib.error.URLError: For connection failures
+        """
+        redirects = 0
+        while True:
+            pool, path, request_headers = self._prepare(url, headers)
+            try:
+                response = pool.request(method, path, request_headers, body)
+            except (OSError, http.client.HTTPException) as e:
+                raise urllib.error.URLError(e)
+
+            if response.status < 300:
+                return response
+            target = redirect_target(url, method, response.status, response.headers, redirects) \
+                if response.status < 400 else None
+            if target is None:
+                raise urllib.error.HTTPError(url, response.status, http.client.responses.get(response.status, ''),
+                                             response.headers, io.BytesIO(response.body))
+            headers = redirect_headers(url, target, headers)
+            url = target
+            redirects += 1
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """Send a GET request."""
+        return self.request('GET', url, headers)
+
+    @contextmanager
+    def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+               body: Optional[bytes] = None) -> Iterator[StreamingResponse]:
+        """
+        Send a request and yield a response whose body is decoded while it is read.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            headers: Request headers
+            body: Optional request body
+
+        Yields:
+            Response for 2xx statuses, after following GET/HEAD redirects
+
+        Raises:
+            urllib.error.HTTPError: For 4xx/5xx responses and 3xx responses that are not followed
+            urllib.error.URLError: For connection failures, including while the body is read
+        """
+        redirects = 0
+        while True:
+            pool, path, request_headers = self._prepare(url, headers)
+            error = target = None
+            try:
+                with pool.stream(method, path, request_headers, body) as raw:
+                    if raw.status >= 300:
+                        # The body is read so the connection can be reused
+                        payload = decode_body(raw.read(), raw.headers.get('Content-Encoding'))
+                        if raw.status < 400:
+                            target = redirect_target(url, method, raw.status, raw.headers, redirects)
+                        if target is None:
+                            error = urllib.error.HTTPError(
+                                url, raw.status, http.client.responses.get(raw.status, ''), raw.headers,
+                                io.BytesIO(payload)
+                            )
+                    else:
+                        yield StreamingResponse(raw.status, raw.headers,
+                                                DecodingReader(raw, raw.headers.get('Content-Encoding')))
+                        # Consume a short unread tail (e.g. the gzip trailer) so the connection can be reused
+                        if not raw.isclosed():
+                            raw.read(STREAM_READ_SIZE)
+            except (OSError, http.client.HTTPException, zlib.error) as e:
+                raise urllib.error.URLError(e)
+            if error is not None:
+                raise error
+            if target is None:
+                return
+            headers = redirect_headers(url, target, headers)
+            url = target
+            redirects += 1
+
+    def get_stats(self, since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get connection reuse statistics across all hosts.
+
+        Args:
+            since: Earlier get_stats() result to report the difference from
+
+        Returns:
+            Request count, connections created/reused and the reuse rate
+        """
+        totals = {'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            for key in totals:
+                totals[key] += pool.stats[key]
+        if since:
+            for key in totals:
+                totals[key] -= since.get(key, 0)
+        totals['reuse_rate'] = totals['connections_reused'] / totals['requests'] if totals['requests'] else 0.0
+        return totals
+
+    def close(self) -> None:
+        """Close all idle pooled connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+
+# Process-wide sessions, reused across invocations of a warm Lambda container
+_sessions: Dict[Tuple[Optional[str], str], HTTPSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(base_url: str, tenant_id: Optional[str] = None,
+                     max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                     timeout: float = DEFAULT_TIMEOUT_SECONDS) -> HTTPSession:
+    """
+    Get the shared HTTP session for a tenant and API base URL.
+
+    Args:
+        base_url: API base URL
+        tenant_id: Tenant the session belongs to (sessions are never shared across tenants)
+        max_connections_per_host: Connection cap for each host of a new session
+        timeout: Socket timeout in seconds for a new session
+
+    Returns:
+        Shared HTTPSession
+    """
+    parsed = urllib.parse.urlsplit(base_url)
+    key = (tenant_id, f"{parsed.scheme}://{parsed.netloc}")
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = HTTPSession(max_connections_per_host, timeout)
+            _sessions[key] = session
+        return session
+
+
+def close_http_sessions() -> None:
+    """Close and forget every shared session."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
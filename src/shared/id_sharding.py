@@ -0,0 +1,306 @@
+"""
+ID-range sharding of large table extractions.
+
+This module provides:
+- Probe parameters that read a table's lowest and highest id with two
+  one-record requests
+- A planner that splits the id space between them into disjoint ranges
+  ('id >= start AND id < end') sized by the expected record count
+- Per-service filters that restrict a chunk's requests to its range
+
+Each range is extracted by its own chunk processor, so one large table is
+pulled by several Lambdas in parallel. The first range is open below and the
+last open above, so records created after the probe still belong to exactly
+one range. Numeric ids (ConnectWise) and fixed-width hex ids (ServiceNow
+sys_id) are supported. A sharded sync is complete, and may advance the
+table's watermark, only once every shard of its group has completed.
+"""
+
+import logging
+import math
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .cursor_pagination import format_condition_value
+from .dynamodb_access import paginate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ID_SHARD_RECORDS = 100000
+DEFAULT_MAX_ID_SHARDS = 8
+
+# Services whose APIs can filter and order by id
+SHARDABLE_SERVICES = ('connectwise', 'servicenow')
+
+# Query parameters that hold filters, and how two filters are combined
+FILTER_SEPARATORS = {
+    'conditions': ' and ',
+    'sysparm_query': '^',
+}
+
+
+class IdRange(NamedTuple):
+    """Half-open id range [start, end); None leaves that side unbounded."""
+    start: Optional[str] = None
+    end: Optional[str] = None
+
+
+def get_id_shard_records() -> int:
+    """Get the target records per shard from ID_SHARD_RECORDS."""
+    return max(1, int(os.environ.get('ID_SHARD_RECORDS', str(DEFAULT_ID_SHARD_RECORDS))))
+
+
+def get_max_id_shards() -> int:
+    """Get the limit on shards per table from MAX_ID_SHARDS."""
+    return max(1, int(os.environ.get('MAX_ID_SHARDS', str(DEFAULT_MAX_ID_SHARDS))))
+
+
+def id_range_to_dict(id_range: IdRange) -> Dict[str, Optional[str]]:
+    """Convert a range to its chunk_config form."""
+    return {'start': id_range.start, 'end': id_range.end}
+
+
+def id_range_from_dict(data: Optional[Dict[str, Any]]) -> Optional[IdRange]:
+    """
+    Read a chunk_config['id_range'] value.
+
+    Args:
+        data: Dictionary with 'start' and 'end', or None
+
+    Returns:
+        IdRange, or None when the chunk is not sharded
+    """
+    if not data:
+        return None
+    start, end = data.get('start'), data.get('end')
+    return IdRange(None if start is None else str(start), None if end is None else str(end))
+
+
+def merge_filters(*filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine filter parameters, joining conditions instead of replacing them.
+
+    Args:
+        filters: Parameter dictionaries (e.g., incremental filter and id range filter)
+
+    Returns:
+        Merged parameters
+    """
+    merged: Dict[str, Any] = {}
+    for params in filters:
+        for name, value in (params or {}).items():
+            if name in FILTER_SEPARATORS and merged.get(name) and value:
+                merged[name] = f"{merged[name]}{FILTER_SEPARATORS[name]}{value}"
+            else:
+                merged[name] = value
+    return merged
+
+
+def id_range_filter(service_name: str, id_field: str, id_range: Optional[IdRange]) -> Dict[str, str]:
+    """
+    Build the request filter restricting a chunk to its id range.
+
+    Args:
+        service_name: Service name (e.g., 'connectwise')
+        id_field: Field the table is sharded on
+        id_range: The chunk's range, or None for an unsharded chunk
+
+    Returns:
+        Query parameters to merge into the request
+
+    Raises:
+        ValueError: If the service has no known range filter syntax
+    """
+    if id_range is None or (id_range.start is None and id_range.end is None):
+        return {}
+
+    service = service_name.lower()
+    if service == 'connectwise':
+        conditions = []
+        if id_range.start is not None:
+            conditions.append(f"{id_field} >= {format_condition_value(id_range.start)}")
+        if id_range.end is not None:
+            conditions.append(f"{id_field} < {format_condition_value(id_range.end)}")
+        return {'conditions': ' and '.join(conditions)}
+    if service == 'servicenow':
+        query = []
+        if id_range.start is not None:
+            query.append(f"{id_field}>={id_range.start}")
+        if id_range.end is not None:
+            query.append(f"{id_field}<{id_range.end}")
+        return {'sysparm_query': '^'.join(query)}
+
+    raise ValueError(f"No id range filter syntax known for {service_name}")
+
+
+def bound_probe_params(service_name: str, id_field: str, descending: bool) -> Dict[str, Any]:
+    """
+    Build the parameters of a one-record request for the lowest or highest id.
+
+    Args:
+        service_name: Service name (e.g., 'servicenow')
+        id_field: Field the table is sharded on
+        descending: True for the highest id, False for the lowest
+
+    Returns:
+        Query parameters
+    """
+    service = service_name.lower()
+    if service == 'connectwise':
+        return {'page': 1, 'pageSize': 1, 'orderBy': f"{id_field} {'desc' if descending else 'asc'}", 'fields': id_field}
+    if service == 'servicenow':
+        return {
+            'sysparm_limit': 1,
+            'sysparm_query': f"ORDERBY{'DESC' if descending else ''}{id_field}",
+            'sysparm_fields': id_field
+        }
+    raise ValueError(f"No id probe syntax known for {service_name}")
+
+
+def probe_id_bounds(
+    service_name: str,
+    id_field: str,
+    fetch_records: Callable[[Dict[str, Any]], List[Dict[str, Any]]]
+) -> Optional[Tuple[str, str]]:
+    """
+    Read a table's lowest and highest id.
+
+    Args:
+        service_name: Service name
+        id_field: Field the table is sharded on
+        fetch_records: Callable performing a request with the given query parameters
+
+    Returns:
+        Tuple of (lowest id, highest id), or None for an empty table
+    """
+    bounds = []
+    for descending in (False, True):
+        records = fetch_records(bound_probe_params(service_name, id_field, descending))
+        value = records[0].get(id_field) if records and isinstance(records[0], dict) else None
+        if value is None:
+            return None
+        bounds.append(str(value))
+    return bounds[0], bounds[1]
+
+
+def _id_codec(low: str, high: str) -> Optional[Tuple[Callable[[str], int], Callable[[int], str]]]:
+    """Get (parse, format) functions for ids that can be split arithmetically, if any."""
+    if low.isdigit() and high.isdigit():
+        return int, str
+    hex_digits = set('0123456789abcdefABCDEF')
+    if len(low) == len(high) and set(low) <= hex_digits and set(high) <= hex_digits:
+        width = len(low)
+        return (lambda value: int(value, 16)), (lambda number: format(number, f'0{width}x'))
+    return None
+
+
+def split_id_range(low: str, high: str, shard_count: int) -> List[IdRange]:
+    """
+    Split the ids from low to high into contiguous ranges of equal width.
+
+    Args:
+        low: Lowest id
+        high: Highest id
+        shard_count: Number of ranges wanted
+
+    Returns:
+        Disjoint ranges covering every id; fewer than shard_count when the id
+        space is too small, and a single unbounded range when ids cannot be split
+    """
+    codec = _id_codec(low, high)
+    if codec is None or shard_count <= 1:
+        return [IdRange()]
+
+    parse, fmt = codec
+    first, stop = parse(low), parse(high) + 1
+    if stop <= first:
+        return [IdRange()]
+
+    span = stop - first
+    boundaries = sorted({first + span * i // shard_count for i in range(1, shard_count)} - {first})
+    starts = [None] + [fmt(boundary) for boundary in boundaries]
+    ends = [fmt(boundary) for boundary in boundaries] + [None]
+    return [IdRange(start, end) for start, end in zip(starts, ends)]
+
+
+def plan_id_shards(
+    bounds: Optional[Tuple[str, str]],
+    estimated_records: Optional[int] = None,
+    records_per_shard: Optional[int] = None,
+    max_shards: Optional[int] = None
+) -> List[IdRange]:
+    """
+    Plan the id ranges of a table extraction.
+
+    Without a record estimate, numeric ids are assumed dense (the id span
+    bounds the record count); hex ids are not split.
+
+    Args:
+        bounds: Lowest and highest id from probe_id_bounds(), or None
+        estimated_records: Expected number of records, if known
+        records_per_shard: Target records per range (default ID_SHARD_RECORDS)
+        max_shards: Maximum number of ranges (default MAX_ID_SHARDS)
+
+    Returns:
+        Ranges to extract in parallel (a single unbounded range when sharding does not apply)
+    """
+    if bounds is None:
+        return [IdRange()]
+
+    low, high = bounds
+    records_per_shard = records_per_shard or get_id_shard_records()
+    max_shards = max_shards or get_max_id_shards()
+
+    if estimated_records is None and low.isdigit() and high.isdigit():
+        estimated_records = int(high) - int(low) + 1
+    if not estimated_records:
+        return [IdRange()]
+
+    shard_count = min(max_shards, max(1, math.ceil(estimated_records / records_per_shard)))
+    ranges = split_id_range(low, high, shard_count)
+    logger.info(f"Planned {len(ranges)} id ranges for ids {low}..{high} (~{estimated_records} records)")
+    return ranges
+
+
+def shard_chunk_id(shard_group: str, index: int) -> str:
+    """Chunk id of one shard of a sharded chunk."""
+    return f"{shard_group}-shard{index}"
+
+
+def shards_completed(
+    dynamodb_client,
+    chunk_progress_table: str,
+    job_id: str,
+    shard_group: str,
+    shard_count: int
+) -> bool:
+    """
+    Check whether every shard of a sharded chunk has completed.
+
+    Reads the shards' ChunkProgress rows with a consistent query, so a shard
+    that has just recorded its own completion sees it.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        chunk_progress_table: ChunkProgress table name
+        job_id: Processing job identifier
+        shard_group: Chunk id the shards were split from
+        shard_count: Number of shards in the group
+
+    Returns:
+        True if all shard_count shards are completed
+    """
+    items = paginate(
+        dynamodb_client.query,
+        TableName=chunk_progress_table,
+        KeyConditionExpression='job_id = :job_id AND begins_with(chunk_id, :prefix)',
+        ExpressionAttributeValues={':job_id': {'S': job_id}, ':prefix': {'S': f"{shard_group}-shard"}},
+        ProjectionExpression='chunk_id, #status',
+        ExpressionAttributeNames={'#status': 'status'},
+        ConsistentRead=True
+    )
+    completed = {
+        item['chunk_id']['S'] for item in items
+        if item.get('status', {}).get('S') == 'completed'
+    }
+    return all(shard_chunk_id(shard_group, index) in completed for index in range(shard_count))
@@ -0,0 +1,175 @@
+"""
+Streaming JSON parsing for paginated API responses.
+
+This module provides:
+- Incremental decoding of a top-level JSON array, or of the array under a
+  wrapper key such as {"data": [...]}, straight from a binary stream
+
+Besides the decoded records, only a small text buffer is held in memory; the
+raw response bytes and the decoded response string are never materialized.
+A page's records are still collected before they are written, so that a
+request retried after a mid-body failure never writes a partial page twice.
+"""
+
+import codecs
+import json
+import logging
+import re
+from typing import Any, BinaryIO, Dict, Iterator, Sequence
+
+logger = logging.getLogger(__name__)
+
+PARSE_MODE_STREAMING = 'streaming'
+PARSE_MODE_BUFFERED = 'buffered'
+
+DEFAULT_RECORD_KEYS = ('data',)
+DEFAULT_READ_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Extent of a bare number or literal, which has no closing delimiter of its own
+_SCALAR_TOKEN = re.compile(r'[^,\]}\s]*')
+_DECODER = json.JSONDecoder()
+
+
+def get_response_parsing_mode(config: Dict[str, Any]) -> str:
+    """
+    Get the API response parsing mode from a table or endpoint configuration.
+
+    Args:
+        config: Configuration dictionary, optionally with a 'response_parsing' key
+
+    Returns:
+        PARSE_MODE_STREAMING (default) or PARSE_MODE_BUFFERED
+    """
+    mode = str((config or {}).get('response_parsing') or PARSE_MODE_STREAMING).lower()
+    if mode not in (PARSE_MODE_STREAMING, PARSE_MODE_BUFFERED):
+        logger.warning(f"Unknown response_parsing mode '{mode}', using {PARSE_MODE_STREAMING}")
+        return PARSE_MODE_STREAMING
+    return mode
+
+
+class _TextBuffer:
+    """Sliding window of decoded text over a binary stream."""
+
+    def __init__(self, stream: BinaryIO, read_size: int):
+        self._stream = stream
+        self._read_size = read_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk of text; returns False at end of stream."""
+        if self.eof:
+            return False
+        chunk = self._stream.read(self._read_size)
+        if not chunk:
+            self.eof = True
+            tail = self._decoder.decode(b'', final=True)
+        else:
+            tail = self._decoder.decode(chunk)
+        # Drop consumed text so the buffer stays around read_size
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += tail
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of stream)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of `characters`."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise json.JSONDecodeError(f"Expected one of {characters!r}", self.text, self.pos)
+        self.pos += 1
+        return character
+
+    def decode_value(self) -> Any:
+        """Decode the next complete JSON value, reading more text as needed."""
+        self.peek()
+        while True:
+            # A number or literal reaching the buffer edge may continue in the next chunk
+            if (self.text[self.pos:self.pos + 1] not in ('{', '[', '"') and not self.eof
+                    and _SCALAR_TOKEN.match(self.text, self.pos).end() == len(self.text)):
+                self.fill()
+                continue
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(buffer: _TextBuffer) -> Iterator[Any]:
+    """Yield the items of the array whose '[' has just been consumed."""
+    if buffer.peek() == ']':
+        buffer.pos += 1
+        return
+    while True:
+        yield buffer.decode_value()
+        if buffer.expect(',]') == ']':
+            return
+
+
+def iter_json_records(
+    stream: BinaryIO,
+    record_keys: Sequence[str] = DEFAULT_RECORD_KEYS,
+    read_size: int = DEFAULT_READ_SIZE
+) -> Iterator[Any]:
+    """
+    Incrementally yield the records of a JSON API response.
+
+    Accepts either a top-level array or an object whose records are an array
+    under one of `record_keys`. Other keys of a wrapper object are skipped;
+    an object without a record key yields nothing.
+
+    Args:
+        stream: Binary stream with a UTF-8 JSON body
+        record_keys: Wrapper object keys that hold the record array
+        read_size: Bytes read from the stream at a time
+
+    Yields:
+        Decoded records in response order
+
+    Raises:
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    buffer = _TextBuffer(stream, read_size)
+    first = buffer.peek()
+    if first == '':
+        return
+    if first == '[':
+        buffer.pos += 1
+        yield from _iter_array(buffer)
+        return
+    if first != '{':
+        # Scalars carry no records; decode to validate and stop
+        buffer.decode_value()
+        return
+
+    buffer.pos += 1
+    if buffer.peek() == '}':
+        return
+    while True:
+        key = buffer.decode_value()
+        buffer.expect(':')
+        if key in record_keys and buffer.peek() == '[':
+            buffer.pos += 1
+            yield from _iter_array(buffer)
+        else:
+            buffer.decode_value()
+        if buffer.expect(',}') == '}':
+            return
+
@@ -0,0 +1,249 @@
+"""
+Pipelined file loading for ClickHouse ingestion.
+
+This module provides:
+- PrefetchingFileReader: reads the next files (e.g. S3 GET + Parquet decode)
+  on a bounded worker pool while the caller inserts earlier ones, yielding
+  results in input order
+- InsertCoalescer: groups consecutive small files into inserts of a target
+  size, since ClickHouse handles a few large inserts far better than many
+  small ones
+- A shared memory budget: prefetching pauses while the files waiting to be
+  consumed plus the rows waiting to be inserted exceed it
+
+Only reads run on worker threads; inserts stay on the caller's thread, so a
+single ClickHouse client is never used concurrently.
+"""
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOAD_CONCURRENCY = 4
+DEFAULT_INSERT_TARGET_ROWS = 100000
+DEFAULT_INSERT_TARGET_MB = 64
+DEFAULT_MEMORY_BUDGET_FRACTION = 0.25
+
+MB = 1024 * 1024
+
+
+def get_load_concurrency() -> int:
+    """Get the number of files read concurrently (CLICKHOUSE_LOAD_CONCURRENCY)."""
+    return max(1, int(os.environ.get('CLICKHOUSE_LOAD_CONCURRENCY', DEFAULT_LOAD_CONCURRENCY)))
+
+
+def get_insert_target_rows() -> int:
+    """Get the row count at which coalesced files are inserted (CLICKHOUSE_INSERT_TARGET_ROWS)."""
+    return max(1, int(os.environ.get('CLICKHOUSE_INSERT_TARGET_ROWS', DEFAULT_INSERT_TARGET_ROWS)))
+
+
+def get_insert_target_bytes() -> int:
+    """Get the size at which coalesced files are inserted (CLICKHOUSE_INSERT_TARGET_MB)."""
+    return max(1, int(float(os.environ.get('CLICKHOUSE_INSERT_TARGET_MB', DEFAULT_INSERT_TARGET_MB)) * MB))
+
+
+def get_memory_budget_bytes() -> int:
+    """
+    Get the memory allowed for prefetched and coalesced data.
+
+    CLICKHOUSE_LOAD_MEMORY_BUDGET_MB if set, otherwise a quarter of the Lambda's
+    memory (AWS_LAMBDA_FUNCTION_MEMORY_SIZE, default 1024MB). Decoded data is
+    copied again during alignment and insert, so the budget leaves room for that.
+    """
+    budget_mb = os.environ.get('CLICKHOUSE_LOAD_MEMORY_BUDGET_MB')
+    if budget_mb is None:
+        lambda_memory_mb = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '1024'))
+        return int(lambda_memory_mb * DEFAULT_MEMORY_BUDGET_FRACTION * MB)
+    return max(1, int(float(budget_mb) * MB))
+
+
+class LoadedFile(NamedTuple):
+    """Result of reading one file; error is set instead of payload when the read failed."""
+    key: str
+    payload: Any
+    rows: int
+    nbytes: int
+    error: Optional[Exception] = None
+
+
+class InsertBatch(NamedTuple):
+    """Consecutive files of one kind to insert together."""
+    kind: str
+    files: List[LoadedFile]
+    rows: int
+    nbytes: int
+
+    @property
+    def keys(self) -> List[str]:
+        return [loaded.key for loaded in self.files]
+
+
+class PrefetchingFileReader:
+    """
+    Reads files on a bounded worker pool and yields them in input order.
+
+    read_file(key) must return a LoadedFile. Up to max_in_flight reads run at
+    once. A new read is only started while the bytes of files read but not yet
+    consumed, plus held_bytes() (data the consumer is still holding, e.g. an
+    unflushed insert batch), stay below memory_budget_bytes. Reads in flight are
+    not counted until they finish, so the budget can be exceeded by at most
+    max_in_flight files; at least one read is always allowed so loading never
+    stalls on a single file larger than the budget.
+    """
+
+    def __init__(
+        self,
+        read_file: Callable[[str], LoadedFile],
+        max_in_flight: int = DEFAULT_LOAD_CONCURRENCY,
+        memory_budget_bytes: Optional[int] = None,
+        held_bytes: Optional[Callable[[], int]] = None
+    ):
+        """
+        Initialize the reader.
+
+        Args:
+            read_file: Callable reading one file key into a LoadedFile
+            max_in_flight: Maximum number of concurrent reads
+            memory_budget_bytes: Memory allowed for read-but-unconsumed data (None = unlimited)
+            held_bytes: Bytes the consumer is holding, counted against the budget
+        """
+        self.read_file = read_file
+        self.max_in_flight = max(1, int(max_in_flight or 1))
+        self.memory_budget_bytes = memory_budget_bytes
+        self.held_bytes = held_bytes or (lambda: 0)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Tuple[str, Future]] = deque()
+
+    def _buffered_bytes(self) -> int:
+        """Bytes of completed reads that have not been consumed yet."""
+        buffered = 0
+        for _, future in self._pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                buffered += future.result().nbytes
+        return buffered
+
+    def _has_room(self, consuming_bytes: int = 0) -> bool:
+        """Whether another read may start."""
+        if not self._pending:
+            return True
+        if len(self._pending) >= self.max_in_flight:
+            return False
+        if self.memory_budget_bytes is None:
+            return True
+        used = self._buffered_bytes() + self.held_bytes() + consuming_bytes
+        return used < self.memory_budget_bytes
+
+    def _safe_read(self, key: str) -> LoadedFile:
+        try:
+            return self.read_file(key)
+        except Exception as e:
+            return LoadedFile(key, None, 0, 0, e)
+
+    def _fill(self, keys: Iterator[str], consuming_bytes: int = 0) -> None:
+        """Submit reads while the window and memory budget allow."""
+        while self._has_room(consuming_bytes):
+            key = next(keys, None)
+            if key is None:
+                return
+            self._pending.append((key, self._executor.submit(self._safe_read, key)))
+
+    def iter_files(self, keys: Iterable[str]) -> Iterator[LoadedFile]:
+        """
+        Yield a LoadedFile per key, in order.
+
+        Args:
+            keys: File keys to read
+
+        Yields:
+            Each file's LoadedFile; failed reads carry the exception in error
+        """
+        keys = iter(keys)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='file-prefetch')
+        try:
+            self._fill(keys)
+            while self._pending:
+                _, future = self._pending.popleft()
+                loaded = future.result()
+                # Keep reading while the consumer works on this file, which still counts against the budget
+                self._fill(keys, loaded.nbytes)
+                yield loaded
+                self._fill(keys)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Cancel reads that have not started and release the worker threads."""
+        while self._pending:
+            _, future = self._pending.popleft()
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class InsertCoalescer:
+    """
+    Groups consecutive files of the same kind into inserts of a target size.
+
+    A batch is released as soon as it reaches target_rows or target_bytes, or
+    when a file of a different kind arrives (e.g. a JSON file between Parquet
+    files). Call flush() after the last file.
+    """
+
+    def __init__(
+        self,
+        target_rows: int = DEFAULT_INSERT_TARGET_ROWS,
+        target_bytes: int = DEFAULT_INSERT_TARGET_MB * MB
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            target_rows: Row count at which a batch is released
+            target_bytes: Size at which a batch is released
+        """
+        self.target_rows = target_rows
+        self.target_bytes = target_bytes
+        self._kind: Optional[str] = None
+        self._files: List[LoadedFile] = []
+        self._rows = 0
+        self._nbytes = 0
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes held in the unreleased batch."""
+        return self._nbytes
+
+    def add(self, kind: str, loaded: LoadedFile) -> List[InsertBatch]:
+        """
+        Add a file; returns the batches that are ready to insert (possibly none).
+
+        Args:
+            kind: Insert path the file belongs to (files of different kinds are never merged)
+            loaded: The file to add
+        """
+        ready = []
+        if self._files and kind != self._kind:
+            ready.append(self.flush())
+        self._kind = kind
+        self._files.append(loaded)
+        self._rows += loaded.rows
+        self._nbytes += loaded.nbytes
+        if self._rows >= self.target_rows or self._nbytes >= self.target_bytes:
+            ready.append(self.flush())
+        return ready
+
+    def flush(self) -> Optional[InsertBatch]:
+        """Release the pending batch, or None if there is nothing pending."""
+        if not self._files:
+            return None
+        batch = InsertBatch(self._kind, self._files, self._rows, self._nbytes)
+        self._kind = None
+        self._files = []
+        self._rows = 0
+        self._nbytes = 0
+        return batch
@@ -0,0 +1,53 @@
+"""
+Process memory readings for Lambda memory monitoring.
+
+psutil is imported on first use and its Process handle is kept for the life of
+the container, so memory checks inside processing loops cost a single
+memory_info() call. When psutil is not installed the miss is remembered and
+readings return None without retrying the import.
+"""
+
+import os
+from typing import Optional
+
+MB = 1024 * 1024
+
+_process = None
+_psutil_available: Optional[bool] = None
+
+
+def get_process():
+    """
+    Get the cached psutil Process for this process.
+
+    Returns:
+        psutil.Process, or None when psutil is not installed
+    """
+    global _process, _psutil_available
+    if _psutil_available is None:
+        try:
+            import psutil
+        except ImportError:
+            _psutil_available = False
+        else:
+            _process = psutil.Process()
+            _psutil_available = True
+    return _process
+
+
+def get_memory_usage_mb() -> Optional[float]:
+    """
+    Get the resident set size of this process.
+
+    Returns:
+        RSS in MB, or None when psutil is not installed
+    """
+    process = get_process()
+    if process is None:
+        return None
+    return process.memory_info().rss / MB
+
+
+def get_lambda_memory_limit_mb(default: int = 1024) -> int:
+    """Get the function's configured memory from AWS_LAMBDA_FUNCTION_MEMORY_SIZE."""
+    return int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', str(default)))
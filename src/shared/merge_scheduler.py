@@ -0,0 +1,257 @@
+"""
+Deferred ReplacingMergeTree deduplication for ClickHouse tables.
+
+This module provides:
+- Dedup strategy selection for loaders ('deferred' or 'immediate')
+- FINAL views that give readers deduplicated rows before parts are merged;
+  loaders and the scheduler create them, readers query them instead of the table
+- MergeScheduler: runs partition-scoped OPTIMIZE ... FINAL only for partitions
+  that received inserts since they were last merged, within per-run limits
+
+A partition holds a single active part once it has been fully merged, so any
+partition with several active parts has been written to since its last merge.
+The scheduler finds those partitions in system.parts and needs no state of
+its own.
+"""
+
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEDUP_STRATEGY_DEFERRED = 'deferred'
+DEDUP_STRATEGY_IMMEDIATE = 'immediate'
+DEDUP_STRATEGIES = (DEDUP_STRATEGY_DEFERRED, DEDUP_STRATEGY_IMMEDIATE)
+
+DEFAULT_MIN_PARTS = 2
+DEFAULT_MAX_PARTITIONS_PER_RUN = 20
+DEFAULT_MAX_SECONDS_PER_RUN = 600.0
+DEFAULT_MAX_RUNNING_MERGES = 2
+
+FINAL_VIEW_SUFFIX = '_final'
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def get_dedup_strategy(value: Optional[str] = None) -> str:
+    """
+    Get the post-load deduplication strategy.
+
+    Args:
+        value: Strategy name; defaults to the CLICKHOUSE_DEDUP_STRATEGY environment variable
+
+    Returns:
+        DEDUP_STRATEGY_DEFERRED (default) or DEDUP_STRATEGY_IMMEDIATE
+    """
+    strategy = str(value or os.environ.get('CLICKHOUSE_DEDUP_STRATEGY') or DEDUP_STRATEGY_DEFERRED).lower()
+    if strategy not in DEDUP_STRATEGIES:
+        logger.warning(f"Unknown dedup strategy '{strategy}', using {DEDUP_STRATEGY_DEFERRED}")
+        return DEDUP_STRATEGY_DEFERRED
+    return strategy
+
+
+def _check_identifier(table_name: str) -> str:
+    if not _IDENTIFIER.match(table_name):
+        raise ValueError(f"Invalid ClickHouse table name: {table_name!r}")
+    return table_name
+
+
+def final_view_name(table_name: str) -> str:
+    """Get the name of a table's deduplicated FINAL view."""
+    return f"{table_name}{FINAL_VIEW_SUFFIX}"
+
+
+def create_final_view(client, table_name: str) -> str:
+    """
+    Create a view that reads a table with FINAL.
+
+    Readers that need exactly one row per sorting key use the view instead of
+    waiting for the scheduler to merge freshly inserted parts.
+
+    Args:
+        client: clickhouse_connect client
+        table_name: ReplacingMergeTree table
+
+    Returns:
+        Name of the view
+    """
+    view_name = final_view_name(_check_identifier(table_name))
+    client.command(f"CREATE VIEW IF NOT EXISTS {view_name} AS SELECT * FROM {table_name} FINAL")
+    return view_name
+
+
+def ensure_final_views(client, table_names: Iterable[str]) -> List[str]:
+    """
+    Create the FINAL views of the tables that exist, including tables created
+    before views were introduced.
+
+    Args:
+        client: clickhouse_connect client
+        table_names: Tables in the client's current database
+
+    Returns:
+        Names of the views that exist after the call
+    """
+    names = [_check_identifier(table_name) for table_name in table_names]
+    if not names:
+        return []
+    result = client.query(
+        "SELECT name FROM system.tables WHERE database = currentDatabase() AND name IN {tables:Array(String)}",
+        parameters={'tables': names}
+    )
+    existing = {row[0] for row in result.result_rows}
+    views = []
+    for table_name in names:
+        if table_name not in existing:
+            continue
+        try:
+            views.append(create_final_view(client, table_name))
+        except Exception as e:
+            logger.warning(f"Failed to create FINAL view for {table_name}: {e}")
+    return views
+
+
+def optimize_table(client, table_name: str) -> None:
+    """Merge and deduplicate a whole table (the 'immediate' strategy)."""
+    client.command(f"OPTIMIZE TABLE {_check_identifier(table_name)} FINAL")
+
+
+def find_partitions_to_merge(client, table_name: str, min_parts: int = DEFAULT_MIN_PARTS) -> List[Dict[str, Any]]:
+    """
+    Find partitions written to since they were last merged.
+
+    Args:
+        client: clickhouse_connect client
+        table_name: Table in the client's current database
+        min_parts: Active parts a partition needs before it is merged
+
+    Returns:
+        Partitions as {partition_id, parts, rows, last_modified}, most fragmented first
+    """
+    result = client.query(
+        "SELECT partition_id, count() AS parts, sum(rows) AS rows, max(modification_time) AS last_modified "
+        "FROM system.parts "
+        "WHERE database = currentDatabase() AND table = {table:String} AND active "
+        "GROUP BY partition_id "
+        "HAVING parts >= {min_parts:UInt32} "
+        "ORDER BY parts DESC, last_modified ASC",
+        parameters={'table': _check_identifier(table_name), 'min_parts': max(2, min_parts)}
+    )
+    return [
+        {'partition_id': row[0], 'parts': int(row[1]), 'rows': int(row[2]), 'last_modified': row[3]}
+        for row in result.result_rows
+    ]
+
+
+def count_running_merges(client, table_name: str) -> int:
+    """Count merges ClickHouse is currently running for a table."""
+    result = client.query(
+        "SELECT count() FROM system.merges WHERE database = currentDatabase() AND table = {table:String}",
+        parameters={'table': _check_identifier(table_name)}
+    )
+    return int(result.result_rows[0][0]) if result.result_rows else 0
+
+
+class MergeScheduler:
+    """
+    Runs partition-scoped OPTIMIZE ... FINAL for recently written partitions.
+
+    Each run merges at most max_partitions_per_run partitions and stops
+    starting new merges after max_seconds_per_run. Tables that already have
+    max_running_merges background merges in progress are skipped so the
+    scheduler never competes with ClickHouse's own merge pool.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_partitions_per_run: int = DEFAULT_MAX_PARTITIONS_PER_RUN,
+        max_seconds_per_run: float = DEFAULT_MAX_SECONDS_PER_RUN,
+        min_parts: int = DEFAULT_MIN_PARTS,
+        max_running_merges: int = DEFAULT_MAX_RUNNING_MERGES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            client: clickhouse_connect client
+            max_partitions_per_run: Partitions merged per run across all tables
+            max_seconds_per_run: Time after which no new merge is started
+            min_parts: Active parts a partition needs before it is merged
+            max_running_merges: Background merges above which a table is skipped
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.client = client
+        self.max_partitions_per_run = max(1, max_partitions_per_run)
+        self.max_seconds_per_run = max_seconds_per_run
+        self.min_parts = min_parts
+        self.max_running_merges = max(1, max_running_merges)
+        self._clock = clock
+
+    def optimize_partition(self, table_name: str, partition_id: str) -> None:
+        """Merge and deduplicate one partition."""
+        escaped = partition_id.replace('\\', '\\\\').replace("'", "\\'")
+        self.client.command(f"OPTIMIZE TABLE {_check_identifier(table_name)} PARTITION ID '{escaped}' FINAL")
+
+    def run(self, table_names: Iterable[str]) -> Dict[str, Any]:
+        """
+        Merge the partitions written to since their last merge.
+
+        Args:
+            table_names: Tables to check, in priority order
+
+        Returns:
+            Run summary with per-table optimized, pending, failed and skipped partitions
+        """
+        started = self._clock()
+        budget = self.max_partitions_per_run
+        summary: Dict[str, Any] = {
+            'tables': {},
+            'partitions_optimized': 0,
+            'partitions_pending': 0,
+            'partitions_failed': 0,
+            'rows_merged': 0
+        }
+
+        for table_name in table_names:
+            table_summary = {'optimized': [], 'failed': [], 'pending': 0, 'skipped': None}
+            summary['tables'][table_name] = table_summary
+            try:
+                partitions = find_partitions_to_merge(self.client, table_name, self.min_parts)
+                if partitions and count_running_merges(self.client, table_name) >= self.max_running_merges:
+                    table_summary['skipped'] = 'merges_in_progress'
+                    table_summary['pending'] = len(partitions)
+                    partitions = []
+            except Exception as e:
+                logger.warning(f"Failed to inspect partitions of {table_name}: {e}")
+                table_summary['skipped'] = 'inspection_failed'
+                partitions = []
+
+            for index, partition in enumerate(partitions):
+                if budget <= 0 or self._clock() - started >= self.max_seconds_per_run:
+                    table_summary['pending'] += len(partitions) - index
+                    break
+                budget -= 1
+                partition_started = self._clock()
+                try:
+                    self.optimize_partition(table_name, partition['partition_id'])
+                except Exception as e:
+                    logger.warning(f"OPTIMIZE of {table_name} partition {partition['partition_id']} failed: {e}")
+                    table_summary['failed'].append(partition['partition_id'])
+                    continue
+                logger.info(f"Merged {table_name} partition {partition['partition_id']} "
+                            f"({partition['parts']} parts, {partition['rows']} rows) "
+                            f"in {self._clock() - partition_started:.1f}s")
+                table_summary['optimized'].append(partition['partition_id'])
+                summary['rows_merged'] += partition['rows']
+
+            summary['partitions_optimized'] += len(table_summary['optimized'])
+            summary['partitions_failed'] += len(table_summary['failed'])
+            summary['partitions_pending'] += table_summary['pending']
+
+        summary['duration_seconds'] = round(self._clock() - started, 3)
+        return summary
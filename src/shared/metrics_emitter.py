@@ -0,0 +1,222 @@
+"""
+Metrics emitters for CloudWatch custom metrics.
+
+Two backends accept the same PutMetricData-style metric dictionaries
+(MetricName, Dimensions, Value, Unit):
+
+- 'emf' (default): aggregates the invocation's metrics in memory and writes
+  them to stdout as CloudWatch Embedded Metric Format (EMF) JSON lines on
+  flush(). Lambda ships stdout to CloudWatch Logs, which extracts the
+  metrics, so no API call is made.
+- 'api': the previous behaviour, PutMetricData calls of up to 20 metrics
+  with every dimension kept.
+
+High-cardinality values such as the job ID are passed as properties, not
+dimensions: EMF writes them next to the metrics, searchable in Logs Insights
+without creating a metric per job, and PutMetricData has nowhere to put them.
+JobId and ChunkId dimensions still sent by older callers are written as EMF
+properties too.
+
+The backend is selected with the METRICS_BACKEND environment variable.
+
+EMF aggregation: values of Count metrics with the same name, dimensions and
+properties are summed into one value; other units keep every sample (up to
+100 per line) so CloudWatch can compute percentiles.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_BACKEND_EMF = 'emf'
+METRICS_BACKEND_API = 'api'
+METRICS_BACKENDS = (METRICS_BACKEND_EMF, METRICS_BACKEND_API)
+
+# Dimensions written as EMF properties instead of metric dimensions
+DEFAULT_PROPERTY_DIMENSIONS = ('JobId', 'ChunkId')
+
+# Units whose values are summed per invocation rather than kept as samples
+SUMMED_UNITS = ('Count',)
+
+MAX_API_METRICS_PER_REQUEST = 20
+MAX_EMF_METRICS_PER_LINE = 100
+MAX_EMF_VALUES_PER_METRIC = 100
+
+
+def get_metrics_backend() -> str:
+    """Get the metrics backend from METRICS_BACKEND (default 'emf')."""
+    backend = os.environ.get('METRICS_BACKEND', METRICS_BACKEND_EMF).lower()
+    if backend not in METRICS_BACKENDS:
+        logger.warning(f"Unknown METRICS_BACKEND '{backend}', using '{METRICS_BACKEND_EMF}'")
+        return METRICS_BACKEND_EMF
+    return backend
+
+
+class EMFMetricsEmitter:
+    """Aggregates metrics per invocation and writes them as EMF log lines."""
+
+    def __init__(
+        self,
+        namespace: str,
+        stream: Optional[TextIO] = None,
+        property_dimensions: Sequence[str] = DEFAULT_PROPERTY_DIMENSIONS
+    ):
+        """
+        Initialize the emitter.
+
+        Args:
+            namespace: CloudWatch namespace
+            stream: Where EMF lines are written (defaults to stdout at flush time)
+            property_dimensions: Dimension names written as properties instead
+        """
+        self.namespace = namespace
+        self.stream = stream
+        self.property_dimensions = set(property_dimensions)
+        # (dimensions, properties) -> metric name -> (unit, values)
+        self._groups: Dict[Tuple[Tuple, Tuple], Dict[str, Tuple[str, List[float]]]] = {}
+
+    def put_metric_data(self, metric_data: List[Dict[str, Any]], properties: Optional[Dict[str, Any]] = None):
+        """
+        Add PutMetricData-style metrics to the invocation's aggregate.
+
+        Args:
+            metric_data: Dictionaries with MetricName, Value, optional Unit and Dimensions
+            properties: Values logged with the metrics but not used as dimensions (e.g. JobId)
+        """
+        shared_properties = [(name, str(value)) for name, value in (properties or {}).items()]
+        for metric in metric_data:
+            dimensions, metric_properties = [], list(shared_properties)
+            for dimension in metric.get('Dimensions', []):
+                target = metric_properties if dimension['Name'] in self.property_dimensions else dimensions
+                target.append((dimension['Name'], str(dimension['Value'])))
+            group = self._groups.setdefault((tuple(dimensions), tuple(sorted(metric_properties))), {})
+            unit, values = group.setdefault(metric['MetricName'], (metric.get('Unit', 'None'), []))
+            value = float(metric['Value'])
+            if unit in SUMMED_UNITS and values:
+                values[0] += value
+            else:
+                values.append(value)
+
+    def flush(self):
+        """Write the aggregated metrics as EMF lines and reset the aggregate."""
+        groups, self._groups = self._groups, {}
+        if not groups:
+            return
+        stream = self.stream or sys.stdout
+        timestamp = int(time.time() * 1000)
+        for (dimensions, properties), metrics in groups.items():
+            for document in self._documents(dimensions, properties, metrics, timestamp):
+                stream.write(json.dumps(document) + '\n')
+        stream.flush()
+
+    def _documents(self, dimensions: Tuple, properties: Tuple,
+                   metrics: Dict[str, Tuple[str, List[float]]], timestamp: int) -> List[Dict[str, Any]]:
+        """Split one group into EMF documents within the per-line metric and value limits."""
+        slices = []
+        for name, (unit, values) in metrics.items():
+            for start in range(0, len(values), MAX_EMF_VALUES_PER_METRIC):
+                part = values[start:start + MAX_EMF_VALUES_PER_METRIC]
+                slices.append((start // MAX_EMF_VALUES_PER_METRIC, name, unit, part))
+
+        # A metric name may appear once per document, so each values slice goes to its own line
+        lines: List[List[Tuple[str, str, List[float]]]] = []
+        for line_index, name, unit, part in slices:
+            while len(lines) <= line_index:
+                lines.append([])
+            lines[line_index].append((name, unit, part))
+
+        documents = []
+        for line_metrics in lines:
+            for start in range(0, len(line_metrics), MAX_EMF_METRICS_PER_LINE):
+                batch = line_metrics[start:start + MAX_EMF_METRICS_PER_LINE]
+                document: Dict[str, Any] = dict(properties)
+                document.update(dimensions)
+                document['_aws'] = {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [[name for name, _ in dimensions]],
+                        'Metrics': [{'Name': name, 'Unit': unit} for name, unit, _ in batch]
+                    }]
+                }
+                for name, _, part in batch:
+                    document[name] = part[0] if len(part) == 1 else part
+                documents.append(document)
+        return documents
+
+
+class CloudWatchMetricsEmitter:
+    """Sends metrics with PutMetricData, 20 per request (the pre-EMF behaviour)."""
+
+    def __init__(self, namespace: str, cloudwatch_client=None):
+        """
+        Initialize the emitter.
+
+        Args:
+            namespace: CloudWatch namespace
+            cloudwatch_client: boto3 CloudWatch client (created on first use when None)
+        """
+        self.namespace = namespace
+        self._cloudwatch = cloudwatch_client
+        self._buffer: List[Dict[str, Any]] = []
+
+    @property
+    def cloudwatch(self):
+        if self._cloudwatch is None:
+            import boto3
+            self._cloudwatch = boto3.client('cloudwatch')
+        return self._cloudwatch
+
+    def put_metric_data(self, metric_data: List[Dict[str, Any]], properties: Optional[Dict[str, Any]] = None):
+        """Buffer metrics, sending every full batch of 20 (PutMetricData has no properties; they are dropped)."""
+        self._buffer.extend(metric_data)
+        while len(self._buffer) >= MAX_API_METRICS_PER_REQUEST:
+            self._send(self._buffer[:MAX_API_METRICS_PER_REQUEST])
+            self._buffer = self._buffer[MAX_API_METRICS_PER_REQUEST:]
+
+    def flush(self):
+        """Send any buffered metrics."""
+        batch, self._buffer = self._buffer, []
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Dict[str, Any]]):
+        self.cloudwatch.put_metric_data(Namespace=self.namespace, MetricData=batch)
+
+
+def create_metrics_emitter(namespace: str, cloudwatch_client=None, backend: Optional[str] = None):
+    """
+    Create the metrics emitter for the configured backend.
+
+    Args:
+        namespace: CloudWatch namespace
+        cloudwatch_client: boto3 CloudWatch client for the 'api' backend
+        backend: 'emf' or 'api' (defaults to METRICS_BACKEND)
+
+    Returns:
+        EMFMetricsEmitter or CloudWatchMetricsEmitter
+    """
+    if (backend or get_metrics_backend()) == METRICS_BACKEND_API:
+        return CloudWatchMetricsEmitter(namespace, cloudwatch_client)
+    return EMFMetricsEmitter(namespace)
+
+
+def publish_metrics(namespace: str, metric_data: List[Dict[str, Any]], cloudwatch_client=None,
+                    properties: Optional[Dict[str, Any]] = None):
+    """
+    Publish one invocation's metrics with the configured backend.
+
+    Args:
+        namespace: CloudWatch namespace
+        metric_data: PutMetricData-style metric dictionaries
+        cloudwatch_client: boto3 CloudWatch client for the 'api' backend
+        properties: Values logged with the metrics but not used as dimensions (e.g. JobId)
+    """
+    emitter = create_metrics_emitter(namespace, cloudwatch_client)
+    emitter.put_metric_data(metric_data, properties)
+    emitter.flush()
@@ -0,0 +1,114 @@
+"""
+Pipelined page fetching for paginated source APIs.
+
+This module provides:
+- A bounded pool of in-flight page requests (one worker thread per slot)
+- Ordered reassembly, so pages are consumed strictly in page order
+- Early stop at the first empty page, cancelling requests past the end
+
+Pages are yielded as soon as the next page in order is available, so callers
+can buffer and write earlier pages while later pages are still downloading.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 1
+
+
+class PipelinedPageFetcher:
+    """
+    Fetches numbered pages concurrently and yields them in order.
+
+    fetch_page(page_number) must return the records for that page; an empty
+    list marks the end of the data. When an estimated page count is given the
+    fetcher keeps up to max_in_flight requests outstanding until the estimate
+    is reached and then probes one page at a time, so a low estimate costs no
+    wasted requests and a high one costs at most max_in_flight - 1.
+
+    reached_end is set only when a page came back empty; iteration that stops
+    for max_pages or should_continue leaves it False.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int], List[Dict[str, Any]]],
+        max_in_flight: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        estimated_pages: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        should_continue: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            fetch_page: Callable returning the records for a 1-indexed page number
+            max_in_flight: Maximum number of concurrent page requests
+            estimated_pages: Estimated page count used to size speculative prefetch
+            max_pages: Hard limit on the number of pages fetched
+            should_continue: Checked before each new request (e.g. Lambda timeout)
+        """
+        self.fetch_page = fetch_page
+        self.max_in_flight = max(1, int(max_in_flight or 1))
+        self.estimated_pages = estimated_pages
+        self.max_pages = max_pages
+        self.should_continue = should_continue or (lambda: True)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Tuple[int, Future]] = deque()
+        self.reached_end = False
+
+    def _window(self, next_page: int, start_page: int) -> int:
+        """Number of requests that may be outstanding before submitting next_page."""
+        if self.estimated_pages is not None and next_page - start_page >= self.estimated_pages:
+            return 1
+        return self.max_in_flight
+
+    def _fill(self, next_page: int, start_page: int) -> int:
+        """Submit requests until the window is full; returns the next unsubmitted page."""
+        while len(self._pending) < self._window(next_page, start_page):
+            if self.max_pages is not None and next_page - start_page >= self.max_pages:
+                break
+            if not self.should_continue():
+                break
+            self._pending.append((next_page, self._executor.submit(self.fetch_page, next_page)))
+            next_page += 1
+        return next_page
+
+    def iter_pages(self, start_page: int = 1) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield (page_number, records) in page order until an empty page.
+
+        Args:
+            start_page: First page number to fetch
+
+        Yields:
+            Page number and its records
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='page-fetch')
+        try:
+            next_page = self._fill(start_page, start_page)
+            while self._pending:
+                page_number, future = self._pending.popleft()
+                records = future.result() or []
+                if not records:
+                    logger.info(f"Page {page_number} returned no records, stopping pipelined fetch")
+                    self.reached_end = True
+                    return
+
+                next_page = self._fill(next_page, start_page)
+                yield page_number, records
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Cancel outstanding requests and release the worker threads."""
+        while self._pending:
+            _, future = self._pending.popleft()
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
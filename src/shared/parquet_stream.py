@@ -0,0 +1,346 @@
+"""
+Incremental Parquet output for chunk processing.
+
+This module provides:
+- S3MultipartSink: a write-only file object that uploads S3 multipart parts as
+  they fill, so a Parquet file is never held in memory as a whole
+- StreamingParquetWriter: converts record pages to Arrow as they arrive and
+  appends them to a pyarrow ParquetWriter one row group at a time, rolling over
+  to a new file when the size target is reached or a page's schema cannot be
+  stored in the current file
+
+pyarrow is imported at module level, so import this module only from code
+that runs with the pandas/pyarrow layer.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# S3 requires every multipart part except the last to be at least 5MB
+MIN_PART_SIZE_BYTES = 5 * 1024 * 1024
+DEFAULT_PART_SIZE_BYTES = 8 * 1024 * 1024
+DEFAULT_ROW_GROUP_ROWS = 25000
+DEFAULT_MAX_FILE_BYTES = 128 * 1024 * 1024
+
+
+class S3MultipartSink:
+    """
+    Write-only file object backed by an S3 multipart upload.
+
+    Bytes are buffered until a part fills and are then uploaded. Files smaller
+    than one part are written with a single put_object call instead.
+    """
+
+    def __init__(self, s3_client, bucket: str, key: str,
+                 part_size: int = DEFAULT_PART_SIZE_BYTES,
+                 content_type: str = 'application/octet-stream'):
+        """
+        Initialize the sink.
+
+        Args:
+            s3_client: boto3 S3 client
+            bucket: Destination bucket
+            key: Destination key
+            part_size: Bytes buffered before a part is uploaded (at least 5MB)
+            content_type: Content type of the object
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(MIN_PART_SIZE_BYTES, part_size)
+        self.content_type = content_type
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+        self.closed = False
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def write(self, data) -> int:
+        """Buffer bytes and upload a part once part_size bytes are buffered."""
+        if self.closed:
+            raise ValueError(f"Write to closed S3 sink s3://{self.bucket}/{self.key}")
+        self._buffer += data
+        size = len(data) if not isinstance(data, memoryview) else data.nbytes
+        self._position += size
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return size
+
+    def _upload_part(self) -> None:
+        if self._upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self._upload_id = response['UploadId']
+        part_number = len(self._parts) + 1
+        # Hand the buffer over instead of copying it
+        body, self._buffer = self._buffer, bytearray()
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            PartNumber=part_number, Body=body
+        )
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    def close(self) -> None:
+        """Upload the remaining bytes and complete the object. Safe to call twice."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._upload_id is None:
+            body, self._buffer = self._buffer, bytearray()
+            self.s3_client.put_object(Bucket=self.bucket, Key=self.key, Body=body,
+                                      ContentType=self.content_type)
+            return
+        try:
+            if self._buffer:
+                self._upload_part()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                MultipartUpload={'Parts': self._parts}
+            )
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """Discard the object and any uploaded parts."""
+        self.closed = True
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload for {self.key}: {e}")
+            self._upload_id = None
+
+
+def schema_hash(schema: pa.Schema) -> str:
+    """Stable hash of a schema's field names and types (metadata is ignored)."""
+    return hashlib.sha256(schema.remove_metadata().to_string().encode('utf-8')).hexdigest()[:16]
+
+
+def _stringify(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
+def _columns(records: List[Dict[str, Any]], stringified: Set[str]) -> Dict[str, List[Any]]:
+    """Collect record values by column, over the union of keys in the batch (in first-seen order)."""
+    keys = list(dict.fromkeys(key for record in records for key in record))
+    return {
+        key: [_stringify(record.get(key)) if key in stringified else record.get(key) for record in records]
+        for key in keys
+    }
+
+
+def records_to_table(records: List[Dict[str, Any]]) -> pa.Table:
+    """
+    Convert API records to an Arrow table.
+
+    Records may omit keys (e.g. APIs that leave out null fields); the table
+    has a column for every key seen in the batch, null where a record lacks
+    it. Columns whose values mix incompatible Python types (e.g. numbers and
+    strings) are stored as strings, with dicts and lists JSON-encoded.
+
+    Args:
+        records: List of record dictionaries
+
+    Returns:
+        Arrow table with one column per key seen in the records
+    """
+    try:
+        return pa.Table.from_pydict(_columns(records, set()))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    value_types: Dict[str, set] = {}
+    for record in records:
+        for key, value in record.items():
+            if value is not None:
+                value_types.setdefault(key, set()).add(float if type(value) is int else type(value))
+    mixed = {key for key, types in value_types.items() if len(types) > 1}
+    logger.info(f"Storing mixed-type columns as strings: {sorted(mixed)}")
+    return pa.Table.from_pydict(_columns(records, mixed))
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> Optional[pa.Table]:
+    """
+    Conform a table to an existing file schema without lossy casts.
+
+    Missing columns become nulls and all-null columns adopt the schema type.
+    Struct columns may omit fields of the schema's struct.
+
+    Args:
+        table: Table to conform
+        schema: Target schema
+
+    Returns:
+        The conformed table, or None if it needs columns or types the schema lacks
+    """
+    extra = [name for name in table.column_names if name not in schema.names]
+    if extra:
+        if any(table.column(name).null_count < table.num_rows for name in extra):
+            return None
+        table = table.drop_columns(extra)
+    try:
+        unified = pa.unify_schemas([schema, table.schema], promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return None
+    if not unified.equals(schema):
+        return None
+    return pa.concat_tables([schema.empty_table(), table], promote_options='permissive')
+
+
+class StreamingParquetWriter:
+    """
+    Writes record pages to one or more Parquet files row group by row group.
+
+    Pages are converted to Arrow immediately, so only compact columnar data is
+    buffered between row groups. The file schema is inferred from the first
+    row group; later row groups are conformed to it, and a row group that
+    needs new columns or wider types starts a new file.
+    """
+
+    def __init__(
+        self,
+        open_sink: Callable[[int], Tuple[str, Any]],
+        row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        compression: str = 'snappy',
+        on_file_closed: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_file_rows: Optional[int] = None
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            open_sink: Called with a 1-based file number; returns (name, writable file object)
+            row_group_rows: Rows buffered before a row group is written
+            max_file_bytes: File size after which the next row group starts a new file
+            compression: Parquet compression codec
+            on_file_closed: Called with a file's entry in files once its sink is closed
+                (for S3 sinks, once the upload has completed)
+            max_file_rows: Rows after which the next row group starts a new file
+        """
+        self.open_sink = open_sink
+        self.row_group_rows = max(1, row_group_rows)
+        self.max_file_bytes = max_file_bytes
+        self.max_file_rows = max_file_rows
+        self.compression = compression
+        self.on_file_closed = on_file_closed
+        self.files: List[Dict[str, Any]] = []
+        self.rows_written = 0
+        # Rows in files whose sink has been closed
+        self.rows_committed = 0
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._sink = None
+        self._schema: Optional[pa.Schema] = None
+
+    @property
+    def buffered_rows(self) -> int:
+        return self._pending_rows
+
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append a page of records.
+
+        Args:
+            records: List of record dictionaries
+        """
+        if not records:
+            return
+        table = records_to_table(records)
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered pages as a row group."""
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        try:
+            tables = [pa.concat_tables(pending, promote_options='permissive')]
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Pages disagree on a column's type; write them one at a time
+            tables = pending
+        for table in tables:
+            self._write_row_group(table)
+
+    def _write_row_group(self, table: pa.Table) -> None:
+        if self._writer is not None:
+            conformed = conform_table(table, self._schema)
+            if conformed is None:
+                logger.info(f"Schema changed, starting a new file after {self.files[-1]['name']}")
+                self._close_file()
+            else:
+                table = conformed
+        if self._writer is None:
+            self._open_file(table.schema)
+
+        self._writer.write_table(table)
+        self.files[-1]['record_count'] += table.num_rows
+        self.rows_written += table.num_rows
+        if self._sink.tell() >= self.max_file_bytes or (
+                self.max_file_rows and self.files[-1]['record_count'] >= self.max_file_rows):
+            self._close_file()
+
+    def _open_file(self, schema: pa.Schema) -> None:
+        name, self._sink = self.open_sink(len(self.files) + 1)
+        self._schema = schema
+        self._writer = pq.ParquetWriter(self._sink, schema, compression=self.compression)
+        self.files.append({'name': name, 'record_count': 0, 'schema_hash': schema_hash(schema)})
+
+    def _close_file(self) -> None:
+        writer, sink = self._writer, self._sink
+        self._writer = self._sink = self._schema = None
+        writer.close()
+        self.files[-1]['size_bytes'] = sink.tell()
+        sink.close()
+        self.rows_committed += self.files[-1]['record_count']
+        if self.on_file_closed is not None:
+            self.on_file_closed(self.files[-1])
+
+    def close(self) -> List[str]:
+        """
+        Write any buffered rows and finish the current file.
+
+        Returns:
+            Names of the files written, in order
+        """
+        self.flush()
+        if self._writer is not None:
+            self._close_file()
+        return [file_info['name'] for file_info in self.files]
+
+    def abort(self) -> None:
+        """Discard buffered rows and the file currently being written."""
+        self._pending, self._pending_rows = [], 0
+        sink = self._sink
+        self._writer = self._sink = self._schema = None
+        if sink is not None:
+            if hasattr(sink, 'abort'):
+                sink.abort()
+            self.files.pop()
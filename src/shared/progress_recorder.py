@@ -0,0 +1,249 @@
+"""
+Write-behind progress recording for DynamoDB progress tables.
+
+Progress rows (e.g. a chunk's 'processing' row) are buffered per invocation
+and written with BatchWriteItem on a background thread, so the caller does
+not wait on them. Writes to the same key are coalesced: a later record()
+merges into the buffered item, and a state transition folds any row that
+has not been sent yet into its own update, so a chunk that finishes before
+its start row was flushed costs a single write.
+
+State transitions (processing -> completed, ...) are conditional UpdateItem
+calls. A transition only applies when the row is in one of the expected
+states, so a duplicate or late invocation cannot overwrite a terminal state.
+A state held under a lease (an epoch-seconds expiry attribute written by
+its owner) can only be taken over once the lease has run out.
+
+The recorder measures its own cost: DynamoDB requests sent, writes saved by
+coalescing, time spent writing and time the caller was actually blocked.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+from .dynamodb_access import MAX_BATCH_WRITE_ITEMS, batch_write_items
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressRecorder:
+    """
+    Coalesces and batches progress writes to one DynamoDB table for one invocation.
+
+    Items and keys are in DynamoDB attribute format. Call close() before the
+    invocation returns so buffered rows are written.
+    """
+
+    def __init__(
+        self,
+        dynamodb_client,
+        table_name: str,
+        key_attributes: Sequence[str] = ('job_id', 'chunk_id'),
+        batch_size: int = MAX_BATCH_WRITE_ITEMS
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            dynamodb_client: boto3 DynamoDB client
+            table_name: Progress table name
+            key_attributes: Primary key attribute names of the table
+            batch_size: Buffered rows that trigger a background flush
+        """
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+        self.key_attributes = tuple(key_attributes)
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_WRITE_ITEMS))
+        self._pending: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._in_flight: List[Future] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            'records': 0,
+            'transitions': 0,
+            'requests': 0,
+            'coalesced': 0,
+            'conditional_failures': 0,
+            'failed_writes': 0,
+            'write_seconds': 0.0,
+            'blocking_seconds': 0.0
+        }
+
+    def _key(self, item: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(json.dumps(item[name], sort_keys=True) for name in self.key_attributes)
+
+    def _add_stat(self, name: str, value: float = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def record(self, item: Dict[str, Any]):
+        """
+        Buffer a full row for a write-behind put.
+
+        Args:
+            item: Row including the key attributes; merged into any buffered row with the same key
+        """
+        with self._lock:
+            self._stats['records'] += 1
+            key = self._key(item)
+            if key in self._pending:
+                self._pending[key].update(item)
+                self._stats['coalesced'] += 1
+            else:
+                self._pending[key] = dict(item)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush(wait=False)
+
+    def flush(self, wait: bool = True):
+        """
+        Send buffered rows with BatchWriteItem on the background thread.
+
+        Args:
+            wait: Block until every write sent so far has completed
+        """
+        with self._lock:
+            items = list(self._pending.values())
+            self._pending.clear()
+            if items:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='progress-writer')
+                self._in_flight.append(self._executor.submit(self._write_items, items))
+        if wait:
+            self._wait()
+
+    def _write_items(self, items: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        try:
+            batch_write_items(self.dynamodb, self.table_name, put_items=items)
+        finally:
+            self._add_stat('requests', math.ceil(len(items) / MAX_BATCH_WRITE_ITEMS))
+            self._add_stat('write_seconds', time.perf_counter() - started)
+
+    def _wait(self):
+        """Wait for in-flight batches; failures are logged, not raised (progress is best effort)."""
+        started = time.perf_counter()
+        with self._lock:
+            futures, self._in_flight = self._in_flight, []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                self._add_stat('failed_writes')
+                logger.warning(f"Failed to write progress rows to {self.table_name}: {str(e)}")
+        self._add_stat('blocking_seconds', time.perf_counter() - started)
+
+    def transition(
+        self,
+        key: Dict[str, Any],
+        status: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        from_statuses: Sequence[str] = ('processing',),
+        leased_statuses: Sequence[str] = (),
+        lease_attribute: str = 'lease_expires_at',
+        now: Optional[float] = None
+    ) -> bool:
+        """
+        Move a row to a new status with a conditional update.
+
+        A buffered row with the same key that has not been sent is folded into
+        this update; earlier writes still in flight complete first.
+
+        Args:
+            key: Primary key attributes
+            status: New status
+            attributes: Other attributes to SET, in DynamoDB attribute format
+            from_statuses: Statuses the row may be in (a missing row or status is always allowed)
+            leased_statuses: Statuses the row may be in only once its lease_attribute is
+                unset or earlier than now
+            lease_attribute: Numeric attribute holding the lease expiry in epoch seconds
+            now: Current epoch seconds (defaults to time.time())
+
+        Returns:
+            True if the transition was applied, False if the row was in another state
+        """
+        with self._lock:
+            self._stats['transitions'] += 1
+            pending_item = self._pending.pop(self._key(key), None)
+            if pending_item is not None:
+                self._stats['coalesced'] += 1
+        self._wait()
+
+        values = {name: value for name, value in (pending_item or {}).items() if name not in self.key_attributes}
+        values.update(attributes or {})
+        values['status'] = {'S': status}
+
+        expression_names = {f"#{name}": name for name in values}
+        expression_values = {f":{name}": value for name, value in values.items()}
+        condition_values = []
+        for index, from_status in enumerate(from_statuses):
+            expression_values[f":from_status_{index}"] = {'S': from_status}
+            condition_values.append(f":from_status_{index}")
+
+        condition = 'attribute_not_exists(#status)'
+        if condition_values:
+            condition += f" OR #status IN ({', '.join(condition_values)})"
+        if leased_statuses:
+            leased_values = []
+            for index, leased_status in enumerate(leased_statuses):
+                expression_values[f":leased_status_{index}"] = {'S': leased_status}
+                leased_values.append(f":leased_status_{index}")
+            lease = f"#{lease_attribute}"
+            expression_names[lease] = lease_attribute
+            expression_values[':lease_now'] = {'N': str(int(time.time() if now is None else now))}
+            condition += (f" OR (#status IN ({', '.join(leased_values)})"
+                          f" AND (attribute_not_exists({lease}) OR {lease} < :lease_now))")
+
+        started = time.perf_counter()
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key=key,
+                UpdateExpression='SET ' + ', '.join(f"#{name} = :{name}" for name in values),
+                ConditionExpression=condition,
+                ExpressionAttributeNames=expression_names,
+                ExpressionAttributeValues=expression_values
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                self._add_stat('conditional_failures')
+                logger.info(f"Skipped transition to {status}: row is not in {list(from_statuses)}"
+                            f"{' or an expired lease' if leased_statuses else ''}")
+                return False
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._add_stat('requests')
+            self._add_stat('write_seconds', elapsed)
+            self._add_stat('blocking_seconds', elapsed)
+
+    def close(self):
+        """Write all buffered rows and stop the background thread."""
+        self.flush(wait=True)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the recorder's own overhead.
+
+        Returns:
+            Dictionary with records, transitions, requests (DynamoDB calls),
+            coalesced (writes saved), conditional_failures, failed_writes,
+            write_seconds and blocking_seconds (time the caller waited)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['write_seconds'] = round(stats['write_seconds'], 4)
+        stats['blocking_seconds'] = round(stats['blocking_seconds'], 4)
+        return stats
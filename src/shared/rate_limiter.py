@@ -0,0 +1,408 @@
+"""
+Adaptive rate limiting and retry scheduling for source API requests.
+
+This module provides:
+- A token bucket per (service, tenant) sized from the service's rate_limiting config
+- AIMD concurrency control: the allowed number of in-flight requests grows by one
+  per window of healthy responses and halves on throttling or latency spikes
+  (latency measured against a moving baseline kept per request class, so
+  cheap count or probe requests do not make pages look slow)
+- Retry-After and vendor rate-limit header handling (X-RateLimit-*, RateLimit-*)
+- Jittered exponential backoff for transient 429/5xx responses and network errors
+
+Requests that still fail after the configured retries raise the last error, so
+callers never mistake a throttled page for the end of the data. A caller with
+a deadline (e.g. the Lambda timeout) gets RateLimitPause instead of a wait
+that would outlast it, so it can checkpoint and continue later.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+import urllib.error
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_BURST_LIMIT = 10
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY_SECONDS = 1.0
+MAX_RETRY_DELAY_SECONDS = 60.0
+
+# A response this much slower than its request class's baseline latency counts as congestion
+LATENCY_CONGESTION_FACTOR = 3.0
+
+# Weight of each new sample in the exponentially weighted latency baseline
+LATENCY_BASELINE_WEIGHT = 0.2
+
+DEFAULT_REQUEST_CLASS = 'page'
+
+# Longest wait for an in-flight slot before the caller's deadline is checked again
+SLOT_WAIT_SECONDS = 1.0
+
+
+class RateLimitPause(Exception):
+    """The quota or a retry requires a wait longer than the caller's remaining time."""
+
+    def __init__(self, wait_seconds: float):
+        super().__init__(f"Rate limit requires waiting {wait_seconds:.1f}s, longer than the time remaining")
+        self.wait_seconds = wait_seconds
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+        now: Current wall-clock time (defaults to time.time())
+
+    Returns:
+        Seconds to wait, or None if the header is absent or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+def parse_rate_limit_headers(headers: Optional[Mapping[str, str]], now: Optional[float] = None) -> Optional[float]:
+    """
+    Get the pause requested by vendor rate-limit headers.
+
+    Handles X-RateLimit-Remaining/Reset and the IETF RateLimit-Remaining/Reset
+    pair. Reset values larger than a day are treated as epoch timestamps.
+
+    Args:
+        headers: Response headers
+        now: Current wall-clock time (defaults to time.time())
+
+    Returns:
+        Seconds to wait before the quota resets when it is exhausted, else None
+    """
+    if not headers:
+        return None
+    lowered = {str(key).lower(): value for key, value in headers.items()}
+    for prefix in ('x-ratelimit-', 'ratelimit-'):
+        remaining = lowered.get(f'{prefix}remaining')
+        if remaining is None:
+            continue
+        try:
+            if float(remaining) > 0:
+                return None
+            reset = float(lowered.get(f'{prefix}reset', 0))
+        except (TypeError, ValueError):
+            return None
+        if reset > 86400:
+            reset -= time.time() if now is None else now
+        return max(0.0, reset)
+    return None
+
+
+class RequestScheduler:
+    """
+    Token-bucket and AIMD scheduler for one (service, tenant) pair.
+
+    Thread-safe; share one instance between every thread issuing requests
+    against the same tenant's quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        burst_limit: int = DEFAULT_BURST_LIMIT,
+        max_concurrency: int = 1,
+        retry_attempts: int = DEFAULT_RETRY_ATTEMPTS,
+        retry_delay_seconds: float = DEFAULT_RETRY_DELAY_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            requests_per_minute: Sustained request rate allowed by the API quota
+            burst_limit: Token bucket capacity
+            max_concurrency: Upper bound for concurrent in-flight requests
+            retry_attempts: Retries for transient failures
+            retry_delay_seconds: Base delay for exponential backoff
+            clock: Monotonic clock (injectable for tests)
+            sleep: Sleep function (injectable for tests)
+            jitter: Uniform [0, 1) source for backoff jitter
+        """
+        self.max_rate = max(requests_per_minute, 1) / 60.0
+        self.rate = self.max_rate
+        self.capacity = max(1, burst_limit)
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency_limit = float(self.max_concurrency)
+        self.retry_attempts = max(0, retry_attempts)
+        self.retry_delay_seconds = retry_delay_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+
+        self._tokens = float(self.capacity)
+        self._last_refill = clock()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._latency_baselines: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failures': 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _acquire_delay(self, now: float) -> float:
+        """Seconds until a request may start; 0 means a slot and a token are available."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        # Tolerate float rounding so a refill that lands just short of a token cannot spin
+        if self._tokens < 1 - 1e-9:
+            return (1 - self._tokens) / self.rate
+        return 0.0
+
+    def acquire(self, time_remaining: Optional[Callable[[], float]] = None) -> None:
+        """
+        Block until the quota and the concurrency limit allow another request.
+
+        Args:
+            time_remaining: Returns the caller's remaining seconds; a longer wait raises
+
+        Raises:
+            RateLimitPause: If the quota reopens only after the caller's deadline
+        """
+        with self._condition:
+            while True:
+                if self._in_flight >= int(self.concurrency_limit):
+                    if time_remaining is not None and time_remaining() < SLOT_WAIT_SECONDS:
+                        raise RateLimitPause(SLOT_WAIT_SECONDS)
+                    self._condition.wait(timeout=SLOT_WAIT_SECONDS)
+                    continue
+                delay = self._acquire_delay(self._clock())
+                if delay <= 0:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    return
+                if time_remaining is not None and delay > time_remaining():
+                    raise RateLimitPause(delay)
+                self._condition.release()
+                try:
+                    self._sleep(delay)
+                finally:
+                    self._condition.acquire()
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False,
+                pause_seconds: Optional[float] = None, request_class: str = DEFAULT_REQUEST_CLASS) -> None:
+        """
+        Return a slot and feed the outcome back into the limits.
+
+        Args:
+            latency: Request latency in seconds for a completed request
+            throttled: Whether the API signalled throttling (429 or exhausted quota)
+            pause_seconds: Time to stop sending requests (Retry-After or quota reset)
+            request_class: Kind of request (e.g. 'page', 'count'); latency is compared
+                with the baseline of the same class only
+        """
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - 1)
+            if pause_seconds:
+                self._blocked_until = max(self._blocked_until, self._clock() + pause_seconds)
+
+            congested = False
+            if latency is not None:
+                baseline = self._latency_baselines.get(request_class)
+                if baseline is None:
+                    baseline = latency
+                congested = latency > baseline * LATENCY_CONGESTION_FACTOR
+                # A moving average, so one unusually fast response cannot mark later ones as congested
+                self._latency_baselines[request_class] = (
+                    baseline + LATENCY_BASELINE_WEIGHT * (latency - baseline)
+                )
+
+            if throttled:
+                # Multiplicative decrease of both concurrency and rate
+                self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+                self.rate = max(self.max_rate / 16, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+            elif congested:
+                self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+            elif latency is not None:
+                # Additive increase: roughly +1 concurrency per window of healthy responses
+                self.concurrency_limit = min(float(self.max_concurrency),
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+            self._condition.notify_all()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before a retry.
+
+        Args:
+            attempt: Zero-based retry attempt
+            retry_after: Server-requested delay, which takes precedence when longer
+
+        Returns:
+            Delay in seconds (full-jitter exponential backoff), at most MAX_RETRY_DELAY_SECONDS
+        """
+        ceiling = min(MAX_RETRY_DELAY_SECONDS, self.retry_delay_seconds * (2 ** attempt))
+        delay = ceiling * self._jitter()
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, MAX_RETRY_DELAY_SECONDS)
+
+    def _count(self, stat: str) -> None:
+        with self._condition:
+            self.stats[stat] += 1
+
+    def _wait_before_retry(self, delay: float, time_remaining: Optional[Callable[[], float]]) -> None:
+        if time_remaining is not None and delay > time_remaining():
+            raise RateLimitPause(delay)
+        self._sleep(delay)
+
+    def execute(
+        self,
+        request: Callable[[], T],
+        response_headers: Callable[[T], Optional[Mapping[str, str]]] = None,
+        request_class: str = DEFAULT_REQUEST_CLASS,
+        time_remaining: Optional[Callable[[], float]] = None
+    ) -> T:
+        """
+        Run a request under the scheduler, retrying transient failures.
+
+        Args:
+            request: Callable performing one HTTP request
+            response_headers: Extracts headers from a successful result for quota tracking
+            request_class: Kind of request, for latency tracking (e.g. 'page', 'count', 'probe')
+            time_remaining: Returns the caller's remaining seconds; waits longer than that raise
+
+        Returns:
+            The request's result
+
+        Raises:
+            urllib.error.HTTPError: Non-retryable status, or retries exhausted
+            urllib.error.URLError: Network failure after retries exhausted
+            RateLimitPause: If a quota pause or retry delay outlasts time_remaining
+        """
+        attempt = 0
+        while True:
+            self.acquire(time_remaining)
+            started = self._clock()
+            try:
+                result = request()
+            except urllib.error.HTTPError as e:
+                retry_after = parse_retry_after(e.headers.get('Retry-After') if e.headers else None)
+                throttled = e.code == 429
+                pause = retry_after if retry_after is not None else parse_rate_limit_headers(e.headers)
+                pause = pause if throttled else None
+                self.release(throttled=throttled, pause_seconds=pause)
+                if throttled:
+                    self._count('throttled')
+                if e.code not in RETRYABLE_STATUS_CODES or not self._should_retry(attempt, e):
+                    raise
+                # A server-requested pause already blocks acquire() for every thread; only back off without one
+                if pause is None:
+                    self._wait_before_retry(self.backoff_delay(attempt), time_remaining)
+            except urllib.error.URLError as e:
+                self.release(throttled=False)
+                if not self._should_retry(attempt, e):
+                    raise
+                self._wait_before_retry(self.backoff_delay(attempt), time_remaining)
+            except Exception:
+                self.release()
+                raise
+            else:
+                headers = response_headers(result) if response_headers else None
+                pause = parse_rate_limit_headers(headers)
+                self.release(latency=self._clock() - started, throttled=pause is not None, pause_seconds=pause,
+                             request_class=request_class)
+                self._count('requests')
+                return result
+            attempt += 1
+            self._count('retries')
+
+    def _should_retry(self, attempt: int, error: Exception) -> bool:
+        if attempt < self.retry_attempts:
+            logger.warning(f"Transient API error, retrying ({attempt + 1}/{self.retry_attempts}): {error}")
+            return True
+        self._count('failures')
+        logger.error(f"API request failed after {self.retry_attempts} retries: {error}")
+        return False
+
+    def get_stats(self, since: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get scheduler counters and current limits.
+
+        Args:
+            since: Earlier get_stats() result to report the counter difference from
+
+        Returns:
+            Request, retry and throttle counts plus the current concurrency and rate
+        """
+        with self._condition:
+            counters = dict(self.stats)
+            if since:
+                for key in counters:
+                    counters[key] -= since.get(key, 0)
+            return dict(counters,
+                        concurrency_limit=int(self.concurrency_limit),
+                        requests_per_minute=round(self.rate * 60, 2))
+
+
+# Process-wide schedulers so every chunk for a tenant shares one quota
+_schedulers: Dict[Tuple[str, Optional[str]], RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_request_scheduler(service_name: str, tenant_id: Optional[str] = None,
+                          endpoint_config: Optional[Dict[str, Any]] = None) -> RequestScheduler:
+    """
+    Get the shared scheduler for a service and tenant.
+
+    Args:
+        service_name: Service name (e.g., 'connectwise')
+        tenant_id: Tenant whose API quota the scheduler guards
+        endpoint_config: Service endpoint configuration providing rate_limiting
+            and error_handling settings for a new scheduler
+
+    Returns:
+        Shared RequestScheduler
+    """
+    key = (service_name.lower(), tenant_id)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            rate_limiting = (endpoint_config or {}).get('rate_limiting', {})
+            error_handling = (endpoint_config or {}).get('error_handling', {})
+            scheduler = RequestScheduler(
+                requests_per_minute=rate_limiting.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+                burst_limit=rate_limiting.get('burst_limit', DEFAULT_BURST_LIMIT),
+                max_concurrency=rate_limiting.get('max_concurrent_requests', 1),
+                retry_attempts=error_handling.get('retry_attempts', DEFAULT_RETRY_ATTEMPTS),
+                retry_delay_seconds=error_handling.get('retry_delay_seconds', DEFAULT_RETRY_DELAY_SECONDS)
+            )
+            _schedulers[key] = scheduler
+        return scheduler
+
+
+def reset_request_schedulers() -> None:
+    """Forget every shared scheduler."""
+    with _schedulers_lock:
+        _schedulers.clear()
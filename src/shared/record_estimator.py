@@ -0,0 +1,327 @@
+"""
+Record-count estimation for chunk planning.
+
+This module provides:
+- Cheap count requests per service: ConnectWise '<endpoint>/count',
+  ServiceNow's X-Total-Count header on a one-record page and a Salesforce
+  SOQL 'SELECT COUNT()' query, with the incremental filter applied
+- Record and byte estimates for a table (bytes from the table's configured
+  average record size)
+- A per-(tenant, table) cache: in memory for warm containers, and in the
+  LastUpdated DynamoDB table (one '<table>#estimate' item per table) so that
+  other components can read the last known size without calling the API
+
+Estimates are planning inputs only; extractions always read to the end of
+the data, so a stale or wrong estimate changes the chunk count, never which
+records are fetched.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from .watermark import build_incremental_params, format_watermark, get_incremental_field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ESTIMATE_TTL_SECONDS = 3600
+DEFAULT_RECORD_BYTES = 2048
+DEFAULT_RECORDS_PER_SECOND = 100
+DEFAULT_SALESFORCE_API_VERSION = 'v58.0'
+
+# Sort key suffix of the estimate items stored alongside watermarks in LastUpdated
+ESTIMATE_KEY_SUFFIX = '#estimate'
+
+
+class RecordEstimate(NamedTuple):
+    """Estimated size of a table extraction."""
+    records: int
+    bytes: int
+    source: str
+    estimated_at: str
+    incremental_since: Optional[str] = None
+
+
+def get_estimate_ttl_seconds() -> int:
+    """Get how long a cached estimate is reused from RECORD_ESTIMATE_TTL_SECONDS."""
+    return max(0, int(os.environ.get('RECORD_ESTIMATE_TTL_SECONDS', str(DEFAULT_ESTIMATE_TTL_SECONDS))))
+
+
+def get_record_bytes(table_config: Dict[str, Any], endpoint_settings: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Get a table's average record size.
+
+    Args:
+        table_config: Table configuration (top level or api_config)
+        endpoint_settings: The endpoint's entry in the service's endpoint mapping
+
+    Returns:
+        Bytes per record ('avg_record_bytes' setting, else ESTIMATED_RECORD_BYTES)
+    """
+    configured = (
+        table_config.get('avg_record_bytes')
+        or (table_config.get('api_config') or {}).get('avg_record_bytes')
+        or (endpoint_settings or {}).get('avg_record_bytes')
+    )
+    return int(configured or os.environ.get('ESTIMATED_RECORD_BYTES', str(DEFAULT_RECORD_BYTES)))
+
+
+def get_records_per_second() -> float:
+    """Get the extraction throughput duration forecasts assume from ESTIMATED_RECORDS_PER_SECOND."""
+    return max(1.0, float(os.environ.get('ESTIMATED_RECORDS_PER_SECOND', str(DEFAULT_RECORDS_PER_SECOND))))
+
+
+def estimate_duration_seconds(estimate: RecordEstimate, records_per_second: Optional[float] = None) -> int:
+    """
+    Forecast how long extracting an estimated table takes.
+
+    Args:
+        estimate: Table estimate
+        records_per_second: Extraction throughput (default ESTIMATED_RECORDS_PER_SECOND)
+
+    Returns:
+        Seconds (at least 1)
+    """
+    records_per_second = records_per_second or get_records_per_second()
+    return max(1, math.ceil(estimate.records / records_per_second))
+
+
+def count_request(
+    table_config: Dict[str, Any],
+    incremental_since: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the count request of a table.
+
+    Args:
+        table_config: Table configuration with service_name and endpoint
+        incremental_since: Watermark of an incremental sync; None counts the whole table
+
+    Returns:
+        Tuple of (path relative to the API base URL, query parameters)
+
+    Raises:
+        ValueError: If the service has no known count request
+    """
+    service_name = table_config.get('service_name', 'unknown').lower()
+    endpoint = table_config['endpoint'].strip('/')
+    filters = build_incremental_params(service_name, get_incremental_field(table_config), incremental_since)
+
+    if service_name == 'connectwise':
+        return f"{endpoint}/count", dict(filters)
+    if service_name == 'servicenow':
+        params = {'sysparm_limit': 1, 'sysparm_fields': 'sys_id'}
+        params.update(filters)
+        return endpoint, params
+    if service_name == 'salesforce':
+        api_version = table_config.get('api_version') or DEFAULT_SALESFORCE_API_VERSION
+        query = f"SELECT COUNT() FROM {endpoint}"
+        if filters.get('where'):
+            query = f"{query} WHERE {filters['where']}"
+        return f"services/data/{api_version}/query", {'q': query}
+
+    raise ValueError(f"No count request known for {service_name}")
+
+
+def _get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive response header lookup."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def parse_count(service_name: str, body: bytes, headers: Optional[Mapping[str, str]] = None) -> int:
+    """
+    Read the record count from a count response.
+
+    Args:
+        service_name: Service name
+        body: Response body
+        headers: Response headers
+
+    Returns:
+        Number of records
+
+    Raises:
+        ValueError: If the response carries no count
+    """
+    service = service_name.lower()
+    if service == 'servicenow':
+        total = _get_header(headers, 'x-total-count')
+        if total is None:
+            raise ValueError("ServiceNow response has no X-Total-Count header")
+        return int(total)
+
+    data = json.loads(body.decode('utf-8'))
+    key = 'totalSize' if service == 'salesforce' else 'count'
+    if not isinstance(data, dict) or key not in data:
+        raise ValueError(f"{service_name} count response has no '{key}'")
+    return int(data[key])
+
+
+def estimate_records(
+    table_config: Dict[str, Any],
+    fetch: Callable[[str, Dict[str, Any]], Tuple[bytes, Mapping[str, str]]],
+    incremental_since: Optional[str] = None,
+    endpoint_settings: Optional[Dict[str, Any]] = None
+) -> RecordEstimate:
+    """
+    Estimate a table's records and bytes with one count request.
+
+    Args:
+        table_config: Table configuration
+        fetch: Callable sending a GET for (path, params) and returning (body, headers)
+        incremental_since: Watermark of an incremental sync; None counts the whole table
+        endpoint_settings: The endpoint's entry in the service's endpoint mapping
+
+    Returns:
+        RecordEstimate
+
+    Raises:
+        ValueError: If the service cannot be counted or the response has no count
+    """
+    path, params = count_request(table_config, incremental_since)
+    body, headers = fetch(path, params)
+    records = parse_count(table_config.get('service_name', 'unknown'), body, headers)
+    return RecordEstimate(
+        records=records,
+        bytes=records * get_record_bytes(table_config, endpoint_settings),
+        source='count',
+        estimated_at=format_watermark(datetime.now(timezone.utc)),
+        incremental_since=incremental_since
+    )
+
+
+def estimate_to_dict(estimate: RecordEstimate) -> Dict[str, Any]:
+    """Convert an estimate to its event/response form."""
+    return {
+        'estimated_records': estimate.records,
+        'estimated_bytes': estimate.bytes,
+        'source': estimate.source,
+        'estimated_at': estimate.estimated_at,
+        'incremental_since': estimate.incremental_since
+    }
+
+
+def estimate_from_dict(data: Optional[Dict[str, Any]]) -> Optional[RecordEstimate]:
+    """Read an estimate from its event/response form; None when absent."""
+    if not data or data.get('estimated_records') is None:
+        return None
+    return RecordEstimate(
+        records=int(data['estimated_records']),
+        bytes=int(data.get('estimated_bytes') or 0),
+        source=data.get('source', 'unknown'),
+        estimated_at=data.get('estimated_at', ''),
+        incremental_since=data.get('incremental_since')
+    )
+
+
+# Per-container cache: (tenant_id, table_name, incremental_since) -> (stored monotonic time, estimate)
+_memory_cache: Dict[Tuple[str, str, Optional[str]], Tuple[float, RecordEstimate]] = {}
+
+
+def get_cached_estimate(
+    tenant_id: str,
+    table_name: str,
+    incremental_since: Optional[str] = None,
+    ttl_seconds: Optional[int] = None
+) -> Optional[RecordEstimate]:
+    """Get an estimate this container made within the TTL."""
+    ttl_seconds = get_estimate_ttl_seconds() if ttl_seconds is None else ttl_seconds
+    entry = _memory_cache.get((tenant_id, table_name, incremental_since))
+    if entry is None or time.monotonic() - entry[0] > ttl_seconds:
+        return None
+    return entry[1]._replace(source='cache')
+
+
+def cache_estimate(tenant_id: str, table_name: str, estimate: RecordEstimate):
+    """Keep an estimate in this container's cache."""
+    _memory_cache[(tenant_id, table_name, estimate.incremental_since)] = (time.monotonic(), estimate)
+
+
+def clear_estimate_cache():
+    """Drop every estimate cached in this container."""
+    _memory_cache.clear()
+
+
+def _estimate_key(tenant_id: str, table_name: str) -> Dict[str, Dict[str, str]]:
+    """LastUpdated key of a table's estimate item."""
+    return {'tenant_id': {'S': tenant_id}, 'table_name': {'S': f"{table_name}{ESTIMATE_KEY_SUFFIX}"}}
+
+
+def store_estimate(dynamodb_client, table_name: str, tenant_id: str, source_table: str, estimate: RecordEstimate):
+    """
+    Persist a table's latest estimate.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: LastUpdated DynamoDB table name
+        tenant_id: Tenant identifier
+        source_table: Source table name
+        estimate: Estimate to store
+    """
+    item = dict(
+        _estimate_key(tenant_id, source_table),
+        estimated_records={'N': str(estimate.records)},
+        estimated_bytes={'N': str(estimate.bytes)},
+        estimated_at={'S': estimate.estimated_at}
+    )
+    if estimate.incremental_since:
+        item['incremental_since'] = {'S': estimate.incremental_since}
+    dynamodb_client.put_item(TableName=table_name, Item=item)
+
+
+def load_estimate(
+    dynamodb_client,
+    table_name: str,
+    tenant_id: str,
+    source_table: str,
+    incremental_since: Optional[str] = None,
+    max_age_seconds: Optional[int] = None,
+    any_window: bool = False
+) -> Optional[RecordEstimate]:
+    """
+    Read a table's stored estimate.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: LastUpdated DynamoDB table name
+        tenant_id: Tenant identifier
+        source_table: Source table name
+        incremental_since: Watermark the estimate must have been made for
+        max_age_seconds: Oldest acceptable estimate; None accepts any age
+        any_window: Accept an estimate made for any watermark (e.g., for duration forecasts)
+
+    Returns:
+        RecordEstimate, or None when nothing suitable is stored
+    """
+    response = dynamodb_client.get_item(TableName=table_name, Key=_estimate_key(tenant_id, source_table))
+    item = response.get('Item')
+    if not item or 'estimated_records' not in item:
+        return None
+
+    stored_since = item.get('incremental_since', {}).get('S')
+    if not any_window and stored_since != incremental_since:
+        return None
+
+    estimated_at = item.get('estimated_at', {}).get('S', '')
+    if max_age_seconds is not None:
+        try:
+            age = (datetime.now(timezone.utc) - datetime.fromisoformat(estimated_at.replace('Z', '+00:00'))).total_seconds()
+        except ValueError:
+            return None
+        if age > max_age_seconds:
+            return None
+
+    return RecordEstimate(
+        records=int(item['estimated_records']['N']),
+        bytes=int(item.get('estimated_bytes', {}).get('N', '0')),
+        source='cache',
+        estimated_at=estimated_at,
+        incremental_since=stored_since
+    )
@@ -0,0 +1,264 @@
+"""
+Server-side ClickHouse ingestion of canonical Parquet files from S3.
+
+Instead of downloading files into the Lambda and inserting rows, the loader
+asks ClickHouse to read the files itself:
+
+    INSERT INTO tickets (id, tenant_id, ...)
+    SELECT `id`, 'tenant' AS `tenant_id`, ...
+    FROM s3('https://bucket.s3.region.amazonaws.com/tenant/canonical/tickets/....parquet', 'Parquet')
+
+This module provides:
+- S3Source: where ClickHouse reads from and how it authenticates
+  (ClickHouse Cloud role ARN, access keys for MinIO and other stand-ins, or
+  the server's own credentials)
+- build_column_expressions(): column projection, casts and the tenant_id
+  stamp expressed in SQL
+- S3Ingestor: describes each file's Parquet schema (footer only) and inserts
+  runs of files with identical schemas with a single INSERT ... SELECT
+
+The Lambda only sends metadata queries and INSERT statements, so its cost does
+not depend on data volume.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_FILES_PER_INSERT = 50
+
+# Characters ClickHouse treats as globs in s3() paths; keys containing them are never combined
+_GLOB_CHARACTERS = set('*?{},')
+
+_DATE_TYPES = ('Date', 'Date32', 'DateTime', 'DateTime64')
+
+
+def quote_string(value: str) -> str:
+    """Quote a value as a ClickHouse string literal."""
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column or table name as a ClickHouse identifier."""
+    return '`' + str(name).replace('\\', '\\\\').replace('`', '\\`') + '`'
+
+
+def unwrap_type(clickhouse_type: str) -> Tuple[str, bool]:
+    """
+    Strip LowCardinality() and Nullable() from a ClickHouse type.
+
+    Returns:
+        Tuple of (inner type, whether the type is Nullable)
+    """
+    inner_type = clickhouse_type
+    nullable = False
+    if inner_type.startswith('LowCardinality('):
+        inner_type = inner_type[len('LowCardinality('):-1]
+    if inner_type.startswith('Nullable('):
+        inner_type = inner_type[len('Nullable('):-1]
+        nullable = True
+    return inner_type, nullable
+
+
+def _is_date_type(inner_type: str) -> bool:
+    return inner_type.split('(')[0] in _DATE_TYPES
+
+
+def build_column_expression(column_name: str, source_type: str, target_type: str) -> str:
+    """
+    Build the SELECT expression that converts a source column to its ClickHouse column type.
+
+    Matching types are selected as-is. Strings going into date columns are
+    parsed with parseDateTimeBestEffortOrNull, which accepts the ISO and US
+    formats the row loader handles. Other conversions use accurateCastOrNull,
+    so a value that does not fit becomes NULL (or the type's default value
+    for non-Nullable columns) instead of failing the whole insert.
+
+    Args:
+        column_name: Column name (same in the file and the table)
+        source_type: Column type ClickHouse infers from the Parquet file
+        target_type: Column type of the ClickHouse table
+
+    Returns:
+        SQL expression aliased to the column name
+    """
+    column = quote_identifier(column_name)
+    if source_type == target_type:
+        return column
+
+    source_inner, _ = unwrap_type(source_type)
+    target_inner, target_nullable = unwrap_type(target_type)
+    if source_inner == target_inner and target_nullable:
+        return column
+
+    value = column
+    if _is_date_type(target_inner) and source_inner == 'String':
+        value = f"parseDateTimeBestEffortOrNull({column})"
+    expression = f"accurateCastOrNull({value}, {quote_string(target_inner)})"
+    if not target_nullable:
+        expression = f"ifNull({expression}, defaultValueOfTypeName({quote_string(target_inner)}))"
+    return f"{expression} AS {column}"
+
+
+def build_column_expressions(
+    source_schema: Dict[str, str],
+    table_schema: Dict[str, str],
+    tenant_id: str
+) -> Tuple[List[str], List[str]]:
+    """
+    Project a Parquet file's columns onto a ClickHouse table.
+
+    Columns that exist only in the file are dropped and columns that exist
+    only in the table are left to their defaults. tenant_id is stamped as a
+    constant when the file does not carry it.
+
+    Args:
+        source_schema: Column name -> type inferred from the Parquet file
+        table_schema: Column name -> type of the ClickHouse table
+        tenant_id: Tenant written to rows without a tenant_id
+
+    Returns:
+        Tuple of (INSERT column names, SELECT expressions), in sorted column order
+    """
+    column_names = sorted(set(source_schema).intersection(table_schema))
+    expressions = [
+        build_column_expression(column_name, source_schema[column_name], table_schema[column_name])
+        for column_name in column_names
+    ]
+    if 'tenant_id' in table_schema and 'tenant_id' not in source_schema:
+        column_names.append('tenant_id')
+        expressions.append(f"{quote_string(tenant_id)} AS {quote_identifier('tenant_id')}")
+    return column_names, expressions
+
+
+class S3Source(NamedTuple):
+    """Where ClickHouse reads canonical files from and how it authenticates."""
+    base_url: str
+    role_arn: Optional[str] = None
+    access_key_id: Optional[str] = None
+    secret_access_key: Optional[str] = None
+
+    @classmethod
+    def from_environment(cls, bucket_name: str) -> 'S3Source':
+        """
+        Build the source from environment variables.
+
+        CLICKHOUSE_S3_ENDPOINT overrides the AWS endpoint with a path-style one
+        (e.g. http://minio:9000 for local testing). CLICKHOUSE_S3_ROLE_ARN makes
+        ClickHouse Cloud assume a role; CLICKHOUSE_S3_ACCESS_KEY_ID and
+        CLICKHOUSE_S3_SECRET_ACCESS_KEY pass keys in the query (stand-ins only,
+        since they end up in ClickHouse's query log). With neither, the server
+        uses its own credentials.
+        """
+        endpoint = os.environ.get('CLICKHOUSE_S3_ENDPOINT')
+        if endpoint:
+            base_url = f"{endpoint.rstrip('/')}/{bucket_name}"
+        else:
+            region = os.environ.get('AWS_REGION', 'us-east-2')
+            base_url = f"https://{bucket_name}.s3.{region}.amazonaws.com"
+        return cls(
+            base_url=base_url,
+            role_arn=os.environ.get('CLICKHOUSE_S3_ROLE_ARN') or None,
+            access_key_id=os.environ.get('CLICKHOUSE_S3_ACCESS_KEY_ID') or None,
+            secret_access_key=os.environ.get('CLICKHOUSE_S3_SECRET_ACCESS_KEY') or None
+        )
+
+    def url(self, s3_keys: Sequence[str]) -> str:
+        """URL of one key, or a {a,b,...} alternation over several keys in the same directory."""
+        if len(s3_keys) == 1:
+            return f"{self.base_url}/{s3_keys[0]}"
+        prefix = os.path.commonprefix(list(s3_keys))
+        prefix = prefix[:prefix.rfind('/') + 1]
+        suffixes = ','.join(key[len(prefix):] for key in s3_keys)
+        return f"{self.base_url}/{prefix}{{{suffixes}}}"
+
+    def table_function(self, s3_keys: Sequence[str]) -> str:
+        """s3() table function call reading the given Parquet keys."""
+        arguments = [quote_string(self.url(s3_keys))]
+        if self.access_key_id and self.secret_access_key:
+            arguments += [quote_string(self.access_key_id), quote_string(self.secret_access_key)]
+        arguments.append("'Parquet'")
+        if self.role_arn:
+            arguments.append(f"extra_credentials(role_arn = {quote_string(self.role_arn)})")
+        return f"s3({', '.join(arguments)})"
+
+
+def can_combine(s3_key: str) -> bool:
+    """Whether a key can be part of a multi-file s3() path."""
+    return not _GLOB_CHARACTERS.intersection(s3_key)
+
+
+class S3Ingestor:
+    """
+    Inserts canonical Parquet files into a ClickHouse table with INSERT ... SELECT FROM s3().
+
+    Consecutive files in the same directory whose Parquet schemas match are
+    read by one INSERT (up to max_files_per_insert files), so ClickHouse gets
+    few large inserts and reads the files in parallel itself.
+    """
+
+    def __init__(self, client, source: S3Source, max_files_per_insert: int = DEFAULT_MAX_FILES_PER_INSERT):
+        """
+        Initialize the ingestor.
+
+        Args:
+            client: clickhouse_connect client
+            source: S3 location and credentials ClickHouse reads with
+            max_files_per_insert: Upper bound on files read by one INSERT
+        """
+        self.client = client
+        self.source = source
+        self.max_files_per_insert = max(1, max_files_per_insert)
+
+    def describe(self, s3_key: str) -> Dict[str, str]:
+        """Get the column types ClickHouse infers for a Parquet file (reads the footer only)."""
+        result = self.client.query(f"DESCRIBE TABLE {self.source.table_function([s3_key])}")
+        return {row[0]: row[1] for row in result.result_rows}
+
+    def plan(self, described_files: Iterable[Tuple[str, Dict[str, str]]]) -> List[Tuple[List[str], Dict[str, str]]]:
+        """
+        Group described files into inserts.
+
+        Args:
+            described_files: (key, Parquet schema from describe()) pairs, in load order
+
+        Returns:
+            List of (keys, shared Parquet schema), in input order
+        """
+        groups: List[Tuple[List[str], Dict[str, str]]] = []
+        for s3_key, schema in described_files:
+            if groups:
+                keys, group_schema = groups[-1]
+                if (schema == group_schema and len(keys) < self.max_files_per_insert
+                        and can_combine(s3_key) and can_combine(keys[-1])
+                        and s3_key.rsplit('/', 1)[0] == keys[-1].rsplit('/', 1)[0]):
+                    keys.append(s3_key)
+                    continue
+            groups.append(([s3_key], schema))
+        return groups
+
+    def build_insert(self, table_name: str, s3_keys: Sequence[str], source_schema: Dict[str, str],
+                     table_schema: Dict[str, str], tenant_id: str) -> str:
+        """Build the INSERT ... SELECT statement reading the given keys."""
+        column_names, expressions = build_column_expressions(source_schema, table_schema, tenant_id)
+        if not column_names:
+            raise ValueError(f"No columns of {table_name} found in {s3_keys[0]}")
+        columns_sql = ', '.join(quote_identifier(column_name) for column_name in column_names)
+        return (f"INSERT INTO {quote_identifier(table_name)} ({columns_sql})\n"
+                f"SELECT {', '.join(expressions)}\n"
+                f"FROM {self.source.table_function(s3_keys)}")
+
+    def insert(self, table_name: str, s3_keys: Sequence[str], source_schema: Dict[str, str],
+               table_schema: Dict[str, str], tenant_id: str) -> int:
+        """
+        Run one INSERT ... SELECT.
+
+        Returns:
+            Number of rows ClickHouse reports as written
+        """
+        summary = self.client.command(
+            self.build_insert(table_name, s3_keys, source_schema, table_schema, tenant_id)
+        )
+        return int(getattr(summary, 'written_rows', 0) or 0)
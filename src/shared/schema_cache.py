@@ -0,0 +1,163 @@
+"""
+Per-container cache of ClickHouse table schemas.
+
+Loaders look up a table's columns for every file they insert. The cache
+answers those lookups from memory and fills itself with a single
+system.columns query covering all canonical tables, so a warm container pays
+one metadata round trip instead of EXISTS plus DESCRIBE per file.
+
+Entries are keyed by (database, table) and expire after a TTL. Every table
+name also has a version that invalidate_table_schema() bumps whenever the
+table is created, altered or dropped; a load that started before an
+invalidation never stores its (now stale) result.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_TABLES = ('companies', 'contacts', 'tickets', 'time_entries')
+
+DEFAULT_TTL_SECONDS = 300.0
+
+DEFAULT_DATABASE = 'default'
+
+_COLUMNS_QUERY = (
+    "SELECT table, name, type FROM system.columns "
+    "WHERE database = currentDatabase() AND table IN {tables:Array(String)} "
+    "ORDER BY table, position"
+)
+
+
+def get_client_database(client) -> str:
+    """Get the database a clickhouse_connect client queries by default."""
+    database = getattr(client, 'database', None)
+    return database if isinstance(database, str) and database else DEFAULT_DATABASE
+
+
+class ClickHouseSchemaCache:
+    """
+    TTL cache of table schemas (column name -> ClickHouse type) keyed by (database, table).
+
+    A cached schema of None records that the table does not exist. The cache is
+    safe to share between threads; queries run outside the lock.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        preload_tables: Iterable[str] = CANONICAL_TABLES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Entry lifetime; defaults to CLICKHOUSE_SCHEMA_CACHE_TTL or 300 seconds
+            preload_tables: Tables fetched together with any table that misses
+            clock: Monotonic clock (injectable for tests)
+        """
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('CLICKHOUSE_SCHEMA_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        self.ttl_seconds = ttl_seconds
+        self.preload_tables = tuple(preload_tables)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, str]]]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def version(self, table_name: str) -> int:
+        """Get the invalidation version of a table."""
+        with self._lock:
+            return self._versions.get(table_name, 0)
+
+    def get_table_schema(self, client, table_name: str) -> Optional[Dict[str, str]]:
+        """
+        Get a table's schema, loading it (and the other canonical tables) on a miss.
+
+        Args:
+            client: clickhouse_connect client
+            table_name: Table in the client's current database
+
+        Returns:
+            Ordered dictionary of column name -> ClickHouse type, or None if the table does not exist
+        """
+        key = (get_client_database(client), table_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] < self.ttl_seconds:
+                return entry[1]
+
+        tables = [table_name] + [table for table in self.preload_tables if table != table_name]
+        return self.load(client, tables)[table_name]
+
+    def load(self, client, table_names: Iterable[str]) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        Fetch the schemas of several tables with one system.columns query and cache them.
+
+        Args:
+            client: clickhouse_connect client
+            table_names: Tables in the client's current database
+
+        Returns:
+            Dictionary of table name -> schema, or None for tables that do not exist
+        """
+        database = get_client_database(client)
+        table_names = list(dict.fromkeys(table_names))
+        with self._lock:
+            versions = {table: self._versions.get(table, 0) for table in table_names}
+
+        result = client.query(_COLUMNS_QUERY, parameters={'tables': table_names})
+        schemas: Dict[str, Optional[Dict[str, str]]] = {table: None for table in table_names}
+        for table, column_name, column_type in result.result_rows:
+            if schemas.get(table) is None:
+                schemas[table] = {}
+            schemas[table][column_name] = column_type
+
+        loaded_at = self._clock()
+        with self._lock:
+            for table, schema in schemas.items():
+                # Skip tables invalidated while the query was running
+                if self._versions.get(table, 0) == versions[table]:
+                    self._entries[(database, table)] = (loaded_at, schema)
+        logger.info(f"Loaded schemas of {sum(schema is not None for schema in schemas.values())}/"
+                    f"{len(table_names)} tables from {database}")
+        return schemas
+
+    def invalidate(self, table_name: str, database: Optional[str] = None) -> None:
+        """
+        Drop a table's cached schema and bump its version.
+
+        Args:
+            table_name: Table whose schema changed
+            database: Database of the table; None invalidates the table in every database
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == table_name]:
+                if database is None or key[0] == database:
+                    del self._entries[key]
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every cached schema."""
+        with self._lock:
+            for _, table_name in self._entries:
+                self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            self._entries.clear()
+
+
+_schema_cache = ClickHouseSchemaCache()
+
+
+def get_schema_cache() -> ClickHouseSchemaCache:
+    """Get the container-wide schema cache."""
+    return _schema_cache
+
+
+def invalidate_table_schema(table_name: str, database: Optional[str] = None) -> None:
+    """Invalidate a table's schema in the container-wide cache after DDL on it."""
+    _schema_cache.invalidate(table_name, database)
@@ -5,14 +5,23 @@ Utility functions for the dynamic data pipeline.
 import json
 import os
 import glob
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 try:
     from .config_simple import TenantConfig
 except ImportError:
     from config_simple import TenantConfig
 
+# Endpoint configurations are re-read at most this often per container
+ENDPOINT_CONFIG_TTL_SECONDS = 300.0
+
+# service name -> (loaded at, configuration)
+_endpoint_configs: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_endpoint_configs_lock = threading.Lock()
+
 
 def flatten_json(data: Dict[str, Any], parent_key: str = '', sep: str = '__') -> Dict[str, Any]:
     """
@@ -101,6 +110,38 @@ def load_endpoint_configuration(service_name: str) -> Dict[str, Any]:
     """
     Load endpoint configuration for a service.
     
+    Configurations are cached per container for ENDPOINT_CONFIG_TTL_SECONDS, so
+    per-request callers do not re-read and re-parse the mapping file (or fetch
+    it from S3) every time. The returned dictionary is shared; do not modify it.
+    
+    Args:
+        service_name: Service name (e.g., 'connectwise')
+        
+    Returns:
+        Endpoint configuration dictionary
+    """
+    now = time.monotonic()
+    with _endpoint_configs_lock:
+        cached = _endpoint_configs.get(service_name)
+    if cached and now - cached[0] < ENDPOINT_CONFIG_TTL_SECONDS:
+        return cached[1]
+    
+    config = _read_endpoint_configuration(service_name)
+    with _endpoint_configs_lock:
+        _endpoint_configs[service_name] = (now, config)
+    return config
+
+
+def clear_endpoint_configuration_cache() -> None:
+    """Forget every cached endpoint configuration."""
+    with _endpoint_configs_lock:
+        _endpoint_configs.clear()
+
+
+def _read_endpoint_configuration(service_name: str) -> Dict[str, Any]:
+    """
+    Read endpoint configuration for a service.
+    
     This function tries multiple sources in order of preference:
     1. Bundled mapping files (Lambda package)
     2. Local development mappings (relative path)
@@ -159,6 +200,27 @@ def load_endpoint_configuration(service_name: str) -> Dict[str, Any]:
         return {}
 
 
+def get_service_concurrency_limit(service_name: str, default: int = 1) -> int:
+    """
+    Get the maximum number of concurrent API requests allowed for a service.
+    
+    Read from rate_limiting.max_concurrent_requests in the service's
+    endpoint configuration.
+    
+    Args:
+        service_name: Service name (e.g., 'connectwise')
+        default: Limit used when the service does not configure one
+        
+    Returns:
+        Maximum concurrent requests (at least 1)
+    """
+    rate_limiting = load_endpoint_configuration(service_name).get('rate_limiting', {})
+    try:
+        return max(1, int(rate_limiting.get('max_concurrent_requests', default)))
+    except (TypeError, ValueError):
+        return max(1, default)
+
+
 def discover_available_services() -> List[str]:
     """
     Discover all available services by scanning the mappings directory.
@@ -521,7 +583,9 @@ def build_service_table_configurations(service_name: str) -> List[Dict[str, Any]
                     'page_size': endpoint_data.get('page_size', 1000),
                     'order_by': endpoint_data.get('order_by'),
                     'incremental_field': endpoint_data.get('incremental_field'),
-                    'sync_frequency': endpoint_data.get('sync_frequency', '30min')
+                    'sync_frequency': endpoint_data.get('sync_frequency', '30min'),
+                    'pagination': endpoint_data.get('pagination'),
+                    'cursor_field': endpoint_data.get('cursor_field')
                 },
                 'processing_config': {
                     'chunk_size': endpoint_data.get('chunk_size', 5000)
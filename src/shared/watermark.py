@@ -0,0 +1,149 @@
+"""
+Incremental sync watermarks.
+
+This module provides:
+- Per-service request filters that restrict a sync to records changed since
+  the table's high-water mark (ConnectWise conditions, Salesforce where
+  clause, ServiceNow sysparm_query)
+- Reading and conditionally advancing the per-(tenant, table) watermark kept
+  in the LastUpdated DynamoDB table
+
+The watermark is the time a sync started, advanced only after that sync
+fetched every changed record and committed its files to S3.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Re-read a small window before the watermark to absorb clock skew between
+# this pipeline and the source API; duplicates are removed downstream by record hash
+WATERMARK_OVERLAP_SECONDS = 300
+
+
+def parse_watermark(value: str) -> datetime:
+    """
+    Parse a stored watermark timestamp.
+
+    Args:
+        value: ISO 8601 timestamp (e.g., '2025-01-01T00:00:00Z')
+
+    Returns:
+        Timezone-aware UTC datetime
+    """
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_watermark(value: datetime) -> str:
+    """Format a datetime as a second-precision UTC watermark ('YYYY-MM-DDTHH:MM:SSZ')."""
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def get_incremental_field(table_config: Dict[str, Any]) -> Optional[str]:
+    """
+    Get the configured incremental field of a table.
+
+    Args:
+        table_config: Table configuration (top level or api_config)
+
+    Returns:
+        Field path such as '_info/lastUpdated', or None
+    """
+    return table_config.get('incremental_field') or (table_config.get('api_config') or {}).get('incremental_field')
+
+
+def build_incremental_params(
+    service_name: str,
+    incremental_field: Optional[str],
+    since: Optional[str],
+    overlap_seconds: int = WATERMARK_OVERLAP_SECONDS
+) -> Dict[str, str]:
+    """
+    Build the request parameters that filter an API call to changed records.
+
+    Args:
+        service_name: Service name (e.g., 'connectwise')
+        incremental_field: Field holding the record's last-modified time
+        since: Watermark timestamp; no filter is applied when None
+        overlap_seconds: Seconds re-read before the watermark
+
+    Returns:
+        Query parameters to merge into the request
+    """
+    if not incremental_field or not since:
+        return {}
+
+    start = parse_watermark(since) - timedelta(seconds=overlap_seconds)
+    service = service_name.lower()
+
+    if service == 'connectwise':
+        return {'conditions': f"{incremental_field} > [{format_watermark(start)}]"}
+    if service == 'salesforce':
+        # SOQL datetime literals are unquoted
+        return {'where': f"{incremental_field} > {format_watermark(start)}"}
+    if service == 'servicenow':
+        return {'sysparm_query': f"{incremental_field}>{start.strftime('%Y-%m-%d %H:%M:%S')}"}
+
+    logger.warning(f"No incremental filter syntax known for {service_name}; fetching all records")
+    return {}
+
+
+def load_watermark(dynamodb_client, table_name: str, tenant_id: str, source_table: str) -> Optional[str]:
+    """
+    Read a table's watermark.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: LastUpdated DynamoDB table name
+        tenant_id: Tenant identifier
+        source_table: Source table name
+
+    Returns:
+        Watermark timestamp, or None if the table has never completed a sync
+    """
+    response = dynamodb_client.get_item(
+        TableName=table_name,
+        Key={'tenant_id': {'S': tenant_id}, 'table_name': {'S': source_table}}
+    )
+    return response.get('Item', {}).get('last_updated', {}).get('S')
+
+
+def advance_watermark(dynamodb_client, table_name: str, tenant_id: str, source_table: str, watermark: str) -> bool:
+    """
+    Move a table's watermark forward; never moves it backwards.
+
+    Args:
+        dynamodb_client: boto3 DynamoDB client
+        table_name: LastUpdated DynamoDB table name
+        tenant_id: Tenant identifier
+        source_table: Source table name
+        watermark: New watermark timestamp
+
+    Returns:
+        True if the watermark was advanced, False if a newer one is already stored
+    """
+    try:
+        dynamodb_client.put_item(
+            TableName=table_name,
+            Item={
+                'tenant_id': {'S': tenant_id},
+                'table_name': {'S': source_table},
+                'last_updated': {'S': watermark},
+                'updated_at': {'S': format_watermark(datetime.now(timezone.utc))}
+            },
+            ConditionExpression='attribute_not_exists(last_updated) OR last_updated < :watermark',
+            ExpressionAttributeValues={':watermark': {'S': watermark}}
+        )
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            logger.info(f"Watermark for {tenant_id}/{source_table} is already at or past {watermark}")
+            return False
+        raise
@@ -5,6 +5,13 @@ Eliminates duplicate test setup across test files.
 import pytest
 import sys
 import os
+import importlib
+import importlib.util
+import json
+import threading
+import types
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -142,4 +149,143 @@ def sample_test_data():
             'date_entered': '2023-01-01T00:00:00Z',
             'last_updated': '2023-01-01T00:00:00Z'
         }
-    }
\ No newline at end of file
+    }
+
+class ChunkHarness:
+    """Runs ChunkProcessor extraction against local fake HTTP APIs, without AWS."""
+
+    def __init__(self):
+        self.servers = []
+
+    def serve(self, respond):
+        """
+        Serve a local fake HTTP API until the test ends.
+
+        respond(path, query, headers) returns (status, payload, response_headers);
+        query maps each parameter to its first value and payload is sent as JSON.
+
+        Returns:
+            The API's base URL
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                query = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+                status, payload, response_headers = respond(url.path, query, self.headers)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in response_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def processor(self, concurrency=1, **attributes):
+        """
+        Build a ChunkProcessor without __init__'s AWS clients.
+
+        The processor logs to a Mock, skips memory checks and runs `concurrency`
+        requests at a time (None keeps the configured limit); keyword arguments
+        override any attribute.
+        """
+        from optimized.processors.chunk_processor import ChunkProcessor
+        from shared.rate_limiter import reset_request_schedulers
+
+        # Each processor gets fresh schedulers sized to its concurrency
+        reset_request_schedulers()
+        processor = ChunkProcessor.__new__(ChunkProcessor)
+        processor.logger = Mock()
+        processor.config = Mock(environment='dev', bucket_name='bucket')
+        processor.dynamodb = Mock(get_item=Mock(return_value={}))
+        processor.s3_client = Mock()
+        processor.cloudwatch = Mock()
+        processor.chunk_progress_table = 'ChunkProgress-dev'
+        processor.last_updated_table = 'LastUpdated-dev'
+        processor.progress_recorder = None
+        processor._check_memory_usage = Mock(return_value=False)
+        if concurrency is not None:
+            processor._get_max_concurrent_requests = Mock(return_value=concurrency)
+        for name, value in attributes.items():
+            setattr(processor, name, value)
+        return processor
+
+    def capture_writes(self, processor):
+        """Replace the processor's Parquet writer with a Mock; returns the list of written batches."""
+        batches = []
+        writer = Mock(buffered_rows=0, rows_written=0, files=[])
+        writer.write_records.side_effect = lambda records: batches.append(list(records))
+        writer.close.return_value = ['batch001.parquet']
+        processor._create_chunk_writer = Mock(return_value=writer)
+        return batches
+
+    def timeout_handler(self, should_continue=True, time_remaining=300.0):
+        """Timeout handler Mock that never expires unless told to."""
+        timeout_handler = Mock()
+        timeout_handler.should_continue.return_value = should_continue
+        timeout_handler.get_remaining_time.return_value = time_remaining
+        return timeout_handler
+
+    def run(self, processor, chunk_config, table_config, tenant_id='t1', should_continue=True,
+            time_remaining=300.0, **kwargs):
+        """Extract one chunk with the processor's _process_chunk."""
+        return processor._process_chunk(chunk_config, table_config, {'tenant_id': tenant_id},
+                                        self.timeout_handler(should_continue, time_remaining), **kwargs)
+
+    def close(self):
+        from shared.http_pool import close_http_sessions
+        from shared.rate_limiter import reset_request_schedulers
+
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        reset_request_schedulers()
+        close_http_sessions()
+
+
+@pytest.fixture
+def chunk_harness():
+    """ChunkProcessor test harness; its fake APIs, schedulers and HTTP sessions are closed after the test."""
+    harness = ChunkHarness()
+    yield harness
+    harness.close()
+
+
+@pytest.fixture
+def real_shared_utils():
+    """The real shared.utils, even if another test replaced it in sys.modules."""
+    with patch.dict(sys.modules):
+        sys.modules.pop('shared.utils', None)
+        sys.modules.pop('shared.config_simple', None)
+        yield importlib.import_module('shared.utils')
+
+
+@pytest.fixture
+def orchestrator_module():
+    """The orchestrator Lambda module imported with the real shared modules, even if another test replaced them."""
+    with patch.dict(sys.modules):
+        for name, module in list(sys.modules.items()):
+            if name.startswith('shared.') and not isinstance(module, types.ModuleType):
+                del sys.modules[name]
+        sys.modules.pop('optimized.orchestrator.lambda_function', None)
+        from optimized.orchestrator import lambda_function
+    return lambda_function
+
+
+@pytest.fixture
+def data_loader():
+    """A freshly loaded ClickHouse data loader Lambda module."""
+    pytest.importorskip('clickhouse_connect')
+    path = project_root / 'src' / 'clickhouse' / 'data_loader' / 'lambda_function.py'
+    spec = importlib.util.spec_from_file_location('clickhouse_data_loader', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,88 @@
+"""
+Integration test for server-side ingestion against ClickHouse and a MinIO S3 stand-in.
+
+Skipped unless CLICKHOUSE_TEST_HOST and MINIO_TEST_ENDPOINT are set. To run it locally:
+
+    docker network create avesa-test
+    docker run -d --name minio --network avesa-test -p 9000:9000 minio/minio server /data
+    docker run -d --name clickhouse --network avesa-test -p 8123:8123 \\
+        -e CLICKHOUSE_SKIP_USER_SETUP=1 clickhouse/clickhouse-server
+    CLICKHOUSE_TEST_HOST=localhost MINIO_TEST_ENDPOINT=http://localhost:9000 \\
+        CLICKHOUSE_S3_ENDPOINT=http://minio:9000 pytest tests/integration/test_s3_ingest_minio.py
+
+MINIO_TEST_ENDPOINT is where the test uploads from; CLICKHOUSE_S3_ENDPOINT is
+where ClickHouse reads from (they differ when ClickHouse runs in a container).
+"""
+
+import io
+import os
+import sys
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+pytestmark = pytest.mark.skipif(
+    not (os.environ.get('CLICKHOUSE_TEST_HOST') and os.environ.get('MINIO_TEST_ENDPOINT')),
+    reason='CLICKHOUSE_TEST_HOST and MINIO_TEST_ENDPOINT are not set'
+)
+
+MINIO_USER = os.environ.get('MINIO_TEST_USER', 'minioadmin')
+MINIO_PASSWORD = os.environ.get('MINIO_TEST_PASSWORD', 'minioadmin')
+
+
+@pytest.fixture
+def environment():
+    boto3 = pytest.importorskip('boto3')
+    clickhouse_connect = pytest.importorskip('clickhouse_connect')
+    pd = pytest.importorskip('pandas')
+
+    bucket = f"avesa-test-{uuid.uuid4().hex[:8]}"
+    s3 = boto3.client('s3', endpoint_url=os.environ['MINIO_TEST_ENDPOINT'],
+                      aws_access_key_id=MINIO_USER, aws_secret_access_key=MINIO_PASSWORD)
+    s3.create_bucket(Bucket=bucket)
+
+    keys = []
+    for batch, ids in enumerate([['1', '2'], ['3']]):
+        buffer = io.BytesIO()
+        pd.DataFrame({
+            'id': ids,
+            'company_name': [f'Company {i}' for i in ids],
+            'closed_date': ['2025-01-15', '01/20/2025'][:len(ids)],
+            'extra_column': ['x'] * len(ids)
+        }).to_parquet(buffer, index=False)
+        key = f"t1/canonical/companies/companies-2025-01-15T00:00:00-{batch:03d}.parquet"
+        s3.put_object(Bucket=bucket, Key=key, Body=buffer.getvalue())
+        keys.append(key)
+
+    client = clickhouse_connect.get_client(host=os.environ['CLICKHOUSE_TEST_HOST'],
+                                           port=int(os.environ.get('CLICKHOUSE_TEST_PORT', 8123)))
+    table = f"companies_{uuid.uuid4().hex[:8]}"
+    client.command(f"CREATE TABLE {table} (id String, tenant_id String, company_name Nullable(String), "
+                   f"closed_date Nullable(Date)) ENGINE = MergeTree ORDER BY id")
+    env = {
+        'CLICKHOUSE_S3_ENDPOINT': os.environ.get('CLICKHOUSE_S3_ENDPOINT', os.environ['MINIO_TEST_ENDPOINT']),
+        'CLICKHOUSE_S3_ACCESS_KEY_ID': MINIO_USER,
+        'CLICKHOUSE_S3_SECRET_ACCESS_KEY': MINIO_PASSWORD
+    }
+    with patch.dict(os.environ, env):
+        yield client, bucket, table, keys
+    client.command(f"DROP TABLE IF EXISTS {table}")
+
+
+def test_files_are_loaded_by_clickhouse(environment):
+    from shared.s3_ingest import S3Ingestor, S3Source
+
+    client, bucket, table, keys = environment
+    table_schema = {row[0]: row[1] for row in client.query(f"DESCRIBE TABLE {table}").result_rows}
+    ingestor = S3Ingestor(client, S3Source.from_environment(bucket))
+
+    groups = ingestor.plan((key, ingestor.describe(key)) for key in keys)
+    written = sum(ingestor.insert(table, group_keys, schema, table_schema, 't1') for group_keys, schema in groups)
+
+    rows = client.query(f"SELECT id, tenant_id, company_name, toString(closed_date) FROM {table} ORDER BY id").result_rows
+    assert written == 3
+    assert rows == [('1', 't1', 'Company 1', '2025-01-15'), ('2', 't1', 'Company 2', '2025-01-20'),
+                    ('3', 't1', 'Company 3', '2025-01-15')]
@@ -15,7 +15,7 @@ from datetime import datetime, timezone
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from shared.canonical_mapper import CanonicalMapper
+from shared.canonical_mapper import CanonicalMapper, FieldAccessor, KeyResolver
 
 
 class TestCanonicalMapper:
@@ -33,14 +33,16 @@ class TestCanonicalMapper:
     
     @patch('shared.canonical_mapper.AWSClientFactory')
     def test_init_without_s3_client(self, mock_factory_class):
-        """Test initialization without S3 client creates one."""
+        """Test initialization without S3 client creates one on first use."""
         mock_factory = Mock()
         mock_clients = {'s3': Mock()}
         mock_factory.get_client_bundle.return_value = mock_clients
         mock_factory_class.return_value = mock_factory
         
         mapper = CanonicalMapper()
+        mock_factory_class.assert_not_called()
         
+        assert mapper.s3_client == mock_clients['s3']
         mock_factory_class.assert_called_once()
         mock_factory.get_client_bundle.assert_called_once_with(['s3'])
         assert mapper.s3_client == mock_clients['s3']
@@ -326,5 +328,96 @@ class TestCanonicalMapper:
         assert 'canonical_table' in result
 
 
+
+class TestCompiledFieldAccessors:
+    """Test cases for compiled field accessors and batch transformation."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.mapper = CanonicalMapper(s3_client=Mock())
+        self.mapping = {
+            'connectwise': {
+                'service/tickets': {
+                    'id': 'id',
+                    'summary': 'Summary',
+                    'status': 'status__name',
+                    'company_id': 'COMPANY__ID',
+                    'board_name': 'board__name'
+                }
+            }
+        }
+    
+    def test_case_insensitive_resolution_is_memoized(self):
+        """Known spellings of a key are tried before any scan of the record's keys."""
+        class NoScan(dict):
+            def __iter__(self):
+                raise AssertionError('keys scanned')
+        
+        resolver = KeyResolver()
+        
+        assert resolver.resolve({'Summary': 'a', 'ID': 1}, 'summary') == 'Summary'
+        assert resolver.resolve(NoScan({'Summary': 'b', 'ID': 2}), 'summary') == 'Summary'
+        assert resolver.resolve({'SUMMARY': 'c'}, 'summary') == 'SUMMARY'
+        assert resolver._cache == {'summary': ('Summary', 'SUMMARY')}
+        assert resolver.resolve({'Summary': 'a'}, 'missing') is None
+        assert 'missing' not in resolver._cache
+    
+    def test_accessor_matches_nested_value_semantics(self):
+        """Accessors keep exact-then-case-insensitive lookup and None on misses."""
+        accessor = FieldAccessor('status', 'Status__NAME', KeyResolver())
+        
+        assert accessor.get({'status': {'name': 'Open'}}) == 'Open'
+        assert accessor.get({'Status': {'NAME': 'Closed'}}) == 'Closed'
+        assert accessor.get({'status': None}) is None
+        assert accessor.get({'status': 'flat'}) is None
+        assert accessor.get({}) is None
+        assert self.mapper._get_nested_value({'a': {'B': 1}}, 'a__b') == 1
+    
+    def test_compile_mapping_is_cached(self):
+        """The same mapping object compiles once per canonical table."""
+        compiled = self.mapper.compile_mapping(self.mapping, 'tickets')
+        
+        assert compiled is self.mapper.compile_mapping(self.mapping, 'tickets')
+        assert compiled.source_mapping == {'service': 'connectwise', 'table': 'tickets'}
+        assert [accessor.canonical_field for accessor in compiled.accessors] == list(
+            self.mapping['connectwise']['service/tickets']
+        )
+        assert self.mapper.compile_mapping({'salesforce': {}}, 'tickets') is None
+    
+    def test_load_mapping_precompiles(self):
+        """Loading a mapping compiles its accessors ahead of the first record."""
+        self.mapper.s3_client.get_object.side_effect = Exception('no s3')
+        mapping = self.mapper.load_mapping('tickets', bucket='bucket')
+        
+        assert ('tickets', id(mapping)) in self.mapper._compiled_cache
+    
+    @patch('shared.canonical_mapper.get_timestamp')
+    def test_transform_batch_matches_transform_record(self, mock_timestamp):
+        """Batch output is identical to per-record output and aligned with the input."""
+        mock_timestamp.return_value = '2023-01-01T00:00:00Z'
+        raw_records = [
+            {'id': 1, 'summary': 'a', 'status': {'name': 'New'}, 'company': {'id': 7}},
+            {'ID': 2, 'SUMMARY': 'b', 'Status': {'Name': 'Open'}},
+            {'id': 3, 'summary': None, 'status': None, 'board': {'name': 'Help'}},
+        ]
+        
+        batch = self.mapper.transform_batch(raw_records, self.mapping, 'tickets', tenant_id='t1')
+        single = [
+            self.mapper.transform_record(record, self.mapping, 'tickets', tenant_id='t1')
+            for record in raw_records
+        ]
+        
+        assert batch == single
+        assert batch[0]['company_id'] == '7'
+        assert batch[1]['id'] == '2'
+        assert batch[1]['status'] == 'Open'
+        assert batch[2]['board_name'] == 'Help'
+        assert mock_timestamp.call_count == 4  # one per batch, one per single record
+    
+    def test_transform_batch_without_mapping(self):
+        """A missing mapping yields None for every record."""
+        assert self.mapper.transform_batch([{'id': 1}, {'id': 2}], None, 'tickets') == [None, None]
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
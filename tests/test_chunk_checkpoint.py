@@ -0,0 +1,294 @@
+"""
+Tests for durable chunk checkpoints and resumed chunk extraction.
+
+The chunk processor tests run against a local fake paginated HTTP API and an
+in-memory ChunkProgress table, and write real Parquet files to memory.
+"""
+
+import io
+import os
+import sys
+import time
+from unittest.mock import Mock, patch
+
+import pyarrow.parquet as pq
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.chunk_checkpoint import (
+    ChunkCursor,
+    ChunkLeaseHeld,
+    DurableCursorTracker,
+    cursor_from_attribute,
+    cursor_to_attribute,
+    lease_attributes,
+    load_checkpoint
+)
+from shared.parquet_stream import StreamingParquetWriter
+
+
+class PagedAPI:
+    """Local HTTP API serving `total_records` records in page/pageSize pages."""
+
+    def __init__(self, harness, total_records):
+        self.total_records = total_records
+        self.requested_pages = []
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        page, page_size = int(query['page']), int(query['pageSize'])
+        self.requested_pages.append(page)
+        start = (page - 1) * page_size
+        return 200, [{'id': i} for i in range(start, min(start + page_size, self.total_records))], {}
+
+
+class ChunkProgressTable:
+    """In-memory ChunkProgress table supporting the calls the processor makes."""
+
+    def __init__(self):
+        self.items = {}
+
+    def batch_write_item(self, RequestItems):
+        for requests in RequestItems.values():
+            for request in requests:
+                item = request['PutRequest']['Item']
+                self.items[(item['job_id']['S'], item['chunk_id']['S'])] = dict(item)
+        return {}
+
+    def update_item(self, TableName, Key, UpdateExpression, ConditionExpression,
+                    ExpressionAttributeNames, ExpressionAttributeValues):
+        key = (Key['job_id']['S'], Key['chunk_id']['S'])
+        item = self.items.get(key, dict(Key))
+        allowed = [value['S'] for name, value in ExpressionAttributeValues.items() if name.startswith(':from_status_')]
+        leased = [value['S'] for name, value in ExpressionAttributeValues.items() if name.startswith(':leased_status_')]
+        lease_expired = int(item.get('lease_expires_at', {'N': '0'})['N']) < \
+            int(ExpressionAttributeValues.get(':lease_now', {'N': '0'})['N'])
+        if 'status' in item and item['status']['S'] not in allowed and not (
+                item['status']['S'] in leased and lease_expired):
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        for placeholder, name in ExpressionAttributeNames.items():
+            item[name] = ExpressionAttributeValues[':' + placeholder[1:]]
+        self.items[key] = item
+
+    def get_item(self, TableName, Key, ConsistentRead):
+        item = self.items.get((Key['job_id']['S'], Key['chunk_id']['S']))
+        return {'Item': item} if item else {}
+
+    def status(self, chunk_id='chunk-1'):
+        return self.items[('job-1', chunk_id)]['status']['S']
+
+
+class MemorySink(io.BytesIO):
+    """BytesIO that keeps its contents after close, like an uploaded object."""
+
+    def __init__(self, name, uploaded):
+        super().__init__()
+        self.name, self.uploaded = name, uploaded
+
+    def close(self):
+        self.uploaded[self.name] = self.getvalue()
+        super().close()
+
+
+class Killed(BaseException):
+    """Stands in for the Lambda runtime stopping an invocation mid-chunk."""
+
+
+class TestCursorTracking:
+    """Test cursor storage and durable cursor resolution."""
+
+    def test_cursor_round_trips_through_dynamodb_format(self):
+        cursor = ChunkCursor(page=7, offset=600, records_processed=600, last_id='599')
+
+        assert cursor_from_attribute(cursor_to_attribute(cursor)) == cursor
+        assert cursor_from_attribute(None) == ChunkCursor()
+
+    def test_durable_cursor_only_covers_committed_pages(self):
+        tracker = DurableCursorTracker(ChunkCursor(page=3, offset=20, records_processed=20))
+        for page in range(3, 7):
+            tracker.mark((page - 2) * 10, ChunkCursor(page + 1, page * 10, page * 10))
+
+        assert tracker.durable(0).page == 3
+        assert tracker.durable(25).page == 5
+        assert tracker.durable(40).page == 7
+
+    def test_writer_reports_each_completed_file(self):
+        uploaded, closed = {}, []
+        writer = StreamingParquetWriter(lambda number: (f'f{number}', MemorySink(f'f{number}', uploaded)),
+                                        row_group_rows=10, max_file_bytes=1, on_file_closed=closed.append)
+
+        writer.write_records([{'id': i} for i in range(10)])
+        assert [entry['name'] for entry in closed] == ['f1'] and writer.rows_committed == 10
+        writer.write_records([{'id': i} for i in range(5)])
+        writer.close()
+
+        assert [entry['name'] for entry in closed] == ['f1', 'f2']
+        assert writer.rows_committed == 15
+        assert set(uploaded) == {'f1', 'f2'}
+
+    def test_files_close_on_a_row_cadence(self):
+        uploaded, closed = {}, []
+        writer = StreamingParquetWriter(lambda number: (f'f{number}', MemorySink(f'f{number}', uploaded)),
+                                        row_group_rows=10, max_file_rows=20, on_file_closed=closed.append)
+
+        for page in range(5):
+            writer.write_records([{'id': page * 10 + i} for i in range(10)])
+
+        # A checkpoint follows every 20 rows although the files are far below max_file_bytes
+        assert [entry['record_count'] for entry in closed] == [20, 20]
+        assert writer.rows_committed == 40
+
+
+class TestResumedChunkExtraction:
+    """Test that one chunk streams across invocations without refetching or losing pages."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+        self.table = ChunkProgressTable()
+        self.uploaded = {}
+
+    def api(self, total_records):
+        return PagedAPI(self.harness, total_records)
+
+    def make_processor(self, row_group_rows):
+        def create_writer(chunk_config, table_config, tenant_config, first_file_number=1, on_file_closed=None):
+            def open_sink(number):
+                name = f"file{first_file_number + number - 1:03d}"
+                return name, MemorySink(name, self.uploaded)
+            return StreamingParquetWriter(open_sink, row_group_rows=row_group_rows, max_file_bytes=1,
+                                          on_file_closed=on_file_closed)
+
+        return self.harness.processor(dynamodb=self.table, _create_chunk_writer=create_writer)
+
+    def table_config(self, api):
+        return {
+            'service_name': 'connectwise',
+            'endpoint': 'service/tickets',
+            'table_name': 'tickets',
+            'page_size': 10,
+            'pagination': 'offset',
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+
+    def invoke(self, processor, api, chunk_config, pages_before_timeout=None):
+        timeout_handler = self.harness.timeout_handler()
+        first_request = len(api.requested_pages)
+        timeout_handler.should_continue.side_effect = lambda: (
+            pages_before_timeout is None or len(api.requested_pages) - first_request < pages_before_timeout
+        )
+        context = Mock(aws_request_id='request-1')
+        event = {'chunk_config': chunk_config, 'table_config': self.table_config(api),
+                 'tenant_config': {'tenant_id': 't1'}, 'job_id': 'job-1'}
+        with patch('optimized.processors.chunk_processor.TimeoutHandler', return_value=timeout_handler), \
+                patch('optimized.processors.chunk_processor.get_timestamp', return_value='2025-03-01T12:00:00Z'), \
+                patch('optimized.processors.chunk_processor.PipelineLogger'), \
+                patch('optimized.processors.chunk_processor.publish_metrics'), \
+                patch('boto3.client'):
+            return processor.lambda_handler(event, context)
+
+    def written_ids(self):
+        return sorted(i for body in self.uploaded.values() for i in pq.read_table(io.BytesIO(body)).column('id').to_pylist())
+
+    def test_continuation_resumes_at_checkpoint(self):
+        api = self.api(total_records=95)
+        first = self.invoke(self.make_processor(10), api, {'chunk_id': 'chunk-1'}, pages_before_timeout=3)
+        assert first['status'] == 'timeout_continuation'
+        assert first['continuation_state']['page'] == 4
+        assert self.table.status() == 'timeout_continuation'
+
+        second = self.invoke(self.make_processor(10), api, first['resume_chunk_config'])
+        requested = list(api.requested_pages)
+
+        assert second['status'] == 'completed'
+        assert second['records_processed'] == 95
+        assert requested == list(range(1, 12))
+        assert self.written_ids() == list(range(95))
+        assert second['s3_files_written'] == [f"file{number:03d}" for number in range(1, 11)]
+        assert len(self.table.items[('job-1', 'chunk-1')]['s3_manifest']['L']) == 10
+        assert self.table.items[('job-1', 'chunk-1')]['continuations'] == {'N': '1'}
+
+    def test_killed_invocation_resumes_after_last_completed_file(self):
+        api = self.api(total_records=95)
+        processor = self.make_processor(20)
+        processor._initialize_chunk_progress({'chunk_id': 'chunk-1'}, 'job-1')
+
+        def kill_after_five_pages():
+            if len(api.requested_pages) >= 5:
+                raise Killed()
+            return True
+
+        timeout_handler = self.harness.timeout_handler()
+        timeout_handler.should_continue.side_effect = kill_after_five_pages
+        with patch('optimized.processors.chunk_processor.get_timestamp', return_value='2025-03-01T12:00:00Z'):
+            with pytest.raises(Killed):
+                processor._process_chunk({'chunk_id': 'chunk-1'}, self.table_config(api),
+                                         {'tenant_id': 't1'}, timeout_handler, job_id='job-1')
+        processor._close_progress_recorder()
+
+        # Pages 1-4 are in two completed files; page 5 was only buffered
+        checkpoint = load_checkpoint(self.table, 'ChunkProgress-dev', 'job-1', 'chunk-1', Mock(), 'bucket')
+        assert checkpoint.status == 'processing'
+        assert checkpoint.cursor == ChunkCursor(page=5, offset=40, records_processed=40, last_id='39')
+
+        result = self.invoke(self.make_processor(20), api, {'chunk_id': 'chunk-1', 'resume': True})
+        requested = list(api.requested_pages)
+
+        assert result['status'] == 'completed'
+        assert requested == [1, 2, 3, 4, 5] + list(range(5, 12))
+        assert self.written_ids() == list(range(95))
+
+    def leave_processing(self, lease_expires_at):
+        self.table.items[('job-1', 'chunk-1')] = dict(
+            {'job_id': {'S': 'job-1'}, 'chunk_id': {'S': 'chunk-1'}, 'status': {'S': 'processing'},
+             'checkpoint': cursor_to_attribute(ChunkCursor(page=3, offset=20, records_processed=20))},
+            **lease_attributes('request-0', lease_expires_at)
+        )
+
+    def test_chunk_leased_by_a_running_invocation_is_not_resumed(self):
+        self.leave_processing(time.time() + 600)
+        api = self.api(total_records=95)
+        with pytest.raises(ChunkLeaseHeld):
+            self.invoke(self.make_processor(10), api, {'chunk_id': 'chunk-1', 'resume': True})
+        requested = list(api.requested_pages)
+
+        assert requested == []
+        assert self.table.status() == 'processing'
+        assert self.table.items[('job-1', 'chunk-1')]['lease_owner'] == {'S': 'request-0'}
+
+    def test_chunk_with_an_expired_lease_is_taken_over(self):
+        self.leave_processing(time.time() - 60)
+        api = self.api(total_records=95)
+        result = self.invoke(self.make_processor(10), api, {'chunk_id': 'chunk-1', 'resume': True})
+        requested = list(api.requested_pages)
+
+        assert result['status'] == 'completed'
+        assert requested == list(range(3, 12))
+        assert self.table.items[('job-1', 'chunk-1')]['lease_owner'] == {'S': 'request-1'}
+
+    def test_completed_chunk_is_not_reprocessed(self):
+        self.table.items[('job-1', 'chunk-1')] = {
+            'job_id': {'S': 'job-1'}, 'chunk_id': {'S': 'chunk-1'}, 'status': {'S': 'completed'},
+            'checkpoint': cursor_to_attribute(ChunkCursor(records_processed=95)), 's3_manifest': {'L': []}
+        }
+        api = self.api(total_records=95)
+        result = self.invoke(self.make_processor(10), api, {'chunk_id': 'chunk-1', 'resume': True})
+        requested = list(api.requested_pages)
+
+        assert result['status'] == 'completed'
+        assert result['records_processed'] == 95
+        assert requested == []
+
+    def test_continuation_limit_fails_the_chunk(self):
+        self.table.items[('job-1', 'chunk-1')] = {
+            'job_id': {'S': 'job-1'}, 'chunk_id': {'S': 'chunk-1'},
+            'status': {'S': 'timeout_continuation'}, 'continuations': {'N': '3'}
+        }
+        api = self.api(total_records=95)
+        with patch.dict(os.environ, {'MAX_CHUNK_CONTINUATIONS': '3'}):
+            result = self.invoke(self.make_processor(10), api, {'chunk_id': 'chunk-1', 'resume': True})
+
+        assert result['status'] == 'failed'
+        assert self.table.status() == 'failed'
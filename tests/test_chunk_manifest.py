@@ -0,0 +1,170 @@
+"""
+Tests for per-chunk S3 file manifests.
+"""
+
+import io
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.chunk_manifest import (
+    MAX_INLINE_MANIFEST_FILES,
+    build_manifest,
+    iter_job_chunks,
+    manifest_attributes,
+    manifest_keys,
+    read_manifest
+)
+
+
+def writer_files(count):
+    return [{'name': f'raw/t1/connectwise/tickets/2025/03/01/tickets_chunk-1_batch{i:03d}.parquet',
+             'record_count': 100 + i, 'size_bytes': 2048 * i, 'schema_hash': 'abc123'}
+            for i in range(1, count + 1)]
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)].encode('utf-8'))}
+
+
+class TestManifestStorage:
+    """Test cases for storing and reading manifests."""
+
+    def test_small_manifest_round_trips_inline(self):
+        manifest = build_manifest(writer_files(4))
+        s3 = FakeS3()
+
+        attributes = manifest_attributes(manifest, s3, 'bucket', 'job-1', 'chunk-1')
+
+        assert attributes['s3_files_count'] == {'N': '4'}
+        assert attributes['s3_records_written'] == {'N': str(101 + 102 + 103 + 104)}
+        assert 's3_manifest_key' not in attributes
+        assert s3.objects == {}
+        assert read_manifest(attributes, s3, 'bucket') == manifest
+
+    def test_large_manifest_is_stored_in_s3(self):
+        manifest = build_manifest(writer_files(MAX_INLINE_MANIFEST_FILES + 1))
+        s3 = FakeS3()
+
+        attributes = manifest_attributes(manifest, s3, 'bucket', 'job-1', 'chunk-1')
+
+        assert attributes['s3_manifest_key'] == {'S': 'manifests/job-1/chunk-1.json'}
+        assert 's3_manifest' not in attributes
+        assert json.loads(s3.objects[('bucket', 'manifests/job-1/chunk-1.json')])['version'] == 1
+        assert manifest_keys(read_manifest(attributes, s3, 'bucket')) == manifest_keys(manifest)
+
+    def test_item_without_manifest(self):
+        assert read_manifest({'chunk_id': {'S': 'chunk-1'}}, FakeS3(), 'bucket') is None
+
+    def test_writer_files_carry_schema_hash(self):
+        pytest.importorskip('pyarrow')
+        from shared.parquet_stream import StreamingParquetWriter
+
+        writer = StreamingParquetWriter(lambda number: (f'file{number}.parquet', io.BytesIO()))
+        writer.write_records([{'id': 1, 'name': 'a'}])
+        writer.close()
+
+        entry = build_manifest(writer.files)[0]
+        assert entry['key'] == 'file1.parquet'
+        assert entry['record_count'] == 1
+        assert entry['size_bytes'] > 0
+        assert len(entry['schema_hash']) == 16
+
+
+class TestIterJobChunks:
+    """Test cases for iter_job_chunks."""
+
+    def test_follows_pagination(self):
+        dynamodb = Mock()
+        dynamodb.query.side_effect = [
+            {'Items': [{'chunk_id': {'S': 'a'}}], 'LastEvaluatedKey': {'chunk_id': {'S': 'a'}}},
+            {'Items': [{'chunk_id': {'S': 'b'}}]}
+        ]
+
+        items = list(iter_job_chunks(dynamodb, 'ChunkProgress-dev', 'job-1'))
+
+        assert [item['chunk_id']['S'] for item in items] == ['a', 'b']
+        assert dynamodb.query.call_args_list[1].kwargs['ExclusiveStartKey'] == {'chunk_id': {'S': 'a'}}
+        assert dynamodb.query.call_args_list[0].kwargs['ExpressionAttributeValues'] == {':job_id': {'S': 'job-1'}}
+
+
+class TestResultAggregatorManifests:
+    """Test that the result aggregator collects exactly the files chunks wrote."""
+
+    def make_aggregator(self, items):
+        from optimized.helpers.result_aggregator import ResultAggregator
+
+        aggregator = ResultAggregator.__new__(ResultAggregator)
+        aggregator.logger = Mock()
+        aggregator.config = Mock(bucket_name='bucket')
+        aggregator.chunk_progress_table = 'ChunkProgress-dev'
+        aggregator.s3_client = FakeS3()
+        aggregator.dynamodb = Mock()
+        aggregator.dynamodb.query.side_effect = [
+            {'Items': items[:1], 'LastEvaluatedKey': {'job_id': {'S': 'job-1'}}},
+            {'Items': items[1:]}
+        ]
+        return aggregator
+
+    def chunk_item(self, chunk_id, status, file_count=None, service_name='servicenow'):
+        item = {'job_id': {'S': 'job-1'}, 'chunk_id': {'S': chunk_id}, 'tenant_id': {'S': 't1'},
+                'table_name': {'S': 'tickets'}, 'status': {'S': status}, 'service_name': {'S': service_name}}
+        if file_count is not None:
+            item.update(manifest_attributes(build_manifest(writer_files(file_count)), None, 'bucket', 'job-1', chunk_id))
+        return item
+
+    def test_collects_manifest_files_across_pages(self):
+        aggregator = self.make_aggregator([
+            self.chunk_item('chunk-1', 'completed', file_count=5),
+            self.chunk_item('chunk-2', 'completed', file_count=1),
+            self.chunk_item('chunk-3', 'failed', file_count=2),
+            self.chunk_item('chunk-4', 'completed')
+        ])
+
+        files = aggregator._collect_s3_files_by_table('job-1')
+
+        assert list(files) == ['t1:servicenow:tickets']
+        assert len(files['t1:servicenow:tickets']) == 6
+        aggregator.logger.warning.assert_called_once()
+
+    def test_collected_files_trigger_canonical_transform(self):
+        aggregator = self.make_aggregator([self.chunk_item('chunk-1', 'completed', file_count=4)])
+        aggregator._trigger_single_canonical_transform = Mock(return_value=True)
+
+        aggregator._trigger_table_canonical_transforms('job-1', {'processing_mode': 'multi_tenant'})
+
+        args = aggregator._trigger_single_canonical_transform.call_args[0]
+        assert args[:3] == ('t1', 'servicenow', 'tickets')
+        assert args[3] == [entry['name'] for entry in writer_files(4)]
+
+
+class TestChunkProgressManifest:
+    """Test that the chunk processor stores its manifest with the chunk status."""
+
+    def test_manifest_written_with_status(self, chunk_harness):
+        processor = chunk_harness.processor(dynamodb=Mock(), s3_client=FakeS3())
+
+        with patch('optimized.processors.chunk_processor.get_timestamp', return_value='2025-03-01T12:00:00Z'):
+            processor._update_chunk_progress('chunk-1', 'job-1', 'completed', {
+                'records_processed': 10, 'processing_time': 1.5, 'service_name': 'connectwise',
+                's3_manifest': build_manifest(writer_files(2))
+            })
+
+        request = processor.dynamodb.update_item.call_args.kwargs
+        assert ', #s3_manifest = :s3_manifest' in request['UpdateExpression']
+        assert request['ConditionExpression'] == 'attribute_not_exists(#status) OR #status IN (:from_status_0)'
+        assert request['ExpressionAttributeValues'][':status'] == {'S': 'completed'}
+        assert request['ExpressionAttributeValues'][':service_name'] == {'S': 'connectwise'}
+        assert len(request['ExpressionAttributeValues'][':s3_manifest']['L']) == 2
@@ -0,0 +1,374 @@
+"""
+Tests for throughput-learned chunk sizing.
+"""
+
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from shared.chunk_sizing import (
+    ChunkOutcome,
+    Throughput,
+    advise_chunk_size,
+    learn_throughput,
+    load_chunk_outcomes,
+    load_throughput,
+    outcome_from_item,
+    outcome_from_result,
+    record_chunk_outcome
+)
+
+NOW = datetime(2025, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def progress_item(records, seconds, hours_ago=1, status='completed', invocation_records=None,
+                  continuations=0, bytes_written=None, table='tickets'):
+    """Build a ChunkProgress row in DynamoDB attribute format."""
+    item = {
+        'job_id': {'S': 'job-1'},
+        'chunk_id': {'S': f"chunk-{records}-{hours_ago}"},
+        'tenant_id': {'S': 't1'},
+        'table_name': {'S': table},
+        'status': {'S': status},
+        'records_processed': {'N': str(records)},
+        'processing_time': {'N': str(seconds)},
+        'continuations': {'N': str(continuations)},
+        'updated_at': {'S': (NOW - timedelta(hours=hours_ago)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
+    }
+    if invocation_records is not None:
+        item['invocation_records'] = {'N': str(invocation_records)}
+    if bytes_written is not None:
+        item['bytes_written'] = {'N': str(bytes_written)}
+    return item
+
+
+def outcome(records, seconds, hours_ago=1, timed_out=False, bytes_=0):
+    return ChunkOutcome('t1', 'tickets', records, seconds, bytes_, timed_out, NOW - timedelta(hours=hours_ago))
+
+
+class ChunkProgressScan:
+    """In-memory ChunkProgress table answering filtered scans."""
+
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+
+    def scan(self, **kwargs):
+        self.requests.append(kwargs)
+        names = kwargs['ExpressionAttributeNames']
+        values = kwargs['ExpressionAttributeValues']
+        matches = [
+            item for item in self.items
+            if item[names['#tenant']]['S'] == values[':tenant']['S']
+            and item[names['#table']]['S'] == values[':table']['S']
+            and item[names['#updated']]['S'] >= values[':since']['S']
+        ]
+        return {'Items': matches}
+
+
+class LastUpdatedTable:
+    """In-memory LastUpdated table honouring the throughput item's write conditions."""
+
+    def __init__(self, conflicts=0):
+        self.items = {}
+        self.requests = []
+        self.conflicts = conflicts
+
+    @staticmethod
+    def key(key):
+        return key['tenant_id']['S'], key['table_name']['S']
+
+    def get_item(self, **kwargs):
+        self.requests.append(kwargs)
+        item = self.items.get(self.key(kwargs['Key']))
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, **kwargs):
+        current = self.items.get(self.key(kwargs['Item']))
+        if kwargs['ConditionExpression'] == 'attribute_not_exists(#samples)':
+            allowed = not current
+        else:
+            allowed = current and current['samples'] == kwargs['ExpressionAttributeValues'][':samples']
+        if self.conflicts or not allowed:
+            self.conflicts = max(self.conflicts - 1, 0)
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        self.items[self.key(kwargs['Item'])] = kwargs['Item']
+
+
+class SizingTables(LastUpdatedTable, ChunkProgressScan):
+    """LastUpdated and ChunkProgress behind one client."""
+
+    def __init__(self, progress_items):
+        LastUpdatedTable.__init__(self)
+        self.progress_items = progress_items
+
+    def scan(self, **kwargs):
+        self.items, items = self.progress_items, self.items
+        try:
+            return ChunkProgressScan.scan(self, **kwargs)
+        finally:
+            self.items = items
+
+
+def rolling_throughput(outcomes, client=None):
+    """Fold outcomes into a LastUpdated table's rolling throughput item."""
+    client = client or LastUpdatedTable()
+    for chunk_outcome in outcomes:
+        assert record_chunk_outcome(client, 'LastUpdated-dev', chunk_outcome, half_life_hours=72)
+    return client
+
+
+class TestOutcomes:
+    """Test reading chunk outcomes from ChunkProgress rows."""
+
+    def test_invocation_records_measure_the_last_invocation(self):
+        result = outcome_from_item(progress_item(9000, 90, invocation_records=3000, continuations=2,
+                                                 status='completed', bytes_written=9000000))
+
+        assert (result.records, result.seconds, result.bytes) == (3000, 90.0, 3000000)
+        assert result.timed_out
+
+    def test_legacy_rows_only_count_single_invocation_chunks(self):
+        assert outcome_from_item(progress_item(5000, 50)).records == 5000
+        assert outcome_from_item(progress_item(9000, 90, continuations=1)) is None
+
+    def test_unmeasured_rows_are_skipped(self):
+        assert outcome_from_item(progress_item(5000, 50, status='failed')) is None
+        assert outcome_from_item(progress_item(5000, 0)) is None
+        assert outcome_from_item(progress_item(0, 50)) is None
+
+    def test_load_scans_recent_rows_of_the_table(self):
+        client = ChunkProgressScan([
+            progress_item(5000, 50, hours_ago=1),
+            progress_item(5000, 50, hours_ago=500),
+            progress_item(5000, 50, table='contacts'),
+            progress_item(5000, 50, status='processing')
+        ])
+
+        outcomes = load_chunk_outcomes(client, 'ChunkProgress-dev', 't1', 'tickets', half_life_hours=72, now=NOW)
+
+        assert len(outcomes) == 1
+        request = client.requests[0]
+        assert request['TableName'] == 'ChunkProgress-dev'
+        assert request['ExpressionAttributeValues'][':since']['S'].startswith('2025-02-26T12:00:00')
+        assert 'invocation_records' in request['ExpressionAttributeNames'].values()
+
+
+class TestThroughput:
+    """Test decay-weighted throughput learning."""
+
+    def test_needs_enough_samples(self):
+        assert learn_throughput([outcome(1000, 10), outcome(1000, 10)], now=NOW) is None
+
+    def test_recent_outcomes_weigh_more(self):
+        outcomes = [outcome(1000, 10, hours_ago=0), outcome(1000, 10, hours_ago=0), outcome(1000, 100, hours_ago=72)]
+
+        throughput = learn_throughput(outcomes, half_life_hours=72, now=NOW)
+
+        # Weights 1, 1, 0.5: 2500 records over 70 seconds
+        assert throughput.records_per_second == pytest.approx(2500 / 70)
+        assert throughput.samples == 3
+
+    def test_timeout_rate_and_bytes_per_record(self):
+        outcomes = [outcome(1000, 10, timed_out=True, bytes_=2000000), outcome(1000, 10), outcome(1000, 10)]
+
+        throughput = learn_throughput(outcomes, now=NOW)
+
+        assert throughput.timeout_rate == pytest.approx(1 / 3)
+        assert throughput.bytes_per_record == pytest.approx(2000)
+
+
+class TestRollingThroughput:
+    """Test the rolling throughput item kept in LastUpdated."""
+
+    def test_matches_learning_from_every_outcome(self):
+        outcomes = [outcome(1000, 100, hours_ago=72, timed_out=True, bytes_=3000000),
+                    outcome(1000, 10, hours_ago=1), outcome(2000, 10, hours_ago=0, bytes_=1000000)]
+        client = rolling_throughput(outcomes)
+
+        throughput = load_throughput(client, 'LastUpdated-dev', 't1', 'tickets', half_life_hours=72, now=NOW)
+
+        expected = learn_throughput(outcomes, half_life_hours=72, now=NOW)
+        assert throughput.records_per_second == pytest.approx(expected.records_per_second)
+        assert throughput.bytes_per_record == pytest.approx(expected.bytes_per_record)
+        assert throughput.timeout_rate == pytest.approx(expected.timeout_rate)
+        assert throughput.samples == 3
+        assert list(client.items) == [('t1', 'tickets#throughput')]
+
+    def test_needs_enough_recent_samples(self):
+        client = rolling_throughput([outcome(1000, 10), outcome(1000, 10)])
+        assert load_throughput(client, 'LastUpdated-dev', 't1', 'tickets', half_life_hours=72, now=NOW) is None
+
+        client = rolling_throughput([outcome(1000, 10, hours_ago=300) for _ in range(3)])
+        assert load_throughput(client, 'LastUpdated-dev', 't1', 'tickets', half_life_hours=72, now=NOW) is None
+
+    def test_concurrent_update_is_retried(self):
+        client = rolling_throughput([outcome(1000, 10)])
+        client.conflicts = 1
+
+        with patch('shared.chunk_sizing.time.sleep'):
+            assert record_chunk_outcome(client, 'LastUpdated-dev', outcome(1000, 10), half_life_hours=72)
+
+        assert client.items[('t1', 'tickets#throughput')]['samples'] == {'N': '2'}
+
+    def test_outcome_of_a_finished_invocation(self):
+        manifest = [{'key': 'a.parquet', 'size_bytes': 6000}]
+        result = outcome_from_result('t1', 'tickets', 'completed', {
+            'records_processed': 150, 'invocation_records_processed': 50, 'processing_time': 5.0,
+            's3_manifest': manifest
+        }, continuations=1, updated_at=NOW)
+
+        assert (result.records, result.seconds, result.bytes, result.timed_out) == (50, 5.0, 2000, True)
+        assert outcome_from_result('t1', 'tickets', 'failed', {'records_processed': 5, 'processing_time': 1}) is None
+        assert outcome_from_result('t1', 'tickets', 'completed', {'records_processed': 0, 'processing_time': 1}) is None
+
+
+class TestAdvice:
+    """Test chunk size advice."""
+
+    def test_default_without_history(self):
+        advice = advise_chunk_size(None, 5000)
+
+        assert (advice.chunk_size, advice.strategy) == (5000, 'default')
+
+    def test_targets_a_fraction_of_the_timeout(self):
+        advice = advise_chunk_size(Throughput(200.0, None, 0.0, 5), 5000, timeout_seconds=180, target_fraction=0.5)
+
+        assert (advice.chunk_size, advice.strategy) == (18000, 'throughput')
+        assert any('50% of the 180s timeout' in reason for reason in advice.reasons)
+
+    def test_timeouts_shrink_chunks(self):
+        advice = advise_chunk_size(Throughput(200.0, 1000.0, 0.25, 5), 5000, timeout_seconds=180, target_fraction=0.5)
+
+        assert advice.chunk_size == 13500
+        assert any('MB per chunk' in reason for reason in advice.reasons)
+
+    def test_clamped_and_capped(self):
+        with patch.dict(os.environ, {'CHUNK_SIZE_MIN': '2000', 'CHUNK_SIZE_MAX': '10000'}):
+            assert advise_chunk_size(Throughput(1.0, None, 0.0, 5), 5000, timeout_seconds=180).chunk_size == 2000
+            assert advise_chunk_size(Throughput(1000.0, None, 0.0, 5), 5000, timeout_seconds=180).chunk_size == 10000
+            assert advise_chunk_size(Throughput(1000.0, None, 0.0, 5), 5000, 4000, timeout_seconds=180).chunk_size == 4000
+
+
+class TestTableProcessorSizing:
+    """Test that the table processor sizes chunks from the rolling throughput item."""
+
+    def make_processor(self, outcomes):
+        from optimized.processors.table_processor import TableProcessor
+
+        processor = TableProcessor.__new__(TableProcessor)
+        processor.logger = Mock()
+        processor.dynamodb = rolling_throughput(outcomes)
+        processor.last_updated_table = 'LastUpdated-dev'
+        processor.chunk_progress_table = 'ChunkProgress-dev'
+        return processor
+
+    def test_learned_throughput_sets_the_size(self):
+        recent = datetime.now(timezone.utc)
+        processor = self.make_processor(
+            [ChunkOutcome('t1', 'tickets', 9000, 60.0, 0, False, recent) for _ in range(3)]
+        )
+
+        with patch.dict(os.environ, {'CHUNK_PROCESSOR_TIMEOUT_SECONDS': '180', 'CHUNK_TARGET_TIMEOUT_FRACTION': '0.5'}):
+            assert processor._calculate_optimal_chunk_size('tickets', 500000, 't1') == 13500
+
+        # One item read per table plan; ChunkProgress is never scanned
+        assert processor.dynamodb.requests[-1] == {
+            'TableName': 'LastUpdated-dev',
+            'Key': {'tenant_id': {'S': 't1'}, 'table_name': {'S': 'tickets#throughput'}}
+        }
+
+    def test_default_without_history(self):
+        processor = self.make_processor([])
+
+        assert processor._calculate_optimal_chunk_size('tickets', 500000, 't1') == \
+            processor._calculate_default_chunk_size('tickets', 500000)
+
+    def test_history_failure_falls_back_to_default(self):
+        processor = self.make_processor([])
+        processor.dynamodb = Mock(get_item=Mock(side_effect=RuntimeError('throttled')))
+
+        assert processor._calculate_optimal_chunk_size('tickets', 500000, 't1') == \
+            processor._calculate_default_chunk_size('tickets', 500000)
+        processor.logger.warning.assert_any_call('Failed to learn chunk throughput for tickets: throttled')
+
+
+class TestChunkProgressAttributes:
+    """Test that finished chunks record what sizing learns from."""
+
+    def test_invocation_records_and_bytes_are_recorded(self, chunk_harness):
+        processor = chunk_harness.processor(dynamodb=Mock())
+        manifest = [{'key': 'a.parquet', 'record_count': 100, 'size_bytes': 4000, 'schema_hash': 'h'},
+                    {'key': 'b.parquet', 'record_count': 50, 'size_bytes': 2000, 'schema_hash': 'h'}]
+
+        with patch('optimized.processors.chunk_processor.get_timestamp', return_value='2025-03-01T12:00:00Z'):
+            processor._update_chunk_progress('chunk-1', 'job-1', 'completed', {
+                'records_processed': 150, 'invocation_records_processed': 50,
+                'processing_time': 4.5, 's3_manifest': manifest
+            })
+
+        request = processor.dynamodb.update_item.call_args.kwargs
+        names = {name: placeholder for placeholder, name in request['ExpressionAttributeNames'].items()}
+        values = request['ExpressionAttributeValues']
+        assert values[':' + names['invocation_records'][1:]] == {'N': '50'}
+        assert values[':' + names['bytes_written'][1:]] == {'N': '6000'}
+
+    def test_finished_invocation_folds_into_rolling_throughput(self, chunk_harness):
+        processor = chunk_harness.processor(dynamodb=LastUpdatedTable())
+
+        processor._record_chunk_throughput('t1', 'tickets', 'timeout_continuation', {
+            'records_processed': 150, 'invocation_records_processed': 150, 'processing_time': 150.0
+        }, 0)
+        processor._record_chunk_throughput('t1', 'tickets', 'failed', {'error': 'boom'}, 0)
+
+        item = processor.dynamodb.items[('t1', 'tickets#throughput')]
+        assert (item['samples'], item['timeout_weight']) == ({'N': '1'}, {'N': '1.0'})
+        assert float(item['records']['N']) / float(item['seconds']['N']) == pytest.approx(1.0)
+
+
+class TestAdvisorCli:
+    """Test the chunk size advisor script."""
+
+    def run(self, argv):
+        import chunk_size_advisor
+
+        recent = datetime.now(timezone.utc) - timedelta(hours=1)
+        items = [progress_item(6000, 60, invocation_records=6000, bytes_written=6000000) for _ in range(3)]
+        for item in items:
+            item['updated_at'] = {'S': recent.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
+        client = SizingTables(items)
+        rolling_throughput([outcome_from_item(item) for item in items], client)
+        client.requests = []
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert chunk_size_advisor.main(argv, dynamodb_client=client) == 0
+        return output.getvalue(), client
+
+    def test_shows_outcomes_and_reasons(self):
+        output, client = self.run(['--tenant', 't1', '--table', 'tickets', '--environment', 'prod',
+                                   '--timeout', '180', '--fraction', '0.5', '--outcomes'])
+
+        assert [request['TableName'] for request in client.requests] == ['LastUpdated-prod', 'ChunkProgress-prod']
+        assert '3 measured chunks in LastUpdated-prod' in output
+        assert output.count('6000 records') == 3
+        assert 'Chunk size: 9000 records (throughput)' in output
+        assert '100.0 records/s' in output
+
+    def test_json_output(self):
+        output, _ = self.run(['--tenant', 't1', '--table', 'tickets', '--estimated-records', '2500',
+                              '--timeout', '180', '--json'])
+
+        advice = json.loads(output)
+        assert advice['outcomes'] == 0
+        assert advice['chunk_size'] == 2500
+        assert advice['throughput']['bytes_per_record'] == pytest.approx(1000)
@@ -0,0 +1,194 @@
+"""
+Tests for column-wise ClickHouse type coercion.
+
+Randomized parity tests: every column converter must return exactly what the
+row-wise convert_value_for_clickhouse returns, value for value and type for type.
+"""
+
+import math
+import os
+import random
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip('pandas')
+
+from shared import clickhouse_coercion
+from shared.clickhouse_coercion import (
+    KIND_DATE,
+    KIND_DATETIME,
+    KIND_STRING,
+    compile_column_converter,
+    convert_value_for_clickhouse,
+    get_column_kind
+)
+
+CLICKHOUSE_TYPES = [
+    'Date', 'Nullable(Date)', 'Date32', 'DateTime', 'Nullable(DateTime)', 'DateTime64(3)',
+    'Int32', 'Nullable(UInt8)', 'Int64', 'Float64', 'Nullable(Float32)', 'Bool', 'Nullable(Bool)',
+    'String', 'LowCardinality(String)', 'Decimal(10, 2)', 'UUID', ''
+]
+
+TRIALS_PER_TYPE = 60
+
+
+def random_date(rng):
+    return date(rng.randint(1850, 2150), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def date_string(rng):
+    day = random_date(rng)
+    time = f"{rng.randint(0, 25):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 61):02d}"
+    return rng.choice([
+        day.isoformat(),
+        day.isoformat(),
+        day.strftime('%m/%d/%Y'),
+        day.strftime('%d/%m/%Y'),
+        day.strftime('%Y/%m/%d'),
+        day.strftime('%d-%m-%Y'),
+        f"{day.isoformat()}T{time}",
+        f"{day.isoformat()}T{time}Z",
+        f"{day.isoformat()}T{time}+05:30",
+        f"{day.isoformat()}T{time}-0800",
+        f"{day.isoformat()}T{time}.{rng.randint(0, 999999)}Z",
+        f"{day.isoformat()}T{time}.123+02:00",
+        f"{day.isoformat()} {time}",
+        f"  {day.isoformat()} ",
+        f"{day.year}-{day.month}-{day.day}",
+        f"{day.year}-02-30",
+        f"{day.year}-13-01",
+        '0000-00-00', '0000-01-01', 'NaN', ' null ', 'None', 'na', '', '   ',
+        'not a date', 'March 5, 2024', str(rng.randint(0, 99999))
+    ])
+
+
+def numeric_string(rng):
+    return rng.choice([
+        str(rng.randint(-10 ** 6, 10 ** 6)),
+        str(rng.uniform(-1e6, 1e6)),
+        f"{rng.uniform(-10, 10):.3e}",
+        str(rng.randint(0, 2 ** 70)),
+        '', '   ', ' 12 ', '1.', '.5', '+3', '-0', '1_000', '1e999', '-inf', 'nan', 'abc', '0x10'
+    ])
+
+
+def bool_string(rng):
+    word = rng.choice(['true', 'false', 'yes', 'no', 'on', 'off', '1', '0', 'maybe', '', ' true'])
+    return rng.choice([word, word.upper(), word.title()])
+
+
+def number(rng):
+    return rng.choice([
+        rng.randint(-10 ** 6, 10 ** 6),
+        rng.randint(1_000_000_000, 2_147_483_647),
+        rng.randint(1_000_000_000_000, 2_147_483_647_000),
+        rng.randint(2 ** 62, 2 ** 70),
+        0,
+        rng.uniform(-1e6, 1e6),
+        float(rng.randint(0, 100)),
+        rng.choice([math.inf, -math.inf, -0.0, 1e300]),
+        rng.choice([True, False])
+    ])
+
+
+def other(rng):
+    return rng.choice([
+        {'a': rng.randint(0, 9)},
+        [rng.randint(0, 9)],
+        random_date(rng),
+        datetime(2024, rng.randint(1, 12), 1, rng.randint(0, 23)),
+        'plain text'
+    ])
+
+
+GENERATORS = [date_string, numeric_string, bool_string, number, other]
+
+
+def random_column(rng):
+    """A homogeneous column from one generator, or a mixed one, with nulls sprinkled in."""
+    length = rng.randint(1, 40)
+    if rng.random() < 0.7:
+        generators = [rng.choice(GENERATORS)]
+    else:
+        generators = GENERATORS
+    return [None if rng.random() < 0.1 else rng.choice(generators)(rng) for _ in range(length)]
+
+
+def comparable(values):
+    """Values with their types; NaN made comparable."""
+    return [(type(value), 'NaN' if isinstance(value, float) and math.isnan(value) else value) for value in values]
+
+
+def row_wise(values, clickhouse_type):
+    return [None if value is None else convert_value_for_clickhouse(value, clickhouse_type, 'field')
+            for value in values]
+
+
+class TestColumnConverterParity:
+    """Randomized parity of column converters with the row-wise conversion."""
+
+    @pytest.mark.parametrize('clickhouse_type', CLICKHOUSE_TYPES)
+    def test_random_columns_match_row_wise_conversion(self, clickhouse_type):
+        rng = random.Random(f"parity-{clickhouse_type}")
+        converter = compile_column_converter(clickhouse_type, 'field')
+
+        for _ in range(TRIALS_PER_TYPE):
+            column = random_column(rng)
+            assert comparable(converter.convert(column)) == comparable(row_wise(column, clickhouse_type)), column
+
+    @pytest.mark.parametrize('generator', GENERATORS, ids=lambda generator: generator.__name__)
+    def test_large_homogeneous_columns_match(self, generator):
+        rng = random.Random(generator.__name__)
+        column = [generator(rng) for _ in range(2000)]
+
+        for clickhouse_type in ('Nullable(Date)', 'DateTime', 'Int64', 'Float64', 'Bool', 'String'):
+            converter = compile_column_converter(clickhouse_type, 'field')
+            assert comparable(converter.convert(column)) == comparable(row_wise(column, clickhouse_type))
+
+
+class TestColumnConverter:
+    """Test cases for the bulk conversion paths."""
+
+    def test_type_is_compiled_once(self):
+        assert compile_column_converter('Nullable(Date)', 'closed') is compile_column_converter('Nullable(Date)', 'closed')
+        assert get_column_kind('Nullable(Date)') == KIND_DATE
+        assert get_column_kind('DateTime') == KIND_DATETIME
+        assert get_column_kind('Decimal(10, 2)') == KIND_STRING
+
+    def test_clean_columns_convert_without_row_wise_calls(self):
+        columns = {
+            'Nullable(Date)': ['2025-01-15', '2025-01-16T08:00:00Z', 'null', None],
+            'DateTime': ['2025-01-15T12:00:00', '2025-01-15T12:00:00Z'],
+            'Int32': ['1', '2.7', '', '-3'],
+            'Float64': [1, 2.5, 3],
+            'Bool': ['TRUE', 'off', 'x', ''],
+            'String': [1.0, 2, False]
+        }
+        with patch.object(clickhouse_coercion, 'convert_value_for_clickhouse') as row_conversion:
+            results = {clickhouse_type: compile_column_converter(clickhouse_type, 'f').convert(values)
+                       for clickhouse_type, values in columns.items()}
+
+        row_conversion.assert_not_called()
+        assert results['Nullable(Date)'] == [date(2025, 1, 15), date(2025, 1, 16), None, None]
+        assert results['Int32'] == [1, 2, None, -3]
+        assert results['Bool'] == [True, False, True, False]
+        assert results['String'] == ['1.0', '2', 'False']
+
+    def test_missing_values_become_none(self):
+        pd = pytest.importorskip('pandas')
+        series = pd.Series([1.5, float('nan'), None], dtype=object)
+
+        assert compile_column_converter('Float64', 'f').convert(series) == [1.5, None, None]
+        assert compile_column_converter('Nullable(Date)', 'f').convert(pd.Series([pd.NaT, pd.NaT])) == [None, None]
+
+    def test_datetime64_columns_are_converted_as_iso_strings(self):
+        pd = pytest.importorskip('pandas')
+        series = pd.Series(pd.to_datetime(['2025-01-15 12:00:00', None]))
+
+        assert compile_column_converter('String', 'f').convert(series) == ['2025-01-15T12:00:00', None]
+        assert compile_column_converter('Date', 'f').convert(series) == [date(2025, 1, 15), None]
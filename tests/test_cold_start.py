@@ -0,0 +1,113 @@
+"""
+Tests for cold-start optimizations: lazy imports, cached clients and memory readings.
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+import types
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import shared.memory_usage as memory_usage
+from shared.canonical_mapper import CanonicalMapper
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+def import_real_module(name):
+    """Import a shared module, even if another test replaced it in sys.modules."""
+    module = sys.modules.get(name)
+    if isinstance(module, types.ModuleType):
+        return module
+    with patch.dict(sys.modules):
+        sys.modules.pop(name, None)
+        return importlib.import_module(name)
+
+
+aws_clients = import_real_module('shared.aws_clients')
+
+
+def modules_loaded_by(code):
+    """Run code in a fresh interpreter and return the modules it loaded."""
+    result = subprocess.run(
+        [sys.executable, '-c', f'{code}\nimport sys\nprint("\\n".join(sys.modules))'],
+        env=dict(os.environ, PYTHONPATH=SRC_DIR, AWS_DEFAULT_REGION='us-east-2'),
+        capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+class TestLazySharedPackage:
+    """Test that importing one shared module does not load the whole package."""
+
+    def test_submodule_import_skips_heavy_dependencies(self):
+        loaded = modules_loaded_by('import shared.utils')
+
+        assert 'clickhouse_connect' not in loaded
+        assert 'shared.canonical_mapper' not in loaded
+
+    def test_package_exports_resolve_on_access(self):
+        loaded = modules_loaded_by('from shared import get_timestamp')
+
+        assert 'shared.utils' in loaded
+        assert 'shared.clickhouse_client' not in loaded
+
+    def test_data_loader_does_not_import_pandas(self):
+        loaded = modules_loaded_by('import clickhouse.data_loader.lambda_function')
+
+        assert 'pandas' not in loaded
+
+
+class TestClientCache:
+    """Test that AWS clients are reused across warm invocations."""
+
+    def setup_method(self):
+        aws_clients.clear_client_cache()
+
+    def teardown_method(self):
+        aws_clients.clear_client_cache()
+
+    @patch.object(aws_clients.boto3, 'client')
+    def test_clients_are_created_once_per_service_and_region(self, mock_client):
+        mock_client.side_effect = lambda service, config: Mock(service=service, region=config.region_name)
+
+        first = aws_clients.get_dynamodb_client()
+        assert aws_clients.get_dynamodb_client() is first
+        assert aws_clients.get_dynamodb_client('us-west-2') is not first
+        assert aws_clients.get_s3_client() is not first
+        assert mock_client.call_count == 3
+
+
+class TestCanonicalMapperClient:
+    """Test that CanonicalMapper only builds an S3 client when it loads from S3."""
+
+    @patch('shared.canonical_mapper.AWSClientFactory')
+    def test_no_client_for_bundled_mappings(self, mock_factory_class):
+        mapper = CanonicalMapper()
+        mapper.load_mapping('companies')
+
+        mock_factory_class.assert_not_called()
+
+
+class TestMemoryUsage:
+    """Test the cached psutil process handle."""
+
+    def teardown_method(self):
+        memory_usage._process = None
+        memory_usage._psutil_available = None
+
+    def test_missing_psutil_is_remembered(self):
+        memory_usage._psutil_available = False
+
+        assert memory_usage.get_memory_usage_mb() is None
+
+    def test_process_handle_is_reused(self):
+        process = Mock()
+        process.memory_info.return_value = Mock(rss=256 * memory_usage.MB)
+        memory_usage._process, memory_usage._psutil_available = process, True
+
+        assert memory_usage.get_memory_usage_mb() == 256
+        assert memory_usage.get_process() is process
@@ -0,0 +1,226 @@
+"""
+Tests for the columnar canonical transform plan.
+
+The columnar plan must produce exactly the records the row path produces
+(pandas read_parquet + iterrows + CanonicalMapper.transform_record), so most
+tests here compare the two paths value for value and type for type.
+"""
+
+import io
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.canonical_mapper import CanonicalMapper
+from shared.columnar_transform import (
+    ColumnarTransformPlan,
+    TRANSFORM_MODE_COLUMNAR,
+    TRANSFORM_MODE_ROW,
+    get_transform_mode,
+)
+from shared.record_hash import HASH_MODE_FAST, RecordHasher
+
+MAPPINGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'mappings', 'canonical')
+REQUIRED_FIELDS = {
+    'companies': ['id', 'company_name'],
+    'contacts': ['id', 'first_name'],
+    'tickets': ['id', 'summary'],
+    'time_entries': ['id', 'actual_hours'],
+}
+FIXED_TIMESTAMP = '2025-01-01T00:00:00+00:00'
+
+
+def load_mapping(table):
+    with open(os.path.join(MAPPINGS_DIR, f'{table}.json')) as f:
+        return json.load(f)
+
+
+def to_parquet(records):
+    """Write raw records the way the chunk processor does."""
+    buffer = io.BytesIO()
+    pd.DataFrame(records).to_parquet(buffer, engine='pyarrow', index=False)
+    return buffer.getvalue()
+
+
+def row_path(mapper, mapping, table, parquet_bytes, tenant_id):
+    """Reference implementation: the canonical transform Lambda's row path."""
+    df = pd.read_parquet(io.BytesIO(parquet_bytes))
+    records = []
+    with patch('shared.canonical_mapper.get_timestamp', return_value=FIXED_TIMESTAMP):
+        for _, row in df.iterrows():
+            record = mapper.transform_record(row.to_dict(), mapping, table)
+            if record and tenant_id:
+                record['tenant_id'] = tenant_id
+            if record and any(record.get(field) is None for field in REQUIRED_FIELDS[table]):
+                record = None
+            if record:
+                record['record_hash'] = None
+                records.append(record)
+    return records
+
+
+def ticket_records(count=50):
+    records = []
+    for i in range(count):
+        record = {
+            'id': 1000 + i,
+            'summary': f'Ticket {i}' if i % 7 else None,
+            'initialDescription': 'desc' if i % 2 else None,
+            'status': {'id': i, 'name': 'New'} if i % 5 else None,
+            'priority': {'name': 'High'} if i % 3 else {'id': 1},
+            'severity': 'Medium',
+            'company': {'id': 250 + i if i % 4 else None, 'name': 'Acme'},
+            'contact': {'ID': 10, 'Name': 'Jane'} if i % 6 else None,
+            'budgetHours': 1.5 * i if i % 2 else None,
+            'actualHours': 2.0,
+            'approved': bool(i % 2) if i % 3 else None,
+            '_info': {'lastUpdated': '2024-06-01T00:00:00Z', 'updatedBy': 'admin'},
+            'customFields': [{'id': 1, 'value': 'x'}] if i % 2 else [],
+        }
+        if i % 10 == 0:
+            record['requiredDate'] = '2024-07-01T00:00:00Z'
+        records.append(record)
+    return records
+
+
+class TestGetTransformMode:
+    """Test cases for transform mode selection."""
+
+    def test_default_is_row(self):
+        assert get_transform_mode({'scd_type': 'type_1'}) == TRANSFORM_MODE_ROW
+        assert get_transform_mode(None) == TRANSFORM_MODE_ROW
+
+    def test_columnar(self):
+        assert get_transform_mode({'transform_mode': 'columnar'}) == TRANSFORM_MODE_COLUMNAR
+
+    def test_invalid_falls_back_to_row(self):
+        assert get_transform_mode({'transform_mode': 'vectorised'}) == TRANSFORM_MODE_ROW
+
+
+class TestColumnarTransformPlan:
+    """Test cases for ColumnarTransformPlan."""
+
+    def setup_method(self):
+        self.mapper = CanonicalMapper(s3_client=Mock())
+
+    def make_plan(self, mapping, table):
+        return ColumnarTransformPlan.from_mapping(
+            self.mapper, mapping, table, required_fields=REQUIRED_FIELDS[table]
+        )
+
+    def assert_parity(self, mapping, table, records, tenant_id='tenant-a'):
+        parquet_bytes = to_parquet(records)
+        expected = row_path(self.mapper, mapping, table, parquet_bytes, tenant_id)
+        actual = self.make_plan(mapping, table).transform_parquet(
+            io.BytesIO(parquet_bytes), tenant_id, ingestion_timestamp=FIXED_TIMESTAMP
+        )
+
+        assert len(actual) == len(expected)
+        for actual_record, expected_record in zip(actual, expected):
+            assert list(actual_record.keys()) == list(expected_record.keys())
+            for key, expected_value in expected_record.items():
+                actual_value = actual_record[key]
+                assert type(actual_value) is type(expected_value), key
+                if isinstance(expected_value, float) and expected_value != expected_value:
+                    assert actual_value != actual_value, key
+                elif not hasattr(expected_value, '__len__') or isinstance(expected_value, (str, dict)):
+                    assert actual_value == expected_value, key
+        return actual, expected
+
+    def test_tickets_parity(self):
+        self.assert_parity(load_mapping('tickets'), 'tickets', ticket_records())
+
+    def test_required_field_mask(self):
+        """Rows whose required field resolves to None are dropped by both paths."""
+        mapping = {'connectwise': {'service/tickets': {'id': 'id', 'summary': 'detail__summary'}}}
+        records = [
+            {'id': 1, 'detail': {'summary': 'a'}},
+            {'id': 2, 'detail': None},
+            {'id': 3, 'detail': {'summary': None}},
+        ]
+        actual, _ = self.assert_parity(mapping, 'tickets', records)
+        assert [record['id'] for record in actual] == ['1']
+
+    def test_tickets_parquet_output_is_byte_identical(self):
+        actual, expected = self.assert_parity(load_mapping('tickets'), 'tickets', ticket_records())
+
+        def write(records):
+            buffer = io.BytesIO()
+            pd.DataFrame(records).to_parquet(buffer, index=False, engine='pyarrow')
+            return buffer.getvalue()
+
+        assert write(actual) == write(expected)
+
+    @pytest.mark.parametrize('table', ['companies', 'contacts', 'time_entries'])
+    def test_other_tables_parity(self, table):
+        records = []
+        for i in range(20):
+            records.append({
+                'id': i,
+                'name': f'Company {i}',
+                'firstName': f'First {i}' if i % 3 else None,
+                'lastName': 'Last',
+                'company': {'id': i, 'identifier': 'ACME'},
+                'actualHours': float(i) if i % 4 else None,
+                'chargeToId': i,
+                'member': {'id': 5, 'identifier': 'tech'},
+                'status': {'name': 'Active'},
+                '_info': {'lastUpdated': '2024-06-01T00:00:00Z'},
+            })
+        self.assert_parity(load_mapping(table), table, records)
+
+    def test_case_insensitive_resolution(self):
+        mapping = {'connectwise': {'service/tickets': {
+            'id': 'ID', 'summary': 'Summary', 'status': 'STATUS__NAME'
+        }}}
+        records = [{'id': 1, 'summary': 'a', 'status': {'Name': 'Open'}}]
+        actual, _ = self.assert_parity(mapping, 'tickets', records)
+        assert actual[0]['status'] == 'Open'
+
+    def test_missing_paths_are_none(self):
+        mapping = {'connectwise': {'service/tickets': {
+            'id': 'id', 'summary': 'summary', 'board_name': 'board__name', 'deep': 'summary__x'
+        }}}
+        actual, _ = self.assert_parity(mapping, 'tickets', [{'id': 1, 'summary': 'a'}])
+        assert actual[0]['board_name'] is None
+        assert actual[0]['deep'] is None
+
+    def test_all_numeric_file_uses_float_rows(self):
+        """iterrows() upcasts every value when the whole frame is numeric."""
+        mapping = {'connectwise': {'service/time_entries': {'id': 'id', 'actual_hours': 'actualHours'}}}
+        actual, _ = self.assert_parity(mapping, 'time_entries', [{'id': 1, 'actualHours': 2.5}])
+        assert actual[0]['id'] == '1.0'
+
+    def test_source_columns_projection(self):
+        plan = self.make_plan(load_mapping('tickets'), 'tickets')
+        schema = pa.schema([('id', pa.int64()), ('summary', pa.string()), ('unused', pa.string()),
+                            ('status', pa.struct([('name', pa.string())]))])
+        assert plan.source_columns(schema) == ['id', 'summary', 'status']
+
+    def test_from_mapping_without_table_mapping(self):
+        assert ColumnarTransformPlan.from_mapping(self.mapper, {'salesforce': {}}, 'tickets') is None
+        assert ColumnarTransformPlan.from_mapping(self.mapper, None, 'tickets') is None
+
+    @pytest.mark.parametrize('mode', ['md5', HASH_MODE_FAST])
+    def test_record_hash_matches_row_path(self, mode):
+        """Hashes computed over plan columns equal hashes of the row path's final records."""
+        parquet_bytes = to_parquet(ticket_records())
+        hasher = RecordHasher(mode)
+        expected = row_path(self.mapper, load_mapping('tickets'), 'tickets', parquet_bytes, 'tenant-a')
+        actual = self.make_plan(load_mapping('tickets'), 'tickets').transform_parquet(
+            io.BytesIO(parquet_bytes), 'tenant-a', ingestion_timestamp=FIXED_TIMESTAMP, hasher=hasher
+        )
+
+        assert [record['record_hash'] for record in actual] == hasher.hash_records(expected)
+
+    def test_empty_file(self):
+        plan = self.make_plan(load_mapping('tickets'), 'tickets')
+        table = pa.table({'id': pa.array([], pa.int64()), 'summary': pa.array([], pa.string())})
+        assert plan.transform(table, 'tenant-a', ingestion_timestamp=FIXED_TIMESTAMP) == []
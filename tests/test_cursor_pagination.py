@@ -0,0 +1,228 @@
+"""
+Tests for forward-only and keyset cursor pagination.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.chunk_checkpoint import ChunkCheckpoint, ChunkCursor
+from shared.cursor_pagination import (
+    PAGINATION_FORWARD_ONLY,
+    PAGINATION_KEYSET,
+    PAGINATION_OFFSET,
+    CursorPaginationError,
+    PageCursor,
+    get_cursor_field,
+    get_pagination_strategy,
+    parse_next_link
+)
+
+MAPPINGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'mappings', 'integrations')
+
+
+class TestPaginationConfig:
+    """Test strategy and cursor field selection."""
+
+    def test_strategy_from_endpoint_mapping(self):
+        table_config = {'service_name': 'connectwise'}
+
+        assert get_pagination_strategy(table_config, {'pagination': 'forward_only'}) == PAGINATION_FORWARD_ONLY
+        assert get_pagination_strategy(dict(table_config, pagination='offset'), {'pagination': 'forward_only'}) == \
+            PAGINATION_OFFSET
+        assert get_pagination_strategy(table_config) == PAGINATION_OFFSET
+
+    def test_unsupported_strategy_falls_back_to_offset(self):
+        assert get_pagination_strategy({'service_name': 'salesforce'}, {'pagination': 'keyset'}) == PAGINATION_OFFSET
+        assert get_pagination_strategy({'service_name': 'servicenow'}, {'pagination': 'forward_only'}) == \
+            PAGINATION_OFFSET
+
+    def test_cursor_field_defaults(self):
+        assert get_cursor_field({'service_name': 'connectwise'}) == 'id'
+        assert get_cursor_field({'service_name': 'servicenow'}) == 'sys_id'
+        assert get_cursor_field({'service_name': 'connectwise', 'api_config': {'cursor_field': 'recId'}}) == 'recId'
+
+    def test_only_deep_connectwise_endpoints_use_cursor_pagination(self):
+        with open(os.path.join(MAPPINGS_DIR, 'connectwise_endpoints.json')) as f:
+            endpoints = json.load(f)['endpoints']
+
+        strategies = {endpoint: get_pagination_strategy({'service_name': 'connectwise'}, settings)
+                      for endpoint, settings in endpoints.items()}
+        cursor_endpoints = {endpoint for endpoint, strategy in strategies.items() if strategy != PAGINATION_OFFSET}
+        assert cursor_endpoints == {'service/tickets', 'time/entries'}
+        assert strategies['service/tickets'] == PAGINATION_FORWARD_ONLY
+
+    def test_servicenow_endpoints_use_keyset_pagination(self):
+        with open(os.path.join(MAPPINGS_DIR, 'servicenow_endpoints.json')) as f:
+            endpoints = json.load(f)['endpoints']
+
+        for settings in endpoints.values():
+            assert get_pagination_strategy({'service_name': 'servicenow'}, settings) == PAGINATION_KEYSET
+
+
+class TestMappedEndpointFetching:
+    """Test which mapped endpoints keep the pipelined page fetcher."""
+
+    def test_offset_endpoints_have_no_cursor(self, chunk_harness, real_shared_utils):
+        processor = chunk_harness.processor()
+
+        companies = processor._create_page_cursor({'service_name': 'connectwise', 'endpoint': 'company/companies'})
+        tickets = processor._create_page_cursor({'service_name': 'connectwise', 'endpoint': 'service/tickets'})
+
+        assert companies is None
+        assert isinstance(tickets, PageCursor)
+
+
+class TestPageCursor:
+    """Test request parameters and cursor advancement."""
+
+    def test_forward_only_follows_link_header(self):
+        cursor = PageCursor('connectwise', PAGINATION_FORWARD_ONLY, 'id')
+
+        assert cursor.request_params(100) == ({'pageSize': 100}, {'pagination-type': 'forward-only'})
+        cursor.advance([{'id': 7}], {'Link': '<https://cw/service/tickets?pageSize=100&pageId=9>; rel="next"'})
+        assert cursor.after == '9'
+        assert cursor.request_params(100)[0] == {'pageSize': 100, 'pageId': '9'}
+
+        cursor.advance([{'id': 12}], {'link': '<https://cw/service/tickets?pageSize=100>; rel="first"'})
+        assert cursor.exhausted is True
+
+    def test_forward_only_without_link_header_uses_last_id(self):
+        cursor = PageCursor('connectwise', PAGINATION_FORWARD_ONLY, 'id')
+        cursor.advance([{'id': 1}, {'id': 2}], {})
+
+        assert cursor.after == '2'
+        assert cursor.exhausted is False
+
+    def test_connectwise_keyset_combines_conditions(self):
+        cursor = PageCursor('connectwise', PAGINATION_KEYSET, 'id', after='500')
+        params, headers = cursor.request_params(100, {'conditions': '_info/lastUpdated > [2025-03-01T12:00:00Z]'})
+
+        assert params == {
+            'page': 1,
+            'pageSize': 100,
+            'orderBy': 'id asc',
+            'conditions': '_info/lastUpdated > [2025-03-01T12:00:00Z] and id > 500'
+        }
+        assert headers == {}
+
+    def test_servicenow_keyset_query(self):
+        cursor = PageCursor('servicenow', PAGINATION_KEYSET, 'sys_id')
+        assert cursor.request_params(50)[0] == {'sysparm_limit': 50, 'sysparm_query': 'ORDERBYsys_id'}
+
+        cursor.advance([{'sys_id': 'a1'}, {'sys_id': 'b2'}])
+        params, _ = cursor.request_params(50, {'sysparm_query': 'sys_updated_on>2025-03-01 12:00:00'})
+        assert params['sysparm_query'] == 'sys_updated_on>2025-03-01 12:00:00^sys_id>b2^ORDERBYsys_id'
+
+    def test_missing_cursor_field_is_an_error(self):
+        cursor = PageCursor('servicenow', PAGINATION_KEYSET, 'sys_id')
+
+        with pytest.raises(CursorPaginationError):
+            cursor.advance([{'number': 'INC001'}])
+
+    def test_parse_next_link(self):
+        header = '<https://x/a?pageId=2>; rel="prev", <https://x/a?pageId=40>; rel="next"'
+
+        assert parse_next_link(header) == 'https://x/a?pageId=40'
+        assert parse_next_link(None) is None
+
+
+class CursorAPI:
+    """
+    Local API paging an id-ordered table by cursor, ConnectWise forward-only or ServiceNow keyset style.
+
+    `on_request` runs before each response, so tests can change the table mid-extraction.
+    """
+
+    def __init__(self, harness, style, records, on_request=None):
+        self.style = style
+        self.records = records
+        self.on_request = on_request
+        self.requests = []
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        self.requests.append(query)
+        if self.on_request:
+            self.on_request(self, len(self.requests))
+        if self.style == 'connectwise':
+            assert headers.get('pagination-type') == 'forward-only'
+            after, limit, key = query.get('pageId'), int(query['pageSize']), 'id'
+            after = int(after) if after is not None else None
+        else:
+            clauses = query['sysparm_query'].split('^')
+            assert clauses[-1] == 'ORDERBYsys_id'
+            bounds = [clause.split('>', 1)[1] for clause in clauses if clause.startswith('sys_id>')]
+            after, limit, key = (bounds[0] if bounds else None), int(query['sysparm_limit']), 'sys_id'
+        matching = [r for r in self.records if after is None or r[key] > after][:limit]
+        response_headers = {}
+        if self.style == 'connectwise':
+            links = [f'<{self.url}/service/tickets?pageSize={limit}>; rel="first"']
+            if matching and any(r['id'] > matching[-1]['id'] for r in self.records):
+                links.append(f'<{self.url}/service/tickets?pageSize={limit}&pageId={matching[-1]["id"]}>; rel="next"')
+            response_headers['Link'] = ', '.join(links)
+        return 200, matching, response_headers
+
+
+class TestCursorPaginatedChunks:
+    """Test chunks extracted with cursor pagination."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def api(self, style, records, on_request=None):
+        return CursorAPI(self.harness, style, records, on_request)
+
+    def run_chunk(self, api, table_config, checkpoint=None):
+        processor = self.harness.processor(concurrency=4)
+        batches = self.harness.capture_writes(processor)
+        result = self.harness.run(processor, {'chunk_id': 'chunk-1', 'estimated_records': 100}, table_config,
+                                  checkpoint=checkpoint)
+        return [record for batch in batches for record in batch], result
+
+    def test_forward_only_does_not_skip_records_deleted_mid_extraction(self):
+        def delete_read_record(api, request_count):
+            # After the first page, a record that was already read is deleted at the source
+            if request_count == 2:
+                api.records = [r for r in api.records if r['id'] != 3]
+
+        api = self.api('connectwise', [{'id': i} for i in range(1, 26)], on_request=delete_read_record)
+        table_config = {
+            'service_name': 'connectwise',
+            'endpoint': 'service/tickets',
+            'page_size': 10,
+            'pagination': 'forward_only',
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+        written, result = self.run_chunk(api, table_config)
+        requests = list(api.requests)
+
+        assert [r['id'] for r in written] == list(range(1, 26))
+        assert [r.get('pageId') for r in requests] == [None, '10', '20']
+        assert all('page' not in r for r in requests)
+        assert result['completed'] is True
+
+    def test_servicenow_keyset_resumes_after_checkpoint(self):
+        records = [{'sys_id': f'{i:04x}'} for i in range(1, 31)]
+        checkpoint = ChunkCheckpoint('timeout_continuation', ChunkCursor(3, 20, 20, records[19]['sys_id']), [], 1)
+
+        api = self.api('servicenow', records)
+        table_config = {
+            'service_name': 'servicenow',
+            'endpoint': 'incident',
+            'page_size': 10,
+            'pagination': 'keyset',
+            'credentials': {'instance_url': api.url, 'username': 'u', 'password': 'p'}
+        }
+        written, result = self.run_chunk(api, table_config, checkpoint=checkpoint)
+        queries = [r['sysparm_query'] for r in api.requests]
+
+        assert written == records[20:]
+        assert queries == ['sys_id>0014^ORDERBYsys_id', 'sys_id>001e^ORDERBYsys_id']
+        assert result['records_processed'] == 30
+        assert result['completed'] is True
@@ -0,0 +1,137 @@
+"""
+Tests for the columnar (Arrow) insert path of the ClickHouse data loader.
+"""
+
+import io
+import os
+import sys
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip('clickhouse_connect')
+pd = pytest.importorskip('pandas')
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+TABLE_SCHEMA = {
+    'id': 'String',
+    'tenant_id': 'String',
+    'ticket_count': 'Nullable(Int32)',
+    'amount': 'Nullable(Float64)',
+    'active': 'Nullable(Bool)',
+    'closed_date': 'Nullable(Date)',
+    'updated_at': 'Nullable(DateTime)',
+    'score': 'Nullable(String)',
+    'last_updated': 'DateTime',
+    'budget': 'Nullable(Int64)'
+}
+
+
+def canonical_parquet():
+    """Parquet bytes shaped like canonical transform output."""
+    frame = pd.DataFrame({
+        'id': ['1', '2', '3', '4'],
+        'ticket_count': [3.0, None, 7.0, 0.0],
+        'amount': [1.5, float('nan'), 2.0, -4.25],
+        'active': [True, False, None, True],
+        'closed_date': ['2025-01-15', '01/20/2025', None, 'not a date'],
+        'updated_at': ['2025-01-15T12:00:00Z', None, '2025-02-01T08:30:00', '2025-03-01T00:00:00Z'],
+        'score': [1.0, 2.5, None, 10.0],
+        'last_updated': pd.to_datetime(['2025-01-15 12:00:00', '2025-01-16 00:00:00',
+                                        '2025-01-17 06:00:00', '2025-01-18 18:30:00']),
+        'budget': ['100', '', '2.0', None],
+        'extra_column': ['x', 'y', 'z', 'w']
+    })
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def as_utc(records):
+    """Compare datetimes as UTC instants; naive values are UTC in Lambda, as in the row insert."""
+    return [
+        {key: value.astimezone(timezone.utc).replace(tzinfo=None)
+         if isinstance(value, datetime) and value.tzinfo else value
+         for key, value in record.items()}
+        for record in records
+    ]
+
+
+class TestColumnarLoad:
+    """Test that the columnar path inserts the same values as the row path."""
+
+    @pytest.fixture(autouse=True)
+    def use_data_loader(self, data_loader):
+        self.loader = data_loader
+
+    def run_loads(self, content):
+        loader = self.loader
+        row_client, arrow_client = Mock(), Mock()
+        with patch.object(loader, 'table_exists', return_value=True), \
+                patch.object(loader, 'get_table_columns', return_value=set(TABLE_SCHEMA)), \
+                patch.object(loader, 'get_table_schema', return_value=dict(TABLE_SCHEMA)), \
+                patch.dict(os.environ, {'CLICKHOUSE_DEDUP_STRATEGY': 'deferred'}):
+            rows_inserted = loader.load_data_to_clickhouse(
+                row_client, 'tickets', loader.process_single_file_content(content, 'f.parquet'), 't1'
+            )
+            arrow_inserted = loader.load_arrow_table_to_clickhouse(
+                arrow_client, 'tickets', pq.read_table(pa.BufferReader(content)), 't1'
+            )
+
+        columns = row_client.insert.call_args[0][1]
+        column_names = row_client.insert.call_args[1]['column_names']
+        row_records = [dict(zip(column_names, row)) for row in zip(*columns)]
+        arrow_table = arrow_client.insert_arrow.call_args[0][1]
+        return rows_inserted, row_records, arrow_inserted, arrow_table
+
+    def test_columnar_insert_matches_row_insert(self):
+        rows_inserted, row_records, arrow_inserted, arrow_table = self.run_loads(canonical_parquet())
+
+        assert arrow_inserted == rows_inserted == 4
+        assert arrow_table.column_names == sorted(set(TABLE_SCHEMA))
+        assert as_utc(arrow_table.to_pylist()) == as_utc(row_records)
+
+    def test_columns_are_cast_to_clickhouse_types(self):
+        _, _, _, arrow_table = self.run_loads(canonical_parquet())
+        schema = arrow_table.schema
+
+        assert schema.field('ticket_count').type == pa.int32()
+        assert schema.field('active').type == pa.bool_()
+        assert schema.field('closed_date').type == pa.date32()
+        assert schema.field('last_updated').type == pa.timestamp('s')
+        assert arrow_table.column('amount').to_pylist()[1] is None
+        assert arrow_table.column('tenant_id').to_pylist() == ['t1'] * 4
+        assert arrow_table.column('score').to_pylist() == ['1.0', '2.5', None, '10.0']
+
+    def test_arrow_type_mapping(self):
+        loader = self.loader
+
+        assert loader.get_arrow_type('LowCardinality(Nullable(String))') == pa.string()
+        assert loader.get_arrow_type('UInt8') == pa.uint8()
+        assert loader.get_arrow_type("DateTime64(3, 'UTC')") == pa.timestamp('us')
+        assert loader.get_arrow_type('Array(String)') is None
+
+    def test_handler_uses_columnar_path_for_parquet_files(self):
+        loader = self.loader
+        s3_client = Mock()
+        s3_client.get_object.return_value = {'Body': io.BytesIO(canonical_parquet())}
+        clickhouse_client = Mock()
+        event = {'tenant_id': 't1', 'processing_mode': 'multi_file_1to1',
+                 'canonical_files': ['t1/canonical/tickets/batch001.parquet']}
+
+        with patch.object(loader.boto3, 'client', return_value=s3_client), \
+                patch.object(loader, 'get_clickhouse_client', return_value=clickhouse_client), \
+                patch.object(loader, 'table_exists', return_value=True), \
+                patch.object(loader, 'get_table_schema', return_value=dict(TABLE_SCHEMA)), \
+                patch.dict(os.environ, {'TARGET_TABLE': 'tickets', 'CLICKHOUSE_DEDUP_STRATEGY': 'deferred'}):
+            response = loader.lambda_handler(event, None)
+
+        assert response['statusCode'] == 200
+        assert '"load_mode": "columnar"' in response['body']
+        assert '"records_processed": 4' in response['body']
+        clickhouse_client.insert_arrow.assert_called_once()
+        clickhouse_client.insert.assert_not_called()
@@ -0,0 +1,147 @@
+"""
+Tests for paginated, segmented and batched DynamoDB access.
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.dynamodb_access import (
+    MAX_BATCH_WRITE_ITEMS,
+    UnprocessedItemsError,
+    batch_get_items,
+    batch_write_items,
+    paginate,
+    parallel_scan,
+    projection_arguments
+)
+
+
+def paged_scan(pages_by_segment):
+    """Scan double returning the given pages per segment, chained by LastEvaluatedKey."""
+    calls = []
+
+    def scan(**request):
+        calls.append(request)
+        pages = pages_by_segment[request.get('Segment', 0)]
+        page_number = request.get('ExclusiveStartKey', {}).get('page', 0)
+        response = {'Items': pages[page_number]}
+        if page_number + 1 < len(pages):
+            response['LastEvaluatedKey'] = {'page': page_number + 1}
+        return response
+
+    return scan, calls
+
+
+class TestPagination:
+    """Test cases for paginate() and parallel_scan()."""
+
+    def test_paginate_follows_last_evaluated_key(self):
+        scan, calls = paged_scan({0: [[1, 2], [3], [4]]})
+
+        assert list(paginate(scan, TableName='t')) == [1, 2, 3, 4]
+        assert [call.get('ExclusiveStartKey') for call in calls] == [None, {'page': 1}, {'page': 2}]
+
+    def test_parallel_scan_reads_every_page_of_every_segment(self):
+        scan, calls = paged_scan({0: [['a'], ['b']], 1: [[]], 2: [['c'], ['d'], ['e']]})
+
+        items = list(parallel_scan(scan, total_segments=3, TableName='t'))
+
+        assert items == ['a', 'b', 'c', 'd', 'e']
+        assert {call['TotalSegments'] for call in calls} == {3}
+        assert all(call['TableName'] == 't' for call in calls)
+
+    def test_single_segment_scan_omits_segment_arguments(self):
+        scan, calls = paged_scan({0: [['a']]})
+
+        assert list(parallel_scan(scan, TableName='t')) == ['a']
+        assert 'Segment' not in calls[0]
+
+    def test_projection_uses_placeholders_and_keeps_existing_names(self):
+        arguments = projection_arguments(['status', 'tenant_id'], {'#created_at': 'created_at'})
+
+        assert arguments['ProjectionExpression'] == '#p0, #p1'
+        assert arguments['ExpressionAttributeNames'] == {
+            '#created_at': 'created_at', '#p0': 'status', '#p1': 'tenant_id'
+        }
+
+
+class TestBatchOperations:
+    """Test cases for BatchGetItem and BatchWriteItem helpers."""
+
+    def test_batch_get_retries_unprocessed_keys(self):
+        keys = [{'id': {'S': str(i)}} for i in range(150)]
+        client = Mock()
+        client.batch_get_item.side_effect = [
+            {'Responses': {'t': [{'id': key['id']} for key in keys[:90]]},
+             'UnprocessedKeys': {'t': {'Keys': keys[90:100]}}},
+            {'Responses': {'t': [{'id': key['id']} for key in keys[90:100]]}},
+            {'Responses': {'t': [{'id': key['id']} for key in keys[100:]]}}
+        ]
+        sleep = Mock()
+
+        items = batch_get_items(client, 't', keys, attribute_names=['id'], sleep=sleep)
+
+        assert len(items) == 150
+        requests = [call.kwargs['RequestItems']['t'] for call in client.batch_get_item.call_args_list]
+        assert [len(request['Keys']) for request in requests] == [100, 10, 50]
+        assert requests[0]['ProjectionExpression'] == '#p0'
+        sleep.assert_called_once()
+
+    def test_batch_write_chunks_and_retries(self):
+        items = [{'id': {'S': str(i)}} for i in range(MAX_BATCH_WRITE_ITEMS + 5)]
+        client = Mock()
+        client.batch_write_item.side_effect = [
+            {'UnprocessedItems': {'t': [{'PutRequest': {'Item': items[0]}}]}},
+            {'UnprocessedItems': {}},
+            {}
+        ]
+
+        written = batch_write_items(client, 't', put_items=items, sleep=Mock())
+
+        assert written == len(items)
+        sizes = [len(call.kwargs['RequestItems']['t']) for call in client.batch_write_item.call_args_list]
+        assert sizes == [MAX_BATCH_WRITE_ITEMS, 1, 5]
+
+    def test_batch_write_gives_up_after_max_attempts(self):
+        client = Mock()
+        unprocessed = [{'DeleteRequest': {'Key': {'id': {'S': '1'}}}}]
+        client.batch_write_item.return_value = {'UnprocessedItems': {'t': unprocessed}}
+
+        with pytest.raises(UnprocessedItemsError) as error:
+            batch_write_items(client, 't', delete_keys=[{'id': {'S': '1'}}], max_attempts=3, sleep=Mock())
+
+        assert error.value.unprocessed == unprocessed
+        assert client.batch_write_item.call_count == 3
+
+
+class TestTenantDiscovery:
+    """Test that the orchestrator discovers tenants beyond the first scan page."""
+
+    def test_discovers_tenants_across_pages_and_segments(self, orchestrator_module):
+        PipelineOrchestrator = orchestrator_module.PipelineOrchestrator
+
+        def service(tenant_id, service_name):
+            return {'tenant_id': {'S': tenant_id}, 'service': {'S': service_name}, 'enabled': {'BOOL': True}}
+
+        scan, calls = paged_scan({
+            0: [[service('t1', 'connectwise')], [service('t2', 'servicenow')]],
+            1: [[service('t1', 'salesforce')]],
+            2: [[]],
+            3: [[service('t3', 'connectwise')]]
+        })
+        orchestrator = PipelineOrchestrator.__new__(PipelineOrchestrator)
+        orchestrator.logger = Mock()
+        orchestrator.config = Mock(tenant_services_table='TenantServices-dev')
+        orchestrator.dynamodb = Mock(scan=scan)
+
+        tenants = orchestrator._discover_tenants()
+
+        assert sorted(tenant['tenant_id'] for tenant in tenants) == ['t1', 't2', 't3']
+        t1 = next(tenant for tenant in tenants if tenant['tenant_id'] == 't1')
+        assert [s['service_name'] for s in t1['services']] == ['connectwise', 'salesforce']
+        assert all('ProjectionExpression' in call for call in calls)
@@ -0,0 +1,306 @@
+"""
+Tests for pooled keep-alive HTTP sessions.
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.http_pool import HTTPSession, close_http_sessions, decode_body, get_http_session, redirect_headers
+
+
+class KeepAliveServer:
+    """Local HTTP/1.1 server that records connections and honours Accept-Encoding."""
+
+    def __init__(self, latency=0.0, drop_connections=False):
+        self.connections = set()
+        self.drop_connections = drop_connections
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latency = latency
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.connections.add(self.client_address)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.latency)
+                with server._lock:
+                    server.in_flight -= 1
+
+                if self.path.startswith('/missing'):
+                    body, status, encoding = b'{"error": "not found"}', 404, None
+                elif self.path.startswith(('/moved', '/loop', '/cached')):
+                    status = 304 if self.path.startswith('/cached') else 302
+                    body, encoding = b'', None
+                    location = '/loop' if self.path.startswith('/loop') else '/ok?from=moved'
+                    self.send_response(status)
+                    self.send_header('Location', location)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                else:
+                    records = [{'path': self.path}]
+                    if self.path.startswith('/large'):
+                        records *= 20000
+                    body, status = json.dumps(records).encode(), 200
+                    accepted = self.headers.get('Accept-Encoding', '')
+                    encoding = 'gzip' if 'gzip' in accepted else None
+                    if self.path.startswith('/deflate'):
+                        encoding = 'deflate'
+                    if encoding == 'gzip':
+                        body = gzip.compress(body)
+                    elif encoding == 'deflate':
+                        body = zlib.compress(body)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                # Close without announcing it, like a server timing out an idle connection
+                self.close_connection = server.drop_connections
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestHTTPSession:
+    """Test cases for HTTPSession."""
+
+    def teardown_method(self):
+        close_http_sessions()
+
+    def test_connections_are_reused(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            for page in range(5):
+                response = session.get(f"{server.url}/page?n={page}")
+                assert json.loads(response.body) == [{'path': f'/page?n={page}'}]
+            session.close()
+
+        stats = session.get_stats()
+        assert len(server.connections) == 1
+        assert stats['requests'] == 5
+        assert stats['connections_created'] == 1
+        assert stats['reuse_rate'] == pytest.approx(0.8)
+
+    def test_gzip_is_negotiated_and_decoded(self):
+        with KeepAliveServer() as server:
+            response = HTTPSession().get(f"{server.url}/gz")
+
+        assert response.headers.get('Content-Encoding') == 'gzip'
+        assert json.loads(response.body) == [{'path': '/gz'}]
+
+    def test_deflate_is_decoded(self):
+        assert decode_body(zlib.compress(b'abc'), 'deflate') == b'abc'
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        assert decode_body(raw.compress(b'abc') + raw.flush(), 'deflate') == b'abc'
+        with KeepAliveServer() as server:
+            assert json.loads(HTTPSession().get(f"{server.url}/deflate").body) == [{'path': '/deflate'}]
+
+    def test_http_errors_raise_urllib_http_error(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            with pytest.raises(urllib.error.HTTPError) as error:
+                session.get(f"{server.url}/missing")
+            # The connection survives an error response
+            session.get(f"{server.url}/ok")
+
+        assert error.value.code == 404
+        assert json.loads(error.value.read()) == {'error': 'not found'}
+        assert session.get_stats()['connections_created'] == 1
+
+    def test_redirects_are_followed_or_raised(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            assert json.loads(session.get(f"{server.url}/moved").body) == [{'path': '/ok?from=moved'}]
+            with session.stream('GET', f"{server.url}/moved") as response:
+                assert json.loads(response.body.read()) == [{'path': '/ok?from=moved'}]
+
+            # A redirect loop or an unfollowed 3xx is an error, never a successful empty page
+            with pytest.raises(urllib.error.HTTPError) as error:
+                session.get(f"{server.url}/loop")
+            assert error.value.code == 302
+            with pytest.raises(urllib.error.HTTPError) as error:
+                with session.stream('GET', f"{server.url}/cached"):
+                    pass
+            assert error.value.code == 304
+        assert session.get_stats()['connections_created'] == 1
+
+    def test_credentials_do_not_follow_cross_origin_redirects(self):
+        headers = {'Authorization': 'Basic abc', 'clientId': 'c'}
+
+        assert redirect_headers('https://api.example.com/a', 'https://api.example.com/b', headers) == headers
+        assert redirect_headers('https://api.example.com/a', 'https://cdn.example.com/b', headers) == {'clientId': 'c'}
+
+    def test_environment_proxy_is_used(self):
+        with KeepAliveServer() as proxy:
+            with patch.dict(os.environ, {'http_proxy': proxy.url, 'no_proxy': 'direct.invalid'}):
+                session = HTTPSession()
+                response = session.get('http://api.invalid/page?n=1')
+                with pytest.raises(urllib.error.URLError):
+                    session.get('http://direct.invalid/page')
+
+        # A plain HTTP proxy receives the absolute URL
+        assert json.loads(response.body) == [{'path': 'http://api.invalid/page?n=1'}]
+
+    def test_connection_failure_raises_url_error(self):
+        with KeepAliveServer() as server:
+            url = server.url
+        with pytest.raises(urllib.error.URLError):
+            HTTPSession(timeout=2).get(f"{url}/gone")
+
+    def test_stale_connection_is_replaced(self):
+        with KeepAliveServer(drop_connections=True) as server:
+            session = HTTPSession()
+            session.get(f"{server.url}/first")
+            time.sleep(0.05)
+            response = session.get(f"{server.url}/second")
+
+        assert json.loads(response.body) == [{'path': '/second'}]
+        assert session.get_stats()['connections_created'] == 2
+
+    def test_per_host_connection_cap(self):
+        with KeepAliveServer(latency=0.05) as server:
+            session = HTTPSession(max_connections_per_host=2)
+            threads = [threading.Thread(target=session.get, args=(f"{server.url}/p{i}",)) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert server.max_in_flight <= 2
+        assert session.get_stats()['connections_created'] <= 2
+
+    def test_streamed_body_is_decoded_and_connection_reused(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            for path in ('/gz', '/deflate', '/gz2'):
+                with session.stream('GET', f"{server.url}{path}") as response:
+                    assert json.loads(response.body.read()) == [{'path': path}]
+            with pytest.raises(urllib.error.HTTPError) as error:
+                with session.stream('GET', f"{server.url}/missing"):
+                    pass
+
+        assert error.value.code == 404
+        assert session.get_stats()['connections_created'] == 1
+
+    def test_partially_read_stream_closes_connection(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            with session.stream('GET', f"{server.url}/large", headers={'Accept-Encoding': 'identity'}) as response:
+                response.body.read(10)
+            session.get(f"{server.url}/next")
+
+        assert session.get_stats()['connections_created'] == 2
+
+    def test_stats_since_baseline(self):
+        with KeepAliveServer() as server:
+            session = HTTPSession()
+            session.get(f"{server.url}/a")
+            baseline = session.get_stats()
+            session.get(f"{server.url}/b")
+            session.get(f"{server.url}/c")
+
+        delta = session.get_stats(since=baseline)
+        assert delta['requests'] == 2
+        assert delta['connections_created'] == 0
+        assert delta['reuse_rate'] == 1.0
+
+
+class TestSessionRegistry:
+    """Test cases for the shared session registry."""
+
+    def teardown_method(self):
+        close_http_sessions()
+
+    def test_sessions_are_shared_per_tenant_and_base_url(self):
+        session = get_http_session('https://api.example.com/v4_6_release/apis/3.0', tenant_id='t1')
+
+        assert get_http_session('https://api.example.com/other', tenant_id='t1') is session
+        assert get_http_session('https://api.example.com/v4_6_release/apis/3.0', tenant_id='t2') is not session
+        assert get_http_session('https://eu.example.com', tenant_id='t1') is not session
+
+    def test_chunk_processor_keys_on_the_invocation_tenant(self, chunk_harness):
+        from optimized.processors.chunk_processor import ServiceCredentials
+
+        processor = chunk_harness.processor(concurrency=4)
+        credentials = ServiceCredentials(api_base_url='https://api.example.com')
+        # Table configs built by the orchestrator carry no tenant_id
+        table_config = {'service_name': 'connectwise', 'table_name': 'tickets'}
+
+        processor.tenant_id = 't1'
+        session = processor._get_http_session(table_config, credentials)
+        processor.tenant_id = 't2'
+
+        assert processor._get_http_session(table_config, credentials) is not session
+        assert get_http_session('https://api.example.com', tenant_id='t1') is session
+
+
+class TestEndpointConfigurationCache:
+    """Test that per-request lookups do not re-read the endpoint mapping."""
+
+    def test_configuration_is_read_once_per_service(self, chunk_harness, real_shared_utils):
+        from optimized.processors.chunk_processor import ServiceCredentials
+
+        processor = chunk_harness.processor(concurrency=None, tenant_id='t1')
+        credentials = ServiceCredentials(api_base_url='https://api.example.com')
+        table_config = {'service_name': 'connectwise', 'table_name': 'tickets', 'endpoint': 'service/tickets'}
+
+        real_shared_utils.clear_endpoint_configuration_cache()
+        with patch.object(real_shared_utils, '_read_endpoint_configuration',
+                          wraps=real_shared_utils._read_endpoint_configuration) as read:
+            for _ in range(3):
+                processor._get_http_session(table_config, credentials)
+                processor._get_request_scheduler(table_config)
+                processor._get_endpoint_settings(table_config)
+
+        read.assert_called_once_with('connectwise')
+        real_shared_utils.clear_endpoint_configuration_cache()
+
+
+class TestServiceCredentialsHeaders:
+    """Test cases for cached request headers on ServiceCredentials."""
+
+    def test_auth_header_is_built_once(self):
+        from optimized.processors.chunk_processor import ServiceCredentials
+
+        credentials = ServiceCredentials(company_id='c', public_key='p', private_key='k', client_id='id')
+        headers = credentials.get_request_headers()
+
+        credentials.private_key = 'changed'
+        assert credentials.get_request_headers() is headers
+        assert headers['Authorization'] == credentials.get_auth_header()
+        assert headers['Authorization'].startswith('Basic ')
+        assert headers['ClientId'] == 'id'
@@ -0,0 +1,247 @@
+"""
+Tests for id-range sharding of large table extractions.
+"""
+
+import io
+import json
+import os
+import re
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.id_sharding import (
+    IdRange,
+    id_range_filter,
+    id_range_from_dict,
+    id_range_to_dict,
+    merge_filters,
+    plan_id_shards,
+    probe_id_bounds,
+    split_id_range
+)
+
+_CONDITION = re.compile(r'^id (>=|<|>) (\d+)$')
+
+
+class TestIdRanges:
+    """Test range splitting, planning and filters."""
+
+    def test_numeric_ranges_cover_every_id_once(self):
+        ranges = split_id_range('1', '1000', 4)
+
+        assert ranges == [IdRange(None, '251'), IdRange('251', '501'), IdRange('501', '751'), IdRange('751', None)]
+        owners = [sum(1 for r in ranges if (r.start is None or i >= int(r.start)) and (r.end is None or i < int(r.end)))
+                  for i in range(-5, 1100)]
+        assert set(owners) == {1}
+
+    def test_hex_ranges_keep_id_width(self):
+        ranges = split_id_range('0' * 32, 'f' * 32, 2)
+
+        assert ranges == [IdRange(None, '8' + '0' * 31), IdRange('8' + '0' * 31, None)]
+
+    def test_small_id_space_gives_fewer_ranges(self):
+        assert split_id_range('5', '6', 8) == [IdRange(None, '6'), IdRange('6', None)]
+        assert split_id_range('7', '7', 8) == [IdRange()]
+
+    def test_unsplittable_ids_give_one_range(self):
+        assert split_id_range('INC001', 'INC999', 4) == [IdRange()]
+
+    def test_plan_sizes_shards_by_record_count(self):
+        assert len(plan_id_shards(('1', '1000000'), records_per_shard=100000, max_shards=8)) == 8
+        assert len(plan_id_shards(('1', '1000000'), estimated_records=250000, records_per_shard=100000, max_shards=8)) == 3
+        assert plan_id_shards(('1', '50000'), records_per_shard=100000) == [IdRange()]
+        assert plan_id_shards(None) == [IdRange()]
+
+    def test_plan_without_estimate_does_not_split_hex_ids(self):
+        assert plan_id_shards(('0' * 32, 'f' * 32), records_per_shard=10) == [IdRange()]
+        assert len(plan_id_shards(('0' * 32, 'f' * 32), estimated_records=40, records_per_shard=10)) == 4
+
+    def test_plan_limits_from_environment(self):
+        with patch.dict(os.environ, {'ID_SHARD_RECORDS': '10', 'MAX_ID_SHARDS': '3'}):
+            assert len(plan_id_shards(('1', '100'))) == 3
+
+    def test_range_filters(self):
+        assert id_range_filter('connectwise', 'id', IdRange('100', '200')) == {'conditions': 'id >= 100 and id < 200'}
+        assert id_range_filter('servicenow', 'sys_id', IdRange(None, '8f')) == {'sysparm_query': 'sys_id<8f'}
+        assert id_range_filter('connectwise', 'id', None) == {}
+        assert id_range_filter('connectwise', 'id', IdRange()) == {}
+        with pytest.raises(ValueError):
+            id_range_filter('salesforce', 'Id', IdRange('a', 'b'))
+
+    def test_range_dict_round_trip(self):
+        assert id_range_from_dict(id_range_to_dict(IdRange('1', None))) == IdRange('1', None)
+        assert id_range_from_dict({'start': 5, 'end': 9}) == IdRange('5', '9')
+        assert id_range_from_dict(None) is None
+
+    def test_merge_filters_joins_conditions(self):
+        merged = merge_filters({'conditions': 'lastUpdated > [x]'}, {'conditions': 'id >= 1'}, {'pageSize': 10})
+        assert merged == {'conditions': 'lastUpdated > [x] and id >= 1', 'pageSize': 10}
+        assert merge_filters({}, {'sysparm_query': 'sys_id<8f'}) == {'sysparm_query': 'sys_id<8f'}
+
+    def test_probe_reads_lowest_and_highest_id(self):
+        fetch = Mock(side_effect=[[{'id': 3}], [{'id': 90}]])
+
+        assert probe_id_bounds('connectwise', 'id', fetch) == ('3', '90')
+        assert [call.args[0]['orderBy'] for call in fetch.call_args_list] == ['id asc', 'id desc']
+        assert probe_id_bounds('connectwise', 'id', Mock(return_value=[])) is None
+
+
+class ConditionsAPI:
+    """Local ConnectWise-style API supporting orderBy, page/pageSize and id conditions."""
+
+    def __init__(self, harness, ids):
+        self.ids = ids
+        self.requests = []
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        self.requests.append(dict(query, path=path))
+        ids = sorted(self.ids, reverse=query.get('orderBy') == 'id desc')
+        for clause in filter(None, query.get('conditions', '').split(' and ')):
+            operator, value = _CONDITION.match(clause).groups()
+            value = int(value)
+            ids = [i for i in ids if {'>=': i >= value, '<': i < value, '>': i > value}[operator]]
+        if path.endswith('/count'):
+            return 200, {'count': len(ids)}, {}
+        page, page_size = int(query.get('page', 1)), int(query['pageSize'])
+        return 200, [{'id': i} for i in ids[(page - 1) * page_size:page * page_size]], {}
+
+
+class TestShardedChunks:
+    """Test planning and extracting id-range chunks in the chunk processor."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def api(self, ids):
+        return ConditionsAPI(self.harness, ids)
+
+    def make_processor(self):
+        return self.harness.processor(concurrency=4)
+
+    def table_config(self, api, pagination):
+        return {
+            'service_name': 'connectwise',
+            'endpoint': 'service/tickets',
+            'table_name': 'tickets',
+            'page_size': 10,
+            'pagination': pagination,
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+
+    def run_chunk(self, table_config, chunk_config):
+        processor = self.make_processor()
+        batches = self.harness.capture_writes(processor)
+        result = self.harness.run(processor, chunk_config, table_config)
+        return [record for batch in batches for record in batch], result
+
+    def test_plan_action_probes_id_bounds(self):
+        # Every other id exists, so the count (not the id span) sizes the shards
+        api = self.api(list(range(101, 351, 2)))
+        with patch.dict(os.environ, {'ID_SHARD_RECORDS': '100', 'MAX_ID_SHARDS': '8'}):
+            plan = self.make_processor().lambda_handler(
+                {'action': 'plan_id_shards', 'table_config': self.table_config(api, 'offset'), 'tenant_id': 't1'}, Mock())
+            requests = list(api.requests)
+
+        assert plan['status'] == 'planned'
+        assert plan['id_field'] == 'id'
+        assert plan['bounds'] == ['101', '349']
+        assert plan['estimated_records'] == 125
+        assert plan['id_ranges'] == [{'start': None, 'end': '225'}, {'start': '225', 'end': None}]
+        assert requests[0]['path'] == '/service/tickets/count'
+        assert [(r['orderBy'], r['pageSize']) for r in requests[1:]] == [('id asc', '1'), ('id desc', '1')]
+
+    def test_failed_probe_plans_one_range(self):
+        table_config = {'service_name': 'connectwise', 'endpoint': 'service/tickets', 'credentials': {}}
+
+        plan = self.make_processor()._plan_id_shards(table_config)
+
+        assert plan['id_ranges'] == [{'start': None, 'end': None}]
+
+    @pytest.mark.parametrize('pagination', ['offset', 'keyset'])
+    def test_shards_extract_every_record_once(self, pagination):
+        ids = list(range(1, 38)) + list(range(500, 537))
+        id_ranges = [IdRange(None, '30'), IdRange('30', '510'), IdRange('510', None)]
+
+        api = self.api(ids)
+        written = []
+        for index, id_range in enumerate(id_ranges):
+            chunk_config = {'chunk_id': f'chunk-1-shard{index}', 'estimated_records': 40,
+                            'id_field': 'id', 'id_range': id_range_to_dict(id_range)}
+            records, result = self.run_chunk(self.table_config(api, pagination), chunk_config)
+            assert result['completed'] is True
+            written.extend(r['id'] for r in records)
+        conditions = [r.get('conditions') for r in api.requests]
+
+        assert sorted(written) == ids
+        assert len(written) == len(set(written))
+        assert all(c and ('id >= 30' in c or 'id < 30' in c or 'id >= 510' in c) for c in conditions)
+
+
+class TestOrchestratorSharding:
+    """Test that the orchestrator fans a planned table out into id-range chunks."""
+
+    @pytest.fixture(autouse=True)
+    def make_orchestrator(self, orchestrator_module):
+        PipelineOrchestrator = orchestrator_module.PipelineOrchestrator
+        self.orchestrator = PipelineOrchestrator.__new__(PipelineOrchestrator)
+        self.orchestrator.logger = Mock()
+
+    def chunk_payload(self, service_name='connectwise', **chunk_config):
+        return {
+            'chunk_config': dict({'chunk_id': 'job-t1-tickets-0'}, **chunk_config),
+            'table_config': {'service_name': service_name, 'table_name': 'tickets'},
+            'tenant_config': {'tenant_id': 't1'}
+        }
+
+    def lambda_client(self, plan, function_error=None):
+        client = Mock()
+        response = {'Payload': io.BytesIO(json.dumps(plan).encode())}
+        if function_error:
+            response['FunctionError'] = function_error
+        client.invoke.return_value = response
+        return client
+
+    def test_payload_is_split_per_planned_range(self):
+        plan = {'status': 'planned', 'id_field': 'id', 'bounds': ['1', '200'],
+                'id_ranges': [{'start': None, 'end': '100'}, {'start': '100', 'end': None}]}
+        client = self.lambda_client(plan)
+
+        payloads = self.orchestrator._shard_chunk_payload(client, 'chunk-fn', self.chunk_payload())
+
+        assert [p['chunk_config']['chunk_id'] for p in payloads] == ['job-t1-tickets-0-shard0', 'job-t1-tickets-0-shard1']
+        assert [p['chunk_config']['id_range'] for p in payloads] == plan['id_ranges']
+        assert all(p['chunk_config']['shard_count'] == 2 and p['chunk_config']['id_field'] == 'id' for p in payloads)
+        assert all(p['chunk_config']['shard_group'] == 'job-t1-tickets-0' for p in payloads)
+        assert all(p['tenant_config'] == {'tenant_id': 't1'} for p in payloads)
+        request = client.invoke.call_args.kwargs
+        assert request['InvocationType'] == 'RequestResponse'
+        assert json.loads(request['Payload'])['action'] == 'plan_id_shards'
+
+    def test_single_range_keeps_the_chunk(self):
+        plan = {'status': 'planned', 'id_field': 'id', 'bounds': None, 'id_ranges': [{'start': None, 'end': None}]}
+        payload = self.chunk_payload()
+
+        assert self.orchestrator._shard_chunk_payload(self.lambda_client(plan), 'chunk-fn', payload) == [payload]
+
+    def test_failed_plan_keeps_the_chunk(self):
+        payload = self.chunk_payload()
+        client = self.lambda_client({'errorMessage': 'boom'}, function_error='Unhandled')
+
+        assert self.orchestrator._shard_chunk_payload(client, 'chunk-fn', payload) == [payload]
+
+    def test_unshardable_chunks_are_not_planned(self):
+        client = Mock()
+
+        for payload in (self.chunk_payload(record_limit=100), self.chunk_payload('salesforce'),
+                        self.chunk_payload(incremental_since='2025-03-01T12:00:00Z')):
+            assert self.orchestrator._shard_chunk_payload(client, 'chunk-fn', payload) == [payload]
+        with patch.dict(os.environ, {'MAX_ID_SHARDS': '1'}):
+            payload = self.chunk_payload()
+            assert self.orchestrator._shard_chunk_payload(client, 'chunk-fn', payload) == [payload]
+        client.invoke.assert_not_called()
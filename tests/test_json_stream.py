@@ -0,0 +1,121 @@
+"""
+Tests for streaming JSON response parsing.
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import zlib
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.http_pool import DecodingReader
+from shared.json_stream import (
+    PARSE_MODE_BUFFERED,
+    PARSE_MODE_STREAMING,
+    get_response_parsing_mode,
+    iter_json_records
+)
+
+
+RECORDS = [
+    {'id': 1, 'summary': 'Printer échoué 🖨', 'amount': 12.5, 'tags': ['a', 'b']},
+    {'id': 2, 'summary': 'Escaped "quote" and \\\\ slash, ] bracket', 'nested': {'x': [1, {'y': None}]}},
+    {'id': 1234567890, 'summary': '', 'flag': True, 'score': -1.5e-3},
+]
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def parse(payload, read_size=7, **kwargs):
+    return list(iter_json_records(io.BytesIO(payload), read_size=read_size, **kwargs))
+
+
+class TestIterJsonRecords:
+    """Test cases for iter_json_records."""
+
+    @pytest.mark.parametrize('read_size', [1, 2, 3, 7, 64, 65536])
+    def test_top_level_array_matches_json_loads(self, read_size):
+        payload = json.dumps(RECORDS, ensure_ascii=False).encode('utf-8')
+        assert parse(payload, read_size=read_size) == json.loads(payload)
+
+    def test_wrapped_records(self):
+        payload = json.dumps({'meta': {'page': 1}, 'data': RECORDS, 'next': None}).encode()
+        assert parse(payload) == RECORDS
+
+    def test_object_without_record_key_yields_nothing(self):
+        assert parse(b'{"error": "nope", "items": [1, 2]}') == []
+        assert parse(b'{"items": [1, 2]}', record_keys=('items',)) == [1, 2]
+
+    def test_empty_inputs(self):
+        assert parse(b'') == []
+        assert parse(b'  [ ]  ') == []
+        assert parse(b'{}') == []
+        assert parse(b'{"data": []}') == []
+
+    def test_numbers_split_across_reads(self):
+        assert parse(b'[1234567, 89, 1e10, true, null]', read_size=2) == [1234567, 89, 1e10, True, None]
+
+    def test_whitespace_and_newlines(self):
+        payload = b'\n[\n  {"id": 1} ,\n\t{"id": 2}\r\n]\n'
+        assert parse(payload, read_size=3) == [{'id': 1}, {'id': 2}]
+
+    @pytest.mark.parametrize('payload', [b'[{"id": 1}, {"id": ', b'[{"id": 1} {"id": 2}]', b'{"data" [1]}'])
+    def test_invalid_json_raises(self, payload):
+        with pytest.raises(json.JSONDecodeError):
+            parse(payload)
+
+    def test_records_are_yielded_before_the_stream_ends(self):
+        class TruncatedStream(io.RawIOBase):
+            def __init__(self):
+                self.data = io.BytesIO(b'[{"id": 1}, {"id": 2}, {"id": ')
+
+            def readable(self):
+                return True
+
+            def readinto(self, buffer):
+                chunk = self.data.read(len(buffer))
+                if not chunk:
+                    raise ConnectionResetError('connection lost')
+                buffer[:len(chunk)] = chunk
+                return len(chunk)
+
+        iterator = iter_json_records(TruncatedStream(), read_size=4)
+        assert next(iterator) == {'id': 1}
+        assert next(iterator) == {'id': 2}
+        with pytest.raises(ConnectionResetError):
+            next(iterator)
+
+
+class TestDecodingReader:
+    """Test cases for incremental gzip/deflate decoding."""
+
+    @pytest.mark.parametrize('encoding,compress', [
+        ('gzip', gzip.compress),
+        ('deflate', zlib.compress),
+        ('deflate', raw_deflate),
+        (None, lambda data: data),
+    ])
+    def test_streamed_decoding_matches_json_loads(self, encoding, compress):
+        payload = json.dumps({'data': [{'id': i, 'text': 'x' * 50} for i in range(2000)]}).encode()
+        raw = compress(payload)
+        reader = DecodingReader(io.BytesIO(raw), encoding)
+
+        assert list(iter_json_records(reader)) == json.loads(payload)['data']
+        assert reader.bytes_read == len(raw)
+
+
+class TestParsingMode:
+    """Test cases for get_response_parsing_mode."""
+
+    def test_modes(self):
+        assert get_response_parsing_mode({}) == PARSE_MODE_STREAMING
+        assert get_response_parsing_mode({'response_parsing': 'Buffered'}) == PARSE_MODE_BUFFERED
+        assert get_response_parsing_mode({'response_parsing': 'bogus'}) == PARSE_MODE_STREAMING
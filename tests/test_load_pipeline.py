@@ -0,0 +1,193 @@
+"""
+Tests for pipelined multi-file loading into ClickHouse.
+"""
+
+import io
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.load_pipeline import InsertCoalescer, LoadedFile, PrefetchingFileReader
+
+
+class TestPrefetchingFileReader:
+    """Test cases for PrefetchingFileReader."""
+
+    def test_yields_files_in_order(self):
+        reader = PrefetchingFileReader(lambda key: LoadedFile(key, key.upper(), 1, 10), max_in_flight=3)
+
+        loaded = list(reader.iter_files(['a', 'b', 'c', 'd', 'e']))
+
+        assert [item.key for item in loaded] == ['a', 'b', 'c', 'd', 'e']
+        assert [item.payload for item in loaded] == ['A', 'B', 'C', 'D', 'E']
+
+    def test_reads_ahead_while_consumer_works(self):
+        release = threading.Event()
+
+        def read(key):
+            if key != 'a':
+                release.wait(5)
+            return LoadedFile(key, None, 1, 1)
+
+        reader = PrefetchingFileReader(read, max_in_flight=3)
+        files = reader.iter_files(['a', 'b', 'c', 'd', 'e'])
+
+        assert next(files).key == 'a'
+        # While 'a' is being consumed the next three reads are already in flight
+        assert [key for key, _ in reader._pending] == ['b', 'c', 'd']
+        release.set()
+        assert [item.key for item in files] == ['b', 'c', 'd', 'e']
+        assert reader._executor is None
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+
+        def read(key):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            threading.Event().wait(0.01)
+            with lock:
+                running['now'] -= 1
+            return LoadedFile(key, None, 1, 1)
+
+        reader = PrefetchingFileReader(read, max_in_flight=2)
+        assert len(list(reader.iter_files([str(i) for i in range(10)]))) == 10
+        assert running['max'] <= 2
+
+    def test_memory_budget_applies_back_pressure(self):
+        held = {'bytes': 0}
+        reader = PrefetchingFileReader(Mock(), max_in_flight=4, memory_budget_bytes=150,
+                                       held_bytes=lambda: held['bytes'])
+        finished = Future()
+        finished.set_result(LoadedFile('a', None, 1, 100))
+        reader._pending.append(('a', finished))
+
+        assert reader._has_room() is True
+        # The file being consumed and data held by the consumer count against the budget
+        assert reader._has_room(consuming_bytes=60) is False
+        held['bytes'] = 60
+        assert reader._has_room() is False
+
+    def test_one_read_is_always_allowed(self):
+        reader = PrefetchingFileReader(Mock(), max_in_flight=4, memory_budget_bytes=1, held_bytes=lambda: 1000)
+
+        assert reader._has_room(consuming_bytes=1000) is True
+
+    def test_read_errors_are_returned_not_raised(self):
+        def read(key):
+            if key == 'bad':
+                raise IOError('NoSuchKey')
+            return LoadedFile(key, key, 1, 1)
+
+        loaded = list(PrefetchingFileReader(read, max_in_flight=2).iter_files(['good', 'bad', 'also_good']))
+
+        assert [item.error is None for item in loaded] == [True, False, True]
+        assert isinstance(loaded[1].error, IOError)
+
+
+class TestInsertCoalescer:
+    """Test cases for InsertCoalescer."""
+
+    def test_small_files_are_coalesced_to_target_rows(self):
+        coalescer = InsertCoalescer(target_rows=10, target_bytes=10 ** 9)
+
+        ready = []
+        for i in range(7):
+            ready.extend(coalescer.add('columnar', LoadedFile(str(i), None, 4, 1)))
+
+        assert [batch.keys for batch in ready] == [['0', '1', '2'], ['3', '4', '5']]
+        assert ready[0].rows == 12
+        assert coalescer.pending_bytes == 1
+        assert coalescer.flush().keys == ['6']
+        assert coalescer.flush() is None
+
+    def test_target_bytes_releases_batch(self):
+        coalescer = InsertCoalescer(target_rows=10 ** 9, target_bytes=100)
+
+        assert coalescer.add('columnar', LoadedFile('a', None, 1, 60)) == []
+        ready = coalescer.add('columnar', LoadedFile('b', None, 1, 60))
+
+        assert [batch.keys for batch in ready] == [['a', 'b']]
+        assert coalescer.pending_bytes == 0
+
+    def test_kind_change_releases_batch(self):
+        coalescer = InsertCoalescer(target_rows=100, target_bytes=10 ** 9)
+
+        coalescer.add('columnar', LoadedFile('a.parquet', None, 1, 1))
+        ready = coalescer.add('rows', LoadedFile('b.json', None, 1, 1))
+
+        assert [(batch.kind, batch.keys) for batch in ready] == [('columnar', ['a.parquet'])]
+        assert coalescer.flush().kind == 'rows'
+
+
+def parquet_bytes(ids):
+    pd = pytest.importorskip('pandas')
+    buffer = io.BytesIO()
+    pd.DataFrame({'id': ids, 'company_name': [f'Company {i}' for i in ids]}).to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+class TestPipelinedDataLoader:
+    """Test that the data loader coalesces canonical files into few inserts."""
+
+    SCHEMA = {'id': 'String', 'tenant_id': 'String', 'company_name': 'Nullable(String)'}
+
+    @pytest.fixture(autouse=True)
+    def use_data_loader(self, data_loader):
+        self.loader = data_loader
+
+    def run_handler(self, files, env, clickhouse_client=None):
+        pytest.importorskip('pyarrow')
+        loader = self.loader
+        s3_client = Mock()
+        s3_client.get_object.side_effect = lambda Bucket, Key: {'Body': io.BytesIO(files[Key])}
+        clickhouse_client = clickhouse_client or Mock()
+        event = {'tenant_id': 't1', 'processing_mode': 'multi_file_1to1', 'canonical_files': list(files)}
+
+        with patch.object(loader.boto3, 'client', return_value=s3_client), \
+                patch.object(loader, 'get_clickhouse_client', return_value=clickhouse_client), \
+                patch.object(loader, 'table_exists', return_value=True), \
+                patch.object(loader, 'get_table_schema', return_value=dict(self.SCHEMA)), \
+                patch.dict(os.environ, dict({'TARGET_TABLE': 'companies', 'CLICKHOUSE_DEDUP_STRATEGY': 'deferred'},
+                                            **env)):
+            response = loader.lambda_handler(event, None)
+        return response, clickhouse_client
+
+    def test_small_files_share_inserts(self):
+        files = {f't1/canonical/companies/batch{i:03d}.parquet': parquet_bytes([str(i * 2), str(i * 2 + 1)])
+                 for i in range(6)}
+
+        response, client = self.run_handler(files, {'CLICKHOUSE_INSERT_TARGET_ROWS': '4'})
+
+        assert response['statusCode'] == 200
+        assert '"records_processed": 12' in response['body']
+        assert '"files_processed": 6' in response['body']
+        assert client.insert_arrow.call_count == 3
+        inserted_ids = [row_id for call in client.insert_arrow.call_args_list
+                        for row_id in call[0][1].column('id').to_pylist()]
+        assert inserted_ids == [str(i) for i in range(12)]
+
+    def test_failed_batch_falls_back_to_single_file_inserts(self):
+        files = {f't1/canonical/companies/batch{i:03d}.parquet': parquet_bytes([str(i)]) for i in range(3)}
+        files['t1/canonical/companies/missing.parquet'] = b'not parquet'
+
+        inserted_rows = []
+
+        def insert_arrow(table_name, table):
+            inserted_rows.append(table.num_rows)
+            if table.num_rows > 1:
+                raise RuntimeError('Too many parts')
+
+        response, _ = self.run_handler(files, {'CLICKHOUSE_INSERT_TARGET_ROWS': '100'},
+                                       Mock(insert_arrow=Mock(side_effect=insert_arrow)))
+
+        assert '"files_processed": 3' in response['body']
+        assert inserted_rows == [3, 1, 1, 1]
@@ -0,0 +1,224 @@
+"""
+Tests for deferred, partition-scoped ClickHouse deduplication.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.merge_scheduler import (
+    DEDUP_STRATEGY_DEFERRED,
+    DEDUP_STRATEGY_IMMEDIATE,
+    MergeScheduler,
+    create_final_view,
+    ensure_final_views,
+    find_partitions_to_merge,
+    get_dedup_strategy
+)
+
+
+class FakeClickHouse:
+    """Client double serving system.parts and system.merges from dictionaries."""
+
+    def __init__(self, parts=None, running_merges=None, failing_partitions=(), tables=()):
+        self.parts = parts or {}
+        self.tables = set(tables)
+        self.running_merges = running_merges or {}
+        self.failing_partitions = set(failing_partitions)
+        self.commands = []
+        self.queries = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((sql, parameters))
+        if 'system.tables' in sql:
+            return Mock(result_rows=[(name,) for name in parameters['tables'] if name in self.tables])
+        table = parameters['table']
+        if 'system.merges' in sql:
+            return Mock(result_rows=[(self.running_merges.get(table, 0),)])
+        rows = [
+            (partition_id, parts, rows, '2025-03-01 12:00:00')
+            for partition_id, (parts, rows) in self.parts.get(table, {}).items()
+            if parts >= parameters['min_parts']
+        ]
+        rows.sort(key=lambda row: -row[1])
+        return Mock(result_rows=rows)
+
+    def command(self, sql):
+        if any(f"'{partition_id}'" in sql for partition_id in self.failing_partitions):
+            raise RuntimeError('merge failed')
+        self.commands.append(sql)
+
+
+class TestDedupStrategy:
+    """Test cases for dedup strategy selection."""
+
+    def test_defaults_to_deferred(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_dedup_strategy() == DEDUP_STRATEGY_DEFERRED
+
+    def test_environment_and_explicit_values(self):
+        with patch.dict(os.environ, {'CLICKHOUSE_DEDUP_STRATEGY': 'Immediate'}):
+            assert get_dedup_strategy() == DEDUP_STRATEGY_IMMEDIATE
+        assert get_dedup_strategy('read_time') == DEDUP_STRATEGY_DEFERRED
+        assert get_dedup_strategy('bogus') == DEDUP_STRATEGY_DEFERRED
+
+    def test_final_view(self):
+        client = FakeClickHouse()
+
+        assert create_final_view(client, 'companies') == 'companies_final'
+        assert client.commands == ['CREATE VIEW IF NOT EXISTS companies_final AS SELECT * FROM companies FINAL']
+        with pytest.raises(ValueError):
+            create_final_view(client, 'companies; DROP TABLE x')
+
+    def test_views_are_created_for_existing_tables_only(self):
+        client = FakeClickHouse(tables=['companies', 'tickets'])
+
+        views = ensure_final_views(client, ['companies', 'contacts', 'tickets'])
+
+        assert views == ['companies_final', 'tickets_final']
+        assert client.commands == [
+            'CREATE VIEW IF NOT EXISTS companies_final AS SELECT * FROM companies FINAL',
+            'CREATE VIEW IF NOT EXISTS tickets_final AS SELECT * FROM tickets FINAL'
+        ]
+        assert client.queries[0][1] == {'tables': ['companies', 'contacts', 'tickets']}
+
+
+class TestMergeScheduler:
+    """Test cases for MergeScheduler."""
+
+    def test_only_partitions_with_new_parts_are_merged(self):
+        client = FakeClickHouse(parts={'tickets': {'202503': (4, 100), '202502': (1, 900), 'all': (2, 50)}})
+
+        summary = MergeScheduler(client).run(['tickets'])
+
+        assert client.commands == [
+            "OPTIMIZE TABLE tickets PARTITION ID '202503' FINAL",
+            "OPTIMIZE TABLE tickets PARTITION ID 'all' FINAL"
+        ]
+        assert summary['tables']['tickets']['optimized'] == ['202503', 'all']
+        assert summary['partitions_optimized'] == 2
+        assert summary['rows_merged'] == 150
+
+    def test_partition_budget_leaves_the_rest_pending(self):
+        client = FakeClickHouse(parts={
+            'companies': {'a': (5, 1), 'b': (3, 1)},
+            'tickets': {'c': (2, 1)}
+        })
+
+        summary = MergeScheduler(client, max_partitions_per_run=2).run(['companies', 'tickets'])
+
+        assert len(client.commands) == 2
+        assert summary['partitions_optimized'] == 2
+        assert summary['partitions_pending'] == 1
+        assert summary['tables']['tickets']['pending'] == 1
+
+    def test_time_budget_stops_new_merges(self):
+        client = FakeClickHouse(parts={'tickets': {'a': (3, 1), 'b': (2, 1)}})
+        now = [0.0]
+
+        def clock():
+            now[0] += 40
+            return now[0]
+
+        summary = MergeScheduler(client, max_seconds_per_run=100, clock=clock).run(['tickets'])
+
+        assert summary['partitions_optimized'] == 1
+        assert summary['partitions_pending'] == 1
+
+    def test_busy_tables_are_skipped_and_failures_reported(self):
+        client = FakeClickHouse(
+            parts={'companies': {'a': (3, 1)}, 'tickets': {'x': (2, 1), 'y': (2, 1)}},
+            running_merges={'companies': 2},
+            failing_partitions=['x']
+        )
+
+        summary = MergeScheduler(client, max_running_merges=2).run(['companies', 'tickets'])
+
+        assert summary['tables']['companies']['skipped'] == 'merges_in_progress'
+        assert summary['tables']['companies']['pending'] == 1
+        assert summary['tables']['tickets']['failed'] == ['x']
+        assert summary['tables']['tickets']['optimized'] == ['y']
+        assert summary['partitions_failed'] == 1
+
+    def test_partition_query_is_parameterized(self):
+        client = FakeClickHouse(parts={'tickets': {'a': (2, 7)}})
+
+        partitions = find_partitions_to_merge(client, 'tickets')
+
+        sql, parameters = client.queries[0]
+        assert '{table:String}' in sql
+        assert parameters == {'table': 'tickets', 'min_parts': 2}
+        assert partitions == [{'partition_id': 'a', 'parts': 2, 'rows': 7, 'last_modified': '2025-03-01 12:00:00'}]
+
+
+class TestDataLoaderDedup:
+    """Test that the data loader no longer optimizes whole tables by default."""
+
+    @pytest.fixture(autouse=True)
+    def use_data_loader(self, data_loader):
+        self.loader = data_loader
+
+    def load(self, strategy):
+        loader = self.loader
+        client = Mock(database='default')
+        with patch.object(loader, 'table_exists', return_value=True), \
+                patch.object(loader, 'get_table_columns', return_value={'id', 'tenant_id'}), \
+                patch.object(loader, 'get_table_schema', return_value={'id': 'String', 'tenant_id': 'String'}), \
+                patch.dict(os.environ, {'CLICKHOUSE_DEDUP_STRATEGY': strategy}):
+            inserted = loader.load_data_to_clickhouse(client, 'companies', [{'id': '1'}], 't1')
+        return inserted, client
+
+    def test_deferred_strategy_skips_optimize(self):
+        inserted, client = self.load('deferred')
+
+        assert inserted == 1
+        client.insert.assert_called_once()
+        client.command.assert_called_once_with(
+            'CREATE VIEW IF NOT EXISTS companies_final AS SELECT * FROM companies FINAL')
+        client.query.assert_not_called()
+
+    def test_immediate_strategy_optimizes_table(self):
+        _, client = self.load('immediate')
+
+        assert client.command.call_args_list[-1].args == ('OPTIMIZE TABLE companies FINAL',)
+
+    def test_existing_tables_get_their_view_once_per_container(self):
+        _, first = self.load('deferred')
+        _, second = self.load('deferred')
+
+        first.command.assert_called_once()
+        second.command.assert_not_called()
+
+
+def load_merge_scheduler_lambda():
+    path = os.path.join(os.path.dirname(__file__), '..', 'src', 'clickhouse', 'merge_scheduler', 'lambda_function.py')
+    spec = importlib.util.spec_from_file_location('clickhouse_merge_scheduler', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMergeSchedulerLambda:
+    """Test the scheduled merge Lambda."""
+
+    def test_run_creates_views_and_emits_emf_metrics(self, capsys):
+        module = load_merge_scheduler_lambda()
+        client = FakeClickHouse(parts={'tickets': {'a': (2, 5)}}, tables=['tickets'])
+
+        with patch.object(module.ClickHouseClient, 'from_environment', return_value=Mock(client=client)), \
+                patch.dict(os.environ, {'METRICS_BACKEND': 'emf'}):
+            response = module.lambda_handler({'tables': ['tickets']}, None)
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['final_views'] == ['tickets_final']
+        assert client.commands[0] == 'CREATE VIEW IF NOT EXISTS tickets_final AS SELECT * FROM tickets FINAL'
+        documents = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+        tickets = next(document for document in documents if document.get('TableName') == 'tickets')
+        assert tickets['PartitionsOptimized'] == 1
+        assert tickets['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'AVESA/DataPipeline'
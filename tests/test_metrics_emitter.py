@@ -0,0 +1,151 @@
+"""
+Tests for the EMF and PutMetricData metrics emitters.
+"""
+
+import io
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.metrics_emitter import (
+    CloudWatchMetricsEmitter,
+    EMFMetricsEmitter,
+    create_metrics_emitter,
+    publish_metrics
+)
+
+
+def metric(name, value, unit='Count', **dimensions):
+    return {'MetricName': name, 'Value': value, 'Unit': unit,
+            'Dimensions': [{'Name': key, 'Value': item} for key, item in dimensions.items()]}
+
+
+def emitted_documents(emitter):
+    emitter.stream = io.StringIO()
+    emitter.flush()
+    return [json.loads(line) for line in emitter.stream.getvalue().splitlines()]
+
+
+class TestEMFMetricsEmitter:
+    """Test cases for EMFMetricsEmitter."""
+
+    def test_job_id_becomes_a_property(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        emitter.put_metric_data([metric('ChunkProcessed', 1, JobId='job-1', TenantId='t1', TableName='tickets')])
+
+        [document] = emitted_documents(emitter)
+
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        assert directive['Namespace'] == 'AVESA/DataPipeline'
+        assert directive['Dimensions'] == [['TenantId', 'TableName']]
+        assert directive['Metrics'] == [{'Name': 'ChunkProcessed', 'Unit': 'Count'}]
+        assert document['JobId'] == 'job-1'
+        assert document['TenantId'] == 't1'
+        assert document['ChunkProcessed'] == 1
+
+    def test_properties_are_logged_without_becoming_dimensions(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        emitter.put_metric_data([metric('ChunkProcessed', 1, TenantId='t1')], properties={'JobId': 'job-1'})
+        emitter.put_metric_data([metric('ChunkProcessed', 1, TenantId='t1')], properties={'JobId': 'job-2'})
+
+        documents = emitted_documents(emitter)
+
+        assert [document['JobId'] for document in documents] == ['job-1', 'job-2']
+        assert all(document['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['TenantId']] for document in documents)
+
+    def test_counts_are_summed_and_timings_kept_as_samples(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        for seconds in (1.5, 2.5, 4.0):
+            emitter.put_metric_data([
+                metric('ChunkProcessed', 1, JobId='job-1', TenantId='t1'),
+                metric('ChunkProcessingTime', seconds, unit='Seconds', JobId='job-1', TenantId='t1')
+            ])
+
+        [document] = emitted_documents(emitter)
+
+        assert document['ChunkProcessed'] == 3
+        assert document['ChunkProcessingTime'] == [1.5, 2.5, 4.0]
+
+    def test_metrics_are_grouped_by_dimensions(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        emitter.put_metric_data([metric('TenantCount', 4, JobId='job-1'), metric('ChunkProcessed', 1, TenantId='t1')])
+
+        documents = emitted_documents(emitter)
+
+        assert [document['_aws']['CloudWatchMetrics'][0]['Dimensions'] for document in documents] == [[[]], [['TenantId']]]
+
+    def test_lines_respect_emf_limits(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        emitter.put_metric_data([metric('Latency', index, unit='Milliseconds') for index in range(150)])
+        emitter.put_metric_data([metric(f'Metric{index}', 1) for index in range(120)])
+
+        documents = emitted_documents(emitter)
+
+        assert sum(len(document['_aws']['CloudWatchMetrics'][0]['Metrics']) for document in documents) == 122
+        assert all(len(document['_aws']['CloudWatchMetrics'][0]['Metrics']) <= 100 for document in documents)
+        latency = [document['Latency'] for document in documents if 'Latency' in document]
+        assert [len(values) for values in latency] == [100, 50]
+
+    def test_flush_resets_the_aggregate(self):
+        emitter = EMFMetricsEmitter('AVESA/DataPipeline')
+        emitter.put_metric_data([metric('ChunkProcessed', 1)])
+        emitted_documents(emitter)
+
+        assert emitted_documents(emitter) == []
+
+
+class TestBackendSelection:
+    """Test cases for choosing between EMF and PutMetricData."""
+
+    def test_emf_is_the_default_and_makes_no_api_calls(self):
+        cloudwatch = Mock()
+        with patch.dict(os.environ, {}, clear=True), patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            publish_metrics('AVESA/DataPipeline', [metric('ChunkProcessed', 1, JobId='job-1')], cloudwatch)
+
+        cloudwatch.put_metric_data.assert_not_called()
+        assert json.loads(stdout.getvalue())['ChunkProcessed'] == 1
+
+    def test_api_backend_keeps_put_metric_data(self):
+        cloudwatch = Mock()
+        with patch.dict(os.environ, {'METRICS_BACKEND': 'api'}):
+            emitter = create_metrics_emitter('AVESA/DataPipeline', cloudwatch)
+        assert isinstance(emitter, CloudWatchMetricsEmitter)
+
+        emitter.put_metric_data([metric(f'Metric{index}', 1, JobId='job-1') for index in range(25)])
+        emitter.flush()
+
+        batches = [call.kwargs['MetricData'] for call in cloudwatch.put_metric_data.call_args_list]
+        assert [len(batch) for batch in batches] == [20, 5]
+        assert batches[0][0]['Dimensions'] == [{'Name': 'JobId', 'Value': 'job-1'}]
+
+    def test_api_backend_drops_properties(self):
+        cloudwatch = Mock()
+        emitter = CloudWatchMetricsEmitter('AVESA/DataPipeline', cloudwatch)
+
+        emitter.put_metric_data([metric('ChunkProcessed', 1, TenantId='t1')], properties={'JobId': 'job-1'})
+        emitter.flush()
+
+        [batch] = [call.kwargs['MetricData'] for call in cloudwatch.put_metric_data.call_args_list]
+        assert batch[0]['Dimensions'] == [{'Name': 'TenantId', 'Value': 't1'}]
+
+
+class TestChunkMetrics:
+    """Test that chunk metrics keep the job ID out of their dimensions."""
+
+    def test_job_id_is_a_property(self, chunk_harness):
+        processor = chunk_harness.processor()
+        with patch('optimized.processors.chunk_processor.publish_metrics') as publish:
+            processor._send_chunk_metrics('job-1', 't1', 'tickets', 'chunk-1', {
+                'records_processed': 100, 'processing_time': 2.0,
+                'rate_limit_stats': {'throttled': 1, 'retries': 2},
+                'progress_stats': {'requests': 3, 'blocking_seconds': 0.5}
+            })
+
+        (namespace, metrics), kwargs = publish.call_args
+        assert kwargs['properties'] == {'JobId': 'job-1'}
+        assert len(metrics) == 7
+        assert all([dimension['Name'] for dimension in item['Dimensions']] == ['TenantId', 'TableName']
+                   for item in metrics)
@@ -0,0 +1,191 @@
+"""
+Tests for pipelined page fetching.
+
+The chunk processor tests run against a local fake paginated HTTP API served by
+the chunk_harness fixture, so the real urllib request path, ordering and
+concurrency cap are all exercised.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.page_fetcher import PipelinedPageFetcher
+
+
+class FakePaginatedAPI:
+    """Local HTTP API serving `total_records` records in page/pageSize pages."""
+
+    def __init__(self, harness, total_records, latency=0.02):
+        self.total_records = total_records
+        self.latency = latency
+        self.requested_pages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        page, page_size = int(query['page']), int(query['pageSize'])
+        with self._lock:
+            self.requested_pages.append(page)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        start = (page - 1) * page_size
+        records = [{'id': i, 'page': page} for i in range(start, min(start + page_size, self.total_records))]
+        with self._lock:
+            self.in_flight -= 1
+        return 200, records, {}
+
+
+class TestPipelinedPageFetcher:
+    """Test cases for PipelinedPageFetcher."""
+
+    def test_pages_are_yielded_in_order(self):
+        def fetch_page(page):
+            # Later pages finish first
+            time.sleep(0.01 * (5 - page) if page < 5 else 0)
+            return [{'page': page}] if page <= 6 else []
+
+        fetcher = PipelinedPageFetcher(fetch_page, max_in_flight=4, estimated_pages=6)
+        assert [page for page, _ in fetcher.iter_pages()] == [1, 2, 3, 4, 5, 6]
+
+    def test_max_pages_is_a_hard_limit(self):
+        requested = []
+
+        def fetch_page(page):
+            requested.append(page)
+            return [{'page': page}]
+
+        pages = list(PipelinedPageFetcher(fetch_page, max_in_flight=3, max_pages=5).iter_pages())
+
+        assert [page for page, _ in pages] == [1, 2, 3, 4, 5]
+        assert sorted(requested) == [1, 2, 3, 4, 5]
+
+    def test_probes_sequentially_past_the_estimate(self):
+        requested = []
+
+        def fetch_page(page):
+            requested.append(page)
+            return [{'page': page}] if page <= 10 else []
+
+        pages = list(PipelinedPageFetcher(fetch_page, max_in_flight=4, estimated_pages=2).iter_pages())
+
+        assert len(pages) == 10
+        # Past the estimate only one page is outstanding, so nothing beyond page 11 is requested
+        assert max(requested) == 11
+
+    def test_should_continue_stops_submission(self):
+        calls = {'count': 0}
+
+        def should_continue():
+            calls['count'] += 1
+            return calls['count'] <= 2
+
+        pages = list(PipelinedPageFetcher(lambda page: [{'page': page}], max_in_flight=4,
+                                          estimated_pages=10, should_continue=should_continue).iter_pages())
+        assert [page for page, _ in pages] == [1, 2]
+
+    def test_reached_end_only_after_an_empty_page(self):
+        stopped = PipelinedPageFetcher(lambda page: [{'page': page}], max_in_flight=2, max_pages=3)
+        assert len(list(stopped.iter_pages())) == 3
+        assert stopped.reached_end is False
+
+        ended = PipelinedPageFetcher(lambda page: [{'page': page}] if page <= 2 else [], max_in_flight=2)
+        assert len(list(ended.iter_pages())) == 2
+        assert ended.reached_end is True
+
+    def test_fetch_error_propagates_in_page_order(self):
+        def fetch_page(page):
+            if page == 2:
+                raise RuntimeError('boom')
+            return [{'page': page}]
+
+        iterator = PipelinedPageFetcher(fetch_page, max_in_flight=3, max_pages=4).iter_pages()
+        assert next(iterator)[0] == 1
+        with pytest.raises(RuntimeError):
+            next(iterator)
+
+
+class TestChunkProcessorPipelinedFetch:
+    """Test ChunkProcessor pagination against a local fake API."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def api(self, total_records, **kwargs):
+        return FakePaginatedAPI(self.harness, total_records, **kwargs)
+
+    def run_chunk(self, api, concurrency, estimated_records=None, record_limit=None, **offsets):
+        processor = self.harness.processor(concurrency)
+        batches = self.harness.capture_writes(processor)
+        table_config = {
+            'service_name': 'connectwise',
+            'endpoint': 'service/tickets',
+            'table_name': 'tickets',
+            'page_size': 10,
+            'pagination': 'offset',
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+        chunk_config = dict({'chunk_id': 'chunk-1', 'estimated_records': estimated_records, 'record_limit': record_limit},
+                            **offsets)
+        result = self.harness.run(processor, chunk_config, table_config)
+        processor.written = [[record['id'] for record in batch] for batch in batches]
+        return processor, result
+
+    def test_pipelined_fetch_matches_sequential(self):
+        api = self.api(total_records=95)
+        sequential, sequential_result = self.run_chunk(api, concurrency=1, estimated_records=95)
+        api = self.api(total_records=95)
+        pipelined, pipelined_result = self.run_chunk(api, concurrency=4, estimated_records=95)
+        max_in_flight = api.max_in_flight
+
+        assert pipelined_result['records_processed'] == sequential_result['records_processed'] == 95
+        assert pipelined.written == sequential.written
+        assert [record_id for batch in pipelined.written for record_id in batch] == list(range(95))
+        assert 1 < max_in_flight <= 4
+
+    def test_concurrency_cap_is_respected(self):
+        api = self.api(total_records=200, latency=0.03)
+        _, result = self.run_chunk(api, concurrency=2, estimated_records=200)
+        assert api.max_in_flight <= 2
+
+        assert result['records_processed'] == 200
+
+    def test_record_limit_truncates_pipelined_fetch(self):
+        api = self.api(total_records=200)
+        processor, result = self.run_chunk(api, concurrency=4, record_limit=35)
+        requested = sorted(api.requested_pages)
+
+        assert result['records_processed'] == 35
+        assert [record_id for batch in processor.written for record_id in batch] == list(range(35))
+        assert requested == [1, 2, 3, 4]
+
+    @pytest.mark.parametrize('concurrency', [1, 4])
+    def test_planned_offset_ranges_cover_the_table_once(self, concurrency):
+        ranges = [(0, 40, 40), (40, 80, 40), (80, None, 20)]
+        written = []
+        api = self.api(total_records=95)
+        for start_offset, end_offset, estimated_records in ranges:
+            processor, result = self.run_chunk(api, concurrency, estimated_records=estimated_records,
+                                               start_offset=start_offset, end_offset=end_offset)
+            assert result['completed'] is True
+            written.extend(record_id for batch in processor.written for record_id in batch)
+
+        # The last chunk reads past the estimate to the end of the data
+        assert written == list(range(95))
+
+    def test_sequential_record_limit_requests_whole_pages(self):
+        api = self.api(total_records=200)
+        processor, result = self.run_chunk(api, concurrency=1, record_limit=35)
+        requested = list(api.requested_pages)
+
+        assert [record_id for batch in processor.written for record_id in batch] == list(range(35))
+        assert requested == [1, 2, 3, 4]
@@ -0,0 +1,183 @@
+"""
+Tests for incremental Parquet output with S3 multipart upload.
+"""
+
+import io
+import os
+import sys
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.parquet_stream import (
+    MIN_PART_SIZE_BYTES,
+    S3MultipartSink,
+    StreamingParquetWriter,
+    conform_table,
+    records_to_table
+)
+
+
+class FakeS3Client:
+    """In-memory stand-in for the S3 calls used by S3MultipartSink."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.calls = []
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.calls.append('put_object')
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        self.calls.append('create_multipart_upload')
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append('upload_part')
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {'ETag': f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append('complete_multipart_upload')
+        parts = self.uploads.pop(UploadId)
+        assert [part['PartNumber'] for part in MultipartUpload['Parts']] == sorted(parts)
+        self.objects[Key] = b''.join(parts[number] for number in sorted(parts))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append('abort_multipart_upload')
+        self.uploads.pop(UploadId, None)
+
+
+def make_writer(s3, **kwargs):
+    def open_sink(file_number):
+        key = f"raw/chunk_batch{file_number:03d}.parquet"
+        return key, S3MultipartSink(s3, 'bucket', key, part_size=MIN_PART_SIZE_BYTES)
+    return StreamingParquetWriter(open_sink, **kwargs)
+
+
+def read(s3, key):
+    return pq.read_table(io.BytesIO(s3.objects[key]))
+
+
+class TestS3MultipartSink:
+    """Test cases for S3MultipartSink."""
+
+    def test_small_object_uses_put_object(self):
+        s3 = FakeS3Client()
+        sink = S3MultipartSink(s3, 'bucket', 'key')
+        sink.write(b'abc')
+        sink.close()
+        sink.close()
+
+        assert s3.objects['key'] == b'abc'
+        assert s3.calls == ['put_object']
+
+    def test_large_object_uses_multipart_parts(self):
+        s3 = FakeS3Client()
+        sink = S3MultipartSink(s3, 'bucket', 'key', part_size=MIN_PART_SIZE_BYTES)
+        payload = os.urandom(1024 * 1024)
+        for _ in range(12):
+            sink.write(memoryview(payload))
+        sink.close()
+
+        assert s3.objects['key'] == payload * 12
+        assert s3.calls.count('upload_part') == 3
+        assert sink.tell() == len(payload) * 12
+
+    def test_abort_discards_upload(self):
+        s3 = FakeS3Client()
+        sink = S3MultipartSink(s3, 'bucket', 'key', part_size=MIN_PART_SIZE_BYTES)
+        sink.write(b'x' * MIN_PART_SIZE_BYTES)
+        sink.abort()
+
+        assert 'abort_multipart_upload' in s3.calls
+        assert s3.uploads == {} and s3.objects == {}
+        with pytest.raises(ValueError):
+            sink.write(b'y')
+
+
+class TestStreamingParquetWriter:
+    """Test cases for StreamingParquetWriter."""
+
+    def test_round_trip_matches_pandas_output(self):
+        records = [{'id': i, 'summary': f"ticket {i}", 'amount': i * 1.5,
+                    'company': {'id': i % 3, 'name': 'acme'}} for i in range(250)]
+        s3 = FakeS3Client()
+        writer = make_writer(s3, row_group_rows=100)
+        for start in range(0, 250, 50):
+            writer.write_records(records[start:start + 50])
+        keys = writer.close()
+
+        assert keys == ['raw/chunk_batch001.parquet']
+        parquet_file = pq.ParquetFile(io.BytesIO(s3.objects[keys[0]]))
+        assert parquet_file.metadata.num_row_groups == 3
+        pd.testing.assert_frame_equal(parquet_file.read().to_pandas(), pd.DataFrame(records))
+
+    def test_schema_is_stable_across_pages(self):
+        s3 = FakeS3Client()
+        writer = make_writer(s3, row_group_rows=2)
+        writer.write_records([{'id': 1, 'note': None, 'owner': {'id': 7, 'name': 'a'}}, {'id': 2, 'note': 'x'}])
+        writer.write_records([{'id': 3, 'owner': {'id': 8}}, {'id': 4, 'note': None}])
+        keys = writer.close()
+
+        assert len(keys) == 1
+        assert read(s3, keys[0]).to_pylist() == [
+            {'id': 1, 'note': None, 'owner': {'id': 7, 'name': 'a'}},
+            {'id': 2, 'note': 'x', 'owner': None},
+            {'id': 3, 'note': None, 'owner': {'id': 8, 'name': None}},
+            {'id': 4, 'note': None, 'owner': None},
+        ]
+
+    def test_incompatible_page_starts_new_file(self):
+        s3 = FakeS3Client()
+        writer = make_writer(s3, row_group_rows=1)
+        writer.write_records([{'id': 1, 'value': 10}])
+        writer.write_records([{'id': 2, 'value': 'ten'}])
+        writer.write_records([{'id': 3, 'extra': True}])
+        keys = writer.close()
+
+        assert len(keys) == 3
+        assert [file_info['record_count'] for file_info in writer.files] == [1, 1, 1]
+        assert read(s3, keys[1]).to_pylist() == [{'id': 2, 'value': 'ten'}]
+
+    def test_max_file_bytes_rolls_over(self):
+        s3 = FakeS3Client()
+        writer = make_writer(s3, row_group_rows=100, max_file_bytes=1)
+        for page in range(3):
+            writer.write_records([{'id': page * 100 + i} for i in range(100)])
+        keys = writer.close()
+
+        assert len(keys) == 3
+        assert sum(read(s3, key).num_rows for key in keys) == 300
+
+    def test_mixed_types_are_stored_as_strings(self):
+        table = records_to_table([{'id': 1, 'code': 5}, {'id': 2, 'code': 'A5'}, {'id': 3, 'code': {'x': 1}}])
+        assert table.column('code').to_pylist() == ['5', 'A5', '{"x": 1}']
+        assert table.column('id').to_pylist() == [1, 2, 3]
+
+    def test_keys_missing_from_the_first_record_are_kept(self):
+        table = records_to_table([{'id': 1}, {'id': 2, 'summary': 'x'}])
+        assert table.to_pylist() == [{'id': 1, 'summary': None}, {'id': 2, 'summary': 'x'}]
+
+    def test_conform_table(self):
+        schema = records_to_table([{'id': 1, 'name': 'a'}]).schema
+        assert conform_table(records_to_table([{'id': 2}]), schema).to_pylist() == [{'id': 2, 'name': None}]
+        assert conform_table(records_to_table([{'id': 2, 'other': None}]), schema).num_rows == 1
+        assert conform_table(records_to_table([{'id': 2.5}]), schema) is None
+
+    def test_abort_discards_open_file(self):
+        s3 = FakeS3Client()
+        writer = make_writer(s3, row_group_rows=1)
+        writer.write_records([{'id': 1}])
+        writer.abort()
+
+        assert writer.files == []
+        assert s3.objects == {}
+        assert writer.close() == []
@@ -0,0 +1,152 @@
+"""
+Tests for write-behind ChunkProgress recording.
+"""
+
+import os
+import sys
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.progress_recorder import ProgressRecorder
+
+
+def chunk_row(chunk_id, status='processing', **attributes):
+    row = {'job_id': {'S': 'job-1'}, 'chunk_id': {'S': chunk_id}, 'status': {'S': status}}
+    row.update({name: {'S': value} for name, value in attributes.items()})
+    return row
+
+
+def chunk_key(chunk_id):
+    return {'job_id': {'S': 'job-1'}, 'chunk_id': {'S': chunk_id}}
+
+
+def conditional_check_failed():
+    return ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}}, 'UpdateItem')
+
+
+class TestProgressRecorder:
+    """Test cases for ProgressRecorder."""
+
+    def test_rows_are_batched_in_the_background(self):
+        client = Mock()
+        client.batch_write_item.return_value = {}
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        for index in range(30):
+            recorder.record(chunk_row(f'chunk-{index}'))
+        recorder.close()
+
+        sizes = [len(call.kwargs['RequestItems']['ChunkProgress-dev'])
+                 for call in client.batch_write_item.call_args_list]
+        assert sizes == [25, 5]
+        assert recorder.get_stats()['requests'] == 2
+
+    def test_records_for_the_same_key_are_coalesced(self):
+        client = Mock()
+        client.batch_write_item.return_value = {}
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        recorder.record(chunk_row('chunk-1', tenant_id='t1'))
+        recorder.record(chunk_row('chunk-1', records_processed='500'))
+        recorder.close()
+
+        [request] = client.batch_write_item.call_args.kwargs['RequestItems']['ChunkProgress-dev']
+        assert request['PutRequest']['Item']['tenant_id'] == {'S': 't1'}
+        assert request['PutRequest']['Item']['records_processed'] == {'S': '500'}
+        assert recorder.get_stats()['coalesced'] == 1
+
+    def test_unsent_start_row_is_folded_into_the_transition(self):
+        client = Mock()
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        recorder.record(chunk_row('chunk-1', tenant_id='t1'))
+        applied = recorder.transition(chunk_key('chunk-1'), 'completed', {'records_processed': {'N': '10'}})
+        recorder.close()
+
+        assert applied
+        client.batch_write_item.assert_not_called()
+        request = client.update_item.call_args.kwargs
+        assert request['Key'] == chunk_key('chunk-1')
+        assert request['ExpressionAttributeValues'][':tenant_id'] == {'S': 't1'}
+        assert request['ExpressionAttributeValues'][':status'] == {'S': 'completed'}
+        assert request['ExpressionAttributeValues'][':from_status_0'] == {'S': 'processing'}
+        assert request['ConditionExpression'] == 'attribute_not_exists(#status) OR #status IN (:from_status_0)'
+        assert recorder.get_stats()['requests'] == 1
+
+    def test_transition_waits_for_in_flight_start_row(self):
+        release = threading.Event()
+        order = []
+        client = Mock()
+        client.batch_write_item.side_effect = lambda **kwargs: (release.wait(5), order.append('put'), {})[-1]
+        client.update_item.side_effect = lambda **kwargs: order.append('update')
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        recorder.record(chunk_row('chunk-1'))
+        recorder.flush(wait=False)
+        threading.Timer(0.05, release.set).start()
+        recorder.transition(chunk_key('chunk-1'), 'completed')
+        recorder.close()
+
+        assert order == ['put', 'update']
+
+    def test_transition_from_terminal_state_is_rejected(self):
+        client = Mock()
+        client.update_item.side_effect = conditional_check_failed()
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        assert not recorder.transition(chunk_key('chunk-1'), 'failed')
+        assert recorder.get_stats()['conditional_failures'] == 1
+
+    def test_leased_status_requires_an_expired_lease(self):
+        client = Mock()
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        assert recorder.transition(chunk_key('chunk-1'), 'processing', from_statuses=('timeout_continuation',),
+                                   leased_statuses=('processing',), now=1000)
+
+        request = client.update_item.call_args.kwargs
+        assert request['ConditionExpression'] == (
+            'attribute_not_exists(#status) OR #status IN (:from_status_0)'
+            ' OR (#status IN (:leased_status_0)'
+            ' AND (attribute_not_exists(#lease_expires_at) OR #lease_expires_at < :lease_now))'
+        )
+        assert request['ExpressionAttributeValues'][':lease_now'] == {'N': '1000'}
+        assert request['ExpressionAttributeNames']['#lease_expires_at'] == 'lease_expires_at'
+
+    def test_other_update_errors_are_raised(self):
+        client = Mock()
+        client.update_item.side_effect = ClientError({'Error': {'Code': 'ValidationException'}}, 'UpdateItem')
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        with pytest.raises(ClientError):
+            recorder.transition(chunk_key('chunk-1'), 'completed')
+
+    def test_failed_background_write_is_counted_not_raised(self):
+        client = Mock()
+        client.batch_write_item.side_effect = RuntimeError('throttled')
+        recorder = ProgressRecorder(client, 'ChunkProgress-dev')
+
+        recorder.record(chunk_row('chunk-1'))
+        recorder.close()
+
+        assert recorder.get_stats()['failed_writes'] == 1
+
+
+class TestChunkProcessorProgress:
+    """Test that a failed duplicate invocation leaves a completed chunk alone."""
+
+    def test_late_failure_does_not_overwrite_completed_chunk(self, chunk_harness):
+        processor = chunk_harness.processor(dynamodb=Mock())
+        processor.dynamodb.update_item.side_effect = conditional_check_failed()
+
+        with patch('optimized.processors.chunk_processor.get_timestamp', return_value='2025-03-01T12:00:00Z'):
+            processor._update_chunk_progress('chunk-1', 'job-1', 'failed', {'error': 'boom'})
+        stats = processor._close_progress_recorder()
+
+        processor.logger.warning.assert_called_once()
+        assert stats['conditional_failures'] == 1
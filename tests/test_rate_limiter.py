@@ -0,0 +1,346 @@
+"""
+Tests for adaptive rate limiting and retry scheduling.
+"""
+
+import email.utils
+import io
+import os
+import sys
+import threading
+import urllib.error
+import urllib.parse
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.rate_limiter import (
+    RateLimitPause,
+    RequestScheduler,
+    get_request_scheduler,
+    parse_rate_limit_headers,
+    parse_retry_after,
+    reset_request_schedulers
+)
+
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(code, headers=None):
+    return urllib.error.HTTPError('http://api', code, 'error', headers or {}, io.BytesIO(b''))
+
+
+def make_scheduler(clock, **kwargs):
+    kwargs.setdefault('jitter', lambda: 0.5)
+    return RequestScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestHeaderParsing:
+    """Test cases for Retry-After and rate-limit header parsing."""
+
+    def test_retry_after_seconds_and_date(self):
+        assert parse_retry_after('7') == 7.0
+        assert parse_retry_after(email.utils.formatdate(1000.0 + 30, usegmt=True), now=1000.0) == pytest.approx(30.0)
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('soon') is None
+
+    def test_rate_limit_headers(self):
+        assert parse_rate_limit_headers({'X-RateLimit-Remaining': '12', 'X-RateLimit-Reset': '30'}) is None
+        assert parse_rate_limit_headers({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '30'}) == 30.0
+        assert parse_rate_limit_headers({'RateLimit-Remaining': '0', 'RateLimit-Reset': '5'}) == 5.0
+        # Epoch reset timestamps are converted to a delay
+        assert parse_rate_limit_headers({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1700000060'},
+                                        now=1700000000) == 60.0
+        assert parse_rate_limit_headers({}) is None
+
+
+class TestRequestScheduler:
+    """Test cases for RequestScheduler."""
+
+    def test_token_bucket_paces_requests(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, requests_per_minute=60, burst_limit=2)
+
+        for _ in range(4):
+            scheduler.execute(lambda: 'ok')
+
+        # Two requests use the burst, the next two wait one second each
+        assert clock.sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
+
+    def test_retry_after_is_honoured(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, requests_per_minute=6000, burst_limit=100)
+        responses = [http_error(429, {'Retry-After': '20'}), 'ok']
+
+        def request():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        baseline = scheduler.get_stats()
+        assert scheduler.execute(request) == 'ok'
+        assert sum(clock.sleeps) >= 20
+        stats = scheduler.get_stats(since=baseline)
+        assert stats['throttled'] == 1
+        assert stats['retries'] == 1
+        assert stats['requests'] == 1
+
+    def test_retries_exhausted_raise(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, retry_attempts=2, retry_delay_seconds=1)
+        request = Mock(side_effect=http_error(503))
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            scheduler.execute(request)
+
+        assert error.value.code == 503
+        assert request.call_count == 3
+        assert scheduler.get_stats()['failures'] == 1
+
+    def test_non_retryable_errors_are_not_retried(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        request = Mock(side_effect=http_error(404))
+
+        with pytest.raises(urllib.error.HTTPError):
+            scheduler.execute(request)
+        assert request.call_count == 1
+
+    def test_backoff_is_jittered_and_capped(self):
+        scheduler = RequestScheduler(retry_delay_seconds=1, jitter=lambda: 1.0)
+        assert scheduler.backoff_delay(0) == 1
+        assert scheduler.backoff_delay(3) == 8
+        assert scheduler.backoff_delay(20) == 60
+        assert scheduler.backoff_delay(0, retry_after=5) == 5
+        assert scheduler.backoff_delay(0, retry_after=600) == 60
+        assert RequestScheduler(jitter=lambda: 0.0).backoff_delay(3) == 0
+
+    def test_aimd_concurrency(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, max_concurrency=8)
+
+        scheduler.acquire()
+        scheduler.release(throttled=True)
+        assert scheduler.get_stats()['concurrency_limit'] == 4
+
+        for _ in range(40):
+            scheduler.acquire()
+            scheduler.release(latency=0.1)
+        assert scheduler.get_stats()['concurrency_limit'] == 8
+
+        scheduler.acquire()
+        scheduler.release(latency=1.0)
+        assert scheduler.get_stats()['concurrency_limit'] == 4
+
+    def test_latency_baseline_is_per_class_and_decays(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, max_concurrency=8)
+
+        # Cheap count requests do not set the bar for pages
+        for _ in range(5):
+            scheduler.acquire()
+            scheduler.release(latency=0.01, request_class='count')
+        scheduler.acquire()
+        scheduler.release(latency=1.0)
+        scheduler.acquire()
+        scheduler.release(latency=1.0)
+        assert scheduler.get_stats()['concurrency_limit'] == 8
+
+        # One unusually fast page only nudges the baseline
+        scheduler.acquire()
+        scheduler.release(latency=0.05)
+        scheduler.acquire()
+        scheduler.release(latency=1.0)
+        assert scheduler.get_stats()['concurrency_limit'] == 8
+
+    def test_exhausted_quota_pauses_requests(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, requests_per_minute=6000, burst_limit=100)
+        headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '15'}
+
+        scheduler.execute(lambda: 'ok', response_headers=lambda result: headers)
+        scheduler.execute(lambda: 'ok')
+
+        assert sum(clock.sleeps) >= 15
+
+    def test_waits_past_the_deadline_raise_a_pause(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, requests_per_minute=6000, burst_limit=100)
+        headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '45'}
+        scheduler.execute(lambda: 'ok', response_headers=lambda result: headers)
+
+        with pytest.raises(RateLimitPause) as pause:
+            scheduler.execute(lambda: 'ok', time_remaining=lambda: 10.0)
+        assert pause.value.wait_seconds == pytest.approx(45)
+        assert clock.sleeps == []
+
+        # A retry delay that outlasts the deadline is not slept either
+        scheduler = make_scheduler(clock, requests_per_minute=6000, burst_limit=100)
+        request = Mock(side_effect=[http_error(429, {'Retry-After': '30'}), 'ok'])
+        with pytest.raises(RateLimitPause):
+            scheduler.execute(request, time_remaining=lambda: 10.0)
+        assert request.call_count == 1
+        assert clock.sleeps == []
+
+    def test_throttle_pause_is_waited_once(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, requests_per_minute=6000, burst_limit=100)
+        headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '15'}
+        request = Mock(side_effect=[http_error(429, headers), 'ok'])
+
+        assert scheduler.execute(request) == 'ok'
+
+        assert clock.sleeps == [pytest.approx(15)]
+
+    def test_slot_wait_respects_the_deadline(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, max_concurrency=1)
+        scheduler.acquire()
+
+        with pytest.raises(RateLimitPause):
+            scheduler.acquire(time_remaining=lambda: 0.5)
+
+    def test_stats_are_counted_across_threads(self):
+        scheduler = RequestScheduler(requests_per_minute=600000, burst_limit=10000, max_concurrency=8)
+
+        def run():
+            for _ in range(200):
+                scheduler.execute(lambda: 'ok')
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert scheduler.get_stats()['requests'] == 1600
+
+    def test_concurrency_limit_blocks_threads(self):
+        scheduler = RequestScheduler(requests_per_minute=6000, burst_limit=100, max_concurrency=2)
+        state = {'in_flight': 0, 'max_in_flight': 0}
+        lock = threading.Lock()
+        barrier = threading.Event()
+
+        def request():
+            with lock:
+                state['in_flight'] += 1
+                state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            barrier.wait(0.05)
+            with lock:
+                state['in_flight'] -= 1
+
+        threads = [threading.Thread(target=scheduler.execute, args=(request,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert state['max_in_flight'] <= 2
+
+    def test_schedulers_are_shared_per_service_and_tenant(self):
+        reset_request_schedulers()
+        config = {'rate_limiting': {'requests_per_minute': 300, 'burst_limit': 50, 'max_concurrent_requests': 4},
+                  'error_handling': {'retry_attempts': 5}}
+        scheduler = get_request_scheduler('ConnectWise', 't1', config)
+
+        assert get_request_scheduler('connectwise', 't1') is scheduler
+        assert get_request_scheduler('connectwise', 't2', config) is not scheduler
+        assert scheduler.capacity == 50
+        assert scheduler.max_concurrency == 4
+        assert scheduler.retry_attempts == 5
+        reset_request_schedulers()
+
+
+class ThrottlingAPI:
+    """Local paginated API that answers the first request for each listed page with 429."""
+
+    def __init__(self, harness, total_records, throttled_pages=(), always_throttle=False):
+        self.total_records = total_records
+        self.throttled_pages = set(throttled_pages)
+        self.always_throttle = always_throttle
+        self.requests = []
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        page, page_size = int(query['page']), int(query['pageSize'])
+        self.requests.append(page)
+        if self.always_throttle or page in self.throttled_pages:
+            self.throttled_pages.discard(page)
+            return 429, {'message': 'rate limited'}, {'Retry-After': '0'}
+        start = (page - 1) * page_size
+        return 200, [{'id': i} for i in range(start, min(start + page_size, self.total_records))], {}
+
+
+class TestChunkProcessorThrottling:
+    """Test that throttled pages are retried instead of truncating the table."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def api(self, total_records, **kwargs):
+        return ThrottlingAPI(self.harness, total_records, **kwargs)
+
+    def run_chunk(self, api, time_remaining=300.0):
+        processor = self.harness.processor()
+        batches = self.harness.capture_writes(processor)
+        table_config = {
+            'service_name': 'connectwise',
+            'tenant_id': 't1',
+            'endpoint': 'service/tickets',
+            'table_name': 'tickets',
+            'page_size': 10,
+            'pagination': 'offset',
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+
+        # Fast retries so the test does not wait on real backoff delays
+        get_request_scheduler('connectwise', 't1', {
+            'rate_limiting': {'requests_per_minute': 60000, 'burst_limit': 100},
+            'error_handling': {'retry_attempts': 2, 'retry_delay_seconds': 0}
+        })
+        result = self.harness.run(processor, {'chunk_id': 'chunk-1'}, table_config, time_remaining=time_remaining)
+        return [record['id'] for batch in batches for record in batch], result
+
+    def test_throttled_pages_are_retried(self):
+        api = self.api(total_records=45, throttled_pages={2, 4})
+        written, result = self.run_chunk(api)
+
+        assert written == list(range(45))
+        assert result['completed'] is True
+        assert result['rate_limit_stats']['throttled'] == 2
+
+    def test_rate_limit_pause_stops_for_a_continuation(self):
+        api = self.api(total_records=45, throttled_pages={2})
+        with patch('shared.rate_limiter.parse_retry_after', return_value=600.0):
+            written, result = self.run_chunk(api, time_remaining=30.0)
+
+        assert written == list(range(10))
+        assert result['completed'] is False
+        assert 'error' not in result
+        assert result['records_processed'] == 10
+
+    def test_exhausted_retries_leave_chunk_incomplete(self):
+        api = self.api(total_records=45, always_throttle=True)
+        written, result = self.run_chunk(api)
+        requests = len(api.requests)
+
+        assert written == []
+        assert result['completed'] is False
+        assert 'error' in result
+        assert requests == 3
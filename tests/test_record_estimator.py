@@ -0,0 +1,329 @@
+"""
+Tests for record-count estimation and its use in chunk planning.
+"""
+
+import io
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.record_estimator import (
+    RecordEstimate,
+    cache_estimate,
+    clear_estimate_cache,
+    count_request,
+    estimate_duration_seconds,
+    estimate_from_dict,
+    estimate_records,
+    estimate_to_dict,
+    get_cached_estimate,
+    load_estimate,
+    parse_count,
+    store_estimate
+)
+
+
+class LastUpdatedTable:
+    """In-memory LastUpdated table supporting put_item and get_item."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item):
+        self.items[(Item['tenant_id']['S'], Item['table_name']['S'])] = dict(Item)
+
+    def get_item(self, TableName, Key):
+        item = self.items.get((Key['tenant_id']['S'], Key['table_name']['S']))
+        return {'Item': item} if item else {}
+
+
+def estimate(records, since=None, estimated_at='2025-03-01T12:00:00Z'):
+    return RecordEstimate(records, records * 100, 'count', estimated_at, since)
+
+
+class TestCountRequests:
+    """Test per-service count requests and responses."""
+
+    def test_connectwise_count_endpoint_with_incremental_condition(self):
+        table_config = {'service_name': 'connectwise', 'endpoint': 'service/tickets', 'incremental_field': 'lastUpdated'}
+
+        assert count_request(table_config) == ('service/tickets/count', {})
+        path, params = count_request(table_config, '2025-03-01T12:00:00Z')
+        assert path == 'service/tickets/count'
+        assert params['conditions'].startswith('lastUpdated > [2025-03-01T')
+
+    def test_servicenow_reads_one_record(self):
+        table_config = {'service_name': 'servicenow', 'endpoint': 'incident', 'incremental_field': 'sys_updated_on'}
+
+        path, params = count_request(table_config, '2025-03-01T12:00:00Z')
+        assert path == 'incident'
+        assert params['sysparm_limit'] == 1 and params['sysparm_fields'] == 'sys_id'
+        assert params['sysparm_query'].startswith('sys_updated_on>2025-03-01 ')
+
+    def test_salesforce_soql_count(self):
+        table_config = {'service_name': 'salesforce', 'endpoint': 'Account', 'incremental_field': 'LastModifiedDate'}
+
+        assert count_request(table_config) == ('services/data/v58.0/query', {'q': 'SELECT COUNT() FROM Account'})
+        _, params = count_request(table_config, '2025-03-01T12:00:00Z')
+        assert params['q'].startswith('SELECT COUNT() FROM Account WHERE LastModifiedDate > 2025-03-01T')
+
+    def test_unknown_service_cannot_be_counted(self):
+        with pytest.raises(ValueError):
+            count_request({'service_name': 'hubspot', 'endpoint': 'contacts'})
+
+    def test_parse_count(self):
+        assert parse_count('connectwise', b'{"count": 42}') == 42
+        assert parse_count('salesforce', b'{"totalSize": 7, "done": true, "records": []}') == 7
+        assert parse_count('servicenow', b'{"result": []}', {'X-Total-Count': '1234'}) == 1234
+        with pytest.raises(ValueError):
+            parse_count('servicenow', b'{"result": []}', {})
+
+    def test_estimate_uses_configured_record_size(self):
+        table_config = {'service_name': 'connectwise', 'endpoint': 'service/tickets', 'avg_record_bytes': 500}
+        fetch = Mock(return_value=(b'{"count": 10}', {}))
+
+        result = estimate_records(table_config, fetch)
+
+        assert (result.records, result.bytes, result.source) == (10, 5000, 'count')
+        fetch.assert_called_once_with('service/tickets/count', {})
+        assert estimate_from_dict(estimate_to_dict(result)) == result
+
+    def test_duration_from_throughput(self):
+        assert estimate_duration_seconds(estimate(1000), records_per_second=50) == 20
+        assert estimate_duration_seconds(estimate(0), records_per_second=50) == 1
+
+
+class TestEstimateCache:
+    """Test the in-memory and DynamoDB estimate caches."""
+
+    def teardown_method(self):
+        clear_estimate_cache()
+
+    def test_memory_cache_is_per_window_and_expires(self):
+        cache_estimate('t1', 'tickets', estimate(10))
+
+        assert get_cached_estimate('t1', 'tickets').records == 10
+        assert get_cached_estimate('t1', 'tickets').source == 'cache'
+        assert get_cached_estimate('t1', 'tickets', '2025-03-01T12:00:00Z') is None
+        assert get_cached_estimate('t2', 'tickets') is None
+        assert get_cached_estimate('t1', 'tickets', ttl_seconds=-1) is None
+
+    def test_stored_estimate_does_not_touch_the_watermark_item(self):
+        table = LastUpdatedTable()
+        table.items[('t1', 'tickets')] = {'tenant_id': {'S': 't1'}, 'table_name': {'S': 'tickets'},
+                                          'last_updated': {'S': '2025-03-01T00:00:00Z'}}
+
+        store_estimate(table, 'LastUpdated-dev', 't1', 'tickets', estimate(10, since='2025-03-01T00:00:00Z'))
+
+        assert table.items[('t1', 'tickets')]['last_updated'] == {'S': '2025-03-01T00:00:00Z'}
+        assert ('t1', 'tickets#estimate') in table.items
+
+    def test_load_matches_window_and_age(self):
+        table = LastUpdatedTable()
+        store_estimate(table, 'LastUpdated-dev', 't1', 'tickets', estimate(10, since='2025-03-01T00:00:00Z'))
+
+        assert load_estimate(table, 'LastUpdated-dev', 't1', 'tickets', '2025-03-01T00:00:00Z').records == 10
+        assert load_estimate(table, 'LastUpdated-dev', 't1', 'tickets') is None
+        assert load_estimate(table, 'LastUpdated-dev', 't1', 'tickets', any_window=True).records == 10
+        assert load_estimate(table, 'LastUpdated-dev', 't1', 'tickets', '2025-03-01T00:00:00Z',
+                             max_age_seconds=60) is None
+        assert load_estimate(table, 'LastUpdated-dev', 't1', 'contacts', any_window=True) is None
+
+
+class CountAPI:
+    """Local ServiceNow-style API reporting the table size in X-Total-Count."""
+
+    def __init__(self, harness, total):
+        self.total = total
+        self.requests = []
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        self.requests.append(query)
+        return 200, {'result': [{'sys_id': 'a1'}]}, {'X-Total-Count': str(self.total)}
+
+
+class TestChunkProcessorEstimates:
+    """Test the chunk processor's estimate action."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+        yield
+        clear_estimate_cache()
+
+    def make_processor(self, table):
+        return self.harness.processor(concurrency=2, dynamodb=table)
+
+    def event(self, api):
+        return {
+            'action': 'estimate_records',
+            'tenant_id': 't1',
+            'incremental_since': None,
+            'table_config': {
+                'service_name': 'servicenow',
+                'endpoint': 'incident',
+                'table_name': 'incident',
+                'credentials': {'instance_url': api.url, 'username': 'u', 'password': 'p'}
+            }
+        }
+
+    def test_estimate_is_counted_once_and_cached(self):
+        table = LastUpdatedTable()
+        api = CountAPI(self.harness, total=4321)
+        first = self.make_processor(table).lambda_handler(self.event(api), Mock())
+        clear_estimate_cache()
+        # A cold container reuses the estimate stored in LastUpdated
+        second = self.make_processor(table).lambda_handler(self.event(api), Mock())
+        requests = list(api.requests)
+
+        assert first['status'] == 'estimated'
+        assert first['estimated_records'] == 4321
+        assert first['estimated_bytes'] == 4321 * 2048
+        assert (second['estimated_records'], second['source']) == (4321, 'cache')
+        assert len(requests) == 1 and requests[0]['sysparm_limit'] == '1'
+        assert table.items[('t1', 'incident#estimate')]['estimated_records'] == {'N': '4321'}
+
+    def test_uncountable_table_is_unavailable(self):
+        event = {'action': 'estimate_records', 'tenant_id': 't1',
+                 'table_config': {'service_name': 'hubspot', 'endpoint': 'contacts', 'table_name': 'contacts',
+                                  'credentials': {'api_base_url': 'http://127.0.0.1:9'}}}
+
+        assert self.make_processor(LastUpdatedTable()).lambda_handler(event, Mock()) == {'status': 'unavailable'}
+
+
+class TestTableProcessorPlanning:
+    """Test that the table processor plans chunks from real estimates."""
+
+    def make_processor(self, result):
+        from optimized.processors.table_processor import TableProcessor
+
+        processor = TableProcessor.__new__(TableProcessor)
+        processor.logger = Mock()
+        processor.config = Mock(environment='dev')
+        processor._get_last_updated_timestamp = Mock(return_value=None)
+        processor._calculate_optimal_chunk_size = Mock(return_value=5000)
+        processor._calculate_chunk_priority = Mock(return_value=1)
+        lambda_client = Mock()
+        lambda_client.invoke.return_value = {'Payload': io.BytesIO(json.dumps(result).encode())}
+        return processor, lambda_client
+
+    def plan(self, result, table_config=None):
+        processor, lambda_client = self.make_processor(result)
+        table_config = table_config or {'table_name': 'tickets', 'service_name': 'connectwise',
+                                        'endpoint': 'service/tickets', 'pagination': 'offset'}
+        with patch('boto3.client', return_value=lambda_client), \
+                patch('optimized.processors.table_processor.get_timestamp', return_value='2025-03-01T14:00:00Z'):
+            table_state = processor._initialize_table_processing(table_config, {'tenant_id': 't1'}, 'job-1')
+            return processor._calculate_chunks(table_config, {}, table_state), lambda_client
+
+    def test_chunks_follow_counted_records(self):
+        plan, lambda_client = self.plan({'status': 'estimated', 'estimated_records': 12000, 'estimated_bytes': 24000000})
+
+        assert plan['total_chunks'] == 3
+        assert plan['estimated_total_bytes'] == 24000000
+        assert [chunk['estimated_bytes'] for chunk in plan['chunks']] == [10000000, 10000000, 4000000]
+        assert [(chunk['start_offset'], chunk['end_offset']) for chunk in plan['chunks']] == \
+            [(0, 5000), (5000, 10000), (10000, None)]
+        assert plan['chunks'][-1]['chunk_id'] == 'tickets_t1_10000_end'
+        request = json.loads(lambda_client.invoke.call_args.kwargs['Payload'])
+        assert request['action'] == 'estimate_records'
+        assert request['tenant_id'] == 't1' and request['incremental_since'] is None
+        assert lambda_client.invoke.call_args.kwargs['FunctionName'] == 'avesa-chunk-processor-dev'
+
+    def test_chunks_start_on_page_boundaries(self):
+        processor, _ = self.make_processor({'status': 'estimated', 'estimated_records': 12000})
+        table_config = {'table_name': 'tickets', 'service_name': 'connectwise', 'page_size': 300}
+        table_state = {'tenant_id': 't1', 'job_id': 'job-1', 'estimated_total_records': 12000}
+
+        with patch('optimized.processors.table_processor.get_timestamp', return_value='2025-03-01T14:00:00Z'):
+            plan = processor._calculate_chunks(table_config, {}, table_state)
+
+        assert [chunk['start_offset'] for chunk in plan['chunks']] == [0, 5100, 10200]
+
+    def test_cursor_paginated_tables_are_one_chunk(self):
+        processor, _ = self.make_processor({'status': 'estimated', 'estimated_records': 12000})
+        table_config = {'table_name': 'tickets', 'service_name': 'connectwise', 'pagination': 'keyset'}
+        table_state = {'tenant_id': 't1', 'job_id': 'job-1', 'estimated_total_records': 12000}
+
+        with patch('optimized.processors.table_processor.get_timestamp', return_value='2025-03-01T14:00:00Z'):
+            plan = processor._calculate_chunks(table_config, {}, table_state)
+
+        assert plan['total_chunks'] == 1
+        assert (plan['chunks'][0]['start_offset'], plan['chunks'][0]['end_offset']) == (0, None)
+
+    def test_mapped_endpoints_plan_with_their_pagination(self, real_shared_utils):
+        configs = {config['endpoint']: config
+                   for config in real_shared_utils.build_service_table_configurations('connectwise')}
+        result = {'status': 'estimated', 'estimated_records': 12000}
+        tickets, _ = self.plan(result, configs['service/tickets'])
+        # Configs built without the mapping's settings resolve them from the endpoint entry
+        bare, _ = self.plan(result, {'table_name': 'tickets', 'service_name': 'connectwise',
+                                     'endpoint': 'service/tickets'})
+
+        assert configs['service/tickets']['api_config']['pagination'] == 'forward_only'
+        assert tickets['total_chunks'] == 1
+        assert (tickets['chunks'][0]['start_offset'], tickets['chunks'][0]['end_offset']) == (0, None)
+        assert bare['total_chunks'] == 1
+
+    def test_empty_table_has_no_chunks(self):
+        plan, _ = self.plan({'status': 'estimated', 'estimated_records': 0, 'estimated_bytes': 0})
+
+        assert plan['total_chunks'] == 0
+
+    def test_unknown_size_is_one_open_chunk(self):
+        plan, _ = self.plan({'status': 'unavailable'})
+
+        assert plan['total_chunks'] == 1
+        chunk = plan['chunks'][0]
+        assert (chunk['start_offset'], chunk['end_offset'], chunk['estimated_records']) == (0, None, None)
+        assert chunk['chunk_id'] == 'tickets_t1_0_end'
+
+
+class TestOrchestratorEstimates:
+    """Test that the orchestrator consumes stored estimates."""
+
+    @pytest.fixture(autouse=True)
+    def make_orchestrator(self, orchestrator_module):
+        PipelineOrchestrator = orchestrator_module.PipelineOrchestrator
+        self.orchestrator = PipelineOrchestrator.__new__(PipelineOrchestrator)
+        self.orchestrator.logger = Mock()
+        self.orchestrator.config = Mock(last_updated_table='LastUpdated-dev')
+        self.orchestrator.dynamodb = LastUpdatedTable()
+
+    def test_duration_from_stored_estimate(self):
+        store_estimate(self.orchestrator.dynamodb, 'LastUpdated-dev', 't1', 'tickets', estimate(90000))
+
+        with patch.dict(os.environ, {'ESTIMATED_RECORDS_PER_SECOND': '100'}):
+            assert self.orchestrator._estimate_table_seconds('t1', 'tickets', 300) == 900
+            assert self.orchestrator._estimate_table_seconds('t1', 'contacts', 240) == 240
+
+    def test_shards_carry_their_share_of_the_estimate(self):
+        plan = {'status': 'planned', 'id_field': 'id', 'bounds': ['1', '300'], 'estimated_records': 250,
+                'id_ranges': [{'start': None, 'end': '150'}, {'start': '150', 'end': None}]}
+        client = Mock()
+        client.invoke.return_value = {'Payload': io.BytesIO(json.dumps(plan).encode())}
+        payload = {'chunk_config': {'chunk_id': 'c'}, 'table_config': {'service_name': 'connectwise'},
+                   'tenant_config': {'tenant_id': 't1'}}
+
+        shards = self.orchestrator._shard_chunk_payload(client, 'chunk-fn', payload)
+
+        assert [shard['chunk_config']['estimated_records'] for shard in shards] == [125, 125]
+        assert json.loads(client.invoke.call_args.kwargs['Payload'])['tenant_id'] == 't1'
+
+    def test_unsharded_chunk_carries_the_estimate(self):
+        plan = {'status': 'planned', 'id_field': 'sys_id', 'bounds': None, 'estimated_records': 40,
+                'id_ranges': [{'start': None, 'end': None}]}
+        client = Mock()
+        client.invoke.return_value = {'Payload': io.BytesIO(json.dumps(plan).encode())}
+        payload = {'chunk_config': {'chunk_id': 'c'}, 'table_config': {'service_name': 'servicenow'},
+                   'tenant_config': {'tenant_id': 't1'}}
+
+        [chunk] = self.orchestrator._shard_chunk_payload(client, 'chunk-fn', payload)
+
+        assert chunk['chunk_config'] == {'chunk_id': 'c', 'estimated_records': 40}
@@ -0,0 +1,144 @@
+"""
+Tests for the shared record hashing module.
+
+The MD5 mode must reproduce the historical record_hash values exactly, so the
+reference implementation below is the hash the canonical transform used to
+compute per record.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.record_hash import (
+    HASH_MODE_FAST,
+    HASH_MODE_MD5,
+    RecordHasher,
+    get_hash_mode,
+)
+
+
+def legacy_record_hash(record):
+    """Hash as previously computed by calculate_record_hash in the canonical transform."""
+    scd_fields = {
+        'effective_start_date', 'effective_end_date', 'is_current',
+        'record_hash', 'ingestion_timestamp', 'temp_record_hash'
+    }
+    hash_data = {k: v for k, v in record.items() if k not in scd_fields}
+    sorted_data = json.dumps(hash_data, sort_keys=True, default=str)
+    return hashlib.md5(sorted_data.encode()).hexdigest()
+
+
+def sample_records():
+    return [
+        {
+            'id': '1', 'summary': 'Café "quoted"', 'status': {'name': 'New', 'id': 3},
+            'budget_hours': float('nan'), 'approved': None, 'count': np.int64(5),
+            'updated': datetime(2024, 6, 1, 12, 30), 'tags': [1, 'a'],
+            'record_hash': 'stale', 'ingestion_timestamp': '2024-01-01', 'tenant_id': 't1'
+        },
+        {
+            'id': '2', 'summary': None, 'status': None, 'budget_hours': 1.5, 'approved': True,
+            'count': 7, 'updated': None, 'tags': [], 'record_hash': None,
+            'ingestion_timestamp': '2024-01-02', 'tenant_id': 't1'
+        },
+    ]
+
+
+class TestGetHashMode:
+    """Test cases for hash mode selection."""
+
+    def test_default_is_md5(self):
+        assert get_hash_mode({'scd_type': 'type_1'}) == HASH_MODE_MD5
+        assert get_hash_mode(None) == HASH_MODE_MD5
+
+    def test_fast(self):
+        assert get_hash_mode({'hash_mode': HASH_MODE_FAST}) == HASH_MODE_FAST
+
+    def test_invalid_falls_back_to_md5(self):
+        assert get_hash_mode({'hash_mode': 'sha1'}) == HASH_MODE_MD5
+
+
+class TestRecordHasher:
+    """Test cases for RecordHasher."""
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            RecordHasher('crc32')
+
+    def test_md5_matches_legacy_hash(self):
+        hasher = RecordHasher()
+        records = sample_records()
+
+        assert hasher.hash_records(records) == [legacy_record_hash(record) for record in records]
+        assert hasher.hash_record({}) == legacy_record_hash({})
+
+    def test_md5_columns_match_records(self):
+        hasher = RecordHasher()
+        records = sample_records()
+        columns = {key: [record[key] for record in records] for key in records[0]}
+
+        assert hasher.hash_columns(columns) == hasher.hash_records(records)
+
+    def test_column_order_excludes_metadata(self):
+        hasher = RecordHasher()
+        assert hasher.column_order(['tenant_id', 'record_hash', 'id', 'is_current']) == ('id', 'tenant_id')
+
+    @pytest.mark.parametrize('mode', [HASH_MODE_MD5, HASH_MODE_FAST])
+    def test_excluded_fields_and_key_order_do_not_change_hash(self, mode):
+        hasher = RecordHasher(mode)
+        record = sample_records()[0]
+        reordered = dict(reversed(list(record.items())))
+        reordered['ingestion_timestamp'] = 'later'
+        reordered['record_hash'] = 'other'
+
+        assert hasher.hash_record(record) == hasher.hash_record(reordered)
+
+    def test_fast_digest_shape_and_stability(self):
+        hasher = RecordHasher(HASH_MODE_FAST)
+        records = sample_records()
+        digests = hasher.hash_records(records)
+
+        assert all(len(digest) == 32 for digest in digests)
+        assert digests[0] != digests[1]
+        assert RecordHasher(HASH_MODE_FAST).hash_records(records) == digests
+
+    def test_fast_distinguishes_values_and_types(self):
+        hasher = RecordHasher(HASH_MODE_FAST)
+        digests = hasher.hash_records([
+            {'a': 1, 'b': 2}, {'a': 2, 'b': 1}, {'a': '1', 'b': 2}, {'a': None, 'b': 2},
+            {'a': {'x': 1}, 'b': 2}, {'a': {'x': 2}, 'b': 2},
+        ])
+        assert len(set(digests)) == len(digests)
+
+    def test_fast_halves_are_independent_for_numeric_rows(self):
+        digest = RecordHasher(HASH_MODE_FAST).hash_record({'a': 1})
+        assert digest[:16] != digest[16:]
+
+    def test_fast_groups_mixed_key_sets(self):
+        hasher = RecordHasher(HASH_MODE_FAST)
+        records = [{'a': 1}, {'a': 1, 'b': 2}, {'a': 1}]
+        digests = hasher.hash_records(records)
+
+        assert digests[0] == digests[2] == hasher.hash_record({'a': 1})
+        assert digests[1] == hasher.hash_record({'a': 1, 'b': 2})
+
+    @pytest.mark.parametrize('mode', [HASH_MODE_MD5, HASH_MODE_FAST])
+    def test_hash_table(self, mode):
+        hasher = RecordHasher(mode)
+        table = pa.table({
+            'id': ['1', '2', '3'],
+            'hours': [1.5, None, 2.0],
+            'record_hash': [None, None, None],
+        })
+
+        assert hasher.hash_table(table) == hasher.hash_records(table.to_pylist())
+        assert hasher.hash_table(table.slice(0, 0)) == []
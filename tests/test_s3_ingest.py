@@ -0,0 +1,211 @@
+"""
+Tests for server-side ClickHouse ingestion from S3 (INSERT ... SELECT FROM s3()).
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.s3_ingest import (
+    S3Ingestor,
+    S3Source,
+    build_column_expression,
+    build_column_expressions,
+    quote_string
+)
+
+TABLE_SCHEMA = {
+    'id': 'String',
+    'tenant_id': 'String',
+    'company_name': 'Nullable(String)',
+    'ticket_count': 'Nullable(Int32)',
+    'closed_date': 'Nullable(Date)',
+    'last_updated': 'DateTime'
+}
+
+PARQUET_SCHEMA = {
+    'id': 'Nullable(String)',
+    'company_name': 'Nullable(String)',
+    'ticket_count': 'Nullable(Float64)',
+    'closed_date': 'Nullable(String)',
+    'last_updated': "Nullable(DateTime64(9, 'UTC'))",
+    'extra_column': 'Nullable(String)'
+}
+
+SOURCE = S3Source('https://data-bucket.s3.us-east-2.amazonaws.com')
+
+
+class TestColumnExpressions:
+    """Test cases for the SQL projection of Parquet columns onto a table."""
+
+    def test_matching_types_are_selected_as_is(self):
+        assert build_column_expression('company_name', 'Nullable(String)', 'Nullable(String)') == '`company_name`'
+        assert build_column_expression('name', 'String', 'LowCardinality(Nullable(String))') == '`name`'
+
+    def test_numeric_columns_are_cast_safely(self):
+        assert build_column_expression('ticket_count', 'Nullable(Float64)', 'Nullable(Int32)') == \
+            "accurateCastOrNull(`ticket_count`, 'Int32') AS `ticket_count`"
+
+    def test_date_strings_are_parsed(self):
+        assert build_column_expression('closed_date', 'Nullable(String)', 'Nullable(Date)') == \
+            "accurateCastOrNull(parseDateTimeBestEffortOrNull(`closed_date`), 'Date') AS `closed_date`"
+
+    def test_non_nullable_targets_get_default_values(self):
+        assert build_column_expression('id', 'Nullable(String)', 'String') == \
+            "ifNull(accurateCastOrNull(`id`, 'String'), defaultValueOfTypeName('String')) AS `id`"
+
+    def test_projection_drops_extra_columns_and_stamps_tenant(self):
+        column_names, expressions = build_column_expressions(PARQUET_SCHEMA, TABLE_SCHEMA, "o'brien")
+
+        assert column_names == ['closed_date', 'company_name', 'id', 'last_updated', 'ticket_count', 'tenant_id']
+        assert expressions[-1] == "'o\\'brien' AS `tenant_id`"
+        assert not any('extra_column' in expression for expression in expressions)
+
+    def test_source_tenant_id_is_kept(self):
+        column_names, expressions = build_column_expressions(
+            dict(PARQUET_SCHEMA, tenant_id='Nullable(String)'), TABLE_SCHEMA, 't1'
+        )
+
+        assert column_names.count('tenant_id') == 1
+        assert "'t1'" not in ' '.join(expressions)
+
+
+class TestS3Source:
+    """Test cases for S3Source."""
+
+    def test_aws_endpoint_with_role(self):
+        with patch.dict(os.environ, {'AWS_REGION': 'us-east-2', 'CLICKHOUSE_S3_ROLE_ARN': 'arn:aws:iam::1:role/ch'}):
+            source = S3Source.from_environment('data-bucket')
+
+        assert source.table_function(['t1/canonical/companies/a.parquet']) == (
+            "s3('https://data-bucket.s3.us-east-2.amazonaws.com/t1/canonical/companies/a.parquet', 'Parquet', "
+            "extra_credentials(role_arn = 'arn:aws:iam::1:role/ch'))"
+        )
+
+    def test_minio_endpoint_with_keys(self):
+        env = {'CLICKHOUSE_S3_ENDPOINT': 'http://minio:9000/', 'CLICKHOUSE_S3_ACCESS_KEY_ID': 'minioadmin',
+               'CLICKHOUSE_S3_SECRET_ACCESS_KEY': 'minioadmin'}
+        with patch.dict(os.environ, env):
+            source = S3Source.from_environment('avesa')
+
+        assert source.table_function(['a.parquet']) == \
+            "s3('http://minio:9000/avesa/a.parquet', 'minioadmin', 'minioadmin', 'Parquet')"
+
+    def test_several_keys_become_an_alternation(self):
+        assert SOURCE.url(['t1/canonical/companies/a-1.parquet', 't1/canonical/companies/a-2.parquet']) == \
+            'https://data-bucket.s3.us-east-2.amazonaws.com/t1/canonical/companies/{a-1.parquet,a-2.parquet}'
+
+
+class FakeClickHouse:
+    """Client double answering DESCRIBE from per-file schemas and recording commands."""
+
+    def __init__(self, schemas, rows_per_file=10, fail_on=None):
+        self.schemas = schemas
+        self.rows_per_file = rows_per_file
+        self.fail_on = fail_on
+        self.database = 'default'
+        self.commands = []
+
+    def query(self, sql, parameters=None):
+        for key, schema in self.schemas.items():
+            if sql.startswith('DESCRIBE TABLE') and key in sql:
+                return Mock(result_rows=[(name, column_type) for name, column_type in schema.items()])
+        raise RuntimeError(f"Unexpected query: {sql}")
+
+    def command(self, sql):
+        self.commands.append(sql)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError('Cannot parse input')
+        files = sql.count('.parquet')
+        return Mock(written_rows=self.rows_per_file * files)
+
+
+class TestS3Ingestor:
+    """Test cases for S3Ingestor."""
+
+    def test_files_with_same_schema_share_an_insert(self):
+        keys = [f't1/canonical/companies/batch-{i}.parquet' for i in range(3)] + ['t1/canonical/companies/other.parquet']
+        schemas = {key: PARQUET_SCHEMA for key in keys[:3]}
+        schemas[keys[3]] = {'id': 'Nullable(String)'}
+        ingestor = S3Ingestor(FakeClickHouse(schemas), SOURCE)
+
+        groups = ingestor.plan((key, ingestor.describe(key)) for key in keys)
+
+        assert [group_keys for group_keys, _ in groups] == [keys[:3], keys[3:]]
+
+    def test_insert_statement(self):
+        client = FakeClickHouse({})
+        ingestor = S3Ingestor(client, SOURCE)
+
+        rows = ingestor.insert('companies', ['t1/canonical/companies/a.parquet'], PARQUET_SCHEMA, TABLE_SCHEMA, 't1')
+
+        assert rows == 10
+        sql = client.commands[0]
+        assert sql.startswith('INSERT INTO `companies` (`closed_date`, `company_name`, `id`, `last_updated`, '
+                              '`ticket_count`, `tenant_id`)\nSELECT ')
+        assert sql.endswith("FROM s3('https://data-bucket.s3.us-east-2.amazonaws.com/"
+                            "t1/canonical/companies/a.parquet', 'Parquet')")
+
+    def test_file_without_table_columns_is_rejected(self):
+        ingestor = S3Ingestor(FakeClickHouse({}), SOURCE)
+
+        with pytest.raises(ValueError):
+            ingestor.build_insert('companies', ['a.parquet'], {'unrelated': 'String'}, {'id': 'String'}, 't1')
+
+
+class TestServerSideDataLoader:
+    """Test that server load mode sends no data through the Lambda."""
+
+    @pytest.fixture(autouse=True)
+    def use_data_loader(self, data_loader):
+        self.loader = data_loader
+
+    def run_handler(self, client, files):
+        loader = self.loader
+        s3_client = Mock()
+        event = {'tenant_id': 't1', 'processing_mode': 'multi_file_1to1', 'canonical_files': files}
+        env = {'TARGET_TABLE': 'companies', 'CLICKHOUSE_DEDUP_STRATEGY': 'deferred', 'CLICKHOUSE_LOAD_MODE': 'server',
+               'S3_BUCKET_NAME': 'data-bucket', 'AWS_REGION': 'us-east-2'}
+
+        with patch.object(loader.boto3, 'client', return_value=s3_client), \
+                patch.object(loader, 'get_clickhouse_client', return_value=client), \
+                patch.object(loader, 'table_exists', return_value=True), \
+                patch.object(loader, 'get_table_schema', return_value=dict(TABLE_SCHEMA)), \
+                patch.dict(os.environ, env):
+            response = loader.lambda_handler(event, None)
+        return response, s3_client
+
+    def test_handler_inserts_via_s3_table_function(self):
+        files = [f't1/canonical/companies/batch-{i}.parquet' for i in range(4)]
+        client = FakeClickHouse({key: PARQUET_SCHEMA for key in files})
+
+        response, s3_client = self.run_handler(client, files)
+
+        assert response['statusCode'] == 200
+        assert '"load_mode": "server"' in response['body']
+        assert '"records_processed": 40' in response['body']
+        assert '"files_processed": 4' in response['body']
+        assert [command.split()[0] for command in client.commands] == ['INSERT', 'CREATE']
+        assert client.commands[1].startswith('CREATE VIEW IF NOT EXISTS companies_final')
+        s3_client.get_object.assert_not_called()
+
+    def test_failed_group_is_retried_file_by_file(self):
+        files = [f't1/canonical/companies/batch-{i}.parquet' for i in range(3)]
+        client = FakeClickHouse({key: PARQUET_SCHEMA for key in files}, fail_on='batch-1')
+
+        response, _ = self.run_handler(client, files)
+
+        assert '"files_processed": 2' in response['body']
+        assert '"records_processed": 20' in response['body']
+        assert sum(command.startswith('INSERT') for command in client.commands) == 4
+
+
+class TestQuoting:
+    """Test cases for SQL quoting."""
+
+    def test_quote_string_escapes_quotes_and_backslashes(self):
+        assert quote_string("a'b\\c") == "'a\\'b\\\\c'"
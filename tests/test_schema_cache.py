@@ -0,0 +1,169 @@
+"""
+Tests for the per-container ClickHouse schema cache.
+"""
+
+import importlib.util
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared import schema_cache
+from shared.schema_cache import CANONICAL_TABLES, ClickHouseSchemaCache
+
+COLUMNS = {
+    'companies': [('id', 'String'), ('tenant_id', 'String'), ('company_name', 'Nullable(String)')],
+    'tickets': [('id', 'String'), ('tenant_id', 'String'), ('closed_date', 'Nullable(Date)')]
+}
+
+
+class FakeClickHouse:
+    """Client double serving system.columns from a dictionary."""
+
+    def __init__(self, columns=None, database='analytics', on_query=None):
+        self.columns = {table: list(rows) for table, rows in (columns or COLUMNS).items()}
+        self.database = database
+        self.on_query = on_query
+        self.queries = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((sql, parameters))
+        if self.on_query:
+            self.on_query()
+        if parameters is None:
+            return Mock(result_rows=[])
+        rows = [(table, name, column_type)
+                for table in parameters['tables']
+                for name, column_type in self.columns.get(table, [])]
+        return Mock(result_rows=rows)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClickHouseSchemaCache:
+    """Test cases for ClickHouseSchemaCache."""
+
+    def test_one_query_serves_all_canonical_tables(self):
+        client = FakeClickHouse()
+        cache = ClickHouseSchemaCache(ttl_seconds=60)
+
+        assert cache.get_table_schema(client, 'tickets') == dict(COLUMNS['tickets'])
+        assert list(cache.get_table_schema(client, 'companies')) == ['id', 'tenant_id', 'company_name']
+        assert cache.get_table_schema(client, 'contacts') is None
+
+        assert len(client.queries) == 1
+        sql, parameters = client.queries[0]
+        assert 'system.columns' in sql and '{tables:Array(String)}' in sql
+        assert sorted(parameters['tables']) == sorted(CANONICAL_TABLES)
+
+    def test_entries_expire_after_ttl(self):
+        client, clock = FakeClickHouse(), Clock()
+        cache = ClickHouseSchemaCache(ttl_seconds=60, clock=clock)
+
+        cache.get_table_schema(client, 'tickets')
+        clock.now = 59
+        cache.get_table_schema(client, 'tickets')
+        clock.now = 61
+        cache.get_table_schema(client, 'tickets')
+
+        assert len(client.queries) == 2
+
+    def test_entries_are_keyed_by_database(self):
+        cache = ClickHouseSchemaCache(ttl_seconds=60)
+        production = FakeClickHouse(database='production')
+        staging = FakeClickHouse(columns={'tickets': [('id', 'String')]}, database='staging')
+
+        assert 'closed_date' in cache.get_table_schema(production, 'tickets')
+        assert cache.get_table_schema(staging, 'tickets') == {'id': 'String'}
+
+        cache.invalidate('tickets', 'staging')
+        cache.get_table_schema(production, 'tickets')
+        assert len(production.queries) == 1
+
+    def test_invalidation_reloads_altered_table(self):
+        client = FakeClickHouse()
+        cache = ClickHouseSchemaCache(ttl_seconds=60)
+        cache.get_table_schema(client, 'tickets')
+
+        client.columns['tickets'].append(('priority', 'Nullable(String)'))
+        cache.invalidate('tickets')
+
+        assert 'priority' in cache.get_table_schema(client, 'tickets')
+        assert cache.version('tickets') == 1
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        cache = ClickHouseSchemaCache(ttl_seconds=60)
+        client = FakeClickHouse(on_query=lambda: cache.invalidate('tickets'))
+
+        assert cache.get_table_schema(client, 'tickets') == dict(COLUMNS['tickets'])
+        client.on_query = None
+        cache.get_table_schema(client, 'companies')
+        cache.get_table_schema(client, 'tickets')
+
+        # companies was cached by the first load; tickets had to be fetched again
+        assert len(client.queries) == 2
+
+
+class TestDataLoaderSchemaLookups:
+    """Test that loading many files costs one metadata query."""
+
+    def test_files_share_one_schema_query(self, data_loader):
+        pytest.importorskip('pandas')
+        client = FakeClickHouse()
+        client.insert = Mock()
+
+        with patch.object(schema_cache, '_schema_cache', ClickHouseSchemaCache(ttl_seconds=60)), \
+                patch.dict(os.environ, {'CLICKHOUSE_DEDUP_STRATEGY': 'deferred'}):
+            for batch in range(40):
+                data_loader.load_data_to_clickhouse(client, 'tickets', [{'id': str(batch), 'closed_date': None}], 't1')
+
+        assert len(client.queries) == 1
+        assert client.insert.call_count == 40
+        assert client.insert.call_args[1]['column_names'] == ['closed_date', 'id', 'tenant_id']
+
+    def test_failed_insert_invalidates_table(self, data_loader):
+        pytest.importorskip('pandas')
+        client = FakeClickHouse()
+        client.insert = Mock(side_effect=RuntimeError('No such column closed_date'))
+
+        with patch.object(schema_cache, '_schema_cache', ClickHouseSchemaCache(ttl_seconds=60)) as cache:
+            with pytest.raises(RuntimeError):
+                data_loader.load_data_to_clickhouse(client, 'tickets', [{'id': '1'}], 't1')
+
+            assert cache.version('tickets') == 1
+
+
+class TestSchemaManagerInvalidation:
+    """Test that DDL issued by the schema manager invalidates cached schemas."""
+
+    def test_update_table_schema_invalidates_table(self):
+        pytest.importorskip('clickhouse_connect')
+        path = os.path.join(os.path.dirname(__file__), '..', 'src', 'clickhouse', 'schema_init',
+                            'dynamic_schema_manager.py')
+        spec = importlib.util.spec_from_file_location('dynamic_schema_manager', path)
+        module = importlib.util.module_from_spec(spec)
+        # The module puts src/shared on sys.path; keep it from leaking into other tests
+        with patch.object(sys, 'path', list(sys.path)):
+            spec.loader.exec_module(module)
+
+        client = FakeClickHouse()
+        manager = module.DynamicClickHouseSchemaManager(client)
+        with patch.object(schema_cache, '_schema_cache', ClickHouseSchemaCache(ttl_seconds=60)) as cache, \
+                patch.object(manager, 'get_table_fields', return_value=['id', 'tenant_id', 'priority']), \
+                patch.object(manager, 'get_existing_table_columns', return_value={'id', 'tenant_id'}), \
+                patch.object(manager, 'load_canonical_mapping', return_value={}):
+            cache.get_table_schema(client, 'tickets')
+
+            assert manager.update_table_schema('tickets') is True
+            assert 'ADD COLUMN IF NOT EXISTS priority' in client.queries[-1][0]
+            assert cache.version('tickets') == 1
+            assert ('analytics', 'tickets') not in cache._entries
@@ -0,0 +1,328 @@
+"""
+Tests for watermark-based incremental sync.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shared.watermark import (
+    advance_watermark,
+    build_incremental_params,
+    get_incremental_field,
+    load_watermark,
+    parse_watermark
+)
+
+
+class TestIncrementalParams:
+    """Test cases for build_incremental_params."""
+
+    def test_connectwise_conditions(self):
+        params = build_incremental_params('ConnectWise', '_info/lastUpdated', '2025-03-01T12:00:00.123456Z')
+        assert params == {'conditions': '_info/lastUpdated > [2025-03-01T11:55:00Z]'}
+
+    def test_salesforce_and_servicenow(self):
+        assert build_incremental_params('salesforce', 'LastModifiedDate', '2025-03-01T12:00:00Z', overlap_seconds=0) == \
+            {'where': 'LastModifiedDate > 2025-03-01T12:00:00Z'}
+        assert build_incremental_params('servicenow', 'sys_updated_on', '2025-03-01T12:00:00Z', overlap_seconds=0) == \
+            {'sysparm_query': 'sys_updated_on>2025-03-01 12:00:00'}
+
+    def test_no_filter_without_watermark_or_field(self):
+        assert build_incremental_params('connectwise', '_info/lastUpdated', None) == {}
+        assert build_incremental_params('connectwise', None, '2025-03-01T12:00:00Z') == {}
+        assert build_incremental_params('unknown', 'updated', '2025-03-01T12:00:00Z') == {}
+
+    def test_incremental_field_lookup(self):
+        assert get_incremental_field({'api_config': {'incremental_field': '_info/lastUpdated'}}) == '_info/lastUpdated'
+        assert get_incremental_field({'incremental_field': 'x', 'api_config': {}}) == 'x'
+        assert get_incremental_field({}) is None
+
+    def test_parse_watermark(self):
+        assert parse_watermark('2025-03-01T12:00:00Z') == parse_watermark('2025-03-01T12:00:00+00:00')
+        assert parse_watermark('2025-03-01T12:00:00').tzinfo is not None
+
+
+class TestAdvanceWatermark:
+    """Test cases for advance_watermark."""
+
+    def test_conditional_put(self):
+        dynamodb = Mock()
+        assert advance_watermark(dynamodb, 'LastUpdated-dev', 't1', 'tickets', '2025-03-01T12:00:00Z') is True
+
+        request = dynamodb.put_item.call_args.kwargs
+        assert request['Item']['last_updated'] == {'S': '2025-03-01T12:00:00Z'}
+        assert request['ConditionExpression'] == 'attribute_not_exists(last_updated) OR last_updated < :watermark'
+
+    def test_never_moves_backwards(self):
+        dynamodb = Mock()
+        dynamodb.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'PutItem')
+        assert advance_watermark(dynamodb, 'LastUpdated-dev', 't1', 'tickets', '2025-03-01T12:00:00Z') is False
+
+    def test_other_errors_propagate(self):
+        dynamodb = Mock()
+        dynamodb.put_item.side_effect = ClientError({'Error': {'Code': 'AccessDenied', 'Message': ''}}, 'PutItem')
+        with pytest.raises(ClientError):
+            advance_watermark(dynamodb, 'LastUpdated-dev', 't1', 'tickets', '2025-03-01T12:00:00Z')
+
+    def test_load_watermark(self):
+        dynamodb = Mock()
+        dynamodb.get_item.return_value = {'Item': {'last_updated': {'S': '2025-03-01T12:00:00Z'}}}
+        assert load_watermark(dynamodb, 'LastUpdated-dev', 't1', 'tickets') == '2025-03-01T12:00:00Z'
+
+        dynamodb.get_item.return_value = {}
+        assert load_watermark(dynamodb, 'LastUpdated-dev', 't1', 'tickets') is None
+
+
+class ChangeTrackingAPI:
+    """Local ConnectWise-style API that honours `conditions=_info/lastUpdated > [...]`."""
+
+    def __init__(self, harness, records, failing_page=None):
+        self.records = records
+        self.conditions = []
+        self.failing_page = failing_page
+        self.url = harness.serve(self.respond)
+
+    def respond(self, path, query, headers):
+        page, page_size = int(query['page']), int(query['pageSize'])
+        condition = query.get('conditions')
+        self.conditions.append(condition)
+        if page == self.failing_page:
+            return 400, {'message': 'bad request'}, {}
+        matching = self.records
+        if condition:
+            since = condition.split('[')[1].rstrip(']')
+            matching = [r for r in self.records if r['_info']['lastUpdated'] > since]
+        return 200, matching[(page - 1) * page_size:page * page_size], {}
+
+
+class TestChunkProcessorIncrementalSync:
+    """Test that chunks fetch only changed records and report whether they reached the end."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def api(self, records, failing_page=None):
+        return ChangeTrackingAPI(self.harness, records, failing_page)
+
+    def run_chunk(self, api, chunk_config, should_continue=True):
+        processor = self.harness.processor()
+        batches = self.harness.capture_writes(processor)
+        table_config = {
+            'service_name': 'connectwise',
+            'endpoint': 'service/tickets',
+            'table_name': 'tickets',
+            'page_size': 10,
+            'pagination': 'offset',
+            'api_config': {'incremental_field': '_info/lastUpdated'},
+            'credentials': {'api_base_url': api.url, 'company_id': 'c', 'public_key': 'p', 'private_key': 'k'}
+        }
+        result = self.harness.run(processor, dict(chunk_config, chunk_id='chunk-1'), table_config,
+                                  should_continue=should_continue)
+        return [record['id'] for batch in batches for record in batch], result
+
+    def make_records(self):
+        return [{'id': i, '_info': {'lastUpdated': f"2025-03-01T{10 + i // 10:02d}:00:00Z"}} for i in range(50)]
+
+    def test_incremental_chunk_fetches_changed_records(self):
+        api = self.api(self.make_records())
+        written, result = self.run_chunk(api, {'incremental_since': '2025-03-01T13:04:00Z'})
+        conditions = set(api.conditions)
+
+        # Records updated at 13:00 fall inside the clock-skew overlap window, so 30-49 are returned
+        assert written == list(range(30, 50))
+        assert conditions == {'_info/lastUpdated > [2025-03-01T12:59:00Z]'}
+        assert result['completed'] is True
+        assert result['reached_end_of_data'] is True
+
+    def test_full_sync_sends_no_conditions(self):
+        api = self.api(self.make_records())
+        written, _ = self.run_chunk(api, {})
+        conditions = set(api.conditions)
+
+        assert written == list(range(50))
+        assert conditions == {None}
+
+    def test_timeout_is_not_end_of_data(self):
+        api = self.api(self.make_records())
+        written, result = self.run_chunk(api, {}, should_continue=False)
+
+        assert written == []
+        assert result['completed'] is False
+        assert result['reached_end_of_data'] is False
+
+    def test_failed_request_is_not_end_of_data(self):
+        api = self.api(self.make_records(), failing_page=3)
+        written, result = self.run_chunk(api, {})
+
+        assert written == list(range(20))
+        assert result['completed'] is False
+        assert result['reached_end_of_data'] is False
+        assert 'HTTP Error 400' in result['error']
+
+
+class TestWatermarkAdvancement:
+    """Test when the chunk processor advances the watermark."""
+
+    @pytest.fixture(autouse=True)
+    def use_harness(self, chunk_harness):
+        self.harness = chunk_harness
+
+    def make_processor(self, processing_result):
+        return self.harness.processor(
+            dynamodb=Mock(),
+            _initialize_chunk_progress=Mock(),
+            _update_chunk_progress=Mock(),
+            _send_chunk_metrics=Mock(),
+            _process_chunk=Mock(return_value=processing_result)
+        )
+
+    def handle(self, processor, chunk_config):
+        event = {
+            'chunk_config': dict(chunk_config, chunk_id='chunk-1'),
+            'table_config': {'table_name': 'tickets', 'service_name': 'connectwise'},
+            'tenant_config': {'tenant_id': 't1'},
+            'job_id': 'job-1'
+        }
+        context = Mock(aws_request_id='req', get_remaining_time_in_millis=Mock(return_value=100000))
+        with patch('optimized.processors.chunk_processor.PipelineLogger'):
+            return processor.lambda_handler(event, context)
+
+    def test_advanced_after_complete_sync(self):
+        processor = self.make_processor({'completed': True, 'reached_end_of_data': True,
+                                         'records_processed': 0, 'processing_time': 1})
+        self.handle(processor, {'next_watermark': '2025-03-01T14:00:00Z'})
+
+        item = processor.dynamodb.put_item.call_args.kwargs['Item']
+        assert item['tenant_id'] == {'S': 't1'}
+        assert item['table_name'] == {'S': 'tickets'}
+        assert item['last_updated'] == {'S': '2025-03-01T14:00:00Z'}
+
+    @pytest.mark.parametrize('processing_result,chunk_config', [
+        ({'completed': False, 'reached_end_of_data': False}, {'next_watermark': '2025-03-01T14:00:00Z'}),
+        ({'completed': True, 'reached_end_of_data': False}, {'next_watermark': '2025-03-01T14:00:00Z'}),
+        ({'completed': True, 'reached_end_of_data': True}, {}),
+    ])
+    def test_not_advanced_for_partial_syncs(self, processing_result, chunk_config):
+        processor = self.make_processor(dict(processing_result, records_processed=0, processing_time=1))
+        self.handle(processor, chunk_config)
+
+        processor.dynamodb.put_item.assert_not_called()
+
+    @pytest.mark.parametrize('sibling_status,advanced', [('completed', True), ('processing', False)])
+    def test_sharded_sync_advances_after_every_shard(self, sibling_status, advanced):
+        processor = self.make_processor({'completed': True, 'reached_end_of_data': True,
+                                         'records_processed': 0, 'processing_time': 1})
+        processor.dynamodb.query.return_value = {'Items': [
+            {'chunk_id': {'S': 'job-1-t1-tickets-0-shard0'}, 'status': {'S': 'completed'}},
+            {'chunk_id': {'S': 'job-1-t1-tickets-0-shard1'}, 'status': {'S': sibling_status}}
+        ]}
+        self.handle(processor, {'next_watermark': '2025-03-01T14:00:00Z',
+                                'shard_group': 'job-1-t1-tickets-0', 'shard_count': 2})
+
+        assert processor.dynamodb.put_item.called is advanced
+        request = processor.dynamodb.query.call_args.kwargs
+        assert request['ConsistentRead'] is True
+        assert request['ExpressionAttributeValues'][':prefix'] == {'S': 'job-1-t1-tickets-0-shard'}
+
+
+class TestOrchestratorWatermark:
+    """Test that the orchestrator's dispatch path runs incremental syncs."""
+
+    @pytest.fixture(autouse=True)
+    def use_orchestrator_module(self, orchestrator_module):
+        self.PipelineOrchestrator = orchestrator_module.PipelineOrchestrator
+
+    def run_workflow(self, event, watermark='2025-03-01T12:00:00Z'):
+        PipelineOrchestrator = self.PipelineOrchestrator
+        orchestrator = PipelineOrchestrator.__new__(PipelineOrchestrator)
+        orchestrator.logger = Mock()
+        orchestrator.config = Mock(environment='dev', last_updated_table='LastUpdated-dev')
+        orchestrator.dynamodb = Mock()
+        orchestrator.dynamodb.get_item.return_value = {'Item': {'last_updated': {'S': watermark}}} if watermark else {}
+        orchestrator._get_service_config_for_table = Mock(return_value={
+            'service_name': 'connectwise', 'endpoint': 'service/tickets', 'credentials': {}
+        })
+        orchestrator._get_incremental_field = Mock(return_value='_info/lastUpdated')
+        orchestrator._shard_chunk_payload = Mock(side_effect=lambda client, function, payload: [payload])
+        orchestrator._dispatch_chunk = Mock()
+        with patch('boto3.client'):
+            orchestrator._execute_pipeline_workflow(
+                dict({'job_id': 'job-1', 'tenants': [{'tenant_id': 't1'}], 'table_name': 'tickets'}, **event),
+                Mock(aws_request_id='req')
+            )
+        return orchestrator._dispatch_chunk.call_args.args[2], orchestrator
+
+    def test_scheduled_sync_reads_the_watermark(self):
+        payload, orchestrator = self.run_workflow({})
+
+        assert payload['table_config']['incremental_field'] == '_info/lastUpdated'
+        assert payload['chunk_config']['incremental_since'] == '2025-03-01T12:00:00Z'
+        assert payload['chunk_config']['next_watermark'] > '2025-03-01T12:00:00Z'
+        assert orchestrator.dynamodb.get_item.call_args.kwargs['Key'] == {
+            'tenant_id': {'S': 't1'}, 'table_name': {'S': 'tickets'}
+        }
+
+    def test_backfill_is_a_full_sync_that_still_sets_the_next_watermark(self):
+        payload, orchestrator = self.run_workflow({'backfill_mode': True})
+
+        assert payload['chunk_config']['incremental_since'] is None
+        assert payload['chunk_config']['next_watermark']
+        orchestrator.dynamodb.get_item.assert_not_called()
+
+    def test_first_sync_is_a_full_sync(self):
+        payload, _ = self.run_workflow({}, watermark=None)
+
+        assert payload['chunk_config']['incremental_since'] is None
+
+    def test_incremental_field_comes_from_the_endpoint_mapping(self):
+        PipelineOrchestrator = self.PipelineOrchestrator
+        orchestrator = PipelineOrchestrator.__new__(PipelineOrchestrator)
+        orchestrator.logger = Mock()
+        mapping = {'endpoints': {'service/tickets': {'incremental_field': '_info/lastUpdated'}, 'system/members': {}}}
+
+        with patch('shared.utils.load_endpoint_configuration', return_value=mapping, create=True):
+            assert orchestrator._get_incremental_field('connectwise', 'service/tickets') == '_info/lastUpdated'
+            assert orchestrator._get_incremental_field('connectwise', 'system/members') is None
+
+
+class TestIncrementalChunkPlan:
+    """Test that the table processor plans incremental chunks."""
+
+    def make_processor(self):
+        from optimized.processors.table_processor import TableProcessor
+
+        processor = TableProcessor.__new__(TableProcessor)
+        processor.logger = Mock()
+        processor._calculate_optimal_chunk_size = Mock(return_value=5000)
+        processor._calculate_chunk_priority = Mock(return_value=1)
+        return processor
+
+    def table_state(self, is_full_sync, estimated_total_records):
+        return {'tenant_id': 't1', 'job_id': 'job-1', 'is_full_sync': is_full_sync,
+                'last_updated': '2025-03-01T12:00:00Z', 'sync_started_at': '2025-03-01T14:00:00Z',
+                'estimated_total_records': estimated_total_records}
+
+    def calculate_chunks(self, table_state):
+        with patch('optimized.processors.table_processor.get_timestamp', return_value='2025-03-01T14:00:00Z'):
+            return self.make_processor()._calculate_chunks({'table_name': 'tickets'}, {}, table_state)
+
+    def test_incremental_sync_is_one_chunk_owning_the_watermark(self):
+        plan = self.calculate_chunks(self.table_state(False, 12000))
+
+        assert plan['total_chunks'] == 1
+        assert plan['chunks'][0]['incremental_since'] == '2025-03-01T12:00:00Z'
+        assert plan['chunks'][0]['next_watermark'] == '2025-03-01T14:00:00Z'
+
+    def test_multi_chunk_full_sync_does_not_advance_watermark(self):
+        plan = self.calculate_chunks(self.table_state(True, 12000))
+
+        assert plan['total_chunks'] == 3
+        assert all('next_watermark' not in chunk and 'incremental_since' not in chunk for chunk in plan['chunks'])